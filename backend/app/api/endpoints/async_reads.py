@@ -0,0 +1,240 @@
+"""
+Versions asynchrones (AsyncSession / asyncpg) des routes de lecture les plus sollicitées
+
+Activées par settings.db_async_enabled : les routeurs sont alors montés avant les routeurs
+synchrones et servent les mêmes chemins avec les mêmes réponses, sans occuper de thread
+pendant l'attente de PostgreSQL. Requêtes et mise en forme des réponses sont celles des routes
+synchrones (build_series_statement, series_response... de data.py) : seules les lectures sont attendues.
+"""
+from typing import List, Dict, Any, Optional
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_db
+from app.core.serialization import RESPONSE_FORMAT_PATTERN
+from app.core.http_cache import build_version_query, compute_etag, etag_matches, not_modified
+from app.models.database import HistoricalData, TechnicalIndicators, SentimentIndicators, SymbolMetadata, ScreenerRun
+from app.models.schemas import HistoricalDataSchema, TechnicalIndicatorsSchema, SentimentIndicatorsSchema
+from app.api.endpoints.data import (
+    build_series_statement, build_combined_statement, result_rows, series_response,
+    row_to_dict_without_nan, combined_row_to_dict, symbols_to_dicts
+)
+from app.services.downsampling import RESOLUTION_PATTERN
+from app.api.endpoints.screener import build_latest_opportunities_query, opportunity_rows_to_dicts
+
+data_router = APIRouter(prefix="/data", tags=["data"])
+screener_router = APIRouter()
+
+
+async def _series_etag(db: AsyncSession, request: Request, models: list, symbol: str) -> str:
+    """ETag de la réponse, calculé à partir de la version des données du symbole"""
+    result = await db.execute(build_version_query(models, symbol))
+    return compute_etag(result.one(), request)
+
+
+# === DONNÉES HISTORIQUES ===
+
+@data_router.get("/historical/{symbol}", response_model=List[HistoricalDataSchema])
+async def get_historical_data(
+    symbol: str,
+    request: Request,
+    response: Response,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    skip: int = Query(0, ge=0),
+    response_format: str = Query("json", alias="format", pattern=RESPONSE_FORMAT_PATTERN),
+    resolution: str = Query("daily", pattern=RESOLUTION_PATTERN),
+    max_points: Optional[int] = Query(None, ge=3, le=1000, description="Décimation LTTB des séries quotidiennes"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Récupérer les données historiques pour un symbole"""
+    try:
+        etag = await _series_etag(db, request, [HistoricalData], symbol)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        query, params, orm_objects = build_series_statement(
+            HistoricalData, symbol, start_date, end_date, limit, skip, response_format, resolution
+        )
+        keys, rows = result_rows(await db.execute(query, params), orm_objects)
+        return series_response(
+            response, keys, rows, etag, symbol, f"Aucune donnée historique trouvée pour le symbole {symbol}",
+            response_format, max_points
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la récupération des données historiques: {str(e)}"
+        )
+
+
+# === INDICATEURS TECHNIQUES ===
+
+@data_router.get("/technical/{symbol}", response_model=List[TechnicalIndicatorsSchema])
+async def get_technical_indicators(
+    symbol: str,
+    request: Request,
+    response: Response,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    skip: int = Query(0, ge=0),
+    response_format: str = Query("json", alias="format", pattern=RESPONSE_FORMAT_PATTERN),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Récupérer les indicateurs techniques pour un symbole"""
+    try:
+        etag = await _series_etag(db, request, [TechnicalIndicators], symbol)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        query, params, orm_objects = build_series_statement(
+            TechnicalIndicators, symbol, start_date, end_date, limit, skip, response_format
+        )
+        keys, rows = result_rows(await db.execute(query, params), orm_objects)
+        return series_response(
+            response, keys, rows, etag, symbol, f"Aucun indicateur technique trouvé pour le symbole {symbol}",
+            response_format
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la récupération des indicateurs techniques: {str(e)}"
+        )
+
+
+# === INDICATEURS DE SENTIMENT ===
+
+@data_router.get("/sentiment/{symbol}", response_model=List[SentimentIndicatorsSchema])
+async def get_sentiment_indicators(
+    symbol: str,
+    request: Request,
+    response: Response,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    skip: int = Query(0, ge=0),
+    response_format: str = Query("json", alias="format", pattern=RESPONSE_FORMAT_PATTERN),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Récupérer les indicateurs de sentiment pour un symbole"""
+    try:
+        etag = await _series_etag(db, request, [SentimentIndicators], symbol)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        query, params, orm_objects = build_series_statement(
+            SentimentIndicators, symbol, start_date, end_date, limit, skip, response_format
+        )
+        keys, rows = result_rows(await db.execute(query, params), orm_objects)
+        return series_response(
+            response, keys, rows, etag, symbol, f"Aucun indicateur de sentiment trouvé pour le symbole {symbol}",
+            response_format, row_to_dict=row_to_dict_without_nan
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la récupération des indicateurs de sentiment: {str(e)}"
+        )
+
+
+# === DONNÉES COMBINÉES ===
+
+@data_router.get("/combined/{symbol}")
+async def get_combined_data(
+    symbol: str,
+    request: Request,
+    response: Response,
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    skip: int = Query(0, ge=0),
+    response_format: str = Query("json", alias="format", pattern=RESPONSE_FORMAT_PATTERN),
+    resolution: str = Query("daily", pattern=RESOLUTION_PATTERN),
+    max_points: Optional[int] = Query(None, ge=3, le=1000, description="Décimation LTTB des séries quotidiennes"),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Récupérer les données historiques, techniques et de sentiment combinées"""
+    try:
+        etag = await _series_etag(db, request, [HistoricalData, TechnicalIndicators, SentimentIndicators], symbol)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+
+        query, params = build_combined_statement(symbol, start_date, end_date, limit, skip, resolution)
+        keys, rows = result_rows(await db.execute(query, params))
+        return series_response(
+            response, keys, rows, etag, symbol, f"Aucune donnée combinée trouvée pour le symbole {symbol}",
+            response_format, max_points, row_to_dict=combined_row_to_dict
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la récupération des données combinées: {str(e)}"
+        )
+
+
+# === SYMBOLES ===
+
+@data_router.get("/symbols", response_model=List[dict])
+async def get_available_symbols(db: AsyncSession = Depends(get_async_db)):
+    """Récupérer la liste des symboles disponibles avec leurs métadonnées"""
+    try:
+        result = await db.execute(
+            select(HistoricalData.symbol, SymbolMetadata.company_name, SymbolMetadata.sector).join(
+                SymbolMetadata, HistoricalData.symbol == SymbolMetadata.symbol
+            ).distinct().order_by(HistoricalData.symbol.asc())
+        )
+        symbols_with_metadata = result.all()
+
+        # Si pas de métadonnées, récupérer juste les symboles
+        if not symbols_with_metadata:
+            result = await db.execute(
+                select(HistoricalData.symbol).distinct().order_by(HistoricalData.symbol.asc())
+            )
+            return [{"symbol": symbol[0], "company_name": symbol[0], "sector": "Unknown"} for symbol in result.all()]
+
+        return symbols_to_dicts(symbols_with_metadata)
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la récupération des symboles: {str(e)}"
+        )
+
+
+# === DERNIÈRES OPPORTUNITÉS DU SCREENER ===
+
+@screener_router.get("/latest-opportunities", response_model=List[Dict[str, Any]])
+async def get_latest_opportunities(db: AsyncSession = Depends(get_async_db)):
+    """Récupérer les dernières opportunités (prediction_value=1) du screener le plus récent"""
+    try:
+        result = await db.execute(select(ScreenerRun.id).order_by(ScreenerRun.created_at.desc()).limit(1))
+        latest_screener_run_id = result.scalar()
+
+        if latest_screener_run_id is None:
+            return []
+
+        rows = (await db.execute(build_latest_opportunities_query(latest_screener_run_id))).all()
+        return opportunity_rows_to_dicts(rows)
+
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la récupération des dernières opportunités: {str(e)}"
+        )
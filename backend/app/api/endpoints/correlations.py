@@ -15,7 +15,7 @@ router = APIRouter()
 
 
 @router.get("/matrices", response_model=List[CorrelationMatrixSchema])
-async def get_correlation_matrices(
+def get_correlation_matrices(
     symbol: Optional[str] = Query(None, description="Symbole du titre"),
     correlation_type: Optional[str] = Query(None, description="Type de corrélation"),
     start_date: Optional[date] = Query(None, description="Date de début"),
@@ -46,7 +46,7 @@ async def get_correlation_matrices(
 
 
 @router.get("/cross-asset", response_model=List[CrossAssetCorrelationSchema])
-async def get_cross_asset_correlations(
+def get_cross_asset_correlations(
     symbol1: Optional[str] = Query(None, description="Premier symbole"),
     symbol2: Optional[str] = Query(None, description="Deuxième symbole"),
     correlation_type: Optional[str] = Query(None, description="Type de corrélation"),
@@ -80,7 +80,7 @@ async def get_cross_asset_correlations(
 
 
 @router.get("/features", response_model=List[CorrelationFeatureSchema])
-async def get_correlation_features(
+def get_correlation_features(
     symbol: Optional[str] = Query(None, description="Symbole du titre"),
     feature_type: Optional[str] = Query(None, description="Type de feature"),
     start_date: Optional[date] = Query(None, description="Date de début"),
@@ -111,7 +111,7 @@ async def get_correlation_features(
 
 
 @router.post("/calculate")
-async def calculate_correlations(
+def calculate_correlations(
     symbol: str,
     correlation_types: List[str] = Query(["sentiment", "technical", "combined"], description="Types de corrélation à calculer"),
     window_sizes: List[int] = Query([5, 20, 60], description="Tailles de fenêtre"),
@@ -135,7 +135,7 @@ async def calculate_correlations(
 
 
 @router.get("/stats")
-async def get_correlation_stats(db: Session = Depends(get_db)):
+def get_correlation_stats(db: Session = Depends(get_db)):
     """Récupérer les statistiques des corrélations"""
     try:
         matrices_count = db.query(CorrelationMatrices).count()
@@ -1,51 +1,254 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import List, Optional
+from sqlalchemy.engine import Row
+from sqlalchemy import text, select, func, any_, bindparam, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from typing import Callable, List, Optional
 from datetime import date, datetime
 
 from app.core.database import get_db
+from app.core.config import settings
+from app.core.serialization import RESPONSE_FORMAT_PATTERN, raw_columns, rows_to_columns, columnar_response, orjson_response
+from app.core.http_cache import build_version_query, compute_etag, etag_matches, cache_headers, not_modified
 from app.models.database import HistoricalData, TechnicalIndicators, SentimentIndicators, SymbolMetadata
 from app.models.schemas import (
     HistoricalDataSchema,
     TechnicalIndicatorsSchema,
     SentimentIndicatorsSchema,
+    BatchSeriesRequest,
     StatisticsResponse, MessageResponse
 )
+from app.services.downsampling import (
+    RESOLUTION_PATTERN, build_resampled_ohlcv_query, build_resampled_combined_query, downsample_rows
+)
 
 router = APIRouter(prefix="/data", tags=["data"])
 
+# Tables interrogeables par les requêtes groupées
+SERIES_MODELS = {
+    "historical": HistoricalData,
+    "technical": TechnicalIndicators,
+    "sentiment": SentimentIndicators,
+}
+
+
+def row_to_dict_without_nan(item) -> dict:
+    """Convertir une ligne ORM en dictionnaire, les valeurs NaN devenant None pour la sérialisation JSON"""
+    item_dict = {}
+    for column in item.__table__.columns:
+        value = getattr(item, column.name)
+        if value is not None and str(value).lower() == 'nan':
+            value = None
+        item_dict[column.name] = value
+    return item_dict
+
+
+def build_series_query(model, symbol: str, start_date: Optional[date], end_date: Optional[date],
+                       limit: int, skip: int, columns: Optional[list] = None):
+    """Requête d'une série temporelle d'un symbole (objets ORM, ou colonnes brutes si columns est donné)"""
+    query = select(*columns) if columns is not None else select(model)
+    query = query.where(model.symbol == symbol.upper())
+
+    if start_date:
+        query = query.where(model.date >= start_date)
+
+    if end_date:
+        query = query.where(model.date <= end_date)
+
+    return query.order_by(model.date.desc()).offset(skip).limit(limit)
+
+
+def build_series_statement(model, symbol: str, start_date: Optional[date], end_date: Optional[date],
+                           limit: int, skip: int, response_format: str = "json", resolution: str = "daily"):
+    """
+    Requête d'une route de série : (requête, paramètres, objets ORM ?)
+    Barres hebdomadaires / mensuelles agrégées par PostgreSQL si resolution != daily (données historiques),
+    colonnes brutes pour les formats colonnes, objets ORM pour le JSON validé par le response_model.
+    """
+    if resolution != "daily":
+        query, params = build_resampled_ohlcv_query(symbol, resolution, start_date, end_date, limit, skip)
+        return query, params, False
+    if response_format != "json":
+        return build_series_query(model, symbol, start_date, end_date, limit, skip, raw_columns(model)), {}, False
+    return build_series_query(model, symbol, start_date, end_date, limit, skip), {}, True
+
+
+def result_rows(result, orm_objects: bool = False):
+    """(noms des colonnes, lignes) d'un résultat déjà lu (Session ou AsyncSession)"""
+    return list(result.keys()), (result.scalars().all() if orm_objects else result.all())
+
+
+def series_etag(db: Session, request: Request, models: list, symbol: str) -> str:
+    """ETag de la réponse, calculé à partir de la version des données du symbole"""
+    return compute_etag(db.execute(build_version_query(models, symbol)).one(), request)
+
+
+def build_batch_query(model, symbols: List[str], start_date: Optional[date], end_date: Optional[date],
+                      columns: list, limit_per_symbol: int):
+    """
+    Requête unique pour plusieurs symboles (symbol = ANY(:symbols)), limitée à limit_per_symbol
+    lignes par symbole (les plus récentes), triée par symbole puis date décroissante.
+    """
+    row_number = func.row_number().over(partition_by=model.symbol, order_by=model.date.desc()).label("row_number")
+    query = select(*columns, row_number).where(
+        model.symbol == any_(bindparam("symbols", symbols, type_=ARRAY(String)))
+    )
+
+    if start_date:
+        query = query.where(model.date >= start_date)
+
+    if end_date:
+        query = query.where(model.date <= end_date)
+
+    ranked = query.subquery()
+    return select(*[ranked.c[column.name] for column in columns]).where(
+        ranked.c.row_number <= limit_per_symbol
+    ).order_by(ranked.c.symbol, ranked.c.date.desc())
+
+
+def build_combined_query(symbol: str, start_date: Optional[date], end_date: Optional[date],
+                         limit: int, skip: int):
+    """Requête SQL joignant les données historiques, techniques et de sentiment"""
+    sql = """
+        SELECT 
+            h.date,
+            h.symbol,
+            h.open,
+            h.high,
+            h.low,
+            h.close,
+            h.volume,
+            h.vwap,
+            t.sma_5, t.sma_20, t.rsi_14, t.macd, t.bb_position, t.atr_14,
+            s.sentiment_score_normalized, s.sentiment_momentum_7d, s.sentiment_volatility_14d
+        FROM historical_data h
+        LEFT JOIN technical_indicators t ON h.symbol = t.symbol AND h.date = t.date
+        LEFT JOIN sentiment_indicators s ON h.symbol = s.symbol AND h.date = s.date
+        WHERE h.symbol = :symbol
+    """
+    params = {"symbol": symbol.upper()}
+    
+    if start_date:
+        sql += " AND h.date >= :start_date"
+        params["start_date"] = start_date
+    
+    if end_date:
+        sql += " AND h.date <= :end_date"
+        params["end_date"] = end_date
+    
+    sql += " ORDER BY h.date DESC LIMIT :limit OFFSET :skip"
+    params["limit"] = limit
+    params["skip"] = skip
+    
+    return text(sql), params
+
+
+def combined_row_to_dict(row) -> dict:
+    """Mettre en forme une ligne de la requête combinée"""
+    return {
+        "date": row.date,
+        "symbol": row.symbol,
+        "open": row.open,
+        "high": row.high,
+        "low": row.low,
+        "close": row.close,
+        "volume": row.volume,
+        "vwap": row.vwap,
+        "technical": {
+            "sma_5": row.sma_5,
+            "sma_20": row.sma_20,
+            "rsi_14": row.rsi_14,
+            "macd": row.macd,
+            "bb_position": row.bb_position,
+            "atr_14": row.atr_14
+        },
+        "sentiment": {
+            "sentiment_score_normalized": row.sentiment_score_normalized,
+            "sentiment_momentum_7d": row.sentiment_momentum_7d,
+            "sentiment_volatility_14d": row.sentiment_volatility_14d
+        }
+    }
+
+
+def build_combined_statement(symbol: str, start_date: Optional[date], end_date: Optional[date],
+                             limit: int, skip: int, resolution: str = "daily"):
+    """Requête de la route combinée (barres agrégées si resolution != daily) : (requête, paramètres)"""
+    if resolution != "daily":
+        return build_resampled_combined_query(symbol, resolution, start_date, end_date, limit, skip)
+    return build_combined_query(symbol, start_date, end_date, limit, skip)
+
+
+def series_response(response: Response, keys: List[str], rows, etag: str, symbol: str, not_found: str,
+                    response_format: str = "json", max_points: Optional[int] = None,
+                    row_to_dict: Optional[Callable] = None):
+    """
+    Réponse d'une route de série (synchrone ou asynchrone) à partir des lignes lues : 404 si aucune
+    ligne, décimation LTTB, format colonnes / Arrow, sinon JSON avec les en-têtes de validation.
+    En JSON, les lignes sont mises en forme par row_to_dict ; les lignes brutes restantes (barres
+    agrégées) sont encodées directement par orjson, les objets ORM passent par le response_model.
+    """
+    if not rows:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=not_found)
+
+    rows = downsample_rows(rows, max_points, lambda row: row.close)
+
+    if response_format != "json":
+        return columnar_response(keys, rows, response_format, headers=cache_headers(etag), symbol=symbol.upper())
+
+    if row_to_dict is not None:
+        data = [row_to_dict(row) for row in rows]
+    elif isinstance(rows[0], Row):
+        return orjson_response([dict(row._mapping) for row in rows], cache_headers(etag))
+    else:
+        data = rows
+
+    response.headers.update(cache_headers(etag))
+    return data
+
+
+def symbols_to_dicts(symbols_with_metadata) -> List[dict]:
+    """Mettre en forme la liste des symboles (symbole, nom, secteur)"""
+    return [
+        {
+            "symbol": symbol[0],
+            "company_name": symbol[1] or symbol[0],
+            "sector": symbol[2] or "Unknown"
+        }
+        for symbol in symbols_with_metadata
+    ]
+
 
 # === ENDPOINTS POUR LES DONNÉES HISTORIQUES ===
 
 @router.get("/historical/{symbol}", response_model=List[HistoricalDataSchema])
 def get_historical_data(
     symbol: str,
+    request: Request,
+    response: Response,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     limit: int = Query(100, ge=1, le=1000),
     skip: int = Query(0, ge=0),
+    response_format: str = Query("json", alias="format", pattern=RESPONSE_FORMAT_PATTERN),
+    resolution: str = Query("daily", pattern=RESOLUTION_PATTERN),
+    max_points: Optional[int] = Query(None, ge=3, le=1000, description="Décimation LTTB des séries quotidiennes"),
     db: Session = Depends(get_db)
 ):
     """Récupérer les données historiques pour un symbole"""
     try:
-        query = db.query(HistoricalData).filter(HistoricalData.symbol == symbol.upper())
-        
-        if start_date:
-            query = query.filter(HistoricalData.date >= start_date)
+        etag = series_etag(db, request, [HistoricalData], symbol)
+        if etag_matches(request, etag):
+            return not_modified(etag)
         
-        if end_date:
-            query = query.filter(HistoricalData.date <= end_date)
-        
-        data = query.order_by(HistoricalData.date.desc()).offset(skip).limit(limit).all()
-        
-        if not data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Aucune donnée historique trouvée pour le symbole {symbol}"
-            )
-        
-        return data
+        query, params, orm_objects = build_series_statement(
+            HistoricalData, symbol, start_date, end_date, limit, skip, response_format, resolution
+        )
+        keys, rows = result_rows(db.execute(query, params), orm_objects)
+        return series_response(
+            response, keys, rows, etag, symbol, f"Aucune donnée historique trouvée pour le symbole {symbol}",
+            response_format, max_points
+        )
         
     except HTTPException:
         raise
@@ -89,31 +292,29 @@ def get_latest_historical_data(
 @router.get("/technical/{symbol}", response_model=List[TechnicalIndicatorsSchema])
 def get_technical_indicators(
     symbol: str,
+    request: Request,
+    response: Response,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     limit: int = Query(100, ge=1, le=1000),
     skip: int = Query(0, ge=0),
+    response_format: str = Query("json", alias="format", pattern=RESPONSE_FORMAT_PATTERN),
     db: Session = Depends(get_db)
 ):
     """Récupérer les indicateurs techniques pour un symbole"""
     try:
-        query = db.query(TechnicalIndicators).filter(TechnicalIndicators.symbol == symbol.upper())
-        
-        if start_date:
-            query = query.filter(TechnicalIndicators.date >= start_date)
+        etag = series_etag(db, request, [TechnicalIndicators], symbol)
+        if etag_matches(request, etag):
+            return not_modified(etag)
         
-        if end_date:
-            query = query.filter(TechnicalIndicators.date <= end_date)
-        
-        data = query.order_by(TechnicalIndicators.date.desc()).offset(skip).limit(limit).all()
-        
-        if not data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Aucun indicateur technique trouvé pour le symbole {symbol}"
-            )
-        
-        return data
+        query, params, orm_objects = build_series_statement(
+            TechnicalIndicators, symbol, start_date, end_date, limit, skip, response_format
+        )
+        keys, rows = result_rows(db.execute(query, params), orm_objects)
+        return series_response(
+            response, keys, rows, etag, symbol, f"Aucun indicateur technique trouvé pour le symbole {symbol}",
+            response_format
+        )
         
     except HTTPException:
         raise
@@ -157,44 +358,30 @@ def get_latest_technical_indicators(
 @router.get("/sentiment/{symbol}", response_model=List[SentimentIndicatorsSchema])
 def get_sentiment_indicators(
     symbol: str,
+    request: Request,
+    response: Response,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     limit: int = Query(100, ge=1, le=1000),
     skip: int = Query(0, ge=0),
+    response_format: str = Query("json", alias="format", pattern=RESPONSE_FORMAT_PATTERN),
     db: Session = Depends(get_db)
 ):
     """Récupérer les indicateurs de sentiment pour un symbole"""
     try:
-        query = db.query(SentimentIndicators).filter(SentimentIndicators.symbol == symbol.upper())
-        
-        if start_date:
-            query = query.filter(SentimentIndicators.date >= start_date)
-        
-        if end_date:
-            query = query.filter(SentimentIndicators.date <= end_date)
-        
-        data = query.order_by(SentimentIndicators.date.desc()).offset(skip).limit(limit).all()
-        
-        if not data:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Aucun indicateur de sentiment trouvé pour le symbole {symbol}"
-            )
+        etag = series_etag(db, request, [SentimentIndicators], symbol)
+        if etag_matches(request, etag):
+            return not_modified(etag)
         
-        # Filtrer les données avec des valeurs NaN et les convertir en None
-        filtered_data = []
-        for item in data:
-            # Créer un dictionnaire des attributs
-            item_dict = {}
-            for column in item.__table__.columns:
-                value = getattr(item, column.name)
-                # Convertir les valeurs NaN en None pour la sérialisation JSON
-                if value is not None and str(value).lower() == 'nan':
-                    value = None
-                item_dict[column.name] = value
-            filtered_data.append(item_dict)
-        
-        return filtered_data
+        query, params, orm_objects = build_series_statement(
+            SentimentIndicators, symbol, start_date, end_date, limit, skip, response_format
+        )
+        keys, rows = result_rows(db.execute(query, params), orm_objects)
+        # Valeurs NaN converties en None pour la sérialisation JSON
+        return series_response(
+            response, keys, rows, etag, symbol, f"Aucun indicateur de sentiment trouvé pour le symbole {symbol}",
+            response_format, row_to_dict=row_to_dict_without_nan
+        )
         
     except HTTPException:
         raise
@@ -223,14 +410,7 @@ def get_latest_sentiment_indicators(
             )
         
         # Convertir les valeurs NaN en None pour la sérialisation JSON
-        item_dict = {}
-        for column in data.__table__.columns:
-            value = getattr(data, column.name)
-            if value is not None and str(value).lower() == 'nan':
-                value = None
-            item_dict[column.name] = value
-        
-        return item_dict
+        return row_to_dict_without_nan(data)
         
     except HTTPException:
         raise
@@ -246,92 +426,126 @@ def get_latest_sentiment_indicators(
 @router.get("/combined/{symbol}")
 def get_combined_data(
     symbol: str,
+    request: Request,
+    response: Response,
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
     limit: int = Query(100, ge=1, le=1000),
     skip: int = Query(0, ge=0),
+    response_format: str = Query("json", alias="format", pattern=RESPONSE_FORMAT_PATTERN),
+    resolution: str = Query("daily", pattern=RESOLUTION_PATTERN),
+    max_points: Optional[int] = Query(None, ge=3, le=1000, description="Décimation LTTB des séries quotidiennes"),
     db: Session = Depends(get_db)
 ):
     """Récupérer les données historiques, techniques et de sentiment combinées"""
     try:
-        # Requête SQL pour joindre toutes les tables
-        query = text("""
-            SELECT 
-                h.date,
-                h.symbol,
-                h.open,
-                h.high,
-                h.low,
-                h.close,
-                h.volume,
-                h.vwap,
-                t.sma_5, t.sma_20, t.rsi_14, t.macd, t.bb_position, t.atr_14,
-                s.sentiment_score_normalized, s.sentiment_momentum_7d, s.sentiment_volatility_14d
-            FROM historical_data h
-            LEFT JOIN technical_indicators t ON h.symbol = t.symbol AND h.date = t.date
-            LEFT JOIN sentiment_indicators s ON h.symbol = s.symbol AND h.date = s.date
-            WHERE h.symbol = :symbol
-        """)
-        
-        params = {"symbol": symbol.upper()}
-        
-        if start_date:
-            query = text(str(query) + " AND h.date >= :start_date")
-            params["start_date"] = start_date
-        
-        if end_date:
-            query = text(str(query) + " AND h.date <= :end_date")
-            params["end_date"] = end_date
-        
-        query = text(str(query) + " ORDER BY h.date DESC LIMIT :limit OFFSET :skip")
-        params["limit"] = limit
-        params["skip"] = skip
-        
-        result = db.execute(query, params)
-        rows = result.fetchall()
-        
-        if not rows:
+        etag = series_etag(db, request, [HistoricalData, TechnicalIndicators, SentimentIndicators], symbol)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        
+        # Requête SQL joignant toutes les tables (barres agrégées si resolution != daily)
+        query, params = build_combined_statement(symbol, start_date, end_date, limit, skip, resolution)
+        keys, rows = result_rows(db.execute(query, params))
+        # Format colonnes : une colonne par champ de la requête, sans imbrication
+        return series_response(
+            response, keys, rows, etag, symbol, f"Aucune donnée combinée trouvée pour le symbole {symbol}",
+            response_format, max_points, row_to_dict=combined_row_to_dict
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la récupération des données combinées: {str(e)}"
+        )
+
+
+# === ENDPOINTS POUR LES REQUÊTES GROUPÉES ===
+
+@router.post("/batch")
+def get_batch_series(batch_request: BatchSeriesRequest, db: Session = Depends(get_db)):
+    """Récupérer une série (historique, technique ou sentiment) pour plusieurs symboles en une requête"""
+    try:
+        symbols = list(dict.fromkeys(symbol.upper() for symbol in batch_request.symbols))
+        if len(symbols) > settings.api_batch_max_symbols:
             raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail=f"Aucune donnée combinée trouvée pour le symbole {symbol}"
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Trop de symboles: {len(symbols)} (maximum {settings.api_batch_max_symbols})"
             )
         
-        # Convertir les résultats en dictionnaires
-        data = []
-        for row in rows:
-            data.append({
-                "date": row.date,
-                "symbol": row.symbol,
-                "open": row.open,
-                "high": row.high,
-                "low": row.low,
-                "close": row.close,
-                "volume": row.volume,
-                "vwap": row.vwap,
-                "technical": {
-                    "sma_5": row.sma_5,
-                    "sma_20": row.sma_20,
-                    "rsi_14": row.rsi_14,
-                    "macd": row.macd,
-                    "bb_position": row.bb_position,
-                    "atr_14": row.atr_14
-                },
-                "sentiment": {
-                    "sentiment_score_normalized": row.sentiment_score_normalized,
-                    "sentiment_momentum_7d": row.sentiment_momentum_7d,
-                    "sentiment_volatility_14d": row.sentiment_volatility_14d
-                }
-            })
+        model = SERIES_MODELS[batch_request.dataset]
+        columns = raw_columns(model)
+        if batch_request.columns:
+            available = {column.name for column in columns}
+            unknown = sorted(set(batch_request.columns) - available)
+            if unknown:
+                raise HTTPException(
+                    status_code=status.HTTP_400_BAD_REQUEST,
+                    detail=f"Colonnes inconnues pour {batch_request.dataset}: {', '.join(unknown)}"
+                )
+            # Le symbole et la date sont toujours retournés
+            wanted = {"symbol", "date", *batch_request.columns}
+            columns = [column for column in columns if column.name in wanted]
+        
+        result = db.execute(build_batch_query(
+            model, symbols, batch_request.start_date, batch_request.end_date, columns, batch_request.limit_per_symbol
+        ))
+        keys = list(result.keys())
+        
+        rows_by_symbol = {}
+        for row in result:
+            rows_by_symbol.setdefault(row.symbol, []).append(row)
+        
+        if batch_request.layout == "columnar":
+            series = {symbol: rows_to_columns(keys, rows) for symbol, rows in rows_by_symbol.items()}
+        else:
+            series = {symbol: [dict(zip(keys, row)) for row in rows] for symbol, rows in rows_by_symbol.items()}
         
-        return data
+        return orjson_response({
+            "dataset": batch_request.dataset,
+            "layout": batch_request.layout,
+            "count": sum(len(rows) for rows in rows_by_symbol.values()),
+            "series": series,
+            "missing_symbols": [symbol for symbol in symbols if symbol not in rows_by_symbol]
+        })
         
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erreur lors de la récupération des données combinées: {str(e)}"
+            detail=f"Erreur lors de la récupération groupée des séries: {str(e)}"
+        )
+
+
+# === ENDPOINTS POUR L'EXPORT EN MASSE ===
+
+@router.get("/export")
+def export_panel(
+    symbols: Optional[List[str]] = Query(None, description="Symboles exportés (tous si absent)"),
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None,
+    export_format: str = Query("parquet", alias="format", pattern="^(parquet|arrow)$")
+):
+    """Exporter le panel historique + technique + sentiment en Parquet ou Arrow IPC (streaming)"""
+    import importlib.util
+    
+    # Vérifier pyarrow avant de commencer la réponse : une erreur en cours de streaming ne peut plus être signalée
+    if importlib.util.find_spec("pyarrow") is None:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail="Export indisponible: pyarrow n'est pas installé"
         )
+    
+    from app.services.export_service import stream_panel, EXPORT_MEDIA_TYPES
+    
+    filename = f"panel_{date.today().isoformat()}.{export_format}"
+    return StreamingResponse(
+        stream_panel(export_format, symbols, start_date, end_date),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
 
 
 # === ENDPOINTS POUR LES SYMBOLES ===
@@ -356,14 +570,7 @@ def get_available_symbols(
             symbols = db.query(HistoricalData.symbol).distinct().order_by(HistoricalData.symbol.asc()).all()
             return [{"symbol": symbol[0], "company_name": symbol[0], "sector": "Unknown"} for symbol in symbols]
         
-        return [
-            {
-                "symbol": symbol[0],
-                "company_name": symbol[1] or symbol[0],
-                "sector": symbol[2] or "Unknown"
-            }
-            for symbol in symbols_with_metadata
-        ]
+        return symbols_to_dicts(symbols_with_metadata)
         
     except Exception as e:
         raise HTTPException(
@@ -1,9 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
+from sqlalchemy import select
 from typing import List, Optional
 from datetime import date
 
 from ...core.database import get_db
+from ...core.serialization import RESPONSE_FORMAT_PATTERN, raw_columns, columnar_response
 from ...models.database import TechnicalIndicators
 from ...models.schemas import TechnicalIndicators as TechnicalIndicatorsSchema
 
@@ -11,56 +13,74 @@ router = APIRouter()
 
 
 @router.get("/technical", response_model=List[TechnicalIndicatorsSchema])
-async def get_technical_indicators(
+def get_technical_indicators(
     symbol: Optional[str] = Query(None, description="Symbole du titre"),
     start_date: Optional[date] = Query(None, description="Date de début"),
     end_date: Optional[date] = Query(None, description="Date de fin"),
     limit: int = Query(100, ge=1, le=1000, description="Nombre maximum de résultats"),
+    response_format: str = Query("json", alias="format", pattern=RESPONSE_FORMAT_PATTERN,
+                                 description="json, columnar (orienté colonnes) ou arrow (Arrow IPC)"),
     db: Session = Depends(get_db)
 ):
     """Récupérer les indicateurs techniques"""
     try:
-        query = db.query(TechnicalIndicators)
+        # Format colonnes : colonnes brutes, sans objets ORM ni validation par ligne
+        if response_format != "json":
+            query = select(*raw_columns(TechnicalIndicators))
+        else:
+            query = select(TechnicalIndicators)
         
         # Filtres
         if symbol:
-            query = query.filter(TechnicalIndicators.symbol == symbol.upper())
+            query = query.where(TechnicalIndicators.symbol == symbol.upper())
         if start_date:
-            query = query.filter(TechnicalIndicators.date >= start_date)
+            query = query.where(TechnicalIndicators.date >= start_date)
         if end_date:
-            query = query.filter(TechnicalIndicators.date <= end_date)
+            query = query.where(TechnicalIndicators.date <= end_date)
         
-        query = query.order_by(TechnicalIndicators.date.desc()).limit(limit)
-        items = query.all()
+        result = db.execute(query.order_by(TechnicalIndicators.date.desc()).limit(limit))
         
-        return items
+        if response_format != "json":
+            return columnar_response(list(result.keys()), result.all(), response_format)
+        
+        return result.scalars().all()
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération des indicateurs: {str(e)}")
 
 
 @router.get("/technical/{symbol}", response_model=List[TechnicalIndicatorsSchema])
-async def get_technical_indicators_by_symbol(
+def get_technical_indicators_by_symbol(
     symbol: str,
     start_date: Optional[date] = Query(None, description="Date de début"),
     end_date: Optional[date] = Query(None, description="Date de fin"),
     limit: int = Query(100, ge=1, le=1000, description="Nombre maximum de résultats"),
+    response_format: str = Query("json", alias="format", pattern=RESPONSE_FORMAT_PATTERN,
+                                 description="json, columnar (orienté colonnes) ou arrow (Arrow IPC)"),
     db: Session = Depends(get_db)
 ):
     """Récupérer les indicateurs techniques pour un symbole spécifique"""
     try:
-        query = db.query(TechnicalIndicators).filter(TechnicalIndicators.symbol == symbol.upper())
+        if response_format != "json":
+            query = select(*raw_columns(TechnicalIndicators))
+        else:
+            query = select(TechnicalIndicators)
         
+        query = query.where(TechnicalIndicators.symbol == symbol.upper())
         if start_date:
-            query = query.filter(TechnicalIndicators.date >= start_date)
+            query = query.where(TechnicalIndicators.date >= start_date)
         if end_date:
-            query = query.filter(TechnicalIndicators.date <= end_date)
+            query = query.where(TechnicalIndicators.date <= end_date)
         
-        query = query.order_by(TechnicalIndicators.date.desc()).limit(limit)
-        items = query.all()
+        result = db.execute(query.order_by(TechnicalIndicators.date.desc()).limit(limit))
+        keys = list(result.keys())
+        items = result.all() if response_format != "json" else result.scalars().all()
         
         if not items:
             raise HTTPException(status_code=404, detail=f"Aucun indicateur technique trouvé pour le symbole {symbol}")
         
+        if response_format != "json":
+            return columnar_response(keys, items, response_format, symbol=symbol.upper())
+        
         return items
     except HTTPException:
         raise
@@ -69,7 +89,7 @@ async def get_technical_indicators_by_symbol(
 
 
 @router.post("/technical/calculate")
-async def calculate_technical_indicators(
+def calculate_technical_indicators(
     symbol: str,
     start_date: Optional[date] = Query(None, description="Date de début"),
     end_date: Optional[date] = Query(None, description="Date de fin"),
@@ -91,7 +111,7 @@ async def calculate_technical_indicators(
 
 
 @router.get("/technical/stats")
-async def get_technical_indicators_stats(db: Session = Depends(get_db)):
+def get_technical_indicators_stats(db: Session = Depends(get_db)):
     """Récupérer les statistiques des indicateurs techniques"""
     try:
         total_indicators = db.query(TechnicalIndicators).count()
@@ -7,22 +7,20 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.orm import Session
 
 from app.core.database import get_db
+from app.core.executor import run_blocking
 from app.models.schemas import (
     ModelTrainingRequest, ModelTrainingResponse, PredictionRequest, PredictionResponse,
     MLModel, ModelPerformance
 )
-from app.services.lightgbm_service import LightGBMService
+from app.services.lightgbm_service import LightGBMService, LIGHTGBM_TRAINERS
 
 router = APIRouter()
 
 
-@router.post("/train/binary", response_model=ModelTrainingResponse)
-async def train_binary_classification_model(
-    symbol: str,
-    target_parameter_id: int,
-    db: Session = Depends(get_db)
-):
-    """Entraîne un modèle LightGBM de classification binaire"""
+def _train_lightgbm_model(model_kind: str, symbol: str, target_parameter_id: int,
+                          db: Session) -> ModelTrainingResponse:
+    """Entraînement synchrone (exécuté dans le pool dédié, hors de la boucle d'événements)"""
+    method_name, model_type, message = LIGHTGBM_TRAINERS[model_kind]
     try:
         service = LightGBMService(db)
         
@@ -38,7 +36,7 @@ async def train_binary_classification_model(
                 detail="Paramètre cible non trouvé"
             )
         
-        result = service.train_binary_classification_model(
+        result = getattr(service, method_name)(
             symbol=symbol,
             target_param=target_param,
             db=db
@@ -47,14 +45,16 @@ async def train_binary_classification_model(
         return ModelTrainingResponse(
             model_id=result["model_id"],
             model_name=result["model_name"],
-            model_type="lightgbm_binary_classification",
+            model_type=model_type,
             symbol=symbol,
             performance=ModelPerformance(**result["performance"]),
             training_samples=result["training_samples"],
             test_samples=result["test_samples"],
-            message="Modèle LightGBM de classification binaire entraîné avec succès"
+            message=message
         )
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -62,6 +62,16 @@ async def train_binary_classification_model(
         )
 
 
+@router.post("/train/binary", response_model=ModelTrainingResponse)
+async def train_binary_classification_model(
+    symbol: str,
+    target_parameter_id: int,
+    db: Session = Depends(get_db)
+):
+    """Entraîne un modèle LightGBM de classification binaire"""
+    return await run_blocking(_train_lightgbm_model, "binary", symbol, target_parameter_id, db)
+
+
 @router.post("/train/multiclass", response_model=ModelTrainingResponse)
 async def train_multiclass_classification_model(
     symbol: str,
@@ -69,43 +79,7 @@ async def train_multiclass_classification_model(
     db: Session = Depends(get_db)
 ):
     """Entraîne un modèle LightGBM de classification multi-classe"""
-    try:
-        service = LightGBMService(db)
-        
-        # Récupération du paramètre cible
-        from app.models.database import TargetParameters
-        target_param = db.query(TargetParameters).filter(
-            TargetParameters.id == target_parameter_id
-        ).first()
-        
-        if not target_param:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Paramètre cible non trouvé"
-            )
-        
-        result = service.train_multiclass_classification_model(
-            symbol=symbol,
-            target_param=target_param,
-            db=db
-        )
-        
-        return ModelTrainingResponse(
-            model_id=result["model_id"],
-            model_name=result["model_name"],
-            model_type="lightgbm_multiclass_classification",
-            symbol=symbol,
-            performance=ModelPerformance(**result["performance"]),
-            training_samples=result["training_samples"],
-            test_samples=result["test_samples"],
-            message="Modèle LightGBM de classification multi-classe entraîné avec succès"
-        )
-        
-    except Exception as e:
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erreur lors de l'entraînement: {str(e)}"
-        )
+    return await run_blocking(_train_lightgbm_model, "multiclass", symbol, target_parameter_id, db)
 
 
 @router.post("/train/regression", response_model=ModelTrainingResponse)
@@ -115,47 +89,110 @@ async def train_regression_model(
     db: Session = Depends(get_db)
 ):
     """Entraîne un modèle LightGBM de régression"""
+    return await run_blocking(_train_lightgbm_model, "regression", symbol, target_parameter_id, db)
+
+
+@router.post("/train/{model_kind}/async")
+def submit_lightgbm_training(model_kind: str, symbol: str, target_parameter_id: int):
+    """Soumettre l'entraînement à Celery et retourner l'identifiant de la tâche"""
+    if model_kind not in LIGHTGBM_TRAINERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Type de modèle inconnu: {model_kind} (attendu: {', '.join(LIGHTGBM_TRAINERS)})"
+        )
+    
     try:
-        service = LightGBMService(db)
+        from app.tasks.training_tasks import train_lightgbm_model
+        task = train_lightgbm_model.delay(model_kind, symbol, target_parameter_id)
         
-        # Récupération du paramètre cible
-        from app.models.database import TargetParameters
-        target_param = db.query(TargetParameters).filter(
-            TargetParameters.id == target_parameter_id
-        ).first()
-        
-        if not target_param:
-            raise HTTPException(
-                status_code=status.HTTP_404_NOT_FOUND,
-                detail="Paramètre cible non trouvé"
-            )
-        
-        result = service.train_regression_model(
-            symbol=symbol,
-            target_param=target_param,
-            db=db
+        return {
+            "task_id": task.id,
+            "status": "started",
+            "message": f"Entraînement LightGBM ({model_kind}) de {symbol} lancé en arrière-plan"
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors du lancement de l'entraînement: {str(e)}"
         )
-        
-        return ModelTrainingResponse(
-            model_id=result["model_id"],
-            model_name=result["model_name"],
-            model_type="lightgbm_regression",
-            symbol=symbol,
-            performance=ModelPerformance(**result["performance"]),
-            training_samples=result["training_samples"],
-            test_samples=result["test_samples"],
-            message="Modèle LightGBM de régression entraîné avec succès"
+
+
+@router.post("/tune/{model_kind}/async")
+def submit_lightgbm_tuning(model_kind: str, symbol: str, target_parameter_id: int, scope: str = "symbol"):
+    """
+    Soumettre à Celery la recherche des hyperparamètres (successive halving) du symbole
+    (scope=symbol) ou de son secteur (scope=sector) ; le statut se lit sur /train/task/{task_id}/status
+    """
+    from app.services.lightgbm_tuning import TUNING_SCOPES
+    
+    if model_kind not in LIGHTGBM_TRAINERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Type de modèle inconnu: {model_kind} (attendu: {', '.join(LIGHTGBM_TRAINERS)})"
         )
+    if scope not in TUNING_SCOPES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Portée inconnue: {scope} (attendu: {', '.join(TUNING_SCOPES)})"
+        )
+    
+    try:
+        from app.tasks.training_tasks import tune_lightgbm_hyperparameters
+        task = tune_lightgbm_hyperparameters.delay(model_kind, symbol, target_parameter_id, scope)
         
+        return {
+            "task_id": task.id,
+            "status": "started",
+            "message": f"Recherche des paramètres LightGBM ({model_kind}, {scope}) de {symbol} lancée en arrière-plan"
+        }
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail=f"Erreur lors de l'entraînement: {str(e)}"
+            detail=f"Erreur lors du lancement de la recherche: {str(e)}"
+        )
+
+
+@router.get("/tuned-params/{symbol}")
+def get_lightgbm_tuned_params(symbol: str, model_kind: str = "binary", db: Session = Depends(get_db)):
+    """Paramètres utilisés à l'entraînement : paramètres par défaut et meilleurs paramètres enregistrés"""
+    if model_kind not in LIGHTGBM_TRAINERS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Type de modèle inconnu: {model_kind} (attendu: {', '.join(LIGHTGBM_TRAINERS)})"
+        )
+    
+    try:
+        from app.services.lightgbm_tuning import get_tuned_params
+        service = LightGBMService(db)
+        tuned = get_tuned_params(db, symbol, model_kind)
+        return {
+            "symbol": symbol,
+            "model_kind": model_kind,
+            "tuned_params": tuned,
+            "training_params": service.training_params(symbol, model_kind, db)
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la récupération des paramètres: {str(e)}"
+        )
+
+
+@router.get("/train/task/{task_id}/status")
+def get_lightgbm_training_status(task_id: str):
+    """Récupérer le statut d'un entraînement soumis à Celery"""
+    try:
+        from app.tasks.screener_tasks import get_task_status
+        return get_task_status(task_id)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors de la récupération du statut: {str(e)}"
         )
 
 
 @router.post("/predict", response_model=PredictionResponse)
-async def predict_with_lightgbm(
+def predict_with_lightgbm(
     request: PredictionRequest,
     db: Session = Depends(get_db)
 ):
@@ -189,7 +226,7 @@ async def predict_with_lightgbm(
 
 
 @router.get("/models", response_model=List[MLModel])
-async def get_lightgbm_models(
+def get_lightgbm_models(
     active_only: bool = True,
     symbol: Optional[str] = None,
     model_type: Optional[str] = None,
@@ -240,7 +277,7 @@ async def get_lightgbm_models(
 
 
 @router.get("/models/{model_id}", response_model=MLModel)
-async def get_lightgbm_model(
+def get_lightgbm_model(
     model_id: int,
     db: Session = Depends(get_db)
 ):
@@ -284,7 +321,7 @@ async def get_lightgbm_model(
 
 
 @router.put("/models/{model_id}/activate")
-async def activate_lightgbm_model(
+def activate_lightgbm_model(
     model_id: int,
     db: Session = Depends(get_db)
 ):
@@ -318,7 +355,7 @@ async def activate_lightgbm_model(
 
 
 @router.put("/models/{model_id}/deactivate")
-async def deactivate_lightgbm_model(
+def deactivate_lightgbm_model(
     model_id: int,
     db: Session = Depends(get_db)
 ):
@@ -352,14 +389,14 @@ async def deactivate_lightgbm_model(
 
 
 @router.delete("/models/{model_id}")
-async def delete_lightgbm_model(
+def delete_lightgbm_model(
     model_id: int,
     db: Session = Depends(get_db)
 ):
     """Supprime un modèle LightGBM"""
     try:
         from app.models.database import MLModels
-        import os
+        from app.services.model_registry import ModelRegistry
         
         model = db.query(MLModels).filter(
             MLModels.id == model_id,
@@ -372,9 +409,8 @@ async def delete_lightgbm_model(
                 detail="Modèle LightGBM non trouvé"
             )
         
-        # Suppression du fichier de modèle
-        if model.model_path and os.path.exists(model.model_path):
-            os.remove(model.model_path)
+        # Suppression des fichiers du modèle et de leur index
+        ModelRegistry(db).remove_artifacts(model)
         
         # Suppression de la base de données
         db.delete(model)
@@ -392,7 +428,7 @@ async def delete_lightgbm_model(
 
 
 @router.get("/stats/overview")
-async def get_lightgbm_stats_overview(db: Session = Depends(get_db)):
+def get_lightgbm_stats_overview(db: Session = Depends(get_db)):
     """Récupère les statistiques globales des modèles LightGBM"""
     try:
         from app.models.database import MLModels
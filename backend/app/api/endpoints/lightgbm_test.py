@@ -9,7 +9,7 @@ from app.models.database import TargetParameters
 router = APIRouter()
 
 @router.get("/test")
-async def test_lightgbm_endpoint(db: Session = Depends(get_db)):
+def test_lightgbm_endpoint(db: Session = Depends(get_db)):
     """Test simple de l'endpoint LightGBM"""
     try:
         print("🧪 Test de l'endpoint LightGBM...")
@@ -67,7 +67,7 @@ async def test_lightgbm_endpoint(db: Session = Depends(get_db)):
         )
 
 @router.post("/train/simple")
-async def train_simple_lightgbm_model(
+def train_simple_lightgbm_model(
     symbol: str = "AAPL",
     target_parameter_id: int = 5,
     db: Session = Depends(get_db)
@@ -14,7 +14,7 @@ router = APIRouter()
 
 
 @router.get("/models", response_model=List[MLModelSchema])
-async def get_ml_models(
+def get_ml_models(
     model_type: Optional[str] = Query(None, description="Type de modèle"),
     is_active: Optional[bool] = Query(None, description="Modèle actif"),
     db: Session = Depends(get_db)
@@ -38,7 +38,7 @@ async def get_ml_models(
 
 
 @router.get("/models/{model_id}", response_model=MLModelSchema)
-async def get_ml_model(
+def get_ml_model(
     model_id: int,
     db: Session = Depends(get_db)
 ):
@@ -57,7 +57,7 @@ async def get_ml_model(
 
 
 @router.get("/predictions", response_model=List[MLPredictionSchema])
-async def get_ml_predictions(
+def get_ml_predictions(
     symbol: Optional[str] = Query(None, description="Symbole du titre"),
     model_id: Optional[int] = Query(None, description="ID du modèle"),
     prediction_type: Optional[str] = Query(None, description="Type de prédiction"),
@@ -91,7 +91,7 @@ async def get_ml_predictions(
 
 
 @router.post("/train")
-async def train_ml_model(
+def train_ml_model(
     model_name: str,
     model_type: str,
     training_data_start: date,
@@ -115,7 +115,7 @@ async def train_ml_model(
 
 
 @router.post("/predict")
-async def make_prediction(
+def make_prediction(
     symbol: str,
     model_id: int,
     prediction_type: str,
@@ -137,7 +137,7 @@ async def make_prediction(
 
 
 @router.get("/stats")
-async def get_ml_stats(db: Session = Depends(get_db)):
+def get_ml_stats(db: Session = Depends(get_db)):
     """Récupérer les statistiques des modèles ML"""
     try:
         total_models = db.query(MLModels).count()
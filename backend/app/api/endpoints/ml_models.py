@@ -10,6 +10,7 @@ from app.models.schemas import (
     PredictionRequest, PredictionResponse, ModelPerformance, MessageResponse
 )
 from app.services.ml_service import MLService
+from app.services.shap_service import ShapService
 
 router = APIRouter(prefix="/ml-models", tags=["ml-models"])
 
@@ -494,8 +495,7 @@ def get_shap_explanations(
         from datetime import datetime
         prediction_date_obj = datetime.strptime(prediction_date, "%Y-%m-%d").date()
         
-        ml_service = MLService(db=db)
-        result = ml_service.calculate_shap_explanations(model_id, symbol, prediction_date_obj, db)
+        result = ShapService(db).get_or_compute(model_id, symbol, prediction_date_obj)
         
         if "error" in result:
             raise HTTPException(
@@ -546,11 +546,8 @@ def get_model_feature_importance(
 def get_detailed_analysis(symbol: str, model_id: int, db: Session = Depends(get_db)):
     """Récupérer l'analyse détaillée complète pour un symbole"""
     try:
-        from app.services.ml_service import MLService
         from app.models.database import HistoricalData, TechnicalIndicators, SentimentIndicators, MLModels
         
-        ml_service = MLService(db)
-        
         # 1. Récupérer le modèle
         model = db.query(MLModels).filter(MLModels.id == model_id).first()
         if not model:
@@ -583,8 +580,8 @@ def get_detailed_analysis(symbol: str, model_id: int, db: Session = Depends(get_
             SentimentIndicators.date == latest_date
         ).first()
         
-        # 5. Calculer les explications SHAP
-        shap_explanations = ml_service.calculate_shap_explanations(model_id, symbol, latest_date, db)
+        # 5. Explications SHAP : précalculées après le run du screener, sinon calculées puis stockées
+        shap_explanations = ShapService(db).get_or_compute(model_id, symbol, latest_date)
         
         # 6. Préparer les données historiques pour les graphiques
         chart_data = []
@@ -596,34 +593,34 @@ def get_detailed_analysis(symbol: str, model_id: int, db: Session = Depends(get_
                 "low": float(data.low),
                 "close": float(data.close),
                 "volume": data.volume,
-                "vwap": float(data.vwap) if data.vwap else None
+                "vwap": float(data.vwap) if data.vwap is not None else None
             })
         
         # 7. Préparer les indicateurs techniques pour les graphiques
         technical_data = {}
         if technical_indicators:
             technical_data = {
-                "sma_20": float(technical_indicators.sma_20) if technical_indicators.sma_20 else None,
-                "ema_20": float(technical_indicators.ema_20) if technical_indicators.ema_20 else None,
-                "rsi_14": float(technical_indicators.rsi_14) if technical_indicators.rsi_14 else None,
-                "macd": float(technical_indicators.macd) if technical_indicators.macd else None,
-                "macd_signal": float(technical_indicators.macd_signal) if technical_indicators.macd_signal else None,
-                "bb_upper": float(technical_indicators.bb_upper) if technical_indicators.bb_upper else None,
-                "bb_middle": float(technical_indicators.bb_middle) if technical_indicators.bb_middle else None,
-                "bb_lower": float(technical_indicators.bb_lower) if technical_indicators.bb_lower else None,
-                "atr_14": float(technical_indicators.atr_14) if technical_indicators.atr_14 else None,
-                "obv": float(technical_indicators.obv) if technical_indicators.obv else None,
+                "sma_20": float(technical_indicators.sma_20) if technical_indicators.sma_20 is not None else None,
+                "ema_20": float(technical_indicators.ema_20) if technical_indicators.ema_20 is not None else None,
+                "rsi_14": float(technical_indicators.rsi_14) if technical_indicators.rsi_14 is not None else None,
+                "macd": float(technical_indicators.macd) if technical_indicators.macd is not None else None,
+                "macd_signal": float(technical_indicators.macd_signal) if technical_indicators.macd_signal is not None else None,
+                "bb_upper": float(technical_indicators.bb_upper) if technical_indicators.bb_upper is not None else None,
+                "bb_middle": float(technical_indicators.bb_middle) if technical_indicators.bb_middle is not None else None,
+                "bb_lower": float(technical_indicators.bb_lower) if technical_indicators.bb_lower is not None else None,
+                "atr_14": float(technical_indicators.atr_14) if technical_indicators.atr_14 is not None else None,
+                "obv": float(technical_indicators.obv) if technical_indicators.obv is not None else None,
             }
         
         # 8. Préparer les indicateurs de sentiment
         sentiment_data = {}
         if sentiment_indicators:
             sentiment_data = {
-                "sentiment_score_normalized": float(sentiment_indicators.sentiment_score_normalized) if sentiment_indicators.sentiment_score_normalized else None,
-                "sentiment_momentum_7d": float(sentiment_indicators.sentiment_momentum_7d) if sentiment_indicators.sentiment_momentum_7d else None,
-                "sentiment_volatility_14d": float(sentiment_indicators.sentiment_volatility_14d) if sentiment_indicators.sentiment_volatility_14d else None,
-                "news_positive_ratio": float(sentiment_indicators.news_positive_ratio) if sentiment_indicators.news_positive_ratio else None,
-                "news_negative_ratio": float(sentiment_indicators.news_negative_ratio) if sentiment_indicators.news_negative_ratio else None,
+                "sentiment_score_normalized": float(sentiment_indicators.sentiment_score_normalized) if sentiment_indicators.sentiment_score_normalized is not None else None,
+                "sentiment_momentum_7d": float(sentiment_indicators.sentiment_momentum_7d) if sentiment_indicators.sentiment_momentum_7d is not None else None,
+                "sentiment_volatility_14d": float(sentiment_indicators.sentiment_volatility_14d) if sentiment_indicators.sentiment_volatility_14d is not None else None,
+                "news_positive_ratio": float(sentiment_indicators.news_positive_ratio) if sentiment_indicators.news_positive_ratio is not None else None,
+                "news_negative_ratio": float(sentiment_indicators.news_negative_ratio) if sentiment_indicators.news_negative_ratio is not None else None,
             }
         
         # 9. Informations sur le modèle
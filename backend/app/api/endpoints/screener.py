@@ -8,11 +8,22 @@ from ...models.schemas import (
     ScreenerRequest, ScreenerResponse, ScreenerRun, ScreenerResult,
     ScreenerConfig, ScreenerConfigCreate, ScreenerConfigUpdate
 )
+from ...services.screener_pipeline import PIPELINE_MODES
 from ...services.screener_service import ScreenerService
-from ...tasks.screener_tasks import get_task_status
+from ...tasks.screener_tasks import get_task_status, launch_screener_preset, run_screener_pipeline
 
 router = APIRouter()
 
+
+def _request_to_dict(request: ScreenerRequest) -> Dict[str, Any]:
+    """Conversion de la requête en dictionnaire pour la tâche"""
+    return {
+        "target_return_percentage": request.target_return_percentage,
+        "time_horizon_days": request.time_horizon_days,
+        "risk_tolerance": request.risk_tolerance
+    }
+
+
 @router.post("/run", response_model=ScreenerResponse)
 async def run_screener(
     request: ScreenerRequest,
@@ -62,24 +73,54 @@ async def run_screener(
             detail=f"Erreur lors de l'exécution du screener: {str(e)}"
         )
 
+@router.post("/run-pipeline", response_model=Dict[str, Any])
+def run_screener_pipeline_endpoint(
+    request: ScreenerRequest,
+    mode: str = "train",
+    max_symbols: Optional[int] = None,
+    concurrency: Optional[int] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Lancer le pipeline de screener de manière asynchrone.
+    
+    - mode: train (entraînement complet), reuse (réutilise les modèles existants),
+      pooled (un seul modèle pour tous les symboles) ou demo
+    - max_symbols: limite du nombre de symboles analysés
+    - concurrency: nombre de symboles traités en parallèle
+    """
+    if mode not in PIPELINE_MODES:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Le mode doit être {', '.join(PIPELINE_MODES)}"
+        )
+    
+    try:
+        task = run_screener_pipeline.delay(
+            _request_to_dict(request), "screener_user",
+            mode=mode, max_symbols=max_symbols, concurrency=concurrency
+        )
+        
+        return {
+            "task_id": task.id,
+            "status": "started",
+            "message": f"Screener ({mode}) lancé en arrière-plan{' (limité à ' + str(max_symbols) + ' symboles)' if max_symbols else ''}"
+        }
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Erreur lors du lancement du screener: {str(e)}"
+        )
+
 @router.post("/run-demo", response_model=Dict[str, Any])
 def run_demo_screener_endpoint(
     request: ScreenerRequest,
+    concurrency: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """Lancer un screener de démonstration de manière asynchrone"""
     try:
-        from app.tasks.demo_screener_tasks import run_demo_screener
-        
-        # Conversion de la requête en dictionnaire pour la tâche
-        request_dict = {
-            "target_return_percentage": request.target_return_percentage,
-            "time_horizon_days": request.time_horizon_days,
-            "risk_tolerance": request.risk_tolerance
-        }
-        
-        # Lancement de la tâche asynchrone de démonstration
-        task = run_demo_screener.delay(request_dict, "demo_user")
+        task = launch_screener_preset("demo", _request_to_dict(request), "demo_user", concurrency=concurrency)
         
         return {
             "task_id": task.id,
@@ -92,25 +133,15 @@ def run_demo_screener_endpoint(
             detail=f"Erreur lors du lancement du screener de démonstration: {str(e)}"
         )
 
-
 @router.post("/run-real", response_model=Dict[str, Any])
 def run_real_screener_endpoint(
     request: ScreenerRequest,
+    concurrency: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """Lancer un screener réel de manière asynchrone"""
     try:
-        from app.tasks.real_screener_tasks import run_real_screener
-        
-        # Conversion de la requête en dictionnaire pour la tâche
-        request_dict = {
-            "target_return_percentage": request.target_return_percentage,
-            "time_horizon_days": request.time_horizon_days,
-            "risk_tolerance": request.risk_tolerance
-        }
-        
-        # Lancement de la tâche asynchrone réelle
-        task = run_real_screener.delay(request_dict, "screener_user")
+        task = launch_screener_preset("real", _request_to_dict(request), "screener_user", concurrency=concurrency)
         
         return {
             "task_id": task.id,
@@ -127,21 +158,12 @@ def run_real_screener_endpoint(
 def run_real_screener_limited_endpoint(
     request: ScreenerRequest,
     max_symbols: int = 20,
+    concurrency: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """Lancer un screener réel limité de manière asynchrone"""
     try:
-        from app.tasks.real_screener_limited_tasks import run_real_screener_limited
-        
-        # Conversion de la requête en dictionnaire pour la tâche
-        request_dict = {
-            "target_return_percentage": request.target_return_percentage,
-            "time_horizon_days": request.time_horizon_days,
-            "risk_tolerance": request.risk_tolerance
-        }
-        
-        # Lancement de la tâche asynchrone réelle limitée
-        task = run_real_screener_limited.delay(request_dict, "screener_user", max_symbols)
+        task = launch_screener_preset("real-limited", _request_to_dict(request), "screener_user", max_symbols=max_symbols, concurrency=concurrency)
         
         return {
             "task_id": task.id,
@@ -158,21 +180,12 @@ def run_real_screener_limited_endpoint(
 def run_real_screener_fixed_endpoint(
     request: ScreenerRequest,
     max_symbols: int = 20,
+    concurrency: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """Lancer un screener réel corrigé de manière asynchrone"""
     try:
-        from app.tasks.real_screener_fixed_tasks import run_real_screener_limited_fixed
-        
-        # Conversion de la requête en dictionnaire pour la tâche
-        request_dict = {
-            "target_return_percentage": request.target_return_percentage,
-            "time_horizon_days": request.time_horizon_days,
-            "risk_tolerance": request.risk_tolerance
-        }
-        
-        # Lancement de la tâche asynchrone réelle corrigée
-        task = run_real_screener_limited_fixed.delay(request_dict, "screener_user", max_symbols)
+        task = launch_screener_preset("real-fixed", _request_to_dict(request), "screener_user", max_symbols=max_symbols, concurrency=concurrency)
         
         return {
             "task_id": task.id,
@@ -189,21 +202,12 @@ def run_real_screener_fixed_endpoint(
 def run_ultra_simple_real_screener_endpoint(
     request: ScreenerRequest,
     max_symbols: int = 5,
+    concurrency: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """Lancer un screener ultra-simple réel de manière asynchrone"""
     try:
-        from app.tasks.ultra_simple_real_tasks import run_ultra_simple_real_screener
-        
-        # Conversion de la requête en dictionnaire pour la tâche
-        request_dict = {
-            "target_return_percentage": request.target_return_percentage,
-            "time_horizon_days": request.time_horizon_days,
-            "risk_tolerance": request.risk_tolerance
-        }
-        
-        # Lancement de la tâche asynchrone ultra-simple réelle
-        task = run_ultra_simple_real_screener.delay(request_dict, "screener_user", max_symbols)
+        task = launch_screener_preset("ultra-simple-real", _request_to_dict(request), "screener_user", max_symbols=max_symbols, concurrency=concurrency)
         
         return {
             "task_id": task.id,
@@ -216,11 +220,54 @@ def run_ultra_simple_real_screener_endpoint(
             detail=f"Erreur lors du lancement du screener ultra-simple réel: {str(e)}"
         )
 
+def build_latest_opportunities_query(screener_run_id: int):
+    """Opportunités (prediction_value=1) d'un run avec modèle, paramètres de cible et société, en une requête"""
+    from sqlalchemy import select
+    from app.models.database import MLPredictions, MLModels, SymbolMetadata, TargetParameters
+    
+    return select(
+        MLPredictions,
+        MLModels.model_name,
+        SymbolMetadata.company_name,
+        TargetParameters.target_return_percentage,
+        TargetParameters.time_horizon_days
+    ).join(
+        MLModels, MLModels.id == MLPredictions.model_id
+    ).join(
+        SymbolMetadata, SymbolMetadata.symbol == MLPredictions.symbol
+    ).outerjoin(
+        TargetParameters, TargetParameters.id == MLModels.target_parameter_id
+    ).where(
+        MLPredictions.screener_run_id == screener_run_id,
+        MLPredictions.prediction_value == 1.0
+    ).order_by(MLPredictions.confidence.desc())
+
+
+def opportunity_rows_to_dicts(rows) -> List[Dict[str, Any]]:
+    """Mettre en forme les opportunités, classées dans l'ordre de la requête"""
+    return [
+        {
+            "symbol": pred.symbol,
+            "company_name": company_name or pred.symbol,
+            "prediction": float(pred.prediction_value),
+            "confidence": float(pred.confidence),
+            "model_id": pred.model_id,
+            "model_name": model_name or "Unknown",
+            "target_return": float(target_return) if target_return is not None else None,
+            "time_horizon": time_horizon,
+            "prediction_date": pred.prediction_date.isoformat() if pred.prediction_date else None,
+            "screener_run_id": pred.screener_run_id,
+            "rank": rank
+        }
+        for rank, (pred, model_name, company_name, target_return, time_horizon) in enumerate(rows, start=1)
+    ]
+
+
 @router.get("/latest-opportunities", response_model=List[Dict[str, Any]])
 def get_latest_opportunities(db: Session = Depends(get_db)):
     """Récupérer les dernières opportunités (prediction_value=1) du screener le plus récent"""
     try:
-        from app.models.database import MLPredictions, MLModels, SymbolMetadata, ScreenerRun
+        from app.models.database import ScreenerRun
         
         # Trouver le screener_run_id le plus récent
         latest_screener_run = db.query(ScreenerRun).order_by(ScreenerRun.created_at.desc()).first()
@@ -229,34 +276,9 @@ def get_latest_opportunities(db: Session = Depends(get_db)):
             return []
         
         # Récupérer les prédictions avec prediction_value=1 pour ce screener_run_id
-        predictions = db.query(MLPredictions).join(MLModels).join(SymbolMetadata, SymbolMetadata.symbol == MLPredictions.symbol).filter(
-            MLPredictions.screener_run_id == latest_screener_run.id,
-            MLPredictions.prediction_value == 1.0
-        ).order_by(MLPredictions.confidence.desc()).all()
-        
-        results = []
-        for pred in predictions:
-            # Récupérer les métadonnées du symbole
-            symbol_metadata = db.query(SymbolMetadata).filter(SymbolMetadata.symbol == pred.symbol).first()
-            
-            # Récupérer les informations du modèle
-            model = db.query(MLModels).filter(MLModels.id == pred.model_id).first()
-            
-            results.append({
-                "symbol": pred.symbol,
-                "company_name": symbol_metadata.company_name if symbol_metadata else pred.symbol,
-                "prediction": float(pred.prediction_value),
-                "confidence": float(pred.confidence),
-                "model_id": pred.model_id,
-                "model_name": model.model_name if model else "Unknown",
-                "target_return": float(model.target_parameter.target_return_percentage) if model and model.target_parameter else None,
-                "time_horizon": model.target_parameter.time_horizon_days if model and model.target_parameter else None,
-                "prediction_date": pred.prediction_date.isoformat() if pred.prediction_date else None,
-                "screener_run_id": pred.screener_run_id,
-                "rank": len(results) + 1
-            })
+        rows = db.execute(build_latest_opportunities_query(latest_screener_run.id)).all()
         
-        return results
+        return opportunity_rows_to_dicts(rows)
         
     except Exception as e:
         raise HTTPException(
@@ -269,21 +291,12 @@ def get_latest_opportunities(db: Session = Depends(get_db)):
 def run_full_screener_ml_web_endpoint(
     request: ScreenerRequest,
     max_symbols: Optional[int] = None,
+    concurrency: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """Lancer un screener ML complet avec service web robuste"""
     try:
-        from app.tasks.full_screener_ml_web_tasks import run_full_screener_ml_web
-        
-        # Conversion de la requête en dictionnaire pour la tâche
-        request_dict = {
-            "target_return_percentage": request.target_return_percentage,
-            "time_horizon_days": request.time_horizon_days,
-            "risk_tolerance": request.risk_tolerance
-        }
-        
-        # Lancement de la tâche asynchrone ML web
-        task = run_full_screener_ml_web.delay(request_dict, "screener_user", max_symbols)
+        task = launch_screener_preset("full-ml-web", _request_to_dict(request), "screener_user", max_symbols=max_symbols, concurrency=concurrency)
         
         return {
             "task_id": task.id,
@@ -300,21 +313,12 @@ def run_full_screener_ml_web_endpoint(
 def run_full_screener_ml_limited_endpoint(
     request: ScreenerRequest,
     max_symbols: int = 5,
+    concurrency: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """Lancer un screener ML limité de manière asynchrone"""
     try:
-        from app.tasks.full_screener_ml_limited_tasks import run_full_screener_ml_limited
-        
-        # Conversion de la requête en dictionnaire pour la tâche
-        request_dict = {
-            "target_return_percentage": request.target_return_percentage,
-            "time_horizon_days": request.time_horizon_days,
-            "risk_tolerance": request.risk_tolerance
-        }
-        
-        # Lancement de la tâche asynchrone ML limitée
-        task = run_full_screener_ml_limited.delay(request_dict, "screener_user", max_symbols)
+        task = launch_screener_preset("full-ml-limited", _request_to_dict(request), "screener_user", max_symbols=max_symbols, concurrency=concurrency)
         
         return {
             "task_id": task.id,
@@ -330,26 +334,17 @@ def run_full_screener_ml_limited_endpoint(
 @router.post("/run-full-ml", response_model=Dict[str, Any])
 def run_full_screener_ml_endpoint(
     request: ScreenerRequest,
+    concurrency: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """Lancer un screener complet avec vrais modèles ML de manière asynchrone"""
     try:
-        from app.tasks.full_screener_ml_tasks import run_full_screener_ml
-        
-        # Conversion de la requête en dictionnaire pour la tâche
-        request_dict = {
-            "target_return_percentage": request.target_return_percentage,
-            "time_horizon_days": request.time_horizon_days,
-            "risk_tolerance": request.risk_tolerance
-        }
-        
-        # Lancement de la tâche asynchrone complète ML
-        task = run_full_screener_ml.delay(request_dict, "screener_user")
+        task = launch_screener_preset("full-ml", _request_to_dict(request), "screener_user", concurrency=concurrency)
         
         return {
             "task_id": task.id,
             "status": "started",
-            "message": "Screener complet ML lancé en arrière-plan (tous les symboles avec vrais modèles)"
+            "message": "Screener complet ML lancé en arrière-plan"
         }
     except Exception as e:
         raise HTTPException(
@@ -360,26 +355,17 @@ def run_full_screener_ml_endpoint(
 @router.post("/run-full-simple", response_model=Dict[str, Any])
 def run_full_screener_simple_endpoint(
     request: ScreenerRequest,
+    concurrency: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """Lancer un screener complet simple de manière asynchrone"""
     try:
-        from app.tasks.full_screener_simple_tasks import run_full_screener_simple
-        
-        # Conversion de la requête en dictionnaire pour la tâche
-        request_dict = {
-            "target_return_percentage": request.target_return_percentage,
-            "time_horizon_days": request.time_horizon_days,
-            "risk_tolerance": request.risk_tolerance
-        }
-        
-        # Lancement de la tâche asynchrone complète simple
-        task = run_full_screener_simple.delay(request_dict, "screener_user")
+        task = launch_screener_preset("full-simple", _request_to_dict(request), "screener_user", concurrency=concurrency)
         
         return {
             "task_id": task.id,
             "status": "started",
-            "message": "Screener complet simple lancé en arrière-plan (tous les symboles)"
+            "message": "Screener complet simple lancé en arrière-plan"
         }
     except Exception as e:
         raise HTTPException(
@@ -391,21 +377,12 @@ def run_full_screener_simple_endpoint(
 def run_full_screener_limited_endpoint(
     request: ScreenerRequest,
     max_symbols: int = 20,
+    concurrency: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """Lancer un screener complet limité de manière asynchrone"""
     try:
-        from app.tasks.full_screener_limited_tasks import run_full_screener_limited
-        
-        # Conversion de la requête en dictionnaire pour la tâche
-        request_dict = {
-            "target_return_percentage": request.target_return_percentage,
-            "time_horizon_days": request.time_horizon_days,
-            "risk_tolerance": request.risk_tolerance
-        }
-        
-        # Lancement de la tâche asynchrone complète limitée
-        task = run_full_screener_limited.delay(request_dict, "screener_user", max_symbols)
+        task = launch_screener_preset("full-limited", _request_to_dict(request), "screener_user", max_symbols=max_symbols, concurrency=concurrency)
         
         return {
             "task_id": task.id,
@@ -421,26 +398,17 @@ def run_full_screener_limited_endpoint(
 @router.post("/run-full", response_model=Dict[str, Any])
 def run_full_screener_endpoint(
     request: ScreenerRequest,
+    concurrency: Optional[int] = None,
     db: Session = Depends(get_db)
 ):
     """Lancer un screener complet avec tous les symboles de manière asynchrone"""
     try:
-        from app.tasks.full_screener_tasks import run_full_screener
-        
-        # Conversion de la requête en dictionnaire pour la tâche
-        request_dict = {
-            "target_return_percentage": request.target_return_percentage,
-            "time_horizon_days": request.time_horizon_days,
-            "risk_tolerance": request.risk_tolerance
-        }
-        
-        # Lancement de la tâche asynchrone complète
-        task = run_full_screener.delay(request_dict, "screener_user")
+        task = launch_screener_preset("full", _request_to_dict(request), "screener_user", concurrency=concurrency)
         
         return {
             "task_id": task.id,
             "status": "started",
-            "message": "Screener complet lancé en arrière-plan (tous les symboles)"
+            "message": "Screener complet lancé en arrière-plan"
         }
     except Exception as e:
         raise HTTPException(
@@ -448,11 +416,6 @@ def run_full_screener_endpoint(
             detail=f"Erreur lors du lancement du screener complet: {str(e)}"
         )
 
-
-
-
-
-
 @router.post("/test-task", response_model=Dict[str, Any])
 def test_simple_task():
     """Tester une tâche simple"""
@@ -14,7 +14,7 @@ router = APIRouter()
 
 
 @router.get("/trading", response_model=List[TradingSignalSchema])
-async def get_trading_signals(
+def get_trading_signals(
     symbol: Optional[str] = Query(None, description="Symbole du titre"),
     signal_type: Optional[str] = Query(None, description="Type de signal"),
     min_confidence: Optional[float] = Query(None, ge=0, le=1, description="Confiance minimale"),
@@ -48,7 +48,7 @@ async def get_trading_signals(
 
 
 @router.get("/trading/{symbol}", response_model=List[TradingSignalSchema])
-async def get_trading_signals_by_symbol(
+def get_trading_signals_by_symbol(
     symbol: str,
     signal_type: Optional[str] = Query(None, description="Type de signal"),
     min_confidence: Optional[float] = Query(None, ge=0, le=1, description="Confiance minimale"),
@@ -84,7 +84,7 @@ async def get_trading_signals_by_symbol(
 
 
 @router.get("/alerts", response_model=List[CorrelationAlertSchema])
-async def get_correlation_alerts(
+def get_correlation_alerts(
     symbol: Optional[str] = Query(None, description="Symbole du titre"),
     alert_type: Optional[str] = Query(None, description="Type d'alerte"),
     severity: Optional[str] = Query(None, description="Sévérité"),
@@ -121,7 +121,7 @@ async def get_correlation_alerts(
 
 
 @router.post("/generate")
-async def generate_trading_signals(
+def generate_trading_signals(
     symbol: str,
     model_id: Optional[int] = Query(None, description="ID du modèle à utiliser"),
     db: Session = Depends(get_db)
@@ -141,7 +141,7 @@ async def generate_trading_signals(
 
 
 @router.post("/alerts/resolve/{alert_id}")
-async def resolve_alert(
+def resolve_alert(
     alert_id: int,
     db: Session = Depends(get_db)
 ):
@@ -163,7 +163,7 @@ async def resolve_alert(
 
 
 @router.get("/stats")
-async def get_signals_stats(db: Session = Depends(get_db)):
+def get_signals_stats(db: Session = Depends(get_db)):
     """Récupérer les statistiques des signaux"""
     try:
         total_signals = db.query(TradingSignals).count()
@@ -1,9 +1,10 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 from app.core.database import get_db
 from app.models.database import SymbolMetadata
 from app.models.schemas import SymbolMetadata as SymbolMetadataSchema, SymbolMetadataCreate, SymbolMetadataUpdate
+from app.services.symbol_search import get_symbol_index, invalidate_symbol_index
 
 router = APIRouter()
 
@@ -51,10 +52,27 @@ def search_symbols_by_company(
 ):
     """Rechercher des symboles par nom d'entreprise"""
     try:
-        symbols = db.query(SymbolMetadata).filter(
-            SymbolMetadata.company_name.ilike(f"%{company_name}%")
-        ).limit(limit).all()
-        return symbols
+        # Classement par l'index en mémoire, puis lecture des lignes correspondantes en une requête
+        matches = get_symbol_index(db).search(company_name, limit=limit, active_only=False)
+        if not matches:
+            return []
+        
+        ranks = {match["symbol"]: rank for rank, match in enumerate(matches)}
+        symbols = db.query(SymbolMetadata).filter(SymbolMetadata.symbol.in_(list(ranks))).all()
+        return sorted(symbols, key=lambda item: ranks[item.symbol])
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la recherche: {str(e)}")
+
+@router.get("/search/typeahead", response_model=List[Dict[str, Any]])
+def typeahead_symbols(
+    q: str = Query(..., min_length=1, max_length=100, description="Début du symbole ou du nom de l'entreprise"),
+    limit: int = Query(10, ge=1, le=50, description="Nombre de résultats à retourner"),
+    active_only: bool = Query(True, description="Limiter aux symboles actifs"),
+    db: Session = Depends(get_db)
+):
+    """Recherche instantanée classée (symbole exact, préfixe du symbole, du nom, d'un mot, sous-chaîne, approchant)"""
+    try:
+        return get_symbol_index(db).search(q, limit=limit, active_only=active_only)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la recherche: {str(e)}")
 
@@ -90,6 +108,7 @@ def create_symbol_metadata(symbol_data: SymbolMetadataCreate, db: Session = Depe
         db.add(new_metadata)
         db.commit()
         db.refresh(new_metadata)
+        invalidate_symbol_index()
         
         return new_metadata
     except HTTPException:
@@ -117,6 +136,7 @@ def update_symbol_metadata(
         
         db.commit()
         db.refresh(symbol_metadata)
+        invalidate_symbol_index()
         
         return symbol_metadata
     except HTTPException:
@@ -135,6 +155,7 @@ def delete_symbol_metadata(symbol: str, db: Session = Depends(get_db)):
         
         db.delete(symbol_metadata)
         db.commit()
+        invalidate_symbol_index()
         
         return {"message": f"Métadonnées supprimées pour le symbole {symbol}"}
     except HTTPException:
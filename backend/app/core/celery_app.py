@@ -2,6 +2,7 @@
 Configuration Celery pour les tâches asynchrones
 """
 from celery import Celery
+from celery.schedules import crontab
 from app.core.config import settings
 
 # Configuration Celery
@@ -10,26 +11,16 @@ celery_app = Celery(
     broker=f"redis://{settings.redis_host}:{settings.redis_port}/{settings.redis_db}",
     backend=f"redis://{settings.redis_host}:{settings.redis_port}/{settings.redis_db}",
     include=[
-        "app.tasks.screener_tasks",
-        "app.tasks.simple_screener_tasks", # Added simplified screener
-        "app.tasks.ultra_simple_screener_tasks", # Added ultra-simplified screener
-        "app.tasks.demo_screener_tasks", # Added demo screener
-        "app.tasks.real_screener_tasks", # Added real screener
-        "app.tasks.real_screener_limited_tasks", # Added limited real screener
-        "app.tasks.real_screener_fixed_tasks", # Added fixed real screener
-        "app.tasks.ultra_simple_real_tasks", # Added ultra-simple real screener
-        "app.tasks.full_screener_tasks", # Added full screener
-        "app.tasks.full_screener_limited_tasks", # Added full screener limited
-        "app.tasks.full_screener_simple_tasks", # Added full screener simple
-        "app.tasks.full_screener_ml_tasks", # Added full screener ML
-        "app.tasks.full_screener_ml_limited_tasks", # Added full screener ML limited
-        "app.tasks.full_screener_ml_web_tasks", # Added full screener ML web
+        "app.tasks.screener_tasks", # Pipeline unique de screener (tous les modes)
+        "app.tasks.shap_tasks", # Précalcul des explications SHAP
+        "app.tasks.training_tasks", # Entraînements soumis par l'API
         "app.tasks.test_tasks", # Added for testing
+        "app.tasks.maintenance_tasks", # Maintenance (partitions annuelles, magasin de features, rétention des modèles)
     ]
 )
 
 # Import des tâches pour les enregistrer
-from app.tasks import screener_tasks, test_tasks, simple_screener_tasks, ultra_simple_screener_tasks, demo_screener_tasks, real_screener_tasks, real_screener_limited_tasks, real_screener_fixed_tasks, ultra_simple_real_tasks, full_screener_tasks, full_screener_limited_tasks, full_screener_simple_tasks, full_screener_ml_tasks, full_screener_ml_limited_tasks, full_screener_ml_web_tasks
+from app.tasks import screener_tasks, shap_tasks, training_tasks, test_tasks, maintenance_tasks
 
 # Configuration des tâches
 celery_app.conf.update(
@@ -49,5 +40,21 @@ celery_app.conf.update(
 # Configuration des résultats
 celery_app.conf.result_expires = 3600  # 1 heure
 
+# Tâches périodiques (celery beat)
+celery_app.conf.beat_schedule = {
+    "ensure-future-partitions": {
+        "task": "ensure_future_partitions",
+        "schedule": crontab(minute=0, hour=3, day_of_month=1),  # le 1er de chaque mois
+    },
+    "refresh-feature-store": {
+        "task": "refresh_feature_store",
+        "schedule": crontab(minute=30, hour=6),  # chaque nuit, après le calcul des indicateurs
+    },
+    "prune-model-registry": {
+        "task": "prune_model_registry",
+        "schedule": crontab(minute=0, hour=4),  # chaque nuit, hors des runs du screener
+    },
+}
+
 if __name__ == "__main__":
     celery_app.start()
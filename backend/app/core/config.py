@@ -21,11 +21,28 @@ class Settings(BaseSettings):
     db_pool_size: int = 10
     db_max_overflow: int = 20
     
+    # Accès asynchrone (asyncpg) pour les routes de lecture les plus sollicitées
+    db_async_enabled: bool = False
+    db_async_pool_size: int = 20
+    db_async_max_overflow: int = 80
+    
+    # Partitionnement par année des grandes tables
+    db_partition_years_ahead: int = 2  # Partitions annuelles créées à l'avance (tables partitionnées)
+    db_partition_years_back: int = 25  # Années passées couvertes par les partitions d'une base neuve
+    
+    # Type des colonnes d'indicateurs : "numeric" (DECIMAL d'origine), "double" ou "real"
+    # (à changer après scripts/migrate_float_columns.py)
+    db_indicator_column_type: str = "numeric"
+    
     # URL de connexion complète (générée automatiquement)
     @property
     def database_url(self) -> str:
         return f"postgresql://{self.db_user}:{quote_plus(self.db_password)}@{self.db_host}:{self.db_port}/{self.db_name}"
     
+    @property
+    def async_database_url(self) -> str:
+        return f"postgresql+asyncpg://{self.db_user}:{quote_plus(self.db_password)}@{self.db_host}:{self.db_port}/{self.db_name}"
+    
     # Configuration Redis
     redis_host: str = "localhost"
     redis_port: int = 6379
@@ -44,6 +61,12 @@ class Settings(BaseSettings):
     api_port: int = 8000
     api_workers: int = 1
     api_reload: bool = True
+    api_threadpool_size: int = 40  # Threads pour les routes synchrones (ORM)
+    api_cpu_workers: int = 2  # Calculs longs (entraînement) exécutés simultanément par l'API
+    api_gzip_minimum_size: int = 1024  # Taille (octets) à partir de laquelle les réponses sont compressées
+    api_batch_max_symbols: int = 200  # Symboles acceptés par requête groupée (/data/batch)
+    export_batch_size: int = 50000  # Lignes par lot (row group Parquet / RecordBatch Arrow) des exports
+    symbol_search_refresh_seconds: float = 30.0  # Intervalle de vérification de la version de symbol_metadata
     
     # Configuration de sécurité
     secret_key: str = "your-super-secret-key-change-this-in-production"
@@ -57,7 +80,35 @@ class Settings(BaseSettings):
     ml_models_path: str = "./models"
     ml_max_features: int = 1000
     ml_training_batch_size: int = 32
-    ml_prediction_batch_size: int = 100
+    ml_prediction_batch_size: int = 100  # Taille du tampon avant écriture groupée des prédictions
+    prediction_sink_flush_seconds: float = 5.0  # Âge maximal du tampon de prédictions avant écriture
+    shap_explainer_cache_size: int = 32  # Nombre d'explainers SHAP gardés en mémoire (un par modèle)
+    shap_precompute_top_k: int = 20  # Opportunités expliquées en arrière-plan après chaque run (0 = désactivé)
+    ml_evaluation_policy: str = "oob"  # Évaluation à l'entraînement : oob, timeseries, kfold (5 forêts de plus) ou none
+    ml_cv_folds: int = 5  # Plis des politiques timeseries et kfold
+    ml_n_jobs: int = -1  # Cœurs utilisés par les forêts et la validation croisée (-1 : tous)
+    ml_inference_engine: str = "flat"  # Prédiction des forêts : "flat" (arbres aplatis, cf. tree_inference) ou "sklearn"
+    ml_flat_model_cache_size: int = 256  # Modèles aplatis (et scalers) gardés en mémoire par processus
+    ml_mmap_artifacts: bool = True  # Forêts aplaties enregistrées sans compression et projetées en mémoire (mmap) : une copie partagée par machine
+    model_retention_versions: int = 3  # Versions gardées par nom de modèle ; les plus anciennes sont désactivées et leurs fichiers supprimés
+    model_retention_days: int = 30  # Âge minimal d'une version avant suppression de ses fichiers
+    model_orphan_grace_hours: int = 6  # Âge minimal d'un fichier non référencé (ou temporaire) avant suppression
+    lightgbm_dataset_cache_enabled: bool = True  # Réutiliser les lgb.Dataset binaires (découpage des features en classes)
+    lightgbm_dataset_cache_path: str = "./models/datasets"  # Répertoire des lgb.Dataset binaires
+    lightgbm_tuning_trials: int = 27  # Configurations tirées au premier tour de la recherche LightGBM
+    lightgbm_tuning_eta: int = 3  # Facteur du successive halving (1/eta des essais gardés, budget x eta)
+    lightgbm_tuning_min_rounds: int = 50  # Itérations de boosting du premier tour
+    lightgbm_tuning_max_rounds: int = 1000  # Itérations de boosting du dernier tour
+    lightgbm_tuning_workers: int = 4  # Processus exécutant les essais en parallèle
+    lightgbm_tuning_sector_symbols: int = 20  # Symboles empilés pour une recherche au niveau du secteur
+    feature_store_enabled: bool = True  # Lire les features précalculées (feature_vectors, si la table a été créée par scripts/migrate_feature_store.py) avant de les recalculer
+    feature_store_overlap_days: int = 5  # Dernières dates recalculées à chaque rafraîchissement (indicateurs tardifs)
+    
+    # Configuration du screener
+    screener_concurrency: int = 1  # Nombre de symboles traités en parallèle par exécution
+    screener_evaluation_policy: str = "none"  # Évaluation des modèles entraînés par le screener (cf. ml_evaluation_policy)
+    pooled_model_algorithm: str = "lightgbm"  # Modèle poolé (mode pooled) : "lightgbm" ou "random_forest"
+    pooled_training_chunk_symbols: int = 50  # Symboles lus par lot pour construire le panel du modèle poolé
     
     # Configuration des corrélations
     correlation_window_sizes: List[int] = [5, 20, 60]
@@ -2,6 +2,7 @@ from sqlalchemy import create_engine, MetaData
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import QueuePool
+from contextlib import contextmanager
 import redis
 from .config import settings
 
@@ -38,6 +39,57 @@ def get_db():
         db.close()
 
 
+@contextmanager
+def get_db_session():
+    """Context manager pour les sessions de base de données hors requêtes HTTP (tâches, scripts)"""
+    db = SessionLocal()
+    try:
+        yield db
+    except Exception as e:
+        db.rollback()
+        raise e
+    finally:
+        db.close()
+
+
+# Moteur asynchrone (asyncpg), créé à la première utilisation si settings.db_async_enabled
+_async_engine = None
+_async_session_factory = None
+
+
+def get_async_session_factory():
+    """Fabrique de sessions asynchrones (AsyncSession) sur un moteur asyncpg"""
+    global _async_engine, _async_session_factory
+    if _async_session_factory is None:
+        from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+        
+        _async_engine = create_async_engine(
+            settings.async_database_url,
+            pool_size=settings.db_async_pool_size,
+            max_overflow=settings.db_async_max_overflow,
+            pool_pre_ping=True,
+            pool_recycle=3600,
+            echo=settings.debug
+        )
+        _async_session_factory = async_sessionmaker(_async_engine, expire_on_commit=False, autoflush=False)
+    return _async_session_factory
+
+
+async def get_async_db():
+    """Dependency pour obtenir une session asynchrone (routes de lecture)"""
+    async with get_async_session_factory()() as db:
+        yield db
+
+
+async def close_async_db():
+    """Fermer les connexions du moteur asynchrone"""
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = None
+        _async_session_factory = None
+
+
 def get_redis():
     """Dependency pour obtenir le client Redis"""
     return redis_client
@@ -0,0 +1,48 @@
+"""
+Exécution des traitements bloquants hors de la boucle d'événements
+
+- les routes `def` (ORM synchrone) tournent dans le pool de threads d'AnyIO, borné par
+  settings.api_threadpool_size ;
+- les calculs longs (entraînement) passent par un pool dédié borné par settings.api_cpu_workers,
+  pour ne pas épuiser le pool des requêtes courantes, ou par une tâche Celery.
+"""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Optional
+
+from .config import settings
+
+_cpu_executor: Optional[ThreadPoolExecutor] = None
+
+
+def configure_threadpool():
+    """Borner le pool de threads utilisé par FastAPI pour les routes et dépendances synchrones"""
+    import anyio.to_thread
+
+    anyio.to_thread.current_default_thread_limiter().total_tokens = settings.api_threadpool_size
+
+
+def get_cpu_executor() -> ThreadPoolExecutor:
+    """Pool dédié aux calculs longs (créé à la première utilisation)"""
+    global _cpu_executor
+    if _cpu_executor is None:
+        _cpu_executor = ThreadPoolExecutor(
+            max_workers=max(1, settings.api_cpu_workers),
+            thread_name_prefix="aimarkets-cpu"
+        )
+    return _cpu_executor
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Exécuter une fonction bloquante dans le pool dédié sans bloquer la boucle d'événements"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_cpu_executor(), functools.partial(func, *args, **kwargs))
+
+
+def shutdown_executor():
+    """Arrêter le pool dédié (à l'arrêt de l'application)"""
+    global _cpu_executor
+    if _cpu_executor is not None:
+        _cpu_executor.shutdown(wait=False, cancel_futures=True)
+        _cpu_executor = None
@@ -0,0 +1,62 @@
+"""
+Validation HTTP (ETag / If-None-Match) des séries temporelles
+
+L'ETag d'une réponse dérive de la version des données du symbole (max(updated_at) et max(date)
+de chaque table lue, chacun lu en un parcours d'index : (symbol, updated_at) et (symbol, date))
+et des paramètres de la requête. Un client qui renvoie l'ETag reçoit un 304 sans que la série
+soit relue. Un INSERT ou UPDATE (trigger updated_at) change la version, de même que la
+suppression des dernières séances ; la purge d'anciennes lignes ne la change pas.
+"""
+import hashlib
+from typing import Dict, Sequence
+
+from fastapi import Request, Response, status
+from sqlalchemy import func, select
+
+from app.core.config import settings
+
+# Le client garde la réponse mais la revalide à chaque affichage
+CACHE_CONTROL = "private, no-cache"
+
+
+def build_version_query(models: Sequence, symbol: str):
+    """Requête retournant (max(updated_at), max(date)) du symbole pour chaque table"""
+    columns = []
+    for model in models:
+        columns.append(select(func.max(model.updated_at)).where(model.symbol == symbol.upper()).scalar_subquery())
+        columns.append(select(func.max(model.date)).where(model.symbol == symbol.upper()).scalar_subquery())
+    return select(*columns)
+
+
+def compute_etag(version, request: Request) -> str:
+    """ETag faible dérivé de la version des données, du chemin et des paramètres de la requête"""
+    key = repr((
+        settings.app_version,
+        tuple(version),
+        request.url.path,
+        sorted(request.query_params.multi_items()),
+    ))
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Comparaison faible de l'ETag avec l'en-tête If-None-Match"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    candidates = [value.strip() for value in header.split(",")]
+    return any((value[2:] if value.startswith("W/") else value) == opaque for value in candidates)
+
+
+def cache_headers(etag: str) -> Dict[str, str]:
+    """En-têtes de validation à joindre aux réponses 200"""
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    """Réponse 304 sans corps"""
+    return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=cache_headers(etag))
@@ -0,0 +1,116 @@
+"""
+Partitionnement par année (RANGE) des grandes tables de séries temporelles
+
+Une partition par année civile plus une partition DEFAULT : les requêtes filtrées sur la date
+ne lisent que les partitions concernées, et une année ancienne s'archive en détachant sa
+partition (elle devient une table ordinaire, à exporter ou supprimer).
+
+PostgreSQL refuse de créer la partition d'une année si la partition DEFAULT contient déjà des
+lignes de cette année : la partition DEFAULT est alors détachée, l'année créée, ses lignes
+déplacées, puis la partition DEFAULT rattachée, dans la transaction de l'appelant.
+"""
+from datetime import date
+from typing import List, Optional
+
+from sqlalchemy import text
+
+from .config import settings
+
+# Table partitionnée -> colonne de partitionnement
+PARTITIONED_TABLES = {
+    "historical_data": "date",
+    "technical_indicators": "date",
+    "sentiment_indicators": "date",
+    "ml_predictions": "prediction_date",
+}
+
+
+def partition_name(table: str, year: int) -> str:
+    return f"{table}_y{year}"
+
+
+def is_partitioned(conn, table: str) -> bool:
+    """Vrai si la table est déjà une table partitionnée"""
+    return conn.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_partitioned_table p
+            JOIN pg_class c ON c.oid = p.partrelid
+            JOIN pg_namespace n ON n.oid = c.relnamespace
+            WHERE n.nspname = 'public' AND c.relname = :table
+        )
+    """), {"table": table}).scalar()
+
+
+def create_year_partition(conn, table: str, year: int):
+    """
+    Créer la partition [1er janvier year, 1er janvier year + 1) si elle n'existe pas, en y
+    déplaçant les lignes de l'année déjà reçues par la partition DEFAULT
+    """
+    name = partition_name(table, year)
+    if conn.execute(text("SELECT to_regclass(:name) IS NOT NULL"), {"name": f"public.{name}"}).scalar():
+        return
+
+    column = PARTITIONED_TABLES[table]
+    bounds = f"{column} >= '{year}-01-01' AND {column} < '{year + 1}-01-01'"
+    default = f"{table}_default"
+    has_default = conn.execute(text("""
+        SELECT EXISTS (
+            SELECT 1 FROM pg_inherits i
+            JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = CAST(:table AS regclass) AND c.relname = :default
+        )
+    """), {"table": f"public.{table}", "default": default}).scalar()
+    rows_in_default = has_default and conn.execute(
+        text(f"SELECT EXISTS (SELECT 1 FROM public.{default} WHERE {bounds})")
+    ).scalar()
+
+    if rows_in_default:
+        conn.execute(text(f"ALTER TABLE public.{table} DETACH PARTITION public.{default}"))
+
+    conn.execute(text(f"""
+        CREATE TABLE public.{name}
+        PARTITION OF public.{table}
+        FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')
+    """))
+
+    if rows_in_default:
+        # Partition DEFAULT détachée : les lignes insérées dans la table vont dans la nouvelle partition
+        conn.execute(text(f"INSERT INTO public.{table} SELECT * FROM public.{default} WHERE {bounds}"))
+        conn.execute(text(f"DELETE FROM public.{default} WHERE {bounds}"))
+        conn.execute(text(f"ALTER TABLE public.{table} ATTACH PARTITION public.{default} DEFAULT"))
+
+
+def create_default_partition(conn, table: str):
+    """Partition recevant les dates hors des années créées"""
+    conn.execute(text(f"CREATE TABLE IF NOT EXISTS public.{table}_default PARTITION OF public.{table} DEFAULT"))
+
+
+def ensure_year_partitions(conn, table: str, first_year: int, years_ahead: Optional[int] = None) -> List[str]:
+    """Créer les partitions de first_year à l'année courante + years_ahead"""
+    years_ahead = settings.db_partition_years_ahead if years_ahead is None else years_ahead
+    last_year = date.today().year + years_ahead
+    for year in range(first_year, last_year + 1):
+        create_year_partition(conn, table, year)
+    return [partition_name(table, year) for year in range(first_year, last_year + 1)]
+
+
+def ensure_future_partitions(conn, years_ahead: Optional[int] = None) -> List[str]:
+    """Créer les partitions des années à venir de toutes les tables déjà partitionnées"""
+    created = []
+    for table in PARTITIONED_TABLES:
+        if is_partitioned(conn, table):
+            created.extend(ensure_year_partitions(conn, table, date.today().year, years_ahead))
+    return created
+
+
+def detach_year_partition(conn, table: str, year: int) -> str:
+    """Détacher la partition d'une année (archivage) ; elle reste disponible comme table ordinaire"""
+    name = partition_name(table, year)
+    conn.execute(text(f"ALTER TABLE public.{table} DETACH PARTITION public.{name}"))
+    return name
+
+
+def create_initial_partitions(target, connection, **kw):
+    """Écouteur after_create des modèles partitionnés : partitions des années courantes et DEFAULT"""
+    ensure_year_partitions(connection, target.name, date.today().year - settings.db_partition_years_back)
+    create_default_partition(connection, target.name)
@@ -0,0 +1,81 @@
+"""
+Sérialisation rapide des séries temporelles
+
+Les routes de liste acceptent format=columnar (JSON orienté colonnes, encodé par orjson) ou
+format=arrow (flux Arrow IPC). Les colonnes sont lues brutes, les Numeric convertis en double
+précision par PostgreSQL : ni objets ORM, ni validation Pydantic ligne par ligne.
+"""
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from fastapi import HTTPException, Response, status
+from sqlalchemy import Float, Numeric, cast
+
+# Valeurs acceptées par le paramètre de requête "format"
+RESPONSE_FORMAT_PATTERN = "^(json|columnar|arrow)$"
+ARROW_MEDIA_TYPE = "application/vnd.apache.arrow.stream"
+
+
+def raw_columns(model, exclude: Iterable[str] = ()) -> list:
+    """Colonnes d'une table à sélectionner telles quelles (Numeric convertis en double précision)"""
+    columns = []
+    for column in model.__table__.columns:
+        if column.name in exclude:
+            continue
+        if isinstance(column.type, Numeric) and not isinstance(column.type, Float):
+            columns.append(cast(column, Float).label(column.name))
+        else:
+            columns.append(column)
+    return columns
+
+
+def rows_to_columns(keys: Sequence[str], rows: Sequence[Sequence[Any]]) -> Dict[str, List[Any]]:
+    """Transposer des lignes en colonnes (les Decimal restants deviennent des float)"""
+    if not rows:
+        return {key: [] for key in keys}
+
+    columns = {}
+    for key, values in zip(keys, zip(*rows)):
+        values = list(values)
+        if any(isinstance(value, Decimal) for value in values):
+            values = [float(value) if value is not None else None for value in values]
+        columns[key] = values
+    return columns
+
+
+def _arrow_ipc_bytes(columns: Dict[str, List[Any]]) -> bytes:
+    """Encoder des colonnes en flux Arrow IPC"""
+    try:
+        import pyarrow as pa
+    except ImportError:
+        raise HTTPException(
+            status_code=status.HTTP_406_NOT_ACCEPTABLE,
+            detail="Format arrow indisponible: pyarrow n'est pas installé"
+        )
+
+    table = pa.table(columns)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def orjson_response(payload: Any, headers: Optional[Dict[str, str]] = None) -> Response:
+    """Réponse JSON encodée par orjson (dates ISO, NaN -> null), sans validation Pydantic"""
+    import orjson
+
+    return Response(content=orjson.dumps(payload), media_type="application/json", headers=headers)
+
+
+def columnar_response(keys: Sequence[str], rows: Sequence[Sequence[Any]], response_format: str,
+                      headers: Optional[Dict[str, str]] = None, **metadata) -> Response:
+    """
+    Réponse orientée colonnes : {"count": n, "columns": {colonne: [valeurs]}, ...métadonnées}
+    en JSON (orjson, NaN -> null), ou table Arrow IPC si response_format == "arrow".
+    """
+    columns = rows_to_columns(keys, rows)
+
+    if response_format == "arrow":
+        return Response(content=_arrow_ipc_bytes(columns), media_type=ARROW_MEDIA_TYPE, headers=headers)
+
+    return orjson_response({**metadata, "count": len(rows), "columns": columns}, headers)
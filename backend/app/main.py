@@ -1,11 +1,13 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from contextlib import asynccontextmanager
 import uvicorn
 
 from .core.config import settings
-from .core.database import init_db, close_db
+from .core.database import init_db, close_db, close_async_db
+from .core.executor import configure_threadpool, shutdown_executor
 from .api.endpoints import data, target_parameters, ml_models, lightgbm_models, lightgbm_test, symbol_metadata
 
 
@@ -16,12 +18,15 @@ async def lifespan(app: FastAPI):
     print("🚀 Démarrage de l'application AIMarkets...")
     init_db()
     print("✅ Base de données initialisée")
+    configure_threadpool()
     
     yield
     
     # Shutdown
     print("🛑 Arrêt de l'application AIMarkets...")
+    shutdown_executor()
     close_db()
+    await close_async_db()
     print("✅ Connexions fermées")
 
 
@@ -44,6 +49,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compression des réponses volumineuses (séries temporelles)
+app.add_middleware(GZipMiddleware, minimum_size=settings.api_gzip_minimum_size)
+
 # Middleware de sécurité
 app.add_middleware(
     TrustedHostMiddleware,
@@ -73,6 +81,22 @@ async def health_check():
     }
 
 
+# Lectures asynchrones (asyncpg) : montées avant les routes synchrones pour être prioritaires
+if settings.db_async_enabled:
+    from app.api.endpoints import async_reads
+
+    app.include_router(
+        async_reads.data_router,
+        prefix="/api/v1",
+        tags=["Données"]
+    )
+
+    app.include_router(
+        async_reads.screener_router,
+        prefix="/api/v1/screener",
+        tags=["Screener"]
+    )
+
 # Inclusion des routes des endpoints
 app.include_router(
     data.router,
@@ -1,7 +1,19 @@
-from sqlalchemy import Column, Integer, String, Date, DECIMAL, BIGINT, TEXT, BOOLEAN, JSON, ForeignKey, TIMESTAMP
+from sqlalchemy import Column, Integer, String, Date, DECIMAL, BIGINT, TEXT, BOOLEAN, JSON, ForeignKey, TIMESTAMP, Index, UniqueConstraint, event
+from sqlalchemy.dialects.postgresql import ARRAY, DOUBLE_PRECISION, REAL
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..core.database import Base
+from ..core.config import settings
+from ..core.partitioning import create_initial_partitions
+
+
+def indicator_numeric(precision: int, scale: int):
+    """Type des colonnes d'indicateurs : DECIMAL d'origine, ou flottant après scripts/migrate_float_columns.py"""
+    if settings.db_indicator_column_type == "double":
+        return DOUBLE_PRECISION()
+    if settings.db_indicator_column_type == "real":
+        return REAL()
+    return DECIMAL(precision, scale)
 
 
 class SymbolMetadata(Base):
@@ -23,9 +35,10 @@ class SymbolMetadata(Base):
 class HistoricalData(Base):
     __tablename__ = "historical_data"
     
-    id = Column(Integer, primary_key=True, index=True)
+    # Clé primaire (id, date) : la colonne de partitionnement doit faire partie de la clé
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     symbol = Column(String(10), nullable=False, index=True)
-    date = Column(Date, nullable=False, index=True)
+    date = Column(Date, primary_key=True, nullable=False, index=True)
     open = Column(DECIMAL(10, 4), nullable=False)
     high = Column(DECIMAL(10, 4), nullable=False)
     low = Column(DECIMAL(10, 4), nullable=False)
@@ -35,7 +48,11 @@ class HistoricalData(Base):
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
-    __table_args__ = ({"schema": "public"},)
+    __table_args__ = (
+        UniqueConstraint("symbol", "date", name="historical_data_symbol_date_key"),
+        Index("ix_historical_data_symbol_updated_at", "symbol", "updated_at"),
+        {"schema": "public", "postgresql_partition_by": "RANGE (date)"},
+    )
 
 
 class SentimentData(Base):
@@ -75,137 +92,147 @@ class SentimentData(Base):
 class TechnicalIndicators(Base):
     __tablename__ = "technical_indicators"
     
-    id = Column(Integer, primary_key=True, index=True)
+    # Clé primaire (id, date) : la colonne de partitionnement doit faire partie de la clé
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     symbol = Column(String(10), nullable=False, index=True)
-    date = Column(Date, nullable=False, index=True)
+    date = Column(Date, primary_key=True, nullable=False, index=True)
     
     # Moyennes mobiles
-    sma_5 = Column(DECIMAL(10, 4))
-    sma_10 = Column(DECIMAL(10, 4))
-    sma_20 = Column(DECIMAL(10, 4))
-    sma_50 = Column(DECIMAL(10, 4))
-    sma_200 = Column(DECIMAL(10, 4))
-    ema_5 = Column(DECIMAL(10, 4))
-    ema_10 = Column(DECIMAL(10, 4))
-    ema_20 = Column(DECIMAL(10, 4))
-    ema_50 = Column(DECIMAL(10, 4))
-    ema_200 = Column(DECIMAL(10, 4))
+    sma_5 = Column(indicator_numeric(10, 4))
+    sma_10 = Column(indicator_numeric(10, 4))
+    sma_20 = Column(indicator_numeric(10, 4))
+    sma_50 = Column(indicator_numeric(10, 4))
+    sma_200 = Column(indicator_numeric(10, 4))
+    ema_5 = Column(indicator_numeric(10, 4))
+    ema_10 = Column(indicator_numeric(10, 4))
+    ema_20 = Column(indicator_numeric(10, 4))
+    ema_50 = Column(indicator_numeric(10, 4))
+    ema_200 = Column(indicator_numeric(10, 4))
     
     # Indicateurs de momentum
-    rsi_14 = Column(DECIMAL(5, 2))
-    macd = Column(DECIMAL(10, 4))
-    macd_signal = Column(DECIMAL(10, 4))
-    macd_histogram = Column(DECIMAL(10, 4))
-    stochastic_k = Column(DECIMAL(5, 2))
-    stochastic_d = Column(DECIMAL(5, 2))
-    williams_r = Column(DECIMAL(5, 2))
-    roc = Column(DECIMAL(10, 4))
-    cci = Column(DECIMAL(10, 4))
+    rsi_14 = Column(indicator_numeric(5, 2))
+    macd = Column(indicator_numeric(10, 4))
+    macd_signal = Column(indicator_numeric(10, 4))
+    macd_histogram = Column(indicator_numeric(10, 4))
+    stochastic_k = Column(indicator_numeric(5, 2))
+    stochastic_d = Column(indicator_numeric(5, 2))
+    williams_r = Column(indicator_numeric(5, 2))
+    roc = Column(indicator_numeric(10, 4))
+    cci = Column(indicator_numeric(10, 4))
     
     # Bollinger Bands
-    bb_upper = Column(DECIMAL(10, 4))
-    bb_middle = Column(DECIMAL(10, 4))
-    bb_lower = Column(DECIMAL(10, 4))
-    bb_width = Column(DECIMAL(10, 4))
-    bb_position = Column(DECIMAL(5, 4))
+    bb_upper = Column(indicator_numeric(10, 4))
+    bb_middle = Column(indicator_numeric(10, 4))
+    bb_lower = Column(indicator_numeric(10, 4))
+    bb_width = Column(indicator_numeric(10, 4))
+    bb_position = Column(indicator_numeric(5, 4))
     
     # Volume
-    obv = Column(DECIMAL(20, 0))
-    volume_roc = Column(DECIMAL(10, 4))
-    volume_sma_20 = Column(DECIMAL(20, 0))
+    obv = Column(indicator_numeric(20, 0))
+    volume_roc = Column(indicator_numeric(10, 4))
+    volume_sma_20 = Column(indicator_numeric(20, 0))
     
     # ATR
-    atr_14 = Column(DECIMAL(10, 4))
+    atr_14 = Column(indicator_numeric(10, 4))
     
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
-    __table_args__ = ({"schema": "public"},)
+    __table_args__ = (
+        UniqueConstraint("symbol", "date", name="technical_indicators_symbol_date_key"),
+        Index("ix_technical_indicators_symbol_updated_at", "symbol", "updated_at"),
+        {"schema": "public", "postgresql_partition_by": "RANGE (date)"},
+    )
 
 
 class SentimentIndicators(Base):
     __tablename__ = "sentiment_indicators"
     
-    id = Column(Integer, primary_key=True, index=True)
+    # Clé primaire (id, date) : la colonne de partitionnement doit faire partie de la clé
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     symbol = Column(String(10), nullable=False, index=True)
-    date = Column(Date, nullable=False, index=True)
+    date = Column(Date, primary_key=True, nullable=False, index=True)
     
     # Base Sentiment Indicators
-    sentiment_score_normalized = Column(DECIMAL(10, 4))
+    sentiment_score_normalized = Column(indicator_numeric(10, 4))
     
     # Sentiment Momentum
-    sentiment_momentum_1d = Column(DECIMAL(10, 4))
-    sentiment_momentum_3d = Column(DECIMAL(10, 4))
-    sentiment_momentum_7d = Column(DECIMAL(10, 4))
-    sentiment_momentum_14d = Column(DECIMAL(10, 4))
+    sentiment_momentum_1d = Column(indicator_numeric(10, 4))
+    sentiment_momentum_3d = Column(indicator_numeric(10, 4))
+    sentiment_momentum_7d = Column(indicator_numeric(10, 4))
+    sentiment_momentum_14d = Column(indicator_numeric(10, 4))
     
     # Sentiment Volatility
-    sentiment_volatility_3d = Column(DECIMAL(10, 4))
-    sentiment_volatility_7d = Column(DECIMAL(10, 4))
-    sentiment_volatility_14d = Column(DECIMAL(10, 4))
-    sentiment_volatility_30d = Column(DECIMAL(10, 4))
+    sentiment_volatility_3d = Column(indicator_numeric(10, 4))
+    sentiment_volatility_7d = Column(indicator_numeric(10, 4))
+    sentiment_volatility_14d = Column(indicator_numeric(10, 4))
+    sentiment_volatility_30d = Column(indicator_numeric(10, 4))
     
     # Sentiment Moving Averages
-    sentiment_sma_3 = Column(DECIMAL(10, 4))
-    sentiment_sma_7 = Column(DECIMAL(10, 4))
-    sentiment_sma_14 = Column(DECIMAL(10, 4))
-    sentiment_sma_30 = Column(DECIMAL(10, 4))
-    sentiment_ema_3 = Column(DECIMAL(10, 4))
-    sentiment_ema_7 = Column(DECIMAL(10, 4))
-    sentiment_ema_14 = Column(DECIMAL(10, 4))
-    sentiment_ema_30 = Column(DECIMAL(10, 4))
+    sentiment_sma_3 = Column(indicator_numeric(10, 4))
+    sentiment_sma_7 = Column(indicator_numeric(10, 4))
+    sentiment_sma_14 = Column(indicator_numeric(10, 4))
+    sentiment_sma_30 = Column(indicator_numeric(10, 4))
+    sentiment_ema_3 = Column(indicator_numeric(10, 4))
+    sentiment_ema_7 = Column(indicator_numeric(10, 4))
+    sentiment_ema_14 = Column(indicator_numeric(10, 4))
+    sentiment_ema_30 = Column(indicator_numeric(10, 4))
     
     # Sentiment Oscillators
-    sentiment_rsi_14 = Column(DECIMAL(10, 4))
-    sentiment_macd = Column(DECIMAL(10, 4))
-    sentiment_macd_signal = Column(DECIMAL(10, 4))
-    sentiment_macd_histogram = Column(DECIMAL(10, 4))
+    sentiment_rsi_14 = Column(indicator_numeric(10, 4))
+    sentiment_macd = Column(indicator_numeric(10, 4))
+    sentiment_macd_signal = Column(indicator_numeric(10, 4))
+    sentiment_macd_histogram = Column(indicator_numeric(10, 4))
     
     # News Volume Indicators
-    news_volume_sma_7 = Column(DECIMAL(10, 4))
-    news_volume_sma_14 = Column(DECIMAL(10, 4))
-    news_volume_sma_30 = Column(DECIMAL(10, 4))
-    news_volume_roc_7d = Column(DECIMAL(10, 4))
-    news_volume_roc_14d = Column(DECIMAL(10, 4))
+    news_volume_sma_7 = Column(indicator_numeric(10, 4))
+    news_volume_sma_14 = Column(indicator_numeric(10, 4))
+    news_volume_sma_30 = Column(indicator_numeric(10, 4))
+    news_volume_roc_7d = Column(indicator_numeric(10, 4))
+    news_volume_roc_14d = Column(indicator_numeric(10, 4))
     
     # Sentiment Distribution Ratios
-    news_positive_ratio = Column(DECIMAL(10, 4))
-    news_negative_ratio = Column(DECIMAL(10, 4))
-    news_neutral_ratio = Column(DECIMAL(10, 4))
-    news_sentiment_quality = Column(DECIMAL(10, 4))
+    news_positive_ratio = Column(indicator_numeric(10, 4))
+    news_negative_ratio = Column(indicator_numeric(10, 4))
+    news_neutral_ratio = Column(indicator_numeric(10, 4))
+    news_sentiment_quality = Column(indicator_numeric(10, 4))
     
     # Short Interest Indicators
-    short_interest_momentum_5d = Column(DECIMAL(10, 4))
-    short_interest_momentum_10d = Column(DECIMAL(10, 4))
-    short_interest_momentum_20d = Column(DECIMAL(10, 4))
-    short_interest_volatility_7d = Column(DECIMAL(10, 4))
-    short_interest_volatility_14d = Column(DECIMAL(10, 4))
-    short_interest_volatility_30d = Column(DECIMAL(10, 4))
-    short_interest_sma_7 = Column(DECIMAL(10, 4))
-    short_interest_sma_14 = Column(DECIMAL(10, 4))
-    short_interest_sma_30 = Column(DECIMAL(10, 4))
+    short_interest_momentum_5d = Column(indicator_numeric(10, 4))
+    short_interest_momentum_10d = Column(indicator_numeric(10, 4))
+    short_interest_momentum_20d = Column(indicator_numeric(10, 4))
+    short_interest_volatility_7d = Column(indicator_numeric(10, 4))
+    short_interest_volatility_14d = Column(indicator_numeric(10, 4))
+    short_interest_volatility_30d = Column(indicator_numeric(10, 4))
+    short_interest_sma_7 = Column(indicator_numeric(10, 4))
+    short_interest_sma_14 = Column(indicator_numeric(10, 4))
+    short_interest_sma_30 = Column(indicator_numeric(10, 4))
     
     # Short Volume Indicators
-    short_volume_momentum_5d = Column(DECIMAL(10, 4))
-    short_volume_momentum_10d = Column(DECIMAL(10, 4))
-    short_volume_momentum_20d = Column(DECIMAL(10, 4))
-    short_volume_volatility_7d = Column(DECIMAL(10, 4))
-    short_volume_volatility_14d = Column(DECIMAL(10, 4))
-    short_volume_volatility_30d = Column(DECIMAL(10, 4))
+    short_volume_momentum_5d = Column(indicator_numeric(10, 4))
+    short_volume_momentum_10d = Column(indicator_numeric(10, 4))
+    short_volume_momentum_20d = Column(indicator_numeric(10, 4))
+    short_volume_volatility_7d = Column(indicator_numeric(10, 4))
+    short_volume_volatility_14d = Column(indicator_numeric(10, 4))
+    short_volume_volatility_30d = Column(indicator_numeric(10, 4))
     
     # Composite Sentiment Indicators
-    sentiment_strength_index = Column(DECIMAL(10, 4))
-    market_sentiment_index = Column(DECIMAL(10, 4))
-    sentiment_divergence = Column(DECIMAL(10, 4))
-    sentiment_acceleration = Column(DECIMAL(10, 4))
-    sentiment_trend_strength = Column(DECIMAL(10, 4))
-    sentiment_quality_index = Column(DECIMAL(10, 4))
-    sentiment_risk_score = Column(DECIMAL(10, 4))
+    sentiment_strength_index = Column(indicator_numeric(10, 4))
+    market_sentiment_index = Column(indicator_numeric(10, 4))
+    sentiment_divergence = Column(indicator_numeric(10, 4))
+    sentiment_acceleration = Column(indicator_numeric(10, 4))
+    sentiment_trend_strength = Column(indicator_numeric(10, 4))
+    sentiment_quality_index = Column(indicator_numeric(10, 4))
+    sentiment_risk_score = Column(indicator_numeric(10, 4))
     
     created_at = Column(TIMESTAMP, server_default=func.now())
     updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
     
-    __table_args__ = ({"schema": "public"},)
+    __table_args__ = (
+        UniqueConstraint("symbol", "date", name="sentiment_indicators_symbol_date_key"),
+        Index("ix_sentiment_indicators_symbol_updated_at", "symbol", "updated_at"),
+        {"schema": "public", "postgresql_partition_by": "RANGE (date)"},
+    )
 
 
 class CorrelationMatrices(Base):
@@ -296,16 +323,21 @@ class MLModels(Base):
     # Relation avec TargetParameters
     target_parameter = relationship("TargetParameters", back_populates="ml_models")
     
-    __table_args__ = ({"schema": "public"},)
+    __table_args__ = (
+        # Allocation des versions (cf. app/services/model_registry.py)
+        Index("ix_ml_models_name_version", "model_name", "model_version"),
+        {"schema": "public"},
+    )
 
 
 class MLPredictions(Base):
     __tablename__ = "ml_predictions"
     
-    id = Column(Integer, primary_key=True, index=True)
+    # Clé primaire (id, prediction_date) : la colonne de partitionnement doit faire partie de la clé
+    id = Column(Integer, primary_key=True, autoincrement=True, index=True)
     model_id = Column(Integer, ForeignKey('public.ml_models.id'), nullable=True)
     symbol = Column(String(10), nullable=False, index=True)
-    prediction_date = Column(Date, nullable=False, index=True)
+    prediction_date = Column(Date, primary_key=True, nullable=False, index=True)
     prediction_value = Column(DECIMAL(15, 8), nullable=False)
     prediction_class = Column(String(50), nullable=True)
     confidence = Column(DECIMAL(5, 4), nullable=False)
@@ -314,7 +346,15 @@ class MLPredictions(Base):
     created_at = Column(TIMESTAMP, server_default=func.now())
     created_by = Column(String(100), nullable=True)
     
-    __table_args__ = ({"schema": "public"},)
+    __table_args__ = (
+        # Cible des INSERT ... ON CONFLICT du puits de prédictions (cf. scripts/migrate_prediction_sink.py)
+        Index(
+            "uq_ml_predictions_run_model_date",
+            "screener_run_id", "model_id", "symbol", "prediction_date",
+            unique=True
+        ),
+        {"schema": "public", "postgresql_partition_by": "RANGE (prediction_date)"},
+    )
 
 
 class TradingSignals(Base):
@@ -400,3 +440,92 @@ class ScreenerResult(Base):
     created_at = Column(TIMESTAMP, server_default=func.now())
     
     __table_args__ = ({"schema": "public"},)
+
+
+class ShapExplanations(Base):
+    __tablename__ = "shap_explanations"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    model_id = Column(Integer, ForeignKey('public.ml_models.id'), nullable=False, index=True)
+    symbol = Column(String(10), nullable=False, index=True)
+    prediction_date = Column(Date, nullable=False, index=True)
+    prediction = Column(DECIMAL(15, 8), nullable=True)
+    base_value = Column(DECIMAL(15, 8), nullable=True)
+    explanations = Column(JSON, nullable=False)
+    screener_run_id = Column(Integer, ForeignKey('public.screener_runs.id'), nullable=True, index=True)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    
+    __table_args__ = (
+        Index("uq_shap_explanations_model_symbol_date", "model_id", "symbol", "prediction_date", unique=True),
+        {"schema": "public"},
+    )
+
+
+
+class FeatureSets(Base):
+    __tablename__ = "feature_sets"
+    
+    feature_set_version = Column(String(32), primary_key=True)
+    feature_names = Column(JSON, nullable=False)  # Ordre des valeurs dans feature_vectors.features
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    
+    __table_args__ = ({"schema": "public"},)
+
+
+class FeatureVectors(Base):
+    __tablename__ = "feature_vectors"
+    
+    # Clé (version, symbole, date) : dernier vecteur d'un symbole lu par un seul parcours d'index
+    feature_set_version = Column(String(32), ForeignKey('public.feature_sets.feature_set_version'), primary_key=True)
+    symbol = Column(String(10), primary_key=True)
+    date = Column(Date, primary_key=True)
+    features = Column(ARRAY(REAL), nullable=False)  # Vecteur float32 complet (cf. FEATURE_SET_COLUMNS)
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        Index("ix_feature_vectors_version_date", "feature_set_version", "date"),
+        {"schema": "public"},
+    )
+
+
+class LightGBMHyperparameters(Base):
+    __tablename__ = "lightgbm_hyperparameters"
+    
+    # Meilleurs paramètres trouvés par la recherche (cf. app/services/lightgbm_tuning.py),
+    # pour un symbole ou pour un secteur
+    id = Column(Integer, primary_key=True, index=True)
+    scope = Column(String(10), nullable=False)  # symbol, sector
+    scope_value = Column(String(100), nullable=False)
+    model_kind = Column(String(20), nullable=False)  # binary, multiclass, regression
+    params = Column(JSON, nullable=False)
+    metric = Column(String(30), nullable=False)
+    best_score = Column(DOUBLE_PRECISION, nullable=True)
+    best_iteration = Column(Integer, nullable=True)
+    trials = Column(Integer, nullable=True)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    updated_at = Column(TIMESTAMP, server_default=func.now(), onupdate=func.now())
+    
+    __table_args__ = (
+        UniqueConstraint("scope", "scope_value", "model_kind", name="uq_lightgbm_hyperparameters_scope_kind"),
+        {"schema": "public"},
+    )
+
+class ModelArtifacts(Base):
+    __tablename__ = "model_artifacts"
+    
+    # Index par contenu des fichiers des modèles (cf. app/services/model_registry.py) : un fichier
+    # identique à un fichier déjà indexé est enregistré comme lien physique vers celui-ci
+    id = Column(Integer, primary_key=True, index=True)
+    model_id = Column(Integer, ForeignKey('public.ml_models.id', ondelete="CASCADE"), nullable=False, index=True)
+    kind = Column(String(20), nullable=False)  # model, scaler, flat
+    path = Column(TEXT, nullable=False, unique=True)
+    sha256 = Column(String(64), nullable=False, index=True)
+    size_bytes = Column(BIGINT, nullable=False)
+    created_at = Column(TIMESTAMP, server_default=func.now())
+    
+    __table_args__ = ({"schema": "public"},)
+
+# Tables partitionnées par année (cf. app/core/partitioning.py et scripts/migrate_partitioning.py) :
+# create_all crée aussi leurs premières partitions
+for _partitioned_model in (HistoricalData, TechnicalIndicators, SentimentIndicators, MLPredictions):
+    event.listen(_partitioned_model.__table__, "after_create", create_initial_partitions)
@@ -346,6 +346,30 @@ class SentimentIndicatorsSchema(SentimentIndicatorsBase):
         from_attributes = True
 
 
+# === SCHÉMAS POUR LES REQUÊTES GROUPÉES ===
+
+class BatchSeriesRequest(BaseModel):
+    symbols: List[str] = Field(..., min_length=1, description="Symboles demandés")
+    dataset: str = Field(default="historical", description="Série demandée (historical, technical, sentiment)")
+    start_date: Optional[date] = Field(None, description="Date de début")
+    end_date: Optional[date] = Field(None, description="Date de fin")
+    columns: Optional[List[str]] = Field(None, description="Colonnes à retourner (toutes par défaut)")
+    limit_per_symbol: int = Field(default=250, ge=1, le=2000, description="Nombre maximum de lignes par symbole")
+    layout: str = Field(default="rows", description="Disposition de chaque série (rows, columnar)")
+
+    @validator('dataset')
+    def validate_dataset(cls, v):
+        if v not in ['historical', 'technical', 'sentiment']:
+            raise ValueError('dataset doit être historical, technical ou sentiment')
+        return v
+
+    @validator('layout')
+    def validate_layout(cls, v):
+        if v not in ['rows', 'columnar']:
+            raise ValueError('layout doit être rows ou columnar')
+        return v
+
+
 # === SCHÉMAS POUR LES RÉPONSES GÉNÉRIQUES ===
 
 class MessageResponse(BaseModel):
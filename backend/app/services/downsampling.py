@@ -0,0 +1,137 @@
+"""
+Réduction des séries pour les graphiques
+
+- agrégation OHLCV hebdomadaire ou mensuelle faite par PostgreSQL (date_trunc) : ouverture de
+  la première séance, plus haut / plus bas de la période, clôture de la dernière séance, volume
+  cumulé, VWAP pondéré par le volume ; les indicateurs sont ceux de la dernière séance. Le
+  volume cumulé est reconverti en bigint (SUM d'un bigint est un numeric, lu en Decimal que
+  orjson ne sait pas encoder) ;
+- décimation LTTB (Largest-Triangle-Three-Buckets) des séries quotidiennes : garde au plus
+  max_points lignes réelles en préservant la forme de la courbe de clôture.
+"""
+from datetime import date
+from typing import Any, Callable, List, Optional, Sequence
+
+from sqlalchemy import text
+
+# Résolutions acceptées par le paramètre de requête "resolution"
+RESOLUTION_PATTERN = "^(daily|weekly|monthly)$"
+RESOLUTION_UNITS = {"weekly": "week", "monthly": "month"}
+
+_BARS_CTE = """
+    WITH bars AS (
+        SELECT
+            date_trunc(:unit, date)::date AS period,
+            (array_agg(open ORDER BY date ASC))[1] AS open,
+            MAX(high) AS high,
+            MIN(low) AS low,
+            (array_agg(close ORDER BY date DESC))[1] AS close,
+            SUM(volume)::bigint AS volume,
+            SUM(vwap * volume) / NULLIF(SUM(CASE WHEN vwap IS NOT NULL THEN volume END), 0) AS vwap,
+            MAX(date) AS last_date
+        FROM historical_data
+        WHERE symbol = :symbol{filters}
+        GROUP BY 1
+    )
+"""
+
+
+def _bars_cte(symbol: str, resolution: str, start_date: Optional[date], end_date: Optional[date]):
+    """CTE des barres agrégées et ses paramètres"""
+    filters = ""
+    params = {"symbol": symbol.upper(), "unit": RESOLUTION_UNITS[resolution]}
+
+    if start_date:
+        filters += " AND date >= :start_date"
+        params["start_date"] = start_date
+
+    if end_date:
+        filters += " AND date <= :end_date"
+        params["end_date"] = end_date
+
+    return _BARS_CTE.format(filters=filters), params
+
+
+def build_resampled_ohlcv_query(symbol: str, resolution: str, start_date: Optional[date],
+                                end_date: Optional[date], limit: int, skip: int):
+    """Barres OHLCV agrégées par semaine ou par mois, de la plus récente à la plus ancienne"""
+    cte, params = _bars_cte(symbol, resolution, start_date, end_date)
+    sql = cte + """
+        SELECT period AS date, :symbol AS symbol,
+               open::float8 AS open, high::float8 AS high, low::float8 AS low, close::float8 AS close,
+               volume, vwap::float8 AS vwap
+        FROM bars
+        ORDER BY period DESC
+        LIMIT :limit OFFSET :skip
+    """
+    params.update({"limit": limit, "skip": skip})
+    return text(sql), params
+
+
+def build_resampled_combined_query(symbol: str, resolution: str, start_date: Optional[date],
+                                   end_date: Optional[date], limit: int, skip: int):
+    """Barres agrégées jointes aux indicateurs de la dernière séance de chaque période"""
+    cte, params = _bars_cte(symbol, resolution, start_date, end_date)
+    sql = cte + """
+        SELECT
+            b.period AS date,
+            :symbol AS symbol,
+            b.open, b.high, b.low, b.close, b.volume, b.vwap,
+            t.sma_5, t.sma_20, t.rsi_14, t.macd, t.bb_position, t.atr_14,
+            s.sentiment_score_normalized, s.sentiment_momentum_7d, s.sentiment_volatility_14d
+        FROM bars b
+        LEFT JOIN technical_indicators t ON t.symbol = :symbol AND t.date = b.last_date
+        LEFT JOIN sentiment_indicators s ON s.symbol = :symbol AND s.date = b.last_date
+        ORDER BY b.period DESC
+        LIMIT :limit OFFSET :skip
+    """
+    params.update({"limit": limit, "skip": skip})
+    return text(sql), params
+
+
+def lttb_indices(values: Sequence[Optional[float]], threshold: int) -> List[int]:
+    """
+    Indices des points gardés par LTTB pour une série régulièrement espacée.
+    Le premier et le dernier point sont toujours conservés.
+    """
+    n = len(values)
+    if threshold >= n or threshold < 3:
+        return list(range(n))
+
+    y = [float(v) if v is not None else 0.0 for v in values]
+    bucket_size = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+
+    for i in range(threshold - 2):
+        # Moyenne du seau suivant (point C du triangle)
+        next_start = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+        avg_x = (next_start + next_end - 1) / 2
+        avg_y = sum(y[next_start:next_end]) / max(next_end - next_start, 1)
+
+        # Point du seau courant formant le plus grand triangle avec A et C
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs((a - avg_x) * (y[j] - y[a]) - (a - j) * (avg_y - y[a]))
+            if area > best_area:
+                best, best_area = j, area
+
+        selected.append(best)
+        a = best
+
+    selected.append(n - 1)
+    return selected
+
+
+def downsample_rows(rows: Sequence[Any], max_points: Optional[int],
+                    value: Callable[[Any], Optional[float]]) -> List[Any]:
+    """Décimer des lignes triées par date décroissante (ordre des routes) en gardant leur ordre"""
+    if not max_points or len(rows) <= max_points:
+        return list(rows)
+
+    chronological = list(reversed(rows))
+    kept = [chronological[i] for i in lttb_indices([value(row) for row in chronological], max_points)]
+    return list(reversed(kept))
@@ -0,0 +1,153 @@
+"""
+Export en masse du panel historique + technique + sentiment (Parquet ou Arrow IPC)
+
+Les lignes sont lues par un curseur côté serveur (stream_results) et converties en
+RecordBatch Arrow de taille fixe : la mémoire utilisée ne dépend pas de la taille de l'export.
+Chaque lot est écrit puis rendu immédiatement sous forme d'octets (réponse HTTP en streaming
+ou fichier local).
+"""
+import io
+import logging
+from datetime import date
+from typing import Iterator, List, Optional
+
+from sqlalchemy import text
+
+from app.core.config import settings
+from app.core.database import get_db_session
+from app.services.feature_registry import TECHNICAL_FEATURE_COLUMNS, SENTIMENT_FEATURE_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("parquet", "arrow")
+EXPORT_MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+PRICE_COLUMNS = ["open", "high", "low", "close", "vwap"]
+
+
+def panel_schema():
+    """Schéma Arrow du panel exporté"""
+    import pyarrow as pa
+
+    return pa.schema(
+        [("symbol", pa.string()), ("date", pa.date32())]
+        + [(column, pa.float64()) for column in PRICE_COLUMNS]
+        + [("volume", pa.int64())]
+        + [(column, pa.float64()) for column in TECHNICAL_FEATURE_COLUMNS + SENTIMENT_FEATURE_COLUMNS]
+    )
+
+
+def build_panel_query(symbols: Optional[List[str]], start_date: Optional[date], end_date: Optional[date]):
+    """Requête du panel joint, triée par symbole puis date (valeurs numériques en double précision)"""
+    selected = (
+        ["h.symbol", "h.date"]
+        + [f"h.{column}::float8 AS {column}" for column in PRICE_COLUMNS]
+        + ["h.volume"]
+        + [f"t.{column}::float8 AS {column}" for column in TECHNICAL_FEATURE_COLUMNS]
+        + [f"s.{column}::float8 AS {column}" for column in SENTIMENT_FEATURE_COLUMNS]
+    )
+    sql = f"""
+        SELECT {', '.join(selected)}
+        FROM historical_data h
+        LEFT JOIN technical_indicators t ON h.symbol = t.symbol AND h.date = t.date
+        LEFT JOIN sentiment_indicators s ON h.symbol = s.symbol AND h.date = s.date
+        WHERE TRUE
+    """
+    params = {}
+
+    if symbols:
+        sql += " AND h.symbol = ANY(:symbols)"
+        params["symbols"] = [symbol.upper() for symbol in symbols]
+
+    if start_date:
+        sql += " AND h.date >= :start_date"
+        params["start_date"] = start_date
+
+    if end_date:
+        sql += " AND h.date <= :end_date"
+        params["end_date"] = end_date
+
+    sql += " ORDER BY h.symbol, h.date"
+    return text(sql), params
+
+
+def iter_panel_batches(symbols: Optional[List[str]] = None, start_date: Optional[date] = None,
+                       end_date: Optional[date] = None, batch_size: Optional[int] = None):
+    """Générer des RecordBatch Arrow du panel, lus par curseur côté serveur"""
+    import pyarrow as pa
+
+    schema = panel_schema()
+    batch_size = batch_size or settings.export_batch_size
+    query, params = build_panel_query(symbols, start_date, end_date)
+
+    with get_db_session() as db:
+        connection = db.connection(execution_options={"stream_results": True, "yield_per": batch_size})
+        result = connection.execute(query, params)
+
+        for rows in result.partitions(batch_size):
+            columns = list(zip(*rows))
+            yield pa.RecordBatch.from_arrays(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema
+            )
+
+
+class _ChunkBuffer(io.RawIOBase):
+    """Flux d'écriture vidé après chaque lot ; tell() compte les octets déjà rendus (offsets Parquet)"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_panel(export_format: str, symbols: Optional[List[str]] = None, start_date: Optional[date] = None,
+                 end_date: Optional[date] = None, batch_size: Optional[int] = None) -> Iterator[bytes]:
+    """Générer le panel encodé (Parquet : un row group par lot ; Arrow : flux IPC)"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    buffer = _ChunkBuffer()
+    schema = panel_schema()
+    if export_format == "parquet":
+        writer = pq.ParquetWriter(buffer, schema, compression="zstd")
+    else:
+        writer = pa.ipc.new_stream(buffer, schema)
+
+    total_rows = 0
+    try:
+        for batch in iter_panel_batches(symbols, start_date, end_date, batch_size):
+            if export_format == "parquet":
+                writer.write_table(pa.Table.from_batches([batch]))
+            else:
+                writer.write_batch(batch)
+            total_rows += batch.num_rows
+            yield buffer.drain()
+    except Exception as e:
+        logger.error(f"❌ [EXPORT] Export interrompu après {total_rows} lignes: {str(e)}")
+        raise
+    finally:
+        writer.close()
+
+    yield buffer.drain()
+    logger.info(f"📦 [EXPORT] Panel {export_format} exporté: {total_rows} lignes")
@@ -0,0 +1,93 @@
+"""
+Lecture des séries (prix + indicateurs) directement en tableaux NumPy
+
+Les colonnes numériques sont sélectionnées en double précision (cast côté PostgreSQL, sans effet
+une fois les colonnes migrées par scripts/migrate_float_columns.py) puis transposées colonne par
+colonne en tableaux float64 : ni objets ORM, ni Decimal, et une valeur NULL devient NaN
+(0.0 reste 0.0).
+"""
+from datetime import date
+from typing import Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Float, Integer, Numeric, and_, cast, select
+from sqlalchemy.orm import Session
+
+from app.models.database import HistoricalData, TechnicalIndicators, SentimentIndicators
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume', 'vwap']
+
+# Colonnes non numériques renvoyées telles quelles
+KEY_COLUMNS = ['symbol', 'date']
+
+
+def float_column(column, label: Optional[str] = None):
+    """Colonne sélectionnée en double précision"""
+    label = label or column.name
+    if isinstance(column.type, (Numeric, Integer)) and not isinstance(column.type, Float):
+        return cast(column, Float).label(label)
+    return column.label(label)
+
+
+def feature_select_columns(price_columns: Iterable[str] = PRICE_COLUMNS,
+                           technical_columns: Iterable[str] = (),
+                           sentiment_columns: Iterable[str] = ()) -> list:
+    """Colonnes (symbol, date, prix, indicateurs) du panel ; les noms absents des tables sont ignorés"""
+    columns = [HistoricalData.symbol.label('symbol'), HistoricalData.date.label('date')]
+    for model, names in ((HistoricalData, price_columns),
+                         (TechnicalIndicators, technical_columns),
+                         (SentimentIndicators, sentiment_columns)):
+        table_columns = model.__table__.columns
+        columns.extend(float_column(table_columns[name]) for name in names if name in table_columns)
+    return columns
+
+
+def panel_from_clause():
+    """historical_data joint aux indicateurs de même (symbol, date), qui peuvent manquer"""
+    historical = HistoricalData.__table__
+    technical = TechnicalIndicators.__table__
+    sentiment = SentimentIndicators.__table__
+    return historical.outerjoin(
+        technical, and_(technical.c.symbol == historical.c.symbol, technical.c.date == historical.c.date)
+    ).outerjoin(
+        sentiment, and_(sentiment.c.symbol == historical.c.symbol, sentiment.c.date == historical.c.date)
+    )
+
+
+def rows_to_frame(keys: Sequence[str], rows: Sequence[Sequence]) -> pd.DataFrame:
+    """DataFrame construit colonne par colonne : float64 pour les colonnes numériques (NULL -> NaN)"""
+    if not rows:
+        return pd.DataFrame(columns=list(keys))
+
+    data = {}
+    for key, values in zip(keys, zip(*rows)):
+        data[key] = list(values) if key in KEY_COLUMNS else np.array(values, dtype=np.float64)
+    return pd.DataFrame(data)
+
+
+def load_feature_frame(db: Session, symbols: List[str],
+                       technical_columns: Iterable[str] = (), sentiment_columns: Iterable[str] = (),
+                       start_date: Optional[date] = None, end_date: Optional[date] = None,
+                       price_columns: Iterable[str] = PRICE_COLUMNS, limit: Optional[int] = None,
+                       latest: Optional[int] = None) -> pd.DataFrame:
+    """
+    Panel des symboles trié par symbole et par date. limit : premières lignes seulement ;
+    latest : dernières lignes seulement (à utiliser avec un seul symbole).
+    """
+    columns = feature_select_columns(price_columns, technical_columns, sentiment_columns)
+    query = select(*columns).select_from(panel_from_clause()).where(HistoricalData.symbol.in_(symbols))
+    if start_date:
+        query = query.where(HistoricalData.date >= start_date)
+    if end_date:
+        query = query.where(HistoricalData.date <= end_date)
+    if latest:
+        query = query.order_by(HistoricalData.date.desc()).limit(latest)
+    else:
+        query = query.order_by(HistoricalData.symbol, HistoricalData.date)
+        if limit:
+            query = query.limit(limit)
+
+    result = db.execute(query)
+    rows = result.all()
+    return rows_to_frame(list(result.keys()), rows[::-1] if latest else rows)
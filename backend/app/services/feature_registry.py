@@ -0,0 +1,205 @@
+"""
+Registre déclaratif des features ML
+
+Chaque feature dérivée est définie une seule fois, avec ses colonnes d'entrée et sa fenêtre
+d'historique (lookback, en nombre de lignes y compris la ligne courante). L'entraînement et la
+prédiction utilisent le même code vectorisé : la prédiction charge seulement la fenêtre nécessaire
+et garde la dernière ligne calculée.
+"""
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Indicateurs bruts lus en base et utilisés tels quels comme features
+PRICE_FEATURE_COLUMNS = ['close', 'volume', 'vwap']
+
+TECHNICAL_FEATURE_COLUMNS = [
+    'sma_5', 'sma_10', 'sma_20', 'sma_50', 'sma_200',
+    'ema_5', 'ema_10', 'ema_20', 'ema_50', 'ema_200',
+    'rsi_14', 'macd', 'macd_signal', 'macd_histogram',
+    'stochastic_k', 'stochastic_d', 'williams_r', 'roc', 'cci',
+    'bb_middle', 'bb_lower', 'bb_width', 'bb_position',
+    'obv', 'volume_roc', 'volume_sma_20',
+    'atr_14',
+]
+
+SENTIMENT_FEATURE_COLUMNS = [
+    'sentiment_score_normalized',
+    'sentiment_momentum_1d', 'sentiment_momentum_3d', 'sentiment_momentum_7d', 'sentiment_momentum_14d',
+    'sentiment_volatility_3d', 'sentiment_volatility_7d', 'sentiment_volatility_14d', 'sentiment_volatility_30d',
+    'sentiment_sma_3', 'sentiment_sma_7', 'sentiment_sma_14', 'sentiment_sma_30',
+    'sentiment_ema_3', 'sentiment_ema_7', 'sentiment_ema_14', 'sentiment_ema_30',
+    'sentiment_rsi_14', 'sentiment_macd', 'sentiment_macd_signal', 'sentiment_macd_histogram',
+    'news_volume_sma_7', 'news_volume_sma_14', 'news_volume_sma_30',
+    'news_volume_roc_7d', 'news_volume_roc_14d',
+    'news_positive_ratio', 'news_negative_ratio', 'news_neutral_ratio', 'news_sentiment_quality',
+    'short_interest_momentum_5d', 'short_interest_momentum_10d', 'short_interest_momentum_20d',
+    'short_interest_volatility_7d', 'short_interest_volatility_14d', 'short_interest_volatility_30d',
+    'short_interest_sma_7', 'short_interest_sma_14', 'short_interest_sma_30',
+    'short_volume_momentum_5d', 'short_volume_momentum_10d', 'short_volume_momentum_20d',
+    'short_volume_volatility_7d', 'short_volume_volatility_14d', 'short_volume_volatility_30d',
+    'sentiment_strength_index', 'market_sentiment_index', 'sentiment_divergence',
+    'sentiment_acceleration', 'sentiment_trend_strength', 'sentiment_quality_index', 'sentiment_risk_score',
+]
+
+BASE_FEATURE_COLUMNS = PRICE_FEATURE_COLUMNS + TECHNICAL_FEATURE_COLUMNS + SENTIMENT_FEATURE_COLUMNS
+
+
+class FeatureSpec:
+    """Définition d'une feature dérivée : entrées, fenêtre d'historique et calcul vectorisé"""
+
+    def __init__(self, name: str, inputs: Tuple[str, ...], lookback: int,
+                 compute: Callable[[pd.DataFrame], pd.Series]):
+        self.name = name
+        self.inputs = inputs
+        self.lookback = lookback
+        self.compute = compute
+
+    def is_available(self, df: pd.DataFrame) -> bool:
+        return all(col in df.columns for col in self.inputs)
+
+
+# Features dérivées, dans l'ordre où elles sont ajoutées aux colonnes d'entraînement
+DERIVED_FEATURES: Dict[str, FeatureSpec] = {}
+
+
+def register_feature(name: str, inputs: Tuple[str, ...], lookback: int = 1):
+    """Décorateur enregistrant une feature dérivée dans le registre"""
+    def decorator(compute: Callable[[pd.DataFrame], pd.Series]):
+        DERIVED_FEATURES[name] = FeatureSpec(name, inputs, lookback, compute)
+        return compute
+    return decorator
+
+
+def _register_momentum(column: str, prefix: str, periods: int):
+    register_feature(f'{prefix}_momentum_{periods}d', (column,), lookback=periods + 1)(
+        lambda df: df[column].pct_change(periods)
+    )
+
+
+def _register_volatility(periods: int):
+    register_feature(f'price_volatility_{periods}d', ('close',), lookback=periods)(
+        lambda df: df['close'].rolling(periods).std()
+    )
+
+
+# Momentum
+for _periods in (5, 10, 20):
+    _register_momentum('close', 'price', _periods)
+for _periods in (5, 10):
+    _register_momentum('volume', 'volume', _periods)
+
+# Volatilité
+for _periods in (5, 10, 20):
+    _register_volatility(_periods)
+
+
+# Corrélations glissantes
+@register_feature('price_sentiment_corr', ('close', 'sentiment_score_normalized'), lookback=20)
+def _price_sentiment_corr(df: pd.DataFrame) -> pd.Series:
+    return df['close'].rolling(20).corr(df['sentiment_score_normalized'])
+
+
+@register_feature('volume_sentiment_corr', ('volume', 'sentiment_score_normalized'), lookback=20)
+def _volume_sentiment_corr(df: pd.DataFrame) -> pd.Series:
+    return df['volume'].rolling(20).corr(df['sentiment_score_normalized'])
+
+
+# Ratios
+@register_feature('price_sma_ratio', ('close', 'sma_20'))
+def _price_sma_ratio(df: pd.DataFrame) -> pd.Series:
+    return df['close'] / df['sma_20']
+
+
+@register_feature('price_ema_ratio', ('close', 'ema_20'))
+def _price_ema_ratio(df: pd.DataFrame) -> pd.Series:
+    return df['close'] / df['ema_20']
+
+
+# Divergences
+@register_feature('rsi_sentiment_divergence', ('rsi_14', 'sentiment_rsi_14'))
+def _rsi_sentiment_divergence(df: pd.DataFrame) -> pd.Series:
+    return df['rsi_14'] - df['sentiment_rsi_14']
+
+
+@register_feature('sentiment_momentum_acceleration', ('sentiment_momentum_7d', 'sentiment_momentum_14d'))
+def _sentiment_momentum_acceleration(df: pd.DataFrame) -> pd.Series:
+    return df['sentiment_momentum_7d'] - df['sentiment_momentum_14d']
+
+
+def required_lookback(feature_names: Optional[Iterable[str]] = None) -> int:
+    """Nombre de lignes d'historique nécessaires pour calculer les features demandées"""
+    names = DERIVED_FEATURES.keys() if feature_names is None else feature_names
+    return max([DERIVED_FEATURES[name].lookback for name in names if name in DERIVED_FEATURES] + [1])
+
+
+def compute_features(df: pd.DataFrame, feature_names: Optional[List[str]] = None,
+                     exclude_columns: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    Calculer les features d'une série chronologique (un symbole, trié par date).
+
+    Sans feature_names (entraînement) : toutes les colonnes non exclues + toutes les features dérivées
+    calculables. Avec feature_names (prédiction) : exactement ces colonnes, dans cet ordre, les features
+    absentes valant 0.
+    """
+    if feature_names is None:
+        df_features = df[[col for col in df.columns if col not in exclude_columns]].copy()
+        derived = [spec for spec in DERIVED_FEATURES.values() if spec.name not in df_features.columns]
+    else:
+        df_features = pd.DataFrame(index=df.index)
+        derived = []
+        for name in feature_names:
+            if name in df.columns:
+                df_features[name] = df[name]
+            elif name in DERIVED_FEATURES:
+                derived.append(DERIVED_FEATURES[name])
+
+    for spec in derived:
+        if spec.is_available(df):
+            df_features[spec.name] = spec.compute(df)
+
+    if feature_names is not None:
+        df_features = df_features.reindex(columns=feature_names, fill_value=0)
+
+    # Remplacer les valeurs infinies et NaN
+    df_features = df_features.replace([np.inf, -np.inf], np.nan)
+    return df_features.fillna(0)
+
+
+def compute_latest_features(windows: pd.DataFrame, feature_names: List[str]) -> pd.DataFrame:
+    """
+    Calculer les features de la dernière ligne de chaque symbole à partir de leurs fenêtres
+    d'historique (colonnes 'symbol' et 'date'). Retourne un DataFrame indexé par symbole.
+    """
+    latest = []
+    for symbol, window in windows.groupby('symbol', sort=False):
+        features = compute_features(window.sort_values('date').reset_index(drop=True), feature_names)
+        latest.append(features.iloc[[-1]].set_index(pd.Index([symbol], name='symbol')))
+
+    if not latest:
+        return pd.DataFrame(columns=feature_names)
+    return pd.concat(latest)
+
+
+# Indicateurs stockés dans le magasin de features sans être des features de base (lus par LightGBMService)
+STORED_EXTRA_COLUMNS = ['bb_upper']
+
+# Features d'entraînement de MLService : colonnes brutes puis features dérivées
+MODEL_FEATURE_COLUMNS = BASE_FEATURE_COLUMNS + [name for name in DERIVED_FEATURES if name not in BASE_FEATURE_COLUMNS]
+
+# Vecteur complet stocké dans feature_vectors (cf. app/services/feature_store.py)
+FEATURE_SET_COLUMNS = MODEL_FEATURE_COLUMNS + STORED_EXTRA_COLUMNS
+
+# Format des vecteurs stockés (2 : colonnes brutes sans imputation), inclus dans la version
+FEATURE_VECTOR_FORMAT = 2
+
+
+def feature_set_version() -> str:
+    """Version du vecteur de features : change dès qu'une colonne ou une fenêtre du registre change"""
+    import hashlib
+
+    signature = f"format:{FEATURE_VECTOR_FORMAT}|" + "|".join(
+        f"{name}:{DERIVED_FEATURES[name].lookback if name in DERIVED_FEATURES else 0}" for name in FEATURE_SET_COLUMNS
+    )
+    return f"fs_{hashlib.sha1(signature.encode()).hexdigest()[:12]}"
@@ -0,0 +1,244 @@
+"""
+Magasin de features précalculées (table feature_vectors)
+
+Pour chaque (version du jeu de features, symbole, date), le vecteur complet des features du
+registre (FEATURE_SET_COLUMNS : colonnes brutes puis features dérivées) est stocké en float32
+(real[]). Les jobs d'indicateurs le remplissent de façon incrémentale ; l'entraînement, la
+prédiction et SHAP y lisent leurs entrées par un seul parcours d'index au lieu de joindre les
+trois tables et de recalculer les features dérivées.
+
+Les colonnes brutes (prix, indicateurs) sont stockées sans imputation (NaN si la valeur manque) :
+l'entraînement leur applique la même imputation que sur les données relues en base, la prédiction
+les remplace par 0 comme compute_features.
+
+La version (feature_set_version) change dès que le registre change : les vecteurs d'une ancienne
+version restent lisibles (ordre des colonnes dans feature_sets) jusqu'à leur suppression.
+
+La table est créée par scripts/migrate_feature_store.py ; sans elle, les features sont recalculées.
+"""
+import logging
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.database import FeatureSets, FeatureVectors, HistoricalData
+from app.services.feature_frames import load_feature_frame
+from app.services.feature_registry import (
+    FEATURE_SET_COLUMNS, PRICE_FEATURE_COLUMNS, TECHNICAL_FEATURE_COLUMNS, SENTIMENT_FEATURE_COLUMNS,
+    STORED_EXTRA_COLUMNS, compute_features, feature_set_version, required_lookback
+)
+
+logger = logging.getLogger(__name__)
+
+# Vecteurs écrits par requête INSERT ... ON CONFLICT
+WRITE_BATCH_SIZE = 1000
+
+_table_exists: Optional[bool] = None
+_table_lock = threading.Lock()
+
+
+def feature_store_available(db: Session) -> bool:
+    """Vrai si le magasin est activé et sa table créée par scripts/migrate_feature_store.py (vérifié une fois par processus)"""
+    global _table_exists
+    if not settings.feature_store_enabled:
+        return False
+    with _table_lock:
+        if _table_exists is None:
+            _table_exists = db.execute(
+                text("SELECT to_regclass('public.feature_vectors') IS NOT NULL")
+            ).scalar()
+        return _table_exists
+
+
+class FeatureStore:
+    """Lecture et écriture des vecteurs de features précalculés"""
+
+    def __init__(self, db: Session, version: Optional[str] = None):
+        self.db = db
+        self.version = version or feature_set_version()
+        self._feature_names: Optional[List[str]] = None
+
+    def feature_names(self) -> List[str]:
+        """Ordre des valeurs dans les vecteurs de cette version"""
+        if self._feature_names is None:
+            if self.version == feature_set_version():
+                self._feature_names = list(FEATURE_SET_COLUMNS)
+            else:
+                feature_set = self.db.get(FeatureSets, self.version)
+                self._feature_names = list(feature_set.feature_names) if feature_set else []
+        return self._feature_names
+
+    def covers(self, feature_names: List[str]) -> bool:
+        """Vrai si toutes les features demandées sont stockées dans cette version"""
+        stored = set(self.feature_names())
+        return bool(feature_names) and all(name in stored for name in feature_names)
+
+    # Écriture
+
+    def register_feature_set(self):
+        """Enregistrer l'ordre des colonnes de la version courante"""
+        statement = insert(FeatureSets).values(
+            feature_set_version=self.version, feature_names=list(FEATURE_SET_COLUMNS)
+        ).on_conflict_do_nothing(index_elements=["feature_set_version"])
+        self.db.execute(statement)
+
+    def _refresh_window(self, symbol: str, full: bool) -> Tuple[Optional[date], Optional[date]]:
+        """(première date à écrire, première date à lire) d'un rafraîchissement incrémental"""
+        if full:
+            return None, None
+
+        last_date = self.db.execute(
+            select(func.max(FeatureVectors.date)).where(
+                FeatureVectors.feature_set_version == self.version, FeatureVectors.symbol == symbol
+            )
+        ).scalar()
+        if last_date is None:
+            return None, None
+
+        # Les dernières dates déjà stockées sont recalculées (indicateurs arrivés après les prix),
+        # avec l'historique nécessaire aux features dérivées
+        overlap = max(settings.feature_store_overlap_days, 1)
+        dates = self.db.execute(
+            select(HistoricalData.date).where(
+                HistoricalData.symbol == symbol, HistoricalData.date <= last_date
+            ).order_by(HistoricalData.date.desc()).limit(overlap + required_lookback() - 1)
+        ).scalars().all()
+        if not dates:
+            return None, None
+        return dates[min(overlap, len(dates)) - 1], dates[-1]
+
+    def refresh_symbol(self, symbol: str, full: bool = False) -> int:
+        """Calculer et enregistrer les vecteurs manquants (ou tous si full) d'un symbole"""
+        write_from, read_from = self._refresh_window(symbol, full)
+
+        frame = load_feature_frame(
+            self.db, [symbol], TECHNICAL_FEATURE_COLUMNS + STORED_EXTRA_COLUMNS, SENTIMENT_FEATURE_COLUMNS,
+            start_date=read_from, price_columns=PRICE_FEATURE_COLUMNS
+        )
+        if frame.empty:
+            return 0
+
+        features = compute_features(frame, FEATURE_SET_COLUMNS)
+        # Colonnes brutes sans imputation (NaN gardés), features dérivées calculées par compute_features
+        raw_columns = [name for name in FEATURE_SET_COLUMNS if name in frame.columns]
+        features[raw_columns] = frame[raw_columns].replace([np.inf, -np.inf], np.nan).to_numpy(dtype=np.float64)
+        features = features.to_numpy(dtype=np.float32)
+        keep = np.ones(len(frame), dtype=bool) if write_from is None else (frame['date'] >= write_from).to_numpy()
+
+        rows = [
+            {"feature_set_version": self.version, "symbol": symbol, "date": row_date, "features": values.tolist()}
+            for row_date, values in zip(frame['date'][keep], features[keep])
+        ]
+        for start in range(0, len(rows), WRITE_BATCH_SIZE):
+            statement = insert(FeatureVectors).values(rows[start:start + WRITE_BATCH_SIZE])
+            statement = statement.on_conflict_do_update(
+                index_elements=["feature_set_version", "symbol", "date"],
+                set_={"features": statement.excluded.features, "updated_at": func.now()}
+            )
+            self.db.execute(statement)
+        return len(rows)
+
+    def refresh(self, symbols: Optional[List[str]] = None, full: bool = False) -> Dict:
+        """Rafraîchir le magasin pour les symboles donnés (tous les symboles par défaut), un commit par symbole"""
+        self.register_feature_set()
+        self.db.commit()
+
+        if symbols is None:
+            symbols = self.db.execute(select(HistoricalData.symbol).distinct()).scalars().all()
+
+        written, errors = 0, 0
+        for symbol in symbols:
+            try:
+                written += self.refresh_symbol(symbol, full)
+                self.db.commit()
+            except Exception as e:
+                self.db.rollback()
+                errors += 1
+                logger.error(f"❌ [FEATURES] Erreur lors du rafraîchissement de {symbol}: {e}")
+
+        logger.info(f"🧮 [FEATURES] {written} vecteurs écrits pour {len(symbols)} symboles "
+                    f"(version {self.version}, {errors} erreurs)")
+
+        # Dernières lignes de features du screener (vue latest_features, si elle existe)
+        from app.services.latest_features import refresh_latest_features
+        try:
+            refresh_latest_features(self.db)
+        except Exception as e:
+            self.db.rollback()
+            logger.error(f"❌ [FEATURES] Erreur lors du rafraîchissement de latest_features: {e}")
+        return {"feature_set_version": self.version, "symbols": len(symbols), "vectors": written, "errors": errors}
+
+    def purge_old_versions(self) -> int:
+        """Supprimer les vecteurs des versions autres que la version courante"""
+        result = self.db.execute(delete(FeatureVectors).where(FeatureVectors.feature_set_version != self.version))
+        self.db.commit()
+        return result.rowcount
+
+    # Lecture
+
+    def _to_frame(self, rows, feature_names: Optional[List[str]], index, fill_missing: bool = False) -> pd.DataFrame:
+        names = self.feature_names()
+        matrix = np.array([row.features for row in rows], dtype=np.float32).reshape(len(rows), len(names))
+        if feature_names is not None:
+            positions = {name: i for i, name in enumerate(names)}
+            matrix = matrix[:, [positions[name] for name in feature_names]]
+            names = feature_names
+        matrix = matrix.astype(np.float64)
+        if fill_missing:
+            # Valeurs manquantes remplacées par 0, comme compute_features à la prédiction
+            matrix = np.nan_to_num(matrix, nan=0.0)
+        return pd.DataFrame(matrix, columns=names, index=index)
+
+    def load_latest(self, symbols: List[str], as_of_date: Optional[date] = None,
+                    feature_names: Optional[List[str]] = None) -> Tuple[pd.DataFrame, pd.Series]:
+        """
+        Dernier vecteur de chaque symbole jusqu'à as_of_date (à défaut le plus récent), indexé par
+        symbole, et dates correspondantes (valeurs manquantes à 0). Les symboles sans vecteur sont absents.
+        """
+        def query_latest(symbol_list, date_filter):
+            query = select(FeatureVectors.symbol, FeatureVectors.date, FeatureVectors.features).where(
+                FeatureVectors.feature_set_version == self.version, FeatureVectors.symbol.in_(symbol_list)
+            )
+            if date_filter is not None:
+                query = query.where(FeatureVectors.date <= date_filter)
+            query = query.distinct(FeatureVectors.symbol).order_by(FeatureVectors.symbol, FeatureVectors.date.desc())
+            return self.db.execute(query).all()
+
+        rows = query_latest(symbols, as_of_date)
+        if as_of_date is not None:
+            # Même repli que la prédiction : le vecteur le plus récent disponible
+            found = {row.symbol for row in rows}
+            missing = [symbol for symbol in symbols if symbol not in found]
+            if missing:
+                rows += query_latest(missing, None)
+
+        index = pd.Index([row.symbol for row in rows], name='symbol')
+        dates = pd.Series([row.date for row in rows], index=index, dtype=object)
+        return self._to_frame(rows, feature_names, index, fill_missing=True), dates
+
+    def load_history(self, symbol: str, end_date: Optional[date] = None, latest: Optional[int] = None,
+                     feature_names: Optional[List[str]] = None) -> pd.DataFrame:
+        """Vecteurs d'un symbole triés par date (colonne 'date' puis une colonne par feature, NaN si manquante)"""
+        query = select(FeatureVectors.date, FeatureVectors.features).where(
+            FeatureVectors.feature_set_version == self.version, FeatureVectors.symbol == symbol
+        )
+        if end_date is not None:
+            query = query.where(FeatureVectors.date <= end_date)
+        if latest:
+            query = query.order_by(FeatureVectors.date.desc()).limit(latest)
+        else:
+            query = query.order_by(FeatureVectors.date)
+
+        rows = self.db.execute(query).all()
+        if latest:
+            rows = rows[::-1]
+        frame = self._to_frame(rows, feature_names, pd.RangeIndex(len(rows)))
+        frame.insert(0, 'date', [row.date for row in rows])
+        return frame
@@ -0,0 +1,82 @@
+"""
+Labels d'entraînement de plusieurs paramètres cibles en un seul passage
+
+Pour une série triée par date (un symbole), le rendement futur de chaque horizon est calculé une
+seule fois par décalage vectorisé du tableau des clôtures, puis comparé à chaque rendement cible
+de cet horizon. Plusieurs TargetParameters sont ainsi labellisés (et entraînés) à partir d'un
+seul chargement des features.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Colonnes ajoutées par label_frame (mêmes noms que l'ancien create_labels_for_training)
+LABEL_COLUMNS = ['target_price', 'future_close', 'actual_return', 'target_achieved', 'target_return']
+
+
+def target_price_factor(target_return_percentage: float, time_horizon_days: int) -> float:
+    """Rapport prix cible / prix courant (cf. MLService.calculate_target_price)"""
+    target_return_percentage = float(target_return_percentage)
+    time_horizon_days = int(time_horizon_days)
+    daily_return = (1 + target_return_percentage / 100) ** (1 / time_horizon_days) - 1
+    return 1 + daily_return * time_horizon_days
+
+
+def forward_closes(close: np.ndarray, horizons: Iterable[int]) -> Dict[int, np.ndarray]:
+    """Clôture à t + horizon pour chaque ligne (NaN quand l'horizon dépasse la série)"""
+    close = np.asarray(close, dtype=np.float64)
+    result = {}
+    for horizon in set(int(h) for h in horizons):
+        future = np.full(len(close), np.nan)
+        if horizon < len(close):
+            future[:len(close) - horizon] = close[horizon:]
+        result[horizon] = future
+    return result
+
+
+class LabelMatrix:
+    """Rendements futurs et labels de plusieurs (rendement cible, horizon) pour une même série"""
+
+    def __init__(self, close: np.ndarray, targets: Iterable[Tuple[float, int]]):
+        self.close = np.asarray(close, dtype=np.float64)
+        self.targets: List[Tuple[float, int]] = [(float(r), int(h)) for r, h in targets]
+        self.future_close = forward_closes(self.close, [h for _, h in self.targets])
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.actual_return = {
+                horizon: (future - self.close) / self.close * 100
+                for horizon, future in self.future_close.items()
+            }
+
+        # Matrice (lignes x cibles) : 1 si la cible est atteinte, 0 sinon, NaN sans clôture future
+        self.achieved = np.empty((len(self.close), len(self.targets)))
+        for j, (target_return, horizon) in enumerate(self.targets):
+            returns = self.actual_return[horizon]
+            self.achieved[:, j] = np.where(np.isnan(returns), np.nan, returns >= target_return)
+
+    def to_frame(self, index=None) -> pd.DataFrame:
+        """Matrice des labels, une colonne target_achieved_<rendement>_<horizon>d par cible"""
+        columns = [f"target_achieved_{target_return:g}_{horizon}d" for target_return, horizon in self.targets]
+        return pd.DataFrame(self.achieved, columns=columns, index=index)
+
+    def label_frame(self, df: pd.DataFrame, target_return_percentage: float, time_horizon_days: int) -> pd.DataFrame:
+        """
+        Copie de df avec les colonnes de LABEL_COLUMNS d'une cible, sans les lignes dont la
+        clôture future est inconnue
+        """
+        target = (float(target_return_percentage), int(time_horizon_days))
+        j = self.targets.index(target)
+        horizon = target[1]
+
+        labeled = df.copy()
+        labeled['target_price'] = self.close * target_price_factor(*target)
+        labeled['future_close'] = self.future_close[horizon]
+        labeled['actual_return'] = self.actual_return[horizon]
+        labeled['target_achieved'] = self.achieved[:, j]
+        labeled['target_return'] = labeled['actual_return']
+
+        critical_columns = ['close', 'volume', 'target_price', 'future_close', 'actual_return']
+        labeled = labeled.dropna(subset=critical_columns)
+        labeled['target_achieved'] = labeled['target_achieved'].astype(int)
+        return labeled
@@ -0,0 +1,167 @@
+"""
+Vue matérialisée latest_features : dernière ligne de features de chaque symbole actif
+
+Une ligne par symbole actif : dernière barre de historical_data, indicateurs techniques et de
+sentiment de la même date, et vecteur du magasin de features (feature_vectors, dernière version
+enregistrée). Le screener charge ces lignes en un seul parcours pour tous les symboles qu'il
+évalue, au lieu de chercher la dernière date symbole par symbole. Sans vecteur pour la dernière
+barre (magasin pas encore rafraîchi), les colonnes brutes de la vue servent de vecteur aux
+modèles qui n'utilisent pas de features dérivées.
+
+La vue est créée par scripts/migrate_latest_features.py et rafraîchie (CONCURRENTLY, sans
+bloquer les lectures) après chaque rafraîchissement du magasin de features.
+"""
+import logging
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from app.services.feature_registry import (
+    PRICE_FEATURE_COLUMNS, TECHNICAL_FEATURE_COLUMNS, SENTIMENT_FEATURE_COLUMNS, STORED_EXTRA_COLUMNS
+)
+
+logger = logging.getLogger(__name__)
+
+LATEST_FEATURES_VIEW = "latest_features"
+
+# Colonnes brutes de la vue, dans l'ordre de sa définition
+VIEW_FEATURE_COLUMNS = PRICE_FEATURE_COLUMNS + TECHNICAL_FEATURE_COLUMNS + STORED_EXTRA_COLUMNS + SENTIMENT_FEATURE_COLUMNS
+
+_view_exists: Optional[bool] = None
+_view_lock = threading.Lock()
+
+
+def create_view_sql() -> str:
+    """Définition de la vue (colonnes d'indicateurs du registre)"""
+    technical = ",\n        ".join(f"t.{column}" for column in TECHNICAL_FEATURE_COLUMNS + STORED_EXTRA_COLUMNS)
+    sentiment = ",\n        ".join(f"si.{column}" for column in SENTIMENT_FEATURE_COLUMNS)
+    return f"""
+        CREATE MATERIALIZED VIEW IF NOT EXISTS public.{LATEST_FEATURES_VIEW} AS
+        SELECT DISTINCT ON (h.symbol)
+            h.symbol,
+            h.date,
+            h.close::float8 AS close,
+            h.volume::float8 AS volume,
+            h.vwap::float8 AS vwap,
+            {technical},
+            {sentiment},
+            fv.feature_set_version,
+            fv.features,
+            NOW() AS refreshed_at
+        FROM public.historical_data h
+        JOIN public.symbol_metadata sm ON sm.symbol = h.symbol AND sm.is_active
+        LEFT JOIN public.technical_indicators t ON t.symbol = h.symbol AND t.date = h.date
+        LEFT JOIN public.sentiment_indicators si ON si.symbol = h.symbol AND si.date = h.date
+        LEFT JOIN public.feature_vectors fv ON fv.symbol = h.symbol AND fv.date = h.date
+            AND fv.feature_set_version = (
+                SELECT feature_set_version FROM public.feature_sets ORDER BY created_at DESC LIMIT 1
+            )
+        ORDER BY h.symbol, h.date DESC
+        WITH DATA
+    """
+
+
+def latest_features_view_exists(db: Session) -> bool:
+    """Vrai si la vue a été créée (vérifié une fois par processus)"""
+    global _view_exists
+    with _view_lock:
+        if _view_exists is None:
+            _view_exists = db.execute(
+                text("SELECT to_regclass(:name) IS NOT NULL"), {"name": f"public.{LATEST_FEATURES_VIEW}"}
+            ).scalar()
+        return _view_exists
+
+
+def refresh_latest_features(db: Session) -> bool:
+    """Rafraîchir la vue sans bloquer les lectures (rafraîchissement simple si elle n'est pas encore remplie)"""
+    if not latest_features_view_exists(db):
+        return False
+
+    populated = db.execute(
+        text("SELECT relispopulated FROM pg_class WHERE oid = to_regclass(:name)"),
+        {"name": f"public.{LATEST_FEATURES_VIEW}"}
+    ).scalar()
+    concurrently = "CONCURRENTLY " if populated else ""
+    db.execute(text(f"REFRESH MATERIALIZED VIEW {concurrently}public.{LATEST_FEATURES_VIEW}"))
+    db.commit()
+    logger.info(f"🔄 [FEATURES] Vue {LATEST_FEATURES_VIEW} rafraîchie")
+    return True
+
+
+class LatestFeaturesSnapshot:
+    """Vecteurs de latest_features chargés en une seule lecture, indexés par symbole"""
+
+    def __init__(self, db: Session, symbols: Optional[List[str]] = None):
+        self.db = db
+        # symbole -> (date, version du vecteur, vecteur du magasin, colonnes brutes de la vue)
+        self.rows: Dict[str, Tuple[date, Optional[str], Optional[np.ndarray], np.ndarray]] = {}
+        self._feature_names: Dict[str, List[str]] = {}
+
+        if not latest_features_view_exists(db):
+            return
+
+        raw_columns = ", ".join(VIEW_FEATURE_COLUMNS)
+        query = f"""
+            SELECT symbol, date, feature_set_version, features, {raw_columns}
+            FROM public.{LATEST_FEATURES_VIEW}
+        """
+        params = {}
+        if symbols is not None:
+            query += " WHERE symbol IN :symbols"
+            params["symbols"] = list(symbols)
+        statement = text(query)
+        if symbols is not None:
+            statement = statement.bindparams(bindparam("symbols", expanding=True))
+
+        for symbol, row_date, version, features, *raw in db.execute(statement, params):
+            vector = np.asarray(features, dtype=np.float32) if features is not None else None
+            raw = np.array([np.nan if value is None else float(value) for value in raw], dtype=np.float32)
+            self.rows[symbol] = (row_date, version, vector, raw)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _positions(self, version: Optional[str], feature_names: List[str]) -> Optional[List[int]]:
+        """Positions des features dans le vecteur de la version (colonnes brutes de la vue si version est None)"""
+        from app.services.feature_store import FeatureStore
+
+        if version is None:
+            names = VIEW_FEATURE_COLUMNS
+        else:
+            if version not in self._feature_names:
+                self._feature_names[version] = FeatureStore(self.db, version).feature_names()
+            names = self._feature_names[version]
+        positions = {name: i for i, name in enumerate(names)}
+        if not all(name in positions for name in feature_names):
+            return None
+        return [positions[name] for name in feature_names]
+
+    def get(self, symbols: List[str], feature_names: List[str]) -> Tuple[pd.DataFrame, pd.Series]:
+        """Features demandées des symboles présents dans la vue, et dates de leur dernière barre"""
+        found, vectors, dates = [], [], []
+        for symbol in symbols:
+            if symbol not in self.rows:
+                continue
+            row_date, version, features, raw = self.rows[symbol]
+            positions = self._positions(version, feature_names) if features is not None else None
+            if positions is not None:
+                vector = features[positions]
+            else:
+                # Pas de vecteur (ou vecteur sans ces features) : colonnes brutes de la vue
+                positions = self._positions(None, feature_names)
+                if positions is None:
+                    continue
+                vector = raw[positions]
+            found.append(symbol)
+            vectors.append(vector)
+            dates.append(row_date)
+
+        index = pd.Index(found, name='symbol')
+        # Valeurs manquantes des colonnes brutes remplacées par 0, comme compute_features
+        matrix = np.nan_to_num(np.array(vectors, dtype=np.float64).reshape(len(found), len(feature_names)), nan=0.0)
+        return pd.DataFrame(matrix, columns=feature_names, index=index), pd.Series(dates, index=index, dtype=object)
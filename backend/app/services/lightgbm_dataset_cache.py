@@ -0,0 +1,123 @@
+"""
+Cache des lgb.Dataset au format binaire LightGBM
+
+La construction d'un lgb.Dataset découpe chaque feature en classes (bins), ce qui domine le coût
+de préparation d'un entraînement. Le Dataset de toutes les lignes d'un symbole (ou d'un groupe de
+symboles) est enregistré une fois, au format binaire, par (portée, version du jeu de features,
+date de la dernière ligne, nombre de lignes, version des données sources). La version des données
+dérive du max(updated_at) des lignes lues (prix, indicateurs, magasin de features) : une correction
+d'indicateurs ou de prix déjà importés invalide le Dataset. Les entraînements et les essais de la recherche
+d'hyperparamètres le rechargent tel quel et n'en prennent que des sous-ensembles de lignes
+(labeled_subset), avec leurs propres labels : seuls les labels changent d'un entraînement à l'autre.
+
+Le Dataset est enregistré avec des labels factices (0) : les labels réels sont toujours posés sur
+les sous-ensembles.
+"""
+import os
+import re
+import glob
+import hashlib
+import logging
+from datetime import date
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, select
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.database import FeatureVectors, HistoricalData, SentimentIndicators, TechnicalIndicators
+from app.services.feature_registry import feature_set_version
+
+logger = logging.getLogger(__name__)
+
+# lightgbm est importé à la première utilisation (dans les fonctions)
+
+
+def source_data_version(db: Session, symbols: Sequence[str]) -> str:
+    """Version des données sources des symboles : max(updated_at) de chaque table lue (index (symbol, updated_at))"""
+    from app.services.feature_store import feature_store_available
+
+    models = [HistoricalData, TechnicalIndicators, SentimentIndicators]
+    if feature_store_available(db):
+        models.append(FeatureVectors)
+    symbols = list(symbols)
+    version = db.execute(select(*[
+        select(func.max(model.updated_at)).where(model.symbol.in_(symbols)).scalar_subquery() for model in models
+    ])).one()
+    return hashlib.sha1(repr(tuple(version)).encode()).hexdigest()[:10]
+
+
+def labeled_subset(full_data, rows: Sequence[int], labels: Sequence[float]):
+    """Sous-ensemble de lignes d'un Dataset (mêmes classes de features) avec ses labels"""
+    subset = full_data.subset(np.asarray(rows, dtype=np.int32)).construct()
+    subset.set_label(np.asarray(labels, dtype=np.float64))
+    return subset
+
+
+class LightGBMDatasetCache:
+    """Datasets LightGBM binaires, un fichier par (portée, version des features, fin et version des données)"""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.lightgbm_dataset_cache_path
+        self.enabled = settings.lightgbm_dataset_cache_enabled
+
+    @staticmethod
+    def scope_prefix(scope: str) -> str:
+        """Portée (symbole, secteur...) utilisable dans un nom de fichier"""
+        return re.sub(r"[^A-Za-z0-9.-]+", "-", scope)
+
+    def path(self, scope: str, end_date: date, rows: int, data_version: str = "") -> str:
+        """Fichier du Dataset de la portée pour ces données (data_version : cf. source_data_version)"""
+        end = pd.Timestamp(end_date).strftime("%Y%m%d")
+        name = f"{self.scope_prefix(scope)}__{feature_set_version()}__{end}__{rows}__{data_version}.bin"
+        return os.path.join(self.directory, name)
+
+    def build(self, X: pd.DataFrame):
+        """Dataset de toutes les lignes de X (labels factices)"""
+        import lightgbm as lgb
+
+        return lgb.Dataset(X, label=np.zeros(len(X))).construct()
+
+    def save(self, scope: str, path: str, full_data):
+        """Écriture atomique (fichier temporaire puis renommage), puis suppression des anciens fichiers de la portée"""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        full_data.save_binary(tmp_path)
+        os.replace(tmp_path, path)
+
+        for old_path in glob.glob(os.path.join(self.directory, f"{self.scope_prefix(scope)}__*.bin")):
+            if old_path != path:
+                try:
+                    os.remove(old_path)
+                except OSError:
+                    pass
+
+    def load(self, scope: str, end_date: date, X: pd.DataFrame, data_version: str = ""):
+        """
+        Dataset de toutes les lignes de X : relu depuis le cache s'il existe, sinon construit puis
+        enregistré. X doit être l'ensemble des lignes de la portée, dans l'ordre des dates.
+        """
+        import lightgbm as lgb
+
+        if not self.enabled:
+            return self.build(X)
+
+        path = self.path(scope, end_date, len(X), data_version)
+        if os.path.exists(path):
+            try:
+                full_data = lgb.Dataset(path).construct()
+                if full_data.num_data() == len(X) and full_data.num_feature() == X.shape[1]:
+                    logger.info(f"📦 [DATASET] {scope}: Dataset LightGBM relu depuis le cache")
+                    return full_data
+            except Exception as e:
+                logger.warning(f"⚠️ [DATASET] Fichier de cache illisible {path}: {e}")
+
+        full_data = self.build(X)
+        try:
+            self.save(scope, path, full_data)
+        except OSError as e:
+            # Le cache est une optimisation : l'entraînement continue sans lui
+            logger.warning(f"⚠️ [DATASET] Dataset non enregistré dans le cache: {e}")
+        return full_data
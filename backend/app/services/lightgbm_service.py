@@ -2,24 +2,47 @@
 Service LightGBM pour l'analyse de tendance financière
 """
 import os
-import joblib
 import numpy as np
 import pandas as pd
 from typing import Dict, List, Optional, Tuple, Any
 from datetime import datetime, date
 from sqlalchemy.orm import Session
-from sklearn.model_selection import train_test_split, cross_val_score, GridSearchCV
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, mean_squared_error, r2_score
-from sklearn.preprocessing import StandardScaler, LabelEncoder
-import lightgbm as lgb
 import warnings
 warnings.filterwarnings('ignore')
 
-from app.models.database import (
-    HistoricalData, TechnicalIndicators, SentimentIndicators, 
-    TargetParameters, MLModels, MLPredictions
-)
+from app.models.database import TargetParameters, MLModels, MLPredictions
 from app.core.config import settings
+from app.services.model_registry import ModelRegistry
+
+# lightgbm, joblib et scikit-learn sont importés à la première utilisation (dans les méthodes)
+# pour que l'import du service reste léger côté API et workers
+
+
+# Type de modèle -> (méthode du service, type enregistré, message de succès)
+LIGHTGBM_TRAINERS = {
+    "binary": (
+        "train_binary_classification_model",
+        "lightgbm_binary_classification",
+        "Modèle LightGBM de classification binaire entraîné avec succès"
+    ),
+    "multiclass": (
+        "train_multiclass_classification_model",
+        "lightgbm_multiclass_classification",
+        "Modèle LightGBM de classification multi-classe entraîné avec succès"
+    ),
+    "regression": (
+        "train_regression_model",
+        "lightgbm_regression",
+        "Modèle LightGBM de régression entraîné avec succès"
+    ),
+}
+
+# Type de modèle -> colonne de labels (cf. create_advanced_labels)
+LIGHTGBM_LABEL_COLUMNS = {
+    "binary": "target_achieved",
+    "multiclass": "return_class",
+    "regression": "target_return",
+}
 
 
 class LightGBMService:
@@ -141,90 +164,59 @@ class LightGBMService:
         
         return df_features, available_features
     
-    def train_binary_classification_model(self, symbol: str, target_param: TargetParameters, 
-                                        db: Session = None) -> Dict[str, Any]:
-        """Entraîne un modèle LightGBM de classification binaire"""
+    def load_training_frame(self, symbol: str, db: Session, end_date: Optional[date] = None,
+                            latest: Optional[int] = None) -> pd.DataFrame:
+        """
+        Charger les prix et les indicateurs du symbole : vecteurs du magasin de features, sinon tables
+        jointes par (symbol, date), directement en tableaux float64 (une valeur NULL devient NaN,
+        0.0 reste 0.0). latest : dernières lignes seulement.
+        """
+        from app.services.feature_frames import load_feature_frame
+        from app.services.feature_store import FeatureStore, feature_store_available
+        
+        feature_columns = self.get_feature_columns()
+        
+        # Vecteurs précalculés du magasin de features s'il est rempli pour ce symbole
+        if feature_store_available(db):
+            store = FeatureStore(db)
+            if store.covers(['close'] + feature_columns):
+                df = store.load_history(symbol, end_date=end_date, latest=latest,
+                                        feature_names=['close'] + feature_columns)
+                if not df.empty:
+                    return df
+        
+        return load_feature_frame(
+            db, [symbol],
+            technical_columns=feature_columns, sentiment_columns=feature_columns,
+            end_date=end_date, latest=latest
+        )
+    
+    def prepare_training_frame(self, symbol: str, target_param: TargetParameters, model_kind: str,
+                               db: Session = None) -> Tuple[pd.DataFrame, pd.Series, date]:
+        """
+        Features de toutes les lignes du symbole (index 0..n-1, dans l'ordre des dates), labels du
+        type de modèle (NaN quand l'horizon dépasse les données) et date de la dernière ligne
+        """
         if db is None:
             db = self.db
-            
-        # Récupération des données
-        query = db.query(HistoricalData, TechnicalIndicators, SentimentIndicators).join(
-            TechnicalIndicators, HistoricalData.symbol == TechnicalIndicators.symbol
-        ).join(
-            SentimentIndicators, HistoricalData.symbol == SentimentIndicators.symbol
-        ).filter(
-            HistoricalData.symbol == symbol
-        ).order_by(HistoricalData.date)
-        
-        results = query.all()
-        
-        if not results:
-            raise ValueError(f"Aucune donnée trouvée pour le symbole {symbol}")
         
-        # Conversion en DataFrame
-        data = []
-        for hist, tech, sent in results:
-            row = {
-                'date': hist.date,
-                'symbol': hist.symbol,
-                'open': float(hist.open),
-                'high': float(hist.high),
-                'low': float(hist.low),
-                'close': float(hist.close),
-                'volume': float(hist.volume),
-                'vwap': float(hist.vwap),
-                
-                # Indicateurs techniques
-                'sma_5': float(tech.sma_5) if tech.sma_5 else 0,
-                'sma_10': float(tech.sma_10) if tech.sma_10 else 0,
-                'sma_20': float(tech.sma_20) if tech.sma_20 else 0,
-                'sma_50': float(tech.sma_50) if tech.sma_50 else 0,
-                'ema_5': float(tech.ema_5) if tech.ema_5 else 0,
-                'ema_10': float(tech.ema_10) if tech.ema_10 else 0,
-                'ema_20': float(tech.ema_20) if tech.ema_20 else 0,
-                'ema_50': float(tech.ema_50) if tech.ema_50 else 0,
-                'rsi': float(tech.rsi) if tech.rsi else 0,
-                'macd': float(tech.macd) if tech.macd else 0,
-                'macd_signal': float(tech.macd_signal) if tech.macd_signal else 0,
-                'macd_histogram': float(tech.macd_histogram) if tech.macd_histogram else 0,
-                'bb_upper': float(tech.bb_upper) if tech.bb_upper else 0,
-                'bb_middle': float(tech.bb_middle) if tech.bb_middle else 0,
-                'bb_lower': float(tech.bb_lower) if tech.bb_lower else 0,
-                'bb_width': float(tech.bb_width) if tech.bb_width else 0,
-                'atr': float(tech.atr) if tech.atr else 0,
-                'obv': float(tech.obv) if tech.obv else 0,
-                'vwap': float(tech.vwap) if tech.vwap else 0,
-                'volume_roc': float(tech.volume_roc) if tech.volume_roc else 0,
-                'stochastic_k': float(tech.stochastic_k) if tech.stochastic_k else 0,
-                'stochastic_d': float(tech.stochastic_d) if tech.stochastic_d else 0,
-                'williams_r': float(tech.williams_r) if tech.williams_r else 0,
-                'roc': float(tech.roc) if tech.roc else 0,
-                'cci': float(tech.cci) if tech.cci else 0,
-                'volume_sma': float(tech.volume_sma) if tech.volume_sma else 0,
-                
-                # Indicateurs de sentiment
-                'news_sentiment_score': float(sent.news_sentiment_score) if sent.news_sentiment_score else 0,
-                'short_interest_ratio': float(sent.short_interest_ratio) if sent.short_interest_ratio else 0,
-                'sentiment_momentum': float(sent.sentiment_momentum) if sent.sentiment_momentum else 0,
-                'sentiment_volatility': float(sent.sentiment_volatility) if sent.sentiment_volatility else 0,
-                'sentiment_sma': float(sent.sentiment_sma) if sent.sentiment_sma else 0,
-                'sentiment_ema': float(sent.sentiment_ema) if sent.sentiment_ema else 0,
-                'sentiment_rsi': float(sent.sentiment_rsi) if sent.sentiment_rsi else 0,
-                'sentiment_macd': float(sent.sentiment_macd) if sent.sentiment_macd else 0,
-                'news_volume': float(sent.news_volume) if sent.news_volume else 0,
-                'sentiment_distribution': float(sent.sentiment_distribution) if sent.sentiment_distribution else 0,
-                'composite_sentiment': float(sent.composite_sentiment) if sent.composite_sentiment else 0,
-            }
-            data.append(row)
-        
-        df = pd.DataFrame(data)
+        # Récupération des données (prix + indicateurs, en tableaux float64)
+        df = self.load_training_frame(symbol, db)
+        if df.empty:
+            raise ValueError(f"Aucune donnée trouvée pour le symbole {symbol}")
         
         # Création des labels
-        df = self.create_advanced_labels(df, target_param)
+        df = self.create_advanced_labels(df, target_param).reset_index(drop=True)
         
         # Préparation des features
         X, feature_names = self.prepare_features(df)
-        y = df['target_achieved']
+        y = df[LIGHTGBM_LABEL_COLUMNS[model_kind]]
+        return X, y, df['date'].max()
+    
+    def split_training_rows(self, X: pd.DataFrame, y: pd.Series,
+                            model_kind: str) -> Tuple[pd.DataFrame, pd.DataFrame, pd.Series, pd.Series]:
+        """Lignes labellisées divisées en train/test (80/20) ; les index restent ceux de X"""
+        from sklearn.model_selection import train_test_split
         
         # Suppression des lignes avec des labels manquants
         valid_indices = ~(y.isna() | X.isna().any(axis=1))
@@ -234,18 +226,63 @@ class LightGBMService:
         if len(X) < 100:
             raise ValueError(f"Pas assez de données pour l'entraînement: {len(X)} échantillons")
         
-        # Division train/test
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
+        # Division train/test (stratifiée pour les classifications)
+        return train_test_split(
+            X, y, test_size=0.2, random_state=42, stratify=None if model_kind == "regression" else y
         )
+    
+    def training_datasets(self, cache_scope: str, X: pd.DataFrame, end_date: date,
+                          X_train: pd.DataFrame, y_train: pd.Series, X_test: pd.DataFrame, y_test: pd.Series,
+                          db: Session = None):
+        """
+        lgb.Dataset train/test : sous-ensembles du Dataset de toutes les lignes de X (découpage en
+        classes lu dans le cache s'il existe pour la même version des données du symbole cache_scope),
+        avec les labels de cet entraînement
+        """
+        from app.services.lightgbm_dataset_cache import LightGBMDatasetCache, labeled_subset, source_data_version
+        
+        cache = LightGBMDatasetCache()
+        data_version = source_data_version(db or self.db, [cache_scope]) if cache.enabled else ""
+        full_data = cache.load(cache_scope, end_date, X, data_version)
+        return (labeled_subset(full_data, X_train.index, y_train),
+                labeled_subset(full_data, X_test.index, y_test))
+    
+    def base_params(self, model_kind: str) -> Dict[str, Any]:
+        """Paramètres par défaut du type de modèle"""
+        return {
+            "binary": self.default_params,
+            "multiclass": self.multiclass_params,
+            "regression": self.regression_params,
+        }[model_kind]
+    
+    def training_params(self, symbol: str, model_kind: str, db: Session = None) -> Dict[str, Any]:
+        """Paramètres par défaut complétés par les meilleurs paramètres trouvés pour le symbole ou son secteur"""
+        from app.services.lightgbm_tuning import get_tuned_params
         
-        # Création du dataset LightGBM
-        train_data = lgb.Dataset(X_train, label=y_train)
-        test_data = lgb.Dataset(X_test, label=y_test, reference=train_data)
+        params = dict(self.base_params(model_kind))
+        params.update(get_tuned_params(db or self.db, symbol, model_kind) or {})
+        return params
+    
+    def train_binary_classification_model(self, symbol: str, target_param: TargetParameters, 
+                                        db: Session = None) -> Dict[str, Any]:
+        """Entraîne un modèle LightGBM de classification binaire"""
+        import lightgbm as lgb
+        from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+        
+        if db is None:
+            db = self.db
+            
+        # Données (prix + indicateurs, labels) divisées en train/test
+        X, y, end_date = self.prepare_training_frame(symbol, target_param, "binary", db)
+        X_train, X_test, y_train, y_test = self.split_training_rows(X, y, "binary")
+        feature_names = list(X.columns)
+        
+        # Datasets LightGBM (découpage en classes des features réutilisé via le cache)
+        train_data, test_data = self.training_datasets(symbol, X, end_date, X_train, y_train, X_test, y_test, db)
         
         # Entraînement du modèle
         model = lgb.train(
-            self.default_params,
+            self.training_params(symbol, "binary", db),
             train_data,
             valid_sets=[test_data],
             num_boost_round=1000,
@@ -265,14 +302,15 @@ class LightGBMService:
         # Importance des features
         feature_importance = dict(zip(feature_names, model.feature_importance()))
         
-        # Sauvegarde du modèle
-        model_name = f"lightgbm_binary_{symbol}_{target_param.parameter_name}_v1"
-        model_path = os.path.join(self.models_path, f"{model_name}.joblib")
-        joblib.dump(model, model_path)
+        # Sauvegarde du modèle (version suivante, écriture atomique)
+        model_name = f"lightgbm_binary_{symbol}_{target_param.parameter_name}"
+        registry = ModelRegistry(db, self.models_path)
+        version, model_path, artifacts = registry.save(model_name, model, flat=False)
         
         # Sauvegarde en base de données
         model_record = MLModels(
-            name=model_name,
+            model_name=model_name,
+            model_version=version,
             model_type="lightgbm_binary_classification",
             symbol=symbol,
             target_parameter_id=target_param.id,
@@ -299,7 +337,7 @@ class LightGBMService:
             created_by="lightgbm_service"
         )
         
-        db.add(model_record)
+        registry.register(model_record, artifacts)
         db.commit()
         db.refresh(model_record)
         
@@ -322,108 +360,23 @@ class LightGBMService:
     def train_multiclass_classification_model(self, symbol: str, target_param: TargetParameters, 
                                             db: Session = None) -> Dict[str, Any]:
         """Entraîne un modèle LightGBM de classification multi-classe"""
+        import lightgbm as lgb
+        from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+        
         if db is None:
             db = self.db
             
-        # Récupération des données (même logique que pour la classification binaire)
-        query = db.query(HistoricalData, TechnicalIndicators, SentimentIndicators).join(
-            TechnicalIndicators, HistoricalData.symbol == TechnicalIndicators.symbol
-        ).join(
-            SentimentIndicators, HistoricalData.symbol == SentimentIndicators.symbol
-        ).filter(
-            HistoricalData.symbol == symbol
-        ).order_by(HistoricalData.date)
-        
-        results = query.all()
-        
-        if not results:
-            raise ValueError(f"Aucune donnée trouvée pour le symbole {symbol}")
-        
-        # Conversion en DataFrame (même logique que pour la classification binaire)
-        data = []
-        for hist, tech, sent in results:
-            row = {
-                'date': hist.date,
-                'symbol': hist.symbol,
-                'open': float(hist.open),
-                'high': float(hist.high),
-                'low': float(hist.low),
-                'close': float(hist.close),
-                'volume': float(hist.volume),
-                'vwap': float(hist.vwap),
-                
-                # Indicateurs techniques
-                'sma_5': float(tech.sma_5) if tech.sma_5 else 0,
-                'sma_10': float(tech.sma_10) if tech.sma_10 else 0,
-                'sma_20': float(tech.sma_20) if tech.sma_20 else 0,
-                'sma_50': float(tech.sma_50) if tech.sma_50 else 0,
-                'ema_5': float(tech.ema_5) if tech.ema_5 else 0,
-                'ema_10': float(tech.ema_10) if tech.ema_10 else 0,
-                'ema_20': float(tech.ema_20) if tech.ema_20 else 0,
-                'ema_50': float(tech.ema_50) if tech.ema_50 else 0,
-                'rsi': float(tech.rsi) if tech.rsi else 0,
-                'macd': float(tech.macd) if tech.macd else 0,
-                'macd_signal': float(tech.macd_signal) if tech.macd_signal else 0,
-                'macd_histogram': float(tech.macd_histogram) if tech.macd_histogram else 0,
-                'bb_upper': float(tech.bb_upper) if tech.bb_upper else 0,
-                'bb_middle': float(tech.bb_middle) if tech.bb_middle else 0,
-                'bb_lower': float(tech.bb_lower) if tech.bb_lower else 0,
-                'bb_width': float(tech.bb_width) if tech.bb_width else 0,
-                'atr': float(tech.atr) if tech.atr else 0,
-                'obv': float(tech.obv) if tech.obv else 0,
-                'vwap': float(tech.vwap) if tech.vwap else 0,
-                'volume_roc': float(tech.volume_roc) if tech.volume_roc else 0,
-                'stochastic_k': float(tech.stochastic_k) if tech.stochastic_k else 0,
-                'stochastic_d': float(tech.stochastic_d) if tech.stochastic_d else 0,
-                'williams_r': float(tech.williams_r) if tech.williams_r else 0,
-                'roc': float(tech.roc) if tech.roc else 0,
-                'cci': float(tech.cci) if tech.cci else 0,
-                'volume_sma': float(tech.volume_sma) if tech.volume_sma else 0,
-                
-                # Indicateurs de sentiment
-                'news_sentiment_score': float(sent.news_sentiment_score) if sent.news_sentiment_score else 0,
-                'short_interest_ratio': float(sent.short_interest_ratio) if sent.short_interest_ratio else 0,
-                'sentiment_momentum': float(sent.sentiment_momentum) if sent.sentiment_momentum else 0,
-                'sentiment_volatility': float(sent.sentiment_volatility) if sent.sentiment_volatility else 0,
-                'sentiment_sma': float(sent.sentiment_sma) if sent.sentiment_sma else 0,
-                'sentiment_ema': float(sent.sentiment_ema) if sent.sentiment_ema else 0,
-                'sentiment_rsi': float(sent.sentiment_rsi) if sent.sentiment_rsi else 0,
-                'sentiment_macd': float(sent.sentiment_macd) if sent.sentiment_macd else 0,
-                'news_volume': float(sent.news_volume) if sent.news_volume else 0,
-                'sentiment_distribution': float(sent.sentiment_distribution) if sent.sentiment_distribution else 0,
-                'composite_sentiment': float(sent.composite_sentiment) if sent.composite_sentiment else 0,
-            }
-            data.append(row)
-        
-        df = pd.DataFrame(data)
-        
-        # Création des labels
-        df = self.create_advanced_labels(df, target_param)
-        
-        # Préparation des features
-        X, feature_names = self.prepare_features(df)
-        y = df['return_class']
-        
-        # Suppression des lignes avec des labels manquants
-        valid_indices = ~(y.isna() | X.isna().any(axis=1))
-        X = X[valid_indices]
-        y = y[valid_indices]
-        
-        if len(X) < 100:
-            raise ValueError(f"Pas assez de données pour l'entraînement: {len(X)} échantillons")
+        # Données (prix + indicateurs, labels) divisées en train/test
+        X, y, end_date = self.prepare_training_frame(symbol, target_param, "multiclass", db)
+        X_train, X_test, y_train, y_test = self.split_training_rows(X, y, "multiclass")
+        feature_names = list(X.columns)
         
-        # Division train/test
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42, stratify=y
-        )
-        
-        # Création du dataset LightGBM
-        train_data = lgb.Dataset(X_train, label=y_train)
-        test_data = lgb.Dataset(X_test, label=y_test, reference=train_data)
+        # Datasets LightGBM (découpage en classes des features réutilisé via le cache)
+        train_data, test_data = self.training_datasets(symbol, X, end_date, X_train, y_train, X_test, y_test, db)
         
         # Entraînement du modèle
         model = lgb.train(
-            self.multiclass_params,
+            self.training_params(symbol, "multiclass", db),
             train_data,
             valid_sets=[test_data],
             num_boost_round=1000,
@@ -443,14 +396,15 @@ class LightGBMService:
         # Importance des features
         feature_importance = dict(zip(feature_names, model.feature_importance()))
         
-        # Sauvegarde du modèle
-        model_name = f"lightgbm_multiclass_{symbol}_{target_param.parameter_name}_v1"
-        model_path = os.path.join(self.models_path, f"{model_name}.joblib")
-        joblib.dump(model, model_path)
+        # Sauvegarde du modèle (version suivante, écriture atomique)
+        model_name = f"lightgbm_multiclass_{symbol}_{target_param.parameter_name}"
+        registry = ModelRegistry(db, self.models_path)
+        version, model_path, artifacts = registry.save(model_name, model, flat=False)
         
         # Sauvegarde en base de données
         model_record = MLModels(
-            name=model_name,
+            model_name=model_name,
+            model_version=version,
             model_type="lightgbm_multiclass_classification",
             symbol=symbol,
             target_parameter_id=target_param.id,
@@ -479,7 +433,7 @@ class LightGBMService:
             created_by="lightgbm_service"
         )
         
-        db.add(model_record)
+        registry.register(model_record, artifacts)
         db.commit()
         db.refresh(model_record)
         
@@ -502,108 +456,23 @@ class LightGBMService:
     def train_regression_model(self, symbol: str, target_param: TargetParameters, 
                              db: Session = None) -> Dict[str, Any]:
         """Entraîne un modèle LightGBM de régression"""
+        import lightgbm as lgb
+        from sklearn.metrics import mean_squared_error, r2_score
+        
         if db is None:
             db = self.db
             
-        # Récupération des données (même logique que pour la classification)
-        query = db.query(HistoricalData, TechnicalIndicators, SentimentIndicators).join(
-            TechnicalIndicators, HistoricalData.symbol == TechnicalIndicators.symbol
-        ).join(
-            SentimentIndicators, HistoricalData.symbol == SentimentIndicators.symbol
-        ).filter(
-            HistoricalData.symbol == symbol
-        ).order_by(HistoricalData.date)
-        
-        results = query.all()
-        
-        if not results:
-            raise ValueError(f"Aucune donnée trouvée pour le symbole {symbol}")
-        
-        # Conversion en DataFrame (même logique que pour la classification)
-        data = []
-        for hist, tech, sent in results:
-            row = {
-                'date': hist.date,
-                'symbol': hist.symbol,
-                'open': float(hist.open),
-                'high': float(hist.high),
-                'low': float(hist.low),
-                'close': float(hist.close),
-                'volume': float(hist.volume),
-                'vwap': float(hist.vwap),
-                
-                # Indicateurs techniques
-                'sma_5': float(tech.sma_5) if tech.sma_5 else 0,
-                'sma_10': float(tech.sma_10) if tech.sma_10 else 0,
-                'sma_20': float(tech.sma_20) if tech.sma_20 else 0,
-                'sma_50': float(tech.sma_50) if tech.sma_50 else 0,
-                'ema_5': float(tech.ema_5) if tech.ema_5 else 0,
-                'ema_10': float(tech.ema_10) if tech.ema_10 else 0,
-                'ema_20': float(tech.ema_20) if tech.ema_20 else 0,
-                'ema_50': float(tech.ema_50) if tech.ema_50 else 0,
-                'rsi': float(tech.rsi) if tech.rsi else 0,
-                'macd': float(tech.macd) if tech.macd else 0,
-                'macd_signal': float(tech.macd_signal) if tech.macd_signal else 0,
-                'macd_histogram': float(tech.macd_histogram) if tech.macd_histogram else 0,
-                'bb_upper': float(tech.bb_upper) if tech.bb_upper else 0,
-                'bb_middle': float(tech.bb_middle) if tech.bb_middle else 0,
-                'bb_lower': float(tech.bb_lower) if tech.bb_lower else 0,
-                'bb_width': float(tech.bb_width) if tech.bb_width else 0,
-                'atr': float(tech.atr) if tech.atr else 0,
-                'obv': float(tech.obv) if tech.obv else 0,
-                'vwap': float(tech.vwap) if tech.vwap else 0,
-                'volume_roc': float(tech.volume_roc) if tech.volume_roc else 0,
-                'stochastic_k': float(tech.stochastic_k) if tech.stochastic_k else 0,
-                'stochastic_d': float(tech.stochastic_d) if tech.stochastic_d else 0,
-                'williams_r': float(tech.williams_r) if tech.williams_r else 0,
-                'roc': float(tech.roc) if tech.roc else 0,
-                'cci': float(tech.cci) if tech.cci else 0,
-                'volume_sma': float(tech.volume_sma) if tech.volume_sma else 0,
-                
-                # Indicateurs de sentiment
-                'news_sentiment_score': float(sent.news_sentiment_score) if sent.news_sentiment_score else 0,
-                'short_interest_ratio': float(sent.short_interest_ratio) if sent.short_interest_ratio else 0,
-                'sentiment_momentum': float(sent.sentiment_momentum) if sent.sentiment_momentum else 0,
-                'sentiment_volatility': float(sent.sentiment_volatility) if sent.sentiment_volatility else 0,
-                'sentiment_sma': float(sent.sentiment_sma) if sent.sentiment_sma else 0,
-                'sentiment_ema': float(sent.sentiment_ema) if sent.sentiment_ema else 0,
-                'sentiment_rsi': float(sent.sentiment_rsi) if sent.sentiment_rsi else 0,
-                'sentiment_macd': float(sent.sentiment_macd) if sent.sentiment_macd else 0,
-                'news_volume': float(sent.news_volume) if sent.news_volume else 0,
-                'sentiment_distribution': float(sent.sentiment_distribution) if sent.sentiment_distribution else 0,
-                'composite_sentiment': float(sent.composite_sentiment) if sent.composite_sentiment else 0,
-            }
-            data.append(row)
-        
-        df = pd.DataFrame(data)
-        
-        # Création des labels
-        df = self.create_advanced_labels(df, target_param)
-        
-        # Préparation des features
-        X, feature_names = self.prepare_features(df)
-        y = df['target_return']
-        
-        # Suppression des lignes avec des labels manquants
-        valid_indices = ~(y.isna() | X.isna().any(axis=1))
-        X = X[valid_indices]
-        y = y[valid_indices]
+        # Données (prix + indicateurs, labels) divisées en train/test
+        X, y, end_date = self.prepare_training_frame(symbol, target_param, "regression", db)
+        X_train, X_test, y_train, y_test = self.split_training_rows(X, y, "regression")
+        feature_names = list(X.columns)
         
-        if len(X) < 100:
-            raise ValueError(f"Pas assez de données pour l'entraînement: {len(X)} échantillons")
-        
-        # Division train/test
-        X_train, X_test, y_train, y_test = train_test_split(
-            X, y, test_size=0.2, random_state=42
-        )
-        
-        # Création du dataset LightGBM
-        train_data = lgb.Dataset(X_train, label=y_train)
-        test_data = lgb.Dataset(X_test, label=y_test, reference=train_data)
+        # Datasets LightGBM (découpage en classes des features réutilisé via le cache)
+        train_data, test_data = self.training_datasets(symbol, X, end_date, X_train, y_train, X_test, y_test, db)
         
         # Entraînement du modèle
         model = lgb.train(
-            self.regression_params,
+            self.training_params(symbol, "regression", db),
             train_data,
             valid_sets=[test_data],
             num_boost_round=1000,
@@ -621,14 +490,15 @@ class LightGBMService:
         # Importance des features
         feature_importance = dict(zip(feature_names, model.feature_importance()))
         
-        # Sauvegarde du modèle
-        model_name = f"lightgbm_regression_{symbol}_{target_param.parameter_name}_v1"
-        model_path = os.path.join(self.models_path, f"{model_name}.joblib")
-        joblib.dump(model, model_path)
+        # Sauvegarde du modèle (version suivante, écriture atomique)
+        model_name = f"lightgbm_regression_{symbol}_{target_param.parameter_name}"
+        registry = ModelRegistry(db, self.models_path)
+        version, model_path, artifacts = registry.save(model_name, model, flat=False)
         
         # Sauvegarde en base de données
         model_record = MLModels(
-            name=model_name,
+            model_name=model_name,
+            model_version=version,
             model_type="lightgbm_regression",
             symbol=symbol,
             target_parameter_id=target_param.id,
@@ -654,7 +524,7 @@ class LightGBMService:
             created_by="lightgbm_service"
         )
         
-        db.add(model_record)
+        registry.register(model_record, artifacts)
         db.commit()
         db.refresh(model_record)
         
@@ -674,8 +544,11 @@ class LightGBMService:
         }
     
     def predict(self, model_id: int, symbol: str, prediction_date: date, 
-                db: Session = None) -> Dict[str, Any]:
-        """Effectue une prédiction avec un modèle LightGBM"""
+                db: Session = None, screener_run_id: Optional[int] = None,
+                sink=None) -> Dict[str, Any]:
+        """Effectue une prédiction avec un modèle LightGBM (enregistrée via le puits de prédictions s'il est fourni)"""
+        import joblib
+        
         if db is None:
             db = self.db
             
@@ -687,79 +560,18 @@ class LightGBMService:
         # Chargement du modèle
         model = joblib.load(model_record.model_path)
         
-        # Récupération des données pour la prédiction
-        query = db.query(HistoricalData, TechnicalIndicators, SentimentIndicators).join(
-            TechnicalIndicators, HistoricalData.symbol == TechnicalIndicators.symbol
-        ).join(
-            SentimentIndicators, HistoricalData.symbol == SentimentIndicators.symbol
-        ).filter(
-            HistoricalData.symbol == symbol,
-            HistoricalData.date == prediction_date
-        )
-        
-        result = query.first()
-        
-        if not result:
-            # Fallback: récupérer les données les plus récentes
-            query = db.query(HistoricalData, TechnicalIndicators, SentimentIndicators).join(
-                TechnicalIndicators, HistoricalData.symbol == TechnicalIndicators.symbol
-            ).join(
-                SentimentIndicators, HistoricalData.symbol == SentimentIndicators.symbol
-            ).filter(
-                HistoricalData.symbol == symbol
-            ).order_by(HistoricalData.date.desc()).limit(1)
-            
-            result = query.first()
-            
-            if not result:
+        # Récupération des données pour la prédiction (à défaut les plus récentes)
+        df = self.load_training_frame(symbol, db, end_date=prediction_date, latest=1)
+        if df.empty:
+            df = self.load_training_frame(symbol, db, latest=1)
+            if df.empty:
                 raise ValueError(f"Aucune donnée trouvée pour le symbole {symbol}")
         
-        hist, tech, sent = result
-        data_date_used = hist.date
+        data_date_used = df['date'].iloc[-1]
         
-        # Préparation des features
-        features = {
-            'sma_5': float(tech.sma_5) if tech.sma_5 else 0,
-            'sma_10': float(tech.sma_10) if tech.sma_10 else 0,
-            'sma_20': float(tech.sma_20) if tech.sma_20 else 0,
-            'sma_50': float(tech.sma_50) if tech.sma_50 else 0,
-            'ema_5': float(tech.ema_5) if tech.ema_5 else 0,
-            'ema_10': float(tech.ema_10) if tech.ema_10 else 0,
-            'ema_20': float(tech.ema_20) if tech.ema_20 else 0,
-            'ema_50': float(tech.ema_50) if tech.ema_50 else 0,
-            'rsi': float(tech.rsi) if tech.rsi else 0,
-            'macd': float(tech.macd) if tech.macd else 0,
-            'macd_signal': float(tech.macd_signal) if tech.macd_signal else 0,
-            'macd_histogram': float(tech.macd_histogram) if tech.macd_histogram else 0,
-            'bb_upper': float(tech.bb_upper) if tech.bb_upper else 0,
-            'bb_middle': float(tech.bb_middle) if tech.bb_middle else 0,
-            'bb_lower': float(tech.bb_lower) if tech.bb_lower else 0,
-            'bb_width': float(tech.bb_width) if tech.bb_width else 0,
-            'atr': float(tech.atr) if tech.atr else 0,
-            'obv': float(tech.obv) if tech.obv else 0,
-            'vwap': float(tech.vwap) if tech.vwap else 0,
-            'volume_roc': float(tech.volume_roc) if tech.volume_roc else 0,
-            'stochastic_k': float(tech.stochastic_k) if tech.stochastic_k else 0,
-            'stochastic_d': float(tech.stochastic_d) if tech.stochastic_d else 0,
-            'williams_r': float(tech.williams_r) if tech.williams_r else 0,
-            'roc': float(tech.roc) if tech.roc else 0,
-            'cci': float(tech.cci) if tech.cci else 0,
-            'volume_sma': float(tech.volume_sma) if tech.volume_sma else 0,
-            'news_sentiment_score': float(sent.news_sentiment_score) if sent.news_sentiment_score else 0,
-            'short_interest_ratio': float(sent.short_interest_ratio) if sent.short_interest_ratio else 0,
-            'sentiment_momentum': float(sent.sentiment_momentum) if sent.sentiment_momentum else 0,
-            'sentiment_volatility': float(sent.sentiment_volatility) if sent.sentiment_volatility else 0,
-            'sentiment_sma': float(sent.sentiment_sma) if sent.sentiment_sma else 0,
-            'sentiment_ema': float(sent.sentiment_ema) if sent.sentiment_ema else 0,
-            'sentiment_rsi': float(sent.sentiment_rsi) if sent.sentiment_rsi else 0,
-            'sentiment_macd': float(sent.sentiment_macd) if sent.sentiment_macd else 0,
-            'news_volume': float(sent.news_volume) if sent.news_volume else 0,
-            'sentiment_distribution': float(sent.sentiment_distribution) if sent.sentiment_distribution else 0,
-            'composite_sentiment': float(sent.composite_sentiment) if sent.composite_sentiment else 0,
-        }
-        
-        # Création du DataFrame pour la prédiction
-        X_pred = pd.DataFrame([features])
+        # Préparation des features dans l'ordre de l'entraînement
+        X_features, _ = self.prepare_features(df)
+        X_pred = X_features.reindex(columns=model.feature_name(), fill_value=0.0)
         
         # Prédiction
         prediction = model.predict(X_pred, num_iteration=model.best_iteration)
@@ -787,24 +599,40 @@ class LightGBMService:
         else:
             raise ValueError(f"Type de modèle non supporté: {model_record.model_type}")
         
-        # Sauvegarde de la prédiction
-        prediction_record = MLPredictions(
-            model_id=model_id,
-            symbol=symbol,
-            prediction_date=prediction_date,
-            prediction_value=prediction_value,
-            prediction_class=prediction_class,
-            confidence=confidence,
-            data_date_used=data_date_used,
-            created_by="lightgbm_service"
-        )
-        
-        db.add(prediction_record)
-        db.commit()
-        db.refresh(prediction_record)
+        # Sauvegarde de la prédiction : écriture groupée via le puits, sinon commit immédiat
+        prediction_id = None
+        if sink is not None:
+            sink.add(
+                symbol=symbol,
+                model_id=model_id,
+                prediction_date=prediction_date,
+                prediction_value=prediction_value,
+                confidence=confidence,
+                prediction_class=prediction_class,
+                data_date_used=data_date_used,
+                screener_run_id=screener_run_id,
+                created_by="lightgbm_service"
+            )
+        else:
+            prediction_record = MLPredictions(
+                model_id=model_id,
+                symbol=symbol,
+                prediction_date=prediction_date,
+                prediction_value=prediction_value,
+                prediction_class=prediction_class,
+                confidence=confidence,
+                data_date_used=data_date_used,
+                screener_run_id=screener_run_id,
+                created_by="lightgbm_service"
+            )
+            
+            db.add(prediction_record)
+            db.commit()
+            db.refresh(prediction_record)
+            prediction_id = prediction_record.id
         
         return {
-            "prediction_id": prediction_record.id,
+            "prediction_id": prediction_id,
             "model_id": model_id,
             "symbol": symbol,
             "prediction_date": prediction_date,
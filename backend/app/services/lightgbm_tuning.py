@@ -0,0 +1,278 @@
+"""
+Recherche des hyperparamètres LightGBM par successive halving
+
+Les configurations (num_leaves, learning_rate, feature_fraction) sont tirées dans SEARCH_SPACE puis
+évaluées par tours : à chaque tour, tous les essais restants sont entraînés en parallèle (processus
+séparés) avec le budget d'itérations du tour, seul le meilleur 1/eta est gardé et le budget est
+multiplié par eta. L'arrêt précoce sur le jeu de validation interrompt les essais sans progrès.
+
+Le lgb.Dataset du symbole (ou du secteur) est lu dans le cache des Dataset binaires (cf.
+app/services/lightgbm_dataset_cache.py), construit si besoin : chaque essai le recharge et n'y pose
+que ses lignes et ses labels, sans refaire le découpage en classes (bins) des features. Les
+paramètres recherchés ne changent pas la construction du Dataset.
+
+Les meilleurs paramètres sont enregistrés dans lightgbm_hyperparameters, par symbole ou par
+secteur, et repris par les entraînements de LightGBMService (cf. training_params).
+"""
+import os
+import random
+import logging
+import tempfile
+import threading
+from itertools import product
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.database import LightGBMHyperparameters, SymbolMetadata, TargetParameters
+from app.services.lightgbm_service import LightGBMService, LIGHTGBM_LABEL_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+# lightgbm et joblib sont importés à la première utilisation (dans les fonctions)
+
+SEARCH_SPACE = {
+    "num_leaves": [15, 31, 63, 127],
+    "learning_rate": [0.01, 0.03, 0.05, 0.1],
+    "feature_fraction": [0.6, 0.75, 0.9, 1.0],
+}
+
+TUNING_SCOPES = ("symbol", "sector")
+
+# Itérations sans amélioration avant l'arrêt d'un essai
+EARLY_STOPPING_ROUNDS = 30
+
+_table_exists: Optional[bool] = None
+_table_lock = threading.Lock()
+
+
+def hyperparameters_table_exists(db: Session) -> bool:
+    """Vrai si la table a été créée par scripts/migrate_lightgbm_tuning.py (vérifié une fois par processus)"""
+    global _table_exists
+    with _table_lock:
+        if _table_exists is None:
+            _table_exists = db.execute(
+                text("SELECT to_regclass('public.lightgbm_hyperparameters') IS NOT NULL")
+            ).scalar()
+        return _table_exists
+
+
+def get_symbol_sector(db: Session, symbol: str) -> Optional[str]:
+    """Secteur du symbole (symbol_metadata)"""
+    return db.query(SymbolMetadata.sector).filter(SymbolMetadata.symbol == symbol).scalar()
+
+
+def get_tuned_params(db: Session, symbol: str, model_kind: str) -> Optional[Dict[str, Any]]:
+    """Meilleurs paramètres enregistrés pour le symbole, à défaut pour son secteur"""
+    if db is None or not hyperparameters_table_exists(db):
+        return None
+
+    scopes = [("symbol", symbol)]
+    sector = get_symbol_sector(db, symbol)
+    if sector:
+        scopes.append(("sector", sector))
+
+    for scope, scope_value in scopes:
+        row = db.query(LightGBMHyperparameters).filter(
+            LightGBMHyperparameters.scope == scope,
+            LightGBMHyperparameters.scope_value == scope_value,
+            LightGBMHyperparameters.model_kind == model_kind
+        ).first()
+        if row:
+            return dict(row.params)
+    return None
+
+
+def sample_configurations(n_trials: int, seed: int = 42) -> List[Dict[str, Any]]:
+    """n_trials configurations distinctes tirées dans SEARCH_SPACE"""
+    grid = [dict(zip(SEARCH_SPACE, values)) for values in product(*SEARCH_SPACE.values())]
+    random.Random(seed).shuffle(grid)
+    return grid[:max(1, n_trials)]
+
+
+def run_trial(dataset_path: str, split: Dict[str, Any], params: Dict[str, Any],
+              num_boost_round: int) -> Tuple[float, int]:
+    """Entraîner un essai sur le Dataset binaire ; retourne (meilleur score de validation, itération)"""
+    import lightgbm as lgb
+    from app.services.lightgbm_dataset_cache import labeled_subset
+
+    full_data = lgb.Dataset(dataset_path).construct()
+    train_data = labeled_subset(full_data, split["train_rows"], split["train_labels"])
+    valid_data = labeled_subset(full_data, split["valid_rows"], split["valid_labels"])
+    model = lgb.train(
+        params,
+        train_data,
+        valid_sets=[valid_data],
+        num_boost_round=num_boost_round,
+        callbacks=[lgb.early_stopping(stopping_rounds=EARLY_STOPPING_ROUNDS, verbose=False),
+                   lgb.log_evaluation(0)]
+    )
+    return float(model.best_score["valid_0"][params["metric"]]), int(model.best_iteration or num_boost_round)
+
+
+def successive_halving(dataset_path: str, split: Dict[str, Any], base_params: Dict[str, Any],
+                       configurations: List[Dict[str, Any]], min_rounds: int, max_rounds: int,
+                       eta: int, workers: int) -> List[Dict[str, Any]]:
+    """
+    Évaluer les configurations par tours de budget croissant (les métriques LightGBM utilisées,
+    logloss et rmse, sont à minimiser). Retourne les essais du dernier tour, le meilleur en tête.
+    """
+    from joblib import Parallel, delayed
+
+    eta = max(2, eta)
+    budget = max(1, min_rounds)
+    trials = [{"params": {**base_params, **config, "num_threads": 1}, "config": config} for config in configurations]
+
+    # Processus loky gardés d'un tour à l'autre (utilisables depuis un worker Celery)
+    with Parallel(n_jobs=workers, backend="loky") as parallel:
+        while True:
+            results = parallel(
+                delayed(run_trial)(dataset_path, split, trial["params"], budget) for trial in trials
+            )
+            for trial, (score, best_iteration) in zip(trials, results):
+                trial.update(score=score, best_iteration=best_iteration, rounds=budget)
+            trials.sort(key=lambda trial: trial["score"])
+            logger.info(f"🎛️ [TUNING] {len(trials)} essais à {budget} itérations, meilleur score {trials[0]['score']:.5f}")
+
+            if len(trials) == 1 or budget >= max_rounds:
+                return trials
+            trials = trials[:max(1, len(trials) // eta)]
+            budget = min(budget * eta, max_rounds)
+
+
+class LightGBMTuner:
+    """Recherche et enregistrement des meilleurs paramètres LightGBM d'un symbole ou d'un secteur"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.service = LightGBMService(db)
+
+    def scope_symbols(self, symbol: str, scope: str) -> Tuple[str, List[str]]:
+        """(valeur de la portée, symboles dont les données sont empilées)"""
+        if scope == "symbol":
+            return symbol, [symbol]
+
+        sector = get_symbol_sector(self.db, symbol)
+        if not sector:
+            raise ValueError(f"Secteur inconnu pour le symbole {symbol}")
+        others = self.db.query(SymbolMetadata.symbol).filter(
+            SymbolMetadata.sector == sector,
+            SymbolMetadata.is_active == True,
+            SymbolMetadata.symbol != symbol
+        ).order_by(SymbolMetadata.symbol).limit(max(0, settings.lightgbm_tuning_sector_symbols - 1)).all()
+        return sector, [symbol] + [row[0] for row in others]
+
+    def build_dataset(self, scope_value: str, symbols: List[str], target_param: TargetParameters,
+                      model_kind: str, directory: str) -> Tuple[str, Dict[str, Any]]:
+        """
+        Chemin du Dataset binaire de toutes les lignes des symboles (cache des Dataset, ou répertoire
+        temporaire si le cache est désactivé) et lignes/labels train et validation
+        """
+        from app.services.lightgbm_dataset_cache import LightGBMDatasetCache, source_data_version
+
+        frames, end_dates, splits = [], [], []
+        offset = 0
+        for symbol in symbols:
+            try:
+                X, y, end_date = self.service.prepare_training_frame(symbol, target_param, model_kind, self.db)
+                X_train, X_valid, y_train, y_valid = self.service.split_training_rows(X, y, model_kind)
+            except ValueError as e:
+                logger.warning(f"⚠️ [TUNING] {symbol} ignoré: {e}")
+                continue
+            frames.append(X)
+            end_dates.append(end_date)
+            splits.append((X_train.index + offset, y_train, X_valid.index + offset, y_valid))
+            offset += len(X)
+        if not frames:
+            raise ValueError("Aucune donnée d'entraînement pour la recherche")
+
+        cache = LightGBMDatasetCache()
+        if not cache.enabled:
+            cache = LightGBMDatasetCache(directory)
+            cache.enabled = True
+
+        # Lignes des symboles empilées (portée sector) : une seule entrée de cache pour la portée
+        X = pd.concat(frames, ignore_index=True)
+        cache_scope = scope_value if len(symbols) == 1 else f"pool-{scope_value}"
+        data_version = source_data_version(self.db, symbols)
+        cache.load(cache_scope, max(end_dates), X, data_version)
+        dataset_path = cache.path(cache_scope, max(end_dates), len(X), data_version)
+        if not os.path.exists(dataset_path):
+            raise ValueError(f"Dataset binaire non enregistré: {dataset_path}")
+
+        split = {
+            "train_rows": np.concatenate([s[0] for s in splits]),
+            "train_labels": np.concatenate([s[1].to_numpy(dtype=np.float64) for s in splits]),
+            "valid_rows": np.concatenate([s[2] for s in splits]),
+            "valid_labels": np.concatenate([s[3].to_numpy(dtype=np.float64) for s in splits]),
+        }
+        return dataset_path, split
+
+    def save_best_params(self, scope: str, scope_value: str, model_kind: str, best: Dict[str, Any],
+                         metric: str, trials: int):
+        """Enregistrer (ou remplacer) les meilleurs paramètres de la portée"""
+        values = {
+            "scope": scope,
+            "scope_value": scope_value,
+            "model_kind": model_kind,
+            "params": best["config"],
+            "metric": metric,
+            "best_score": best["score"],
+            "best_iteration": best["best_iteration"],
+            "trials": trials,
+        }
+        statement = insert(LightGBMHyperparameters).values(values)
+        statement = statement.on_conflict_do_update(
+            constraint="uq_lightgbm_hyperparameters_scope_kind",
+            set_={**{key: statement.excluded[key] for key in ("params", "metric", "best_score",
+                                                               "best_iteration", "trials")},
+                  "updated_at": func.now()}
+        )
+        self.db.execute(statement)
+        self.db.commit()
+
+    def tune(self, symbol: str, target_param: TargetParameters, model_kind: str = "binary",
+             scope: str = "symbol") -> Dict[str, Any]:
+        """Rechercher les meilleurs paramètres du type de modèle pour le symbole ou son secteur"""
+        if model_kind not in LIGHTGBM_LABEL_COLUMNS:
+            raise ValueError(f"Type de modèle inconnu: {model_kind} (attendu: {', '.join(LIGHTGBM_LABEL_COLUMNS)})")
+        if scope not in TUNING_SCOPES:
+            raise ValueError(f"Portée inconnue: {scope} (attendu: {', '.join(TUNING_SCOPES)})")
+
+        scope_value, symbols = self.scope_symbols(symbol, scope)
+        base_params = self.service.base_params(model_kind)
+        configurations = sample_configurations(settings.lightgbm_tuning_trials)
+
+        with tempfile.TemporaryDirectory(prefix="lgb_tuning_") as directory:
+            dataset_path, split = self.build_dataset(scope_value, symbols, target_param, model_kind, directory)
+            rows = len(split["train_rows"])
+            final = successive_halving(
+                dataset_path, split, base_params, configurations,
+                min_rounds=settings.lightgbm_tuning_min_rounds,
+                max_rounds=settings.lightgbm_tuning_max_rounds,
+                eta=settings.lightgbm_tuning_eta,
+                workers=settings.lightgbm_tuning_workers
+            )
+
+        best = final[0]
+        self.save_best_params(scope, scope_value, model_kind, best, base_params["metric"], len(configurations))
+        logger.info(f"🏆 [TUNING] {model_kind} {scope}={scope_value}: {best['config']} "
+                    f"({base_params['metric']} {best['score']:.5f}, {rows} lignes)")
+
+        return {
+            "scope": scope,
+            "scope_value": scope_value,
+            "model_kind": model_kind,
+            "symbols": symbols,
+            "training_rows": rows,
+            "trials": len(configurations),
+            "best_params": best["config"],
+            "best_score": best["score"],
+            "best_iteration": best["best_iteration"],
+            "metric": base_params["metric"]
+        }
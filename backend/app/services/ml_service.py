@@ -4,22 +4,32 @@ from sqlalchemy.orm import Session
 from sqlalchemy import text
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta, date
-import joblib
 import os
-from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, mean_squared_error, r2_score
-from sklearn.preprocessing import StandardScaler
+import logging
 import warnings
 warnings.filterwarnings('ignore')
-import shap
+
+# joblib, scikit-learn et shap sont importés à la première utilisation (dans les méthodes)
+# pour ne pas alourdir le démarrage de l'API et des workers qui n'entraînent ni ne prédisent
 
 from app.models.database import (
-    HistoricalData, TechnicalIndicators, SentimentIndicators, 
-    TargetParameters, MLModels, MLPredictions
+    HistoricalData, TargetParameters, MLModels, MLPredictions
 )
 from app.core.config import settings
+from app.services.model_registry import ModelRegistry
+from app.services.feature_registry import (
+    BASE_FEATURE_COLUMNS, PRICE_FEATURE_COLUMNS, TECHNICAL_FEATURE_COLUMNS, SENTIMENT_FEATURE_COLUMNS,
+    compute_features, compute_latest_features, required_lookback
+)
+
+# Politiques d'évaluation à l'entraînement (en plus du score sur le jeu de test)
+#   oob        : score out-of-bag de la forêt entraînée, sans autre entraînement
+#   timeseries : validation walk-forward (TimeSeriesSplit) en parallèle sur les cœurs
+#   kfold      : validation croisée 5 plis (ancien comportement, 5 forêts supplémentaires)
+#   none       : aucune validation croisée (runs du screener)
+EVALUATION_POLICIES = ("oob", "timeseries", "kfold", "none")
 
+logger = logging.getLogger(__name__)
 
 class MLService:
     def __init__(self, db: Session = None):
@@ -56,415 +66,221 @@ class MLService:
     def calculate_target_price(self, current_price: float, target_return_percentage: float, 
                              time_horizon_days: int) -> float:
         """Calculer le prix cible basé sur le rendement attendu"""
-        # Convertir en float pour éviter les problèmes de type
-        current_price = float(current_price)
-        target_return_percentage = float(target_return_percentage)
-        time_horizon_days = int(time_horizon_days)
-        
-        # Calcul du rendement quotidien équivalent
-        daily_return = (1 + target_return_percentage / 100) ** (1 / time_horizon_days) - 1
-        # Calcul du prix cible
-        target_price = current_price * (1 + daily_return * time_horizon_days)
-        return target_price
-    
-    def create_labels_for_training(self, symbol: str, target_param: TargetParameters, db: Session = None) -> pd.DataFrame:
-        """Créer les labels pour l'entraînement basés sur les paramètres de cible"""
-        # Utiliser la session passée en paramètre ou celle de l'instance
-        session = db or self.db
-        
-        # Récupérer les données historiques avec SQLAlchemy ORM
-        historical_data = session.query(HistoricalData).filter(
-            HistoricalData.symbol == symbol
-        ).order_by(HistoricalData.date).all()
+        from app.services.label_engine import target_price_factor
         
-        if not historical_data:
-            return pd.DataFrame()
+        return float(current_price) * target_price_factor(target_return_percentage, time_horizon_days)
+    
+    def load_training_history(self, symbol: str, db: Session = None) -> pd.DataFrame:
+        """
+        Tout l'historique d'un symbole pour l'entraînement : colonnes brutes du magasin de features
+        s'il est rempli, sinon prix + indicateurs en une seule requête. Dans les deux cas les valeurs
+        manquantes restent NaN : imputation et features dérivées sont calculées ensuite, de la même façon.
+        """
+        from app.services.feature_store import FeatureStore, feature_store_available
         
-        # Convertir en DataFrame
-        data = []
-        for h in historical_data:
-            # Récupérer les indicateurs techniques
-            tech = session.query(TechnicalIndicators).filter(
-                TechnicalIndicators.symbol == symbol,
-                TechnicalIndicators.date == h.date
-            ).first()
-            
-            # Récupérer les indicateurs de sentiment
-            sent = session.query(SentimentIndicators).filter(
-                SentimentIndicators.symbol == symbol,
-                SentimentIndicators.date == h.date
-            ).first()
-            
-            # Préparer les données de base
-            row_data = {
-                'date': h.date,
-                'close': float(h.close),
-                'volume': h.volume,
-                'vwap': float(h.vwap) if h.vwap else None,
-            }
-            
-            # Ajouter tous les indicateurs techniques disponibles
-            if tech:
-                tech_indicators = {
-                    # Moyennes mobiles
-                    'sma_5': float(tech.sma_5) if tech.sma_5 else None,
-                    'sma_10': float(tech.sma_10) if tech.sma_10 else None,
-                    'sma_20': float(tech.sma_20) if tech.sma_20 else None,
-                    'sma_50': float(tech.sma_50) if tech.sma_50 else None,
-                    'sma_200': float(tech.sma_200) if tech.sma_200 else None,
-                    'ema_5': float(tech.ema_5) if tech.ema_5 else None,
-                    'ema_10': float(tech.ema_10) if tech.ema_10 else None,
-                    'ema_20': float(tech.ema_20) if tech.ema_20 else None,
-                    'ema_50': float(tech.ema_50) if tech.ema_50 else None,
-                    'ema_200': float(tech.ema_200) if tech.ema_200 else None,
-                    
-                    # Indicateurs de momentum
-                    'rsi_14': float(tech.rsi_14) if tech.rsi_14 else None,
-                    'macd': float(tech.macd) if tech.macd else None,
-                    'macd_signal': float(tech.macd_signal) if tech.macd_signal else None,
-                    'macd_histogram': float(tech.macd_histogram) if tech.macd_histogram else None,
-                    'stochastic_k': float(tech.stochastic_k) if tech.stochastic_k else None,
-                    'stochastic_d': float(tech.stochastic_d) if tech.stochastic_d else None,
-                    'williams_r': float(tech.williams_r) if tech.williams_r else None,
-                    'roc': float(tech.roc) if tech.roc else None,
-                    'cci': float(tech.cci) if tech.cci else None,
-                    
-                    # Bollinger Bands
-                    'bb_middle': float(tech.bb_middle) if tech.bb_middle else None,
-                    'bb_lower': float(tech.bb_lower) if tech.bb_lower else None,
-                    'bb_width': float(tech.bb_width) if tech.bb_width else None,
-                    'bb_position': float(tech.bb_position) if tech.bb_position else None,
-                    
-                    # Volume
-                    'obv': float(tech.obv) if tech.obv else None,
-                    'volume_roc': float(tech.volume_roc) if tech.volume_roc else None,
-                    'volume_sma_20': float(tech.volume_sma_20) if tech.volume_sma_20 else None,
-                    
-                    # ATR
-                    'atr_14': float(tech.atr_14) if tech.atr_14 else None,
-                }
-                row_data.update(tech_indicators)
-            
-            # Ajouter tous les indicateurs de sentiment disponibles
-            if sent:
-                sent_indicators = {
-                    # Base Sentiment Indicators
-                    'sentiment_score_normalized': float(sent.sentiment_score_normalized) if sent.sentiment_score_normalized else None,
-                    
-                    # Sentiment Momentum
-                    'sentiment_momentum_1d': float(sent.sentiment_momentum_1d) if sent.sentiment_momentum_1d else None,
-                    'sentiment_momentum_3d': float(sent.sentiment_momentum_3d) if sent.sentiment_momentum_3d else None,
-                    'sentiment_momentum_7d': float(sent.sentiment_momentum_7d) if sent.sentiment_momentum_7d else None,
-                    'sentiment_momentum_14d': float(sent.sentiment_momentum_14d) if sent.sentiment_momentum_14d else None,
-                    
-                    # Sentiment Volatility
-                    'sentiment_volatility_3d': float(sent.sentiment_volatility_3d) if sent.sentiment_volatility_3d else None,
-                    'sentiment_volatility_7d': float(sent.sentiment_volatility_7d) if sent.sentiment_volatility_7d else None,
-                    'sentiment_volatility_14d': float(sent.sentiment_volatility_14d) if sent.sentiment_volatility_14d else None,
-                    'sentiment_volatility_30d': float(sent.sentiment_volatility_30d) if sent.sentiment_volatility_30d else None,
-                    
-                    # Sentiment Moving Averages
-                    'sentiment_sma_3': float(sent.sentiment_sma_3) if sent.sentiment_sma_3 else None,
-                    'sentiment_sma_7': float(sent.sentiment_sma_7) if sent.sentiment_sma_7 else None,
-                    'sentiment_sma_14': float(sent.sentiment_sma_14) if sent.sentiment_sma_14 else None,
-                    'sentiment_sma_30': float(sent.sentiment_sma_30) if sent.sentiment_sma_30 else None,
-                    'sentiment_ema_3': float(sent.sentiment_ema_3) if sent.sentiment_ema_3 else None,
-                    'sentiment_ema_7': float(sent.sentiment_ema_7) if sent.sentiment_ema_7 else None,
-                    'sentiment_ema_14': float(sent.sentiment_ema_14) if sent.sentiment_ema_14 else None,
-                    'sentiment_ema_30': float(sent.sentiment_ema_30) if sent.sentiment_ema_30 else None,
-                    
-                    # Sentiment Oscillators
-                    'sentiment_rsi_14': float(sent.sentiment_rsi_14) if sent.sentiment_rsi_14 else None,
-                    'sentiment_macd': float(sent.sentiment_macd) if sent.sentiment_macd else None,
-                    'sentiment_macd_signal': float(sent.sentiment_macd_signal) if sent.sentiment_macd_signal else None,
-                    'sentiment_macd_histogram': float(sent.sentiment_macd_histogram) if sent.sentiment_macd_histogram else None,
-                    
-                    # News Volume Indicators
-                    'news_volume_sma_7': float(sent.news_volume_sma_7) if sent.news_volume_sma_7 else None,
-                    'news_volume_sma_14': float(sent.news_volume_sma_14) if sent.news_volume_sma_14 else None,
-                    'news_volume_sma_30': float(sent.news_volume_sma_30) if sent.news_volume_sma_30 else None,
-                    'news_volume_roc_7d': float(sent.news_volume_roc_7d) if sent.news_volume_roc_7d else None,
-                    'news_volume_roc_14d': float(sent.news_volume_roc_14d) if sent.news_volume_roc_14d else None,
-                    
-                    # Sentiment Distribution Ratios
-                    'news_positive_ratio': float(sent.news_positive_ratio) if sent.news_positive_ratio else None,
-                    'news_negative_ratio': float(sent.news_negative_ratio) if sent.news_negative_ratio else None,
-                    'news_neutral_ratio': float(sent.news_neutral_ratio) if sent.news_neutral_ratio else None,
-                    'news_sentiment_quality': float(sent.news_sentiment_quality) if sent.news_sentiment_quality else None,
-                    
-                    # Short Interest Indicators
-                    'short_interest_momentum_5d': float(sent.short_interest_momentum_5d) if sent.short_interest_momentum_5d else None,
-                    'short_interest_momentum_10d': float(sent.short_interest_momentum_10d) if sent.short_interest_momentum_10d else None,
-                    'short_interest_momentum_20d': float(sent.short_interest_momentum_20d) if sent.short_interest_momentum_20d else None,
-                    'short_interest_volatility_7d': float(sent.short_interest_volatility_7d) if sent.short_interest_volatility_7d else None,
-                    'short_interest_volatility_14d': float(sent.short_interest_volatility_14d) if sent.short_interest_volatility_14d else None,
-                    'short_interest_volatility_30d': float(sent.short_interest_volatility_30d) if sent.short_interest_volatility_30d else None,
-                    'short_interest_sma_7': float(sent.short_interest_sma_7) if sent.short_interest_sma_7 else None,
-                    'short_interest_sma_14': float(sent.short_interest_sma_14) if sent.short_interest_sma_14 else None,
-                    'short_interest_sma_30': float(sent.short_interest_sma_30) if sent.short_interest_sma_30 else None,
-                    
-                    # Short Volume Indicators
-                    'short_volume_momentum_5d': float(sent.short_volume_momentum_5d) if sent.short_volume_momentum_5d else None,
-                    'short_volume_momentum_10d': float(sent.short_volume_momentum_10d) if sent.short_volume_momentum_10d else None,
-                    'short_volume_momentum_20d': float(sent.short_volume_momentum_20d) if sent.short_volume_momentum_20d else None,
-                    'short_volume_volatility_7d': float(sent.short_volume_volatility_7d) if sent.short_volume_volatility_7d else None,
-                    'short_volume_volatility_14d': float(sent.short_volume_volatility_14d) if sent.short_volume_volatility_14d else None,
-                    'short_volume_volatility_30d': float(sent.short_volume_volatility_30d) if sent.short_volume_volatility_30d else None,
-                    
-                    # Composite Sentiment Indicators
-                    'sentiment_strength_index': float(sent.sentiment_strength_index) if sent.sentiment_strength_index else None,
-                    'market_sentiment_index': float(sent.market_sentiment_index) if sent.market_sentiment_index else None,
-                    'sentiment_divergence': float(sent.sentiment_divergence) if sent.sentiment_divergence else None,
-                    'sentiment_acceleration': float(sent.sentiment_acceleration) if sent.sentiment_acceleration else None,
-                    'sentiment_trend_strength': float(sent.sentiment_trend_strength) if sent.sentiment_trend_strength else None,
-                    'sentiment_quality_index': float(sent.sentiment_quality_index) if sent.sentiment_quality_index else None,
-                    'sentiment_risk_score': float(sent.sentiment_risk_score) if sent.sentiment_risk_score else None,
-                }
-                row_data.update(sent_indicators)
-            
-            data.append(row_data)
+        session = db or self.db
         
-        df = pd.DataFrame(data)
+        df = pd.DataFrame()
+        if feature_store_available(session):
+            df = FeatureStore(session).load_history(symbol, feature_names=BASE_FEATURE_COLUMNS)
         
         if df.empty:
-            return pd.DataFrame()
+            df = self.load_feature_windows([symbol], db=session)
+            if not df.empty:
+                df = df.drop(columns=['symbol'])
+        return df
+    
+    def create_labels_for_targets(self, symbol: str, target_params: List[TargetParameters],
+                                  db: Session = None) -> Dict[int, pd.DataFrame]:
+        """
+        Données labellisées de plusieurs paramètres cibles (par id) à partir d'un seul chargement
+        de l'historique et d'un seul calcul des rendements futurs par horizon
+        """
+        from app.services.label_engine import LabelMatrix
+        
+        df = self.load_training_history(symbol, db)
+        if df.empty:
+            return {param.id: pd.DataFrame() for param in target_params}
         
-        # Calculer le prix cible pour chaque jour
-        df['target_price'] = df['close'].apply(
-            lambda x: self.calculate_target_price(x, target_param.target_return_percentage, target_param.time_horizon_days)
+        # Rendements futurs calculés sur les clôtures d'origine (avant remplissage des valeurs manquantes)
+        labels = LabelMatrix(
+            df['close'].to_numpy(),
+            [(param.target_return_percentage, param.time_horizon_days) for param in target_params]
         )
         
-        # Calculer le rendement réel sur l'horizon
-        df['future_close'] = df['close'].shift(-target_param.time_horizon_days)
-        df['actual_return'] = (df['future_close'] - df['close']) / df['close'] * 100
-        
-        # Créer les labels de classification
-        target_return_float = float(target_param.target_return_percentage)
-        df['target_achieved'] = (df['actual_return'] >= target_return_float).astype(int)
-        
-        # Créer les labels de régression (rendement réel)
-        df['target_return'] = df['actual_return']
-        
-        # Remplacer les valeurs NaN par des valeurs par défaut au lieu de supprimer les lignes
-        # Pour les features numériques, utiliser la médiane ou 0
-        numeric_columns = [
-            # Données de base
-            'close', 'volume', 'vwap',
-            
-            # Moyennes mobiles techniques
-            'sma_5', 'sma_10', 'sma_20', 'sma_50', 'sma_200',
-            'ema_5', 'ema_10', 'ema_20', 'ema_50', 'ema_200',
-            
-            # Indicateurs de momentum techniques
-            'rsi_14', 'macd', 'macd_signal', 'macd_histogram',
-            'stochastic_k', 'stochastic_d', 'williams_r', 'roc', 'cci',
-            
-            # Bollinger Bands
-            'bb_middle', 'bb_lower', 'bb_width', 'bb_position',
-            
-            # Volume techniques
-            'obv', 'volume_roc', 'volume_sma_20',
-            
-            # ATR
-            'atr_14',
-            
-            # Indicateurs de sentiment de base
-            'sentiment_score_normalized',
-            
-            # Sentiment Momentum
-            'sentiment_momentum_1d', 'sentiment_momentum_3d', 'sentiment_momentum_7d', 'sentiment_momentum_14d',
-            
-            # Sentiment Volatility
-            'sentiment_volatility_3d', 'sentiment_volatility_7d', 'sentiment_volatility_14d', 'sentiment_volatility_30d',
-            
-            # Sentiment Moving Averages
-            'sentiment_sma_3', 'sentiment_sma_7', 'sentiment_sma_14', 'sentiment_sma_30',
-            'sentiment_ema_3', 'sentiment_ema_7', 'sentiment_ema_14', 'sentiment_ema_30',
-            
-            # Sentiment Oscillators
-            'sentiment_rsi_14', 'sentiment_macd', 'sentiment_macd_signal', 'sentiment_macd_histogram',
-            
-            # News Volume Indicators
-            'news_volume_sma_7', 'news_volume_sma_14', 'news_volume_sma_30',
-            'news_volume_roc_7d', 'news_volume_roc_14d',
-            
-            # Sentiment Distribution Ratios
-            'news_positive_ratio', 'news_negative_ratio', 'news_neutral_ratio', 'news_sentiment_quality',
-            
-            # Short Interest Indicators
-            'short_interest_momentum_5d', 'short_interest_momentum_10d', 'short_interest_momentum_20d',
-            'short_interest_volatility_7d', 'short_interest_volatility_14d', 'short_interest_volatility_30d',
-            'short_interest_sma_7', 'short_interest_sma_14', 'short_interest_sma_30',
-            
-            # Short Volume Indicators
-            'short_volume_momentum_5d', 'short_volume_momentum_10d', 'short_volume_momentum_20d',
-            'short_volume_volatility_7d', 'short_volume_volatility_14d', 'short_volume_volatility_30d',
-            
-            # Composite Sentiment Indicators
-            'sentiment_strength_index', 'market_sentiment_index', 'sentiment_divergence',
-            'sentiment_acceleration', 'sentiment_trend_strength', 'sentiment_quality_index', 'sentiment_risk_score'
-        ]
-        
-        for col in numeric_columns:
+        # Remplacer les valeurs NaN par la médiane de la colonne (0 si pas de données) au lieu de
+        # supprimer les lignes ; seules les lignes sans rendement futur sont supprimées
+        for col in BASE_FEATURE_COLUMNS:
             if col in df.columns:
-                # Remplacer NaN par la médiane de la colonne, ou 0 si pas de données
                 median_val = df[col].median() if not df[col].isna().all() else 0
                 df[col] = df[col].fillna(median_val)
         
-        # Supprimer seulement les lignes avec des valeurs manquantes critiques
-        critical_columns = ['close', 'volume', 'target_price', 'future_close', 'actual_return']
-        df = df.dropna(subset=critical_columns)
-        
-        return df
+        return {
+            param.id: labels.label_frame(df, param.target_return_percentage, param.time_horizon_days)
+            for param in target_params
+        }
+    
+    def create_labels_for_training(self, symbol: str, target_param: TargetParameters, db: Session = None) -> pd.DataFrame:
+        """Créer les labels pour l'entraînement basés sur les paramètres de cible"""
+        return self.create_labels_for_targets(symbol, [target_param], db)[target_param.id]
     
     def prepare_features(self, df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
-        """Préparer les features pour l'entraînement avec toutes les dimensions enrichies"""
-        
-        # Définir toutes les features disponibles (toutes les colonnes sauf les colonnes de contrôle)
-        exclude_columns = ['date', 'target_price', 'future_close', 'actual_return', 'target_achieved', 'target_return']
-        feature_columns = [col for col in df.columns if col not in exclude_columns]
-        
-        # Sélectionner les features disponibles
-        available_features = [col for col in feature_columns if col in df.columns]
-        
-        # Créer des features supplémentaires
-        df_features = df[available_features].copy()
-        
-        # Features de momentum supplémentaires (si pas déjà présentes)
-        if 'close' in df.columns:
-            if 'price_momentum_5d' not in df_features.columns:
-                df_features['price_momentum_5d'] = df['close'].pct_change(5)
-            if 'price_momentum_10d' not in df_features.columns:
-                df_features['price_momentum_10d'] = df['close'].pct_change(10)
-            if 'price_momentum_20d' not in df_features.columns:
-                df_features['price_momentum_20d'] = df['close'].pct_change(20)
-        
-        if 'volume' in df.columns:
-            if 'volume_momentum_5d' not in df_features.columns:
-                df_features['volume_momentum_5d'] = df['volume'].pct_change(5)
-            if 'volume_momentum_10d' not in df_features.columns:
-                df_features['volume_momentum_10d'] = df['volume'].pct_change(10)
-        
-        # Features de volatilité supplémentaires
-        if 'close' in df.columns:
-            if 'price_volatility_5d' not in df_features.columns:
-                df_features['price_volatility_5d'] = df['close'].rolling(5).std()
-            if 'price_volatility_10d' not in df_features.columns:
-                df_features['price_volatility_10d'] = df['close'].rolling(10).std()
-            if 'price_volatility_20d' not in df_features.columns:
-                df_features['price_volatility_20d'] = df['close'].rolling(20).std()
-        
-        # Features de corrélation avancées
-        if 'close' in df.columns and 'sentiment_score_normalized' in df.columns:
-            if 'price_sentiment_corr' not in df_features.columns:
-                df_features['price_sentiment_corr'] = df['close'].rolling(20).corr(df['sentiment_score_normalized'])
-        
-        if 'volume' in df.columns and 'sentiment_score_normalized' in df.columns:
-            if 'volume_sentiment_corr' not in df_features.columns:
-                df_features['volume_sentiment_corr'] = df['volume'].rolling(20).corr(df['sentiment_score_normalized'])
-        
-        # Features de ratio avancées
-        if 'close' in df.columns and 'sma_20' in df.columns:
-            if 'price_sma_ratio' not in df_features.columns:
-                df_features['price_sma_ratio'] = df['close'] / df['sma_20']
-        
-        if 'close' in df.columns and 'ema_20' in df.columns:
-            if 'price_ema_ratio' not in df_features.columns:
-                df_features['price_ema_ratio'] = df['close'] / df['ema_20']
-        
-        # Features de divergence
-        if 'rsi_14' in df.columns and 'sentiment_rsi_14' in df.columns:
-            if 'rsi_sentiment_divergence' not in df_features.columns:
-                df_features['rsi_sentiment_divergence'] = df['rsi_14'] - df['sentiment_rsi_14']
-        
-        # Features de momentum croisé
-        if 'sentiment_momentum_7d' in df.columns and 'sentiment_momentum_14d' in df.columns:
-            if 'sentiment_momentum_acceleration' not in df_features.columns:
-                df_features['sentiment_momentum_acceleration'] = df['sentiment_momentum_7d'] - df['sentiment_momentum_14d']
-        
-        # Remplacer les valeurs infinies et NaN
-        df_features = df_features.replace([np.inf, -np.inf], np.nan)
-        df_features = df_features.fillna(0)
+        """Préparer les features pour l'entraînement (colonnes brutes + features dérivées du registre)"""
+        exclude_columns = ['symbol', 'date', 'target_price', 'future_close', 'actual_return', 'target_achieved', 'target_return']
+        df_features = compute_features(df, exclude_columns=exclude_columns)
         
         return df_features, df_features.columns.tolist()
     
     def prepare_features_for_prediction(self, df: pd.DataFrame, feature_names: List[str]) -> pd.DataFrame:
-        """Préparer les features pour la prédiction en utilisant exactement les mêmes features que l'entraînement"""
+        """
+        Préparer les features pour la prédiction avec le même code que l'entraînement.
+        df doit contenir la fenêtre d'historique nécessaire (cf. required_lookback) ; les features
+        sont calculées pour chaque ligne, la dernière correspondant à la date prédite.
+        """
+        return compute_features(df, feature_names)
+    
+    def load_feature_windows(self, symbols: List[str], as_of_date: date = None, lookback: int = None,
+                             db: Session = None) -> pd.DataFrame:
+        """
+        Charger en une seule requête les données (prix + indicateurs) des symboles : les `lookback`
+        dernières lignes jusqu'à la date demandée (à défaut les plus récentes), ou tout l'historique
+        si lookback est None. Retourne un DataFrame trié par symbole et par date.
+        """
+        from sqlalchemy import func, and_, select
+        from app.services.feature_frames import feature_select_columns, panel_from_clause, rows_to_frame
         
-        # Créer un DataFrame avec toutes les features nécessaires
-        df_features = pd.DataFrame(index=df.index)
+        session = db or self.db
+        columns = feature_select_columns(PRICE_FEATURE_COLUMNS, TECHNICAL_FEATURE_COLUMNS, SENTIMENT_FEATURE_COLUMNS)
+        
+        def query_windows(date_filter):
+            ranked = session.query(
+                HistoricalData.symbol.label('symbol'),
+                HistoricalData.date.label('date'),
+                func.row_number().over(
+                    partition_by=HistoricalData.symbol,
+                    order_by=HistoricalData.date.desc()
+                ).label('row_number')
+            ).filter(HistoricalData.symbol.in_(symbols))
+            if date_filter is not None:
+                ranked = ranked.filter(HistoricalData.date <= date_filter)
+            ranked = ranked.subquery()
+            
+            query = select(*columns).select_from(panel_from_clause()).join(
+                ranked, and_(ranked.c.symbol == HistoricalData.symbol, ranked.c.date == HistoricalData.date)
+            )
+            if lookback:
+                query = query.where(ranked.c.row_number <= lookback)
+            result = session.execute(query.order_by(HistoricalData.symbol, HistoricalData.date))
+            return list(result.keys()), result.all()
+        
+        keys, records = query_windows(as_of_date)
+        if as_of_date:
+            # Même repli que predict : les données les plus récentes disponibles
+            found = {record.symbol for record in records}
+            if len(found) < len(set(symbols)):
+                records += [r for r in query_windows(None)[1] if r.symbol not in found]
+        
+        if not records:
+            return pd.DataFrame()
+        
+        return rows_to_frame(keys, records).drop_duplicates(['symbol', 'date']).sort_values(['symbol', 'date']).reset_index(drop=True)
+    
+    def load_latest_features(self, symbols: List[str], as_of_date: date = None, feature_names: List[str] = None,
+                             db: Session = None, snapshot=None) -> Tuple[pd.DataFrame, pd.Series]:
+        """
+        Features de la dernière date disponible (jusqu'à as_of_date) de chaque symbole, indexées par
+        symbole, et dates utilisées. Pour la date du jour, lues dans la vue latest_features (snapshot
+        déjà chargé, cf. LatestFeaturesSnapshot) ; sinon dans le magasin de features (feature_vectors) ;
+        recalculées sur la fenêtre d'historique pour les symboles absents des deux.
+        """
+        from app.services.feature_store import FeatureStore, feature_store_available
+        from app.services.latest_features import LatestFeaturesSnapshot
         
-        # Ajouter toutes les features de base disponibles
-        for feature in feature_names:
-            if feature in df.columns:
-                df_features[feature] = df[feature]
+        session = db or self.db
+        frames, dates = [], []
+        missing = list(symbols)
+        
+        latest_requested = as_of_date is None or (
+            as_of_date.date() if isinstance(as_of_date, datetime) else as_of_date
+        ) >= date.today()
+        store_available = feature_store_available(session)
+        if store_available and latest_requested:
+            snapshot = snapshot if snapshot is not None else LatestFeaturesSnapshot(session, missing)
+            latest, latest_dates = snapshot.get(missing, feature_names)
+            frames.append(latest)
+            dates.append(latest_dates)
+            missing = [symbol for symbol in missing if symbol not in latest.index]
+        
+        if store_available and missing:
+            store = FeatureStore(session)
+            if store.covers(feature_names):
+                stored, stored_dates = store.load_latest(missing, as_of_date, feature_names)
+                frames.append(stored)
+                dates.append(stored_dates)
+                missing = [symbol for symbol in missing if symbol not in stored.index]
+        
+        if missing:
+            windows = self.load_feature_windows(missing, as_of_date, required_lookback(feature_names), session)
+            if not windows.empty:
+                frames.append(compute_latest_features(windows, feature_names))
+                dates.append(windows.groupby('symbol')['date'].max())
+        
+        frames = [frame for frame in frames if not frame.empty]
+        if not frames:
+            return pd.DataFrame(columns=feature_names), pd.Series(dtype=object)
+        return pd.concat(frames), pd.concat([d for d in dates if not d.empty])
+    
+    def evaluate_model(self, model, X_train: np.ndarray, y_train: pd.Series, policy: str, scoring: str) -> Dict:
+        """
+        Scores de validation selon la politique d'évaluation : cv_mean, cv_std (None sans validation
+        croisée) et validation_score
+        """
+        from sklearn.base import clone
+        from sklearn.model_selection import TimeSeriesSplit, cross_val_score
+        
+        if policy == "oob":
+            return {"evaluation_policy": policy, "validation_score": float(model.oob_score_),
+                    "cv_mean": float(model.oob_score_), "cv_std": None}
+        
+        if policy in ("timeseries", "kfold"):
+            if policy == "timeseries":
+                # Plis walk-forward : lignes d'entraînement remises dans l'ordre chronologique
+                order = np.argsort(y_train.index.to_numpy())
+                X_train, y_train = X_train[order], y_train.iloc[order]
+                cv = TimeSeriesSplit(n_splits=settings.ml_cv_folds)
             else:
-                # Si la feature n'existe pas, la créer avec des valeurs par défaut
-                if feature == 'price_momentum_5d' and 'close' in df.columns:
-                    df_features[feature] = df['close'].pct_change(5)
-                elif feature == 'price_momentum_10d' and 'close' in df.columns:
-                    df_features[feature] = df['close'].pct_change(10)
-                elif feature == 'price_momentum_20d' and 'close' in df.columns:
-                    df_features[feature] = df['close'].pct_change(20)
-                elif feature == 'volume_momentum_5d' and 'volume' in df.columns:
-                    df_features[feature] = df['volume'].pct_change(5)
-                elif feature == 'volume_momentum_10d' and 'volume' in df.columns:
-                    df_features[feature] = df['volume'].pct_change(10)
-                elif feature == 'price_volatility_5d' and 'close' in df.columns:
-                    # Pour la prédiction, utiliser une valeur par défaut basée sur l'historique récent
-                    # ou une estimation basée sur la volatilité des autres features
-                    if 'atr_14' in df.columns and not pd.isna(df['atr_14'].iloc[0]):
-                        df_features[feature] = df['atr_14'] * 0.1  # Estimation basée sur ATR
-                    else:
-                        df_features[feature] = df['close'].iloc[0] * 0.01  # 1% du prix comme estimation
-                elif feature == 'price_volatility_10d' and 'close' in df.columns:
-                    if 'atr_14' in df.columns and not pd.isna(df['atr_14'].iloc[0]):
-                        df_features[feature] = df['atr_14'] * 0.15  # Estimation basée sur ATR
-                    else:
-                        df_features[feature] = df['close'].iloc[0] * 0.015  # 1.5% du prix comme estimation
-                elif feature == 'price_volatility_20d' and 'close' in df.columns:
-                    if 'atr_14' in df.columns and not pd.isna(df['atr_14'].iloc[0]):
-                        df_features[feature] = df['atr_14'] * 0.2  # Estimation basée sur ATR
-                    else:
-                        df_features[feature] = df['close'].iloc[0] * 0.02  # 2% du prix comme estimation
-                elif feature == 'price_sentiment_corr' and 'close' in df.columns and 'sentiment_score_normalized' in df.columns:
-                    # Pour la corrélation, utiliser une valeur par défaut neutre
-                    df_features[feature] = 0.0
-                elif feature == 'volume_sentiment_corr' and 'volume' in df.columns and 'sentiment_score_normalized' in df.columns:
-                    # Pour la corrélation, utiliser une valeur par défaut neutre
-                    df_features[feature] = 0.0
-                elif feature == 'price_sma_ratio' and 'close' in df.columns and 'sma_20' in df.columns:
-                    df_features[feature] = df['close'] / df['sma_20']
-                elif feature == 'price_ema_ratio' and 'close' in df.columns and 'ema_20' in df.columns:
-                    df_features[feature] = df['close'] / df['ema_20']
-                elif feature == 'rsi_sentiment_divergence' and 'rsi_14' in df.columns and 'sentiment_rsi_14' in df.columns:
-                    df_features[feature] = df['rsi_14'] - df['sentiment_rsi_14']
-                elif feature == 'sentiment_momentum_acceleration' and 'sentiment_momentum_7d' in df.columns and 'sentiment_momentum_14d' in df.columns:
-                    df_features[feature] = df['sentiment_momentum_7d'] - df['sentiment_momentum_14d']
-                else:
-                    # Feature non reconnue, utiliser 0
-                    df_features[feature] = 0
-        
-        # Remplacer les valeurs infinies et NaN
-        df_features = df_features.replace([np.inf, -np.inf], np.nan)
-        df_features = df_features.fillna(0)
-        
-        # S'assurer que l'ordre des colonnes correspond exactement à feature_names
-        df_features = df_features[feature_names]
-        
-        return df_features
+                cv = settings.ml_cv_folds
+            cv_scores = cross_val_score(clone(model), X_train, y_train, cv=cv, scoring=scoring,
+                                        n_jobs=settings.ml_n_jobs)
+            return {"evaluation_policy": policy, "validation_score": float(cv_scores.mean()),
+                    "cv_mean": float(cv_scores.mean()), "cv_std": float(cv_scores.std())}
+        
+        return {"evaluation_policy": "none", "validation_score": None, "cv_mean": None, "cv_std": None}
     
-    def train_classification_model(self, symbol: str, target_param: TargetParameters, db: Session = None) -> Dict:
-        """Entraîner un modèle de classification pour prédire si la cible sera atteinte"""
+    def train_classification_model(self, symbol: str, target_param: TargetParameters, db: Session = None,
+                                   labeled_df: pd.DataFrame = None, evaluation: str = None) -> Dict:
+        """
+        Entraîner un modèle de classification pour prédire si la cible sera atteinte.
+        evaluation : politique d'évaluation (EVALUATION_POLICIES), settings.ml_evaluation_policy par défaut
+        """
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+        from sklearn.preprocessing import StandardScaler
+        
         # Utiliser la session passée en paramètre ou celle de l'instance
         session = db or self.db
         
-        # Créer les données d'entraînement
-        df = self.create_labels_for_training(symbol, target_param, session)
+        # Créer les données d'entraînement (sauf si déjà labellisées par create_labels_for_targets)
+        df = labeled_df if labeled_df is not None else self.create_labels_for_training(symbol, target_param, session)
         
         if df.empty or len(df) < 100:
             return {"error": "Pas assez de données pour l'entraînement"}
         
+        evaluation = evaluation or settings.ml_evaluation_policy
+        if evaluation not in EVALUATION_POLICIES:
+            return {"error": f"Politique d'évaluation inconnue: {evaluation} (attendu: {', '.join(EVALUATION_POLICIES)})"}
+        
         # Préparer les features
         X, feature_names = self.prepare_features(df)
         y = df['target_achieved']
@@ -482,7 +298,9 @@ class MLService:
             n_estimators=100,
             max_depth=10,
             random_state=42,
-            class_weight='balanced'
+            class_weight='balanced',
+            oob_score=evaluation == "oob",
+            n_jobs=settings.ml_n_jobs
         )
         model.fit(X_train_scaled, y_train)
         
@@ -495,31 +313,16 @@ class MLService:
         recall = recall_score(y_test, y_pred, zero_division=0)
         f1 = f1_score(y_test, y_pred, zero_division=0)
         
-        # Validation croisée
-        cv_scores = cross_val_score(model, X_train_scaled, y_train, cv=5, scoring='accuracy')
+        # Validation (out-of-bag, walk-forward, k plis ou aucune)
+        validation = self.evaluate_model(model, X_train_scaled, y_train, evaluation, 'accuracy')
         
         # Générer un nom de modèle unique
         base_name = f"classification_{symbol}_{target_param.parameter_name}"
         model_name = base_name
         
-        # Trouver la prochaine version disponible
-        version_num = 1
-        while True:
-            version = f"v{version_num}"
-            existing = session.query(MLModels).filter(
-                MLModels.model_name == model_name,
-                MLModels.model_version == version
-            ).first()
-            if not existing:
-                break
-            version_num += 1
-        
-        # Créer les chemins de fichiers avec la version
-        model_path = os.path.join(self.models_path, f"{model_name}_{version}.joblib")
-        scaler_path = os.path.join(self.models_path, f"{model_name}_{version}_scaler.joblib")
-        
-        joblib.dump(model, model_path)
-        joblib.dump(scaler, scaler_path)
+        # Version suivante et écriture atomique du modèle, du scaler et de la forêt aplatie
+        registry = ModelRegistry(session, self.models_path)
+        version, model_path, artifacts = registry.save(model_name, model, scaler)
         
         # Enregistrer le modèle en base
         ml_model = MLModels(
@@ -537,20 +340,18 @@ class MLService:
                 "training_data_end": str(df['date'].max())
             },
             performance_metrics={
-                "validation_score": float(cv_scores.mean()),
+                **validation,
                 "test_score": accuracy,
                 "precision": precision,
                 "recall": recall,
-                "f1_score": f1,
-                "cv_mean": float(cv_scores.mean()),
-                "cv_std": float(cv_scores.std())
+                "f1_score": f1
             },
             model_path=model_path,
             is_active=True,
             created_by="ml_service"
         )
-        self.db.add(ml_model)
-        self.db.commit()
+        registry.register(ml_model, artifacts)
+        session.commit()
         
         return {
             "model_id": ml_model.id,
@@ -559,22 +360,49 @@ class MLService:
             "precision": precision,
             "recall": recall,
             "f1_score": f1,
-            "cv_mean": float(cv_scores.mean()),
-            "cv_std": float(cv_scores.std()),
+            "cv_mean": validation["cv_mean"],
+            "cv_std": validation["cv_std"],
             "feature_importance": dict(zip(feature_names, model.feature_importances_))
         }
     
-    def train_regression_model(self, symbol: str, target_param: TargetParameters, db: Session = None) -> Dict:
-        """Entraîner un modèle de régression pour prédire le rendement exact"""
+    def train_classification_models(self, symbol: str, target_params: List[TargetParameters],
+                                    db: Session = None, evaluation: str = None) -> Dict[int, Dict]:
+        """Entraîner un modèle de classification par paramètre cible avec un seul chargement des données"""
+        session = db or self.db
+        labeled = self.create_labels_for_targets(symbol, target_params, session)
+        
+        results = {}
+        for param in target_params:
+            try:
+                results[param.id] = self.train_classification_model(symbol, param, session, labeled[param.id], evaluation)
+            except Exception as e:
+                results[param.id] = {"error": str(e)}
+        return results
+    
+    def train_regression_model(self, symbol: str, target_param: TargetParameters, db: Session = None,
+                               labeled_df: pd.DataFrame = None, evaluation: str = None) -> Dict:
+        """
+        Entraîner un modèle de régression pour prédire le rendement exact.
+        evaluation : politique d'évaluation (EVALUATION_POLICIES), settings.ml_evaluation_policy par défaut
+        """
+        from sklearn.ensemble import RandomForestRegressor
+        from sklearn.model_selection import train_test_split
+        from sklearn.metrics import mean_squared_error, r2_score
+        from sklearn.preprocessing import StandardScaler
+        
         # Utiliser la session passée en paramètre ou celle de l'instance
         session = db or self.db
         
-        # Créer les données d'entraînement
-        df = self.create_labels_for_training(symbol, target_param, session)
+        # Créer les données d'entraînement (sauf si déjà labellisées par create_labels_for_targets)
+        df = labeled_df if labeled_df is not None else self.create_labels_for_training(symbol, target_param, session)
         
         if df.empty or len(df) < 100:
             return {"error": "Pas assez de données pour l'entraînement"}
         
+        evaluation = evaluation or settings.ml_evaluation_policy
+        if evaluation not in EVALUATION_POLICIES:
+            return {"error": f"Politique d'évaluation inconnue: {evaluation} (attendu: {', '.join(EVALUATION_POLICIES)})"}
+        
         # Préparer les features
         X, feature_names = self.prepare_features(df)
         y = df['target_return']
@@ -591,7 +419,9 @@ class MLService:
         model = RandomForestRegressor(
             n_estimators=100,
             max_depth=10,
-            random_state=42
+            random_state=42,
+            oob_score=evaluation == "oob",
+            n_jobs=settings.ml_n_jobs
         )
         model.fit(X_train_scaled, y_train)
         
@@ -602,31 +432,16 @@ class MLService:
         rmse = np.sqrt(mse)
         r2 = r2_score(y_test, y_pred)
         
-        # Validation croisée
-        cv_scores = cross_val_score(model, X_train_scaled, y_train, cv=5, scoring='r2')
+        # Validation (out-of-bag, walk-forward, k plis ou aucune)
+        validation = self.evaluate_model(model, X_train_scaled, y_train, evaluation, 'r2')
         
         # Générer un nom de modèle unique
         base_name = f"regression_{symbol}_{target_param.parameter_name}"
         model_name = base_name
         
-        # Trouver la prochaine version disponible
-        version_num = 1
-        while True:
-            version = f"v{version_num}"
-            existing = session.query(MLModels).filter(
-                MLModels.model_name == model_name,
-                MLModels.model_version == version
-            ).first()
-            if not existing:
-                break
-            version_num += 1
-        
-        # Créer les chemins de fichiers avec la version
-        model_path = os.path.join(self.models_path, f"{model_name}_{version}.joblib")
-        scaler_path = os.path.join(self.models_path, f"{model_name}_{version}_scaler.joblib")
-        
-        joblib.dump(model, model_path)
-        joblib.dump(scaler, scaler_path)
+        # Version suivante et écriture atomique du modèle, du scaler et de la forêt aplatie
+        registry = ModelRegistry(session, self.models_path)
+        version, model_path, artifacts = registry.save(model_name, model, scaler)
         
         # Enregistrer le modèle en base
         ml_model = MLModels(
@@ -644,20 +459,18 @@ class MLService:
                 "training_data_end": str(df['date'].max())
             },
             performance_metrics={
-                "validation_score": float(cv_scores.mean()),
+                **validation,
                 "test_score": r2,
                 "r2_score": r2,
                 "mse": mse,
-                "rmse": rmse,
-                "cv_mean": float(cv_scores.mean()),
-                "cv_std": float(cv_scores.std())
+                "rmse": rmse
             },
             model_path=model_path,
             is_active=True,
             created_by="ml_service"
         )
-        self.db.add(ml_model)
-        self.db.commit()
+        registry.register(ml_model, artifacts)
+        session.commit()
         
         return {
             "model_id": ml_model.id,
@@ -665,13 +478,35 @@ class MLService:
             "mse": mse,
             "rmse": rmse,
             "r2_score": r2,
-            "cv_mean": float(cv_scores.mean()),
-            "cv_std": float(cv_scores.std()),
+            "cv_mean": validation["cv_mean"],
+            "cv_std": validation["cv_std"],
             "feature_importance": dict(zip(feature_names, model.feature_importances_))
         }
     
-    def predict(self, symbol: str, model_id: int, date: datetime, db: Session = None, screener_run_id: int = None) -> Dict:
-        """Faire une prédiction avec un modèle entraîné"""
+    def load_inference_model(self, model_path: str):
+        """
+        (modèle, scaler) utilisés pour prédire : forêt aplatie mise en cache par processus si
+        ml_inference_engine vaut "flat", sinon le modèle scikit-learn relu depuis le disque
+        """
+        import joblib
+        
+        if settings.ml_inference_engine == "flat":
+            from app.services.tree_inference import load_flat_model
+            try:
+                return load_flat_model(model_path)
+            except ValueError as e:
+                logger.warning(f"⚠️ [PREDICT] Modèle non aplati ({e}), prédiction scikit-learn")
+        
+        model = joblib.load(model_path)
+        scaler = joblib.load(model_path.replace('.joblib', '_scaler.joblib'))
+        return model, scaler
+    
+    def predict(self, symbol: str, model_id: int, date: datetime, db: Session = None, screener_run_id: int = None,
+                sink=None, snapshot=None) -> Dict:
+        """
+        Faire une prédiction avec un modèle entraîné (enregistrée via le puits de prédictions s'il est fourni).
+        snapshot : lignes de latest_features déjà chargées pour un lot de symboles (screener).
+        """
         # Utiliser la session passée en paramètre ou celle de l'instance
         session = db or self.db
         
@@ -680,182 +515,23 @@ class MLService:
         if not ml_model:
             return {"error": "Modèle non trouvé"}
         
-        # Charger le modèle et le scaler
-        model = joblib.load(ml_model.model_path)
-        scaler_path = ml_model.model_path.replace('.joblib', '_scaler.joblib')
-        scaler = joblib.load(scaler_path)
-        
-        # Récupérer les données du jour avec SQLAlchemy ORM
-        # D'abord essayer la date exacte
-        historical_data = session.query(HistoricalData).filter(
-            HistoricalData.symbol == symbol,
-            HistoricalData.date == date
-        ).first()
-        
-        # Si pas de données pour cette date, prendre la plus récente disponible
-        if not historical_data:
-            historical_data = session.query(HistoricalData).filter(
-                HistoricalData.symbol == symbol
-            ).order_by(HistoricalData.date.desc()).first()
-            
-            if not historical_data:
-                return {"error": "Aucune donnée historique trouvée pour ce symbole"}
-            
-            # Utiliser la date la plus récente trouvée
-            date = historical_data.date
-        
-        # Récupérer les indicateurs techniques
-        tech = session.query(TechnicalIndicators).filter(
-            TechnicalIndicators.symbol == symbol,
-            TechnicalIndicators.date == date
-        ).first()
-        
-        # Récupérer les indicateurs de sentiment
-        sent = session.query(SentimentIndicators).filter(
-            SentimentIndicators.symbol == symbol,
-            SentimentIndicators.date == date
-        ).first()
-        
-        # Créer le DataFrame avec toutes les dimensions enrichies
-        row_data = {
-            'close': float(historical_data.close),
-            'volume': historical_data.volume,
-            'vwap': float(historical_data.vwap) if historical_data.vwap else None,
-        }
-        
-        # Ajouter tous les indicateurs techniques disponibles
-        if tech:
-            tech_indicators = {
-                # Moyennes mobiles
-                'sma_5': float(tech.sma_5) if tech.sma_5 else None,
-                'sma_10': float(tech.sma_10) if tech.sma_10 else None,
-                'sma_20': float(tech.sma_20) if tech.sma_20 else None,
-                'sma_50': float(tech.sma_50) if tech.sma_50 else None,
-                'sma_200': float(tech.sma_200) if tech.sma_200 else None,
-                'ema_5': float(tech.ema_5) if tech.ema_5 else None,
-                'ema_10': float(tech.ema_10) if tech.ema_10 else None,
-                'ema_20': float(tech.ema_20) if tech.ema_20 else None,
-                'ema_50': float(tech.ema_50) if tech.ema_50 else None,
-                'ema_200': float(tech.ema_200) if tech.ema_200 else None,
-                
-                # Indicateurs de momentum
-                'rsi_14': float(tech.rsi_14) if tech.rsi_14 else None,
-                'macd': float(tech.macd) if tech.macd else None,
-                'macd_signal': float(tech.macd_signal) if tech.macd_signal else None,
-                'macd_histogram': float(tech.macd_histogram) if tech.macd_histogram else None,
-                'stochastic_k': float(tech.stochastic_k) if tech.stochastic_k else None,
-                'stochastic_d': float(tech.stochastic_d) if tech.stochastic_d else None,
-                'williams_r': float(tech.williams_r) if tech.williams_r else None,
-                'roc': float(tech.roc) if tech.roc else None,
-                'cci': float(tech.cci) if tech.cci else None,
-                
-                # Bollinger Bands
-                'bb_middle': float(tech.bb_middle) if tech.bb_middle else None,
-                'bb_lower': float(tech.bb_lower) if tech.bb_lower else None,
-                'bb_width': float(tech.bb_width) if tech.bb_width else None,
-                'bb_position': float(tech.bb_position) if tech.bb_position else None,
-                
-                # Volume
-                'obv': float(tech.obv) if tech.obv else None,
-                'volume_roc': float(tech.volume_roc) if tech.volume_roc else None,
-                'volume_sma_20': float(tech.volume_sma_20) if tech.volume_sma_20 else None,
-                
-                # ATR
-                'atr_14': float(tech.atr_14) if tech.atr_14 else None,
-            }
-            row_data.update(tech_indicators)
-        
-        # Ajouter tous les indicateurs de sentiment disponibles
-        if sent:
-            sent_indicators = {
-                # Base Sentiment Indicators
-                'sentiment_score_normalized': float(sent.sentiment_score_normalized) if sent.sentiment_score_normalized else None,
-                
-                # Sentiment Momentum
-                'sentiment_momentum_1d': float(sent.sentiment_momentum_1d) if sent.sentiment_momentum_1d else None,
-                'sentiment_momentum_3d': float(sent.sentiment_momentum_3d) if sent.sentiment_momentum_3d else None,
-                'sentiment_momentum_7d': float(sent.sentiment_momentum_7d) if sent.sentiment_momentum_7d else None,
-                'sentiment_momentum_14d': float(sent.sentiment_momentum_14d) if sent.sentiment_momentum_14d else None,
-                
-                # Sentiment Volatility
-                'sentiment_volatility_3d': float(sent.sentiment_volatility_3d) if sent.sentiment_volatility_3d else None,
-                'sentiment_volatility_7d': float(sent.sentiment_volatility_7d) if sent.sentiment_volatility_7d else None,
-                'sentiment_volatility_14d': float(sent.sentiment_volatility_14d) if sent.sentiment_volatility_14d else None,
-                'sentiment_volatility_30d': float(sent.sentiment_volatility_30d) if sent.sentiment_volatility_30d else None,
-                
-                # Sentiment Moving Averages
-                'sentiment_sma_3': float(sent.sentiment_sma_3) if sent.sentiment_sma_3 else None,
-                'sentiment_sma_7': float(sent.sentiment_sma_7) if sent.sentiment_sma_7 else None,
-                'sentiment_sma_14': float(sent.sentiment_sma_14) if sent.sentiment_sma_14 else None,
-                'sentiment_sma_30': float(sent.sentiment_sma_30) if sent.sentiment_sma_30 else None,
-                'sentiment_ema_3': float(sent.sentiment_ema_3) if sent.sentiment_ema_3 else None,
-                'sentiment_ema_7': float(sent.sentiment_ema_7) if sent.sentiment_ema_7 else None,
-                'sentiment_ema_14': float(sent.sentiment_ema_14) if sent.sentiment_ema_14 else None,
-                'sentiment_ema_30': float(sent.sentiment_ema_30) if sent.sentiment_ema_30 else None,
-                
-                # Sentiment Oscillators
-                'sentiment_rsi_14': float(sent.sentiment_rsi_14) if sent.sentiment_rsi_14 else None,
-                'sentiment_macd': float(sent.sentiment_macd) if sent.sentiment_macd else None,
-                'sentiment_macd_signal': float(sent.sentiment_macd_signal) if sent.sentiment_macd_signal else None,
-                'sentiment_macd_histogram': float(sent.sentiment_macd_histogram) if sent.sentiment_macd_histogram else None,
-                
-                # News Volume Indicators
-                'news_volume_sma_7': float(sent.news_volume_sma_7) if sent.news_volume_sma_7 else None,
-                'news_volume_sma_14': float(sent.news_volume_sma_14) if sent.news_volume_sma_14 else None,
-                'news_volume_sma_30': float(sent.news_volume_sma_30) if sent.news_volume_sma_30 else None,
-                'news_volume_roc_7d': float(sent.news_volume_roc_7d) if sent.news_volume_roc_7d else None,
-                'news_volume_roc_14d': float(sent.news_volume_roc_14d) if sent.news_volume_roc_14d else None,
-                
-                # Sentiment Distribution Ratios
-                'news_positive_ratio': float(sent.news_positive_ratio) if sent.news_positive_ratio else None,
-                'news_negative_ratio': float(sent.news_negative_ratio) if sent.news_negative_ratio else None,
-                'news_neutral_ratio': float(sent.news_neutral_ratio) if sent.news_neutral_ratio else None,
-                'news_sentiment_quality': float(sent.news_sentiment_quality) if sent.news_sentiment_quality else None,
-                
-                # Short Interest Indicators
-                'short_interest_momentum_5d': float(sent.short_interest_momentum_5d) if sent.short_interest_momentum_5d else None,
-                'short_interest_momentum_10d': float(sent.short_interest_momentum_10d) if sent.short_interest_momentum_10d else None,
-                'short_interest_momentum_20d': float(sent.short_interest_momentum_20d) if sent.short_interest_momentum_20d else None,
-                'short_interest_volatility_7d': float(sent.short_interest_volatility_7d) if sent.short_interest_volatility_7d else None,
-                'short_interest_volatility_14d': float(sent.short_interest_volatility_14d) if sent.short_interest_volatility_14d else None,
-                'short_interest_volatility_30d': float(sent.short_interest_volatility_30d) if sent.short_interest_volatility_30d else None,
-                'short_interest_sma_7': float(sent.short_interest_sma_7) if sent.short_interest_sma_7 else None,
-                'short_interest_sma_14': float(sent.short_interest_sma_14) if sent.short_interest_sma_14 else None,
-                'short_interest_sma_30': float(sent.short_interest_sma_30) if sent.short_interest_sma_30 else None,
-                
-                # Short Volume Indicators
-                'short_volume_momentum_5d': float(sent.short_volume_momentum_5d) if sent.short_volume_momentum_5d else None,
-                'short_volume_momentum_10d': float(sent.short_volume_momentum_10d) if sent.short_volume_momentum_10d else None,
-                'short_volume_momentum_20d': float(sent.short_volume_momentum_20d) if sent.short_volume_momentum_20d else None,
-                'short_volume_volatility_7d': float(sent.short_volume_volatility_7d) if sent.short_volume_volatility_7d else None,
-                'short_volume_volatility_14d': float(sent.short_volume_volatility_14d) if sent.short_volume_volatility_14d else None,
-                'short_volume_volatility_30d': float(sent.short_volume_volatility_30d) if sent.short_volume_volatility_30d else None,
-                
-                # Composite Sentiment Indicators
-                'sentiment_strength_index': float(sent.sentiment_strength_index) if sent.sentiment_strength_index else None,
-                'market_sentiment_index': float(sent.market_sentiment_index) if sent.market_sentiment_index else None,
-                'sentiment_divergence': float(sent.sentiment_divergence) if sent.sentiment_divergence else None,
-                'sentiment_acceleration': float(sent.sentiment_acceleration) if sent.sentiment_acceleration else None,
-                'sentiment_trend_strength': float(sent.sentiment_trend_strength) if sent.sentiment_trend_strength else None,
-                'sentiment_quality_index': float(sent.sentiment_quality_index) if sent.sentiment_quality_index else None,
-                'sentiment_risk_score': float(sent.sentiment_risk_score) if sent.sentiment_risk_score else None,
-            }
-            row_data.update(sent_indicators)
-        
-        data = [row_data]
-        
-        df = pd.DataFrame(data)
-        
-        if df.empty:
-            return {"error": "Données non trouvées pour cette date"}
+        # Charger le modèle et le scaler (forêt aplatie gardée en cache, cf. tree_inference)
+        model, scaler = self.load_inference_model(ml_model.model_path)
         
         # Récupérer les noms des features utilisées lors de l'entraînement
         feature_names = ml_model.model_parameters.get('feature_names', [])
         if not feature_names:
             return {"error": "Noms des features non trouvés dans le modèle"}
         
-        # Préparer les features en utilisant exactement les mêmes features que l'entraînement
-        X = self.prepare_features_for_prediction(df, feature_names)
+        # Features de la date demandée ou à défaut de la plus récente disponible
+        # (magasin de features, sinon recalculées sur la fenêtre d'historique nécessaire)
+        X, data_dates = self.load_latest_features([symbol], date, feature_names, session, snapshot)
+        
+        if X.empty:
+            return {"error": "Aucune donnée historique trouvée pour ce symbole"}
+        
+        # Utiliser la date réellement disponible
+        date = data_dates.iloc[0]
         
         # Normaliser et prédire
         X_scaled = scaler.transform(X)
@@ -869,20 +545,33 @@ class MLService:
             confidence = 0.8  # Placeholder pour la régression
             prediction_type = "target_return"
         
-        # Enregistrer la prédiction
-        ml_prediction = MLPredictions(
-            symbol=symbol,
-            prediction_date=date,
-            model_id=model_id,
-            prediction_class=prediction_type,
-            prediction_value=float(prediction),
-            confidence=float(confidence),
-            data_date_used=date,
-            screener_run_id=screener_run_id,
-            created_by="ml_service"
-        )
-        self.db.add(ml_prediction)
-        self.db.commit()
+        # Enregistrer la prédiction : écriture groupée via le puits, sinon commit immédiat
+        if sink is not None:
+            sink.add(
+                symbol=symbol,
+                model_id=model_id,
+                prediction_date=date,
+                prediction_value=float(prediction),
+                confidence=float(confidence),
+                prediction_class=prediction_type,
+                data_date_used=date,
+                screener_run_id=screener_run_id,
+                created_by="ml_service"
+            )
+        else:
+            ml_prediction = MLPredictions(
+                symbol=symbol,
+                prediction_date=date,
+                model_id=model_id,
+                prediction_class=prediction_type,
+                prediction_value=float(prediction),
+                confidence=float(confidence),
+                data_date_used=date,
+                screener_run_id=screener_run_id,
+                created_by="ml_service"
+            )
+            session.add(ml_prediction)
+            session.commit()
         
         return {
             "symbol": symbol,
@@ -909,8 +598,8 @@ class MLService:
             "model_id": ml_model.id,
             "model_name": ml_model.model_name,
             "model_type": ml_model.model_type,
-            "validation_score": float(ml_model.validation_score) if ml_model.validation_score else None,
-            "test_score": float(ml_model.test_score) if ml_model.test_score else None,
+            "validation_score": float(ml_model.validation_score) if ml_model.validation_score is not None else None,
+            "test_score": float(ml_model.test_score) if ml_model.test_score is not None else None,
             "training_period": {
                 "start": ml_model.training_data_start.isoformat() if ml_model.training_data_start else None,
                 "end": ml_model.training_data_end.isoformat() if ml_model.training_data_end else None
@@ -920,313 +609,18 @@ class MLService:
         }
     
     def calculate_shap_explanations(self, model_id: int, symbol: str, prediction_date: date, db: Session = None) -> Dict:
-        """Calculer les explications SHAP pour une prédiction"""
+        """Calculer les explications SHAP pour une prédiction (explainer mis en cache par ShapService)"""
+        from app.services.shap_service import ShapService
+        
         # Utiliser la session passée en paramètre ou celle de l'instance
         session = db or self.db
         
-        # Récupérer le modèle
-        ml_model = session.query(MLModels).filter(MLModels.id == model_id).first()
-        if not ml_model:
-            return {"error": "Modèle non trouvé"}
-        
-        # Charger le modèle et le scaler
-        model = joblib.load(ml_model.model_path)
-        scaler_path = ml_model.model_path.replace('.joblib', '_scaler.joblib')
-        scaler = joblib.load(scaler_path)
-        
-        # Récupérer les données du jour
-        historical_data = session.query(HistoricalData).filter(
-            HistoricalData.symbol == symbol,
-            HistoricalData.date == prediction_date
-        ).first()
-        
-        if not historical_data:
-            # Prendre la plus récente disponible
-            historical_data = session.query(HistoricalData).filter(
-                HistoricalData.symbol == symbol
-            ).order_by(HistoricalData.date.desc()).first()
-            
-            if not historical_data:
-                return {"error": "Aucune donnée historique trouvée pour ce symbole"}
-        
-        # Récupérer les indicateurs techniques et de sentiment
-        tech = session.query(TechnicalIndicators).filter(
-            TechnicalIndicators.symbol == symbol,
-            TechnicalIndicators.date == historical_data.date
-        ).first()
-        
-        sent = session.query(SentimentIndicators).filter(
-            SentimentIndicators.symbol == symbol,
-            SentimentIndicators.date == historical_data.date
-        ).first()
-        
-        # Créer le DataFrame avec toutes les dimensions enrichies
-        row_data = {
-            'close': float(historical_data.close),
-            'volume': historical_data.volume,
-            'vwap': float(historical_data.vwap) if historical_data.vwap else None,
-        }
-        
-        # Ajouter tous les indicateurs techniques disponibles
-        if tech:
-            tech_indicators = {
-                # Moyennes mobiles
-                'sma_5': float(tech.sma_5) if tech.sma_5 else None,
-                'sma_10': float(tech.sma_10) if tech.sma_10 else None,
-                'sma_20': float(tech.sma_20) if tech.sma_20 else None,
-                'sma_50': float(tech.sma_50) if tech.sma_50 else None,
-                'sma_200': float(tech.sma_200) if tech.sma_200 else None,
-                'ema_5': float(tech.ema_5) if tech.ema_5 else None,
-                'ema_10': float(tech.ema_10) if tech.ema_10 else None,
-                'ema_20': float(tech.ema_20) if tech.ema_20 else None,
-                'ema_50': float(tech.ema_50) if tech.ema_50 else None,
-                'ema_200': float(tech.ema_200) if tech.ema_200 else None,
-                
-                # Indicateurs de momentum
-                'rsi_14': float(tech.rsi_14) if tech.rsi_14 else None,
-                'macd': float(tech.macd) if tech.macd else None,
-                'macd_signal': float(tech.macd_signal) if tech.macd_signal else None,
-                'macd_histogram': float(tech.macd_histogram) if tech.macd_histogram else None,
-                'stochastic_k': float(tech.stochastic_k) if tech.stochastic_k else None,
-                'stochastic_d': float(tech.stochastic_d) if tech.stochastic_d else None,
-                'williams_r': float(tech.williams_r) if tech.williams_r else None,
-                'roc': float(tech.roc) if tech.roc else None,
-                'cci': float(tech.cci) if tech.cci else None,
-                
-                # Bollinger Bands
-                'bb_middle': float(tech.bb_middle) if tech.bb_middle else None,
-                'bb_lower': float(tech.bb_lower) if tech.bb_lower else None,
-                'bb_width': float(tech.bb_width) if tech.bb_width else None,
-                'bb_position': float(tech.bb_position) if tech.bb_position else None,
-                
-                # Volume
-                'obv': float(tech.obv) if tech.obv else None,
-                'volume_roc': float(tech.volume_roc) if tech.volume_roc else None,
-                'volume_sma_20': float(tech.volume_sma_20) if tech.volume_sma_20 else None,
-                
-                # ATR
-                'atr_14': float(tech.atr_14) if tech.atr_14 else None,
-            }
-            row_data.update(tech_indicators)
-        
-        # Ajouter tous les indicateurs de sentiment disponibles
-        if sent:
-            sent_indicators = {
-                # Base Sentiment Indicators
-                'sentiment_score_normalized': float(sent.sentiment_score_normalized) if sent.sentiment_score_normalized else None,
-                
-                # Sentiment Momentum
-                'sentiment_momentum_1d': float(sent.sentiment_momentum_1d) if sent.sentiment_momentum_1d else None,
-                'sentiment_momentum_3d': float(sent.sentiment_momentum_3d) if sent.sentiment_momentum_3d else None,
-                'sentiment_momentum_7d': float(sent.sentiment_momentum_7d) if sent.sentiment_momentum_7d else None,
-                'sentiment_momentum_14d': float(sent.sentiment_momentum_14d) if sent.sentiment_momentum_14d else None,
-                
-                # Sentiment Volatility
-                'sentiment_volatility_3d': float(sent.sentiment_volatility_3d) if sent.sentiment_volatility_3d else None,
-                'sentiment_volatility_7d': float(sent.sentiment_volatility_7d) if sent.sentiment_volatility_7d else None,
-                'sentiment_volatility_14d': float(sent.sentiment_volatility_14d) if sent.sentiment_volatility_14d else None,
-                'sentiment_volatility_30d': float(sent.sentiment_volatility_30d) if sent.sentiment_volatility_30d else None,
-                
-                # Sentiment Moving Averages
-                'sentiment_sma_3': float(sent.sentiment_sma_3) if sent.sentiment_sma_3 else None,
-                'sentiment_sma_7': float(sent.sentiment_sma_7) if sent.sentiment_sma_7 else None,
-                'sentiment_sma_14': float(sent.sentiment_sma_14) if sent.sentiment_sma_14 else None,
-                'sentiment_sma_30': float(sent.sentiment_sma_30) if sent.sentiment_sma_30 else None,
-                'sentiment_ema_3': float(sent.sentiment_ema_3) if sent.sentiment_ema_3 else None,
-                'sentiment_ema_7': float(sent.sentiment_ema_7) if sent.sentiment_ema_7 else None,
-                'sentiment_ema_14': float(sent.sentiment_ema_14) if sent.sentiment_ema_14 else None,
-                'sentiment_ema_30': float(sent.sentiment_ema_30) if sent.sentiment_ema_30 else None,
-                
-                # Sentiment Oscillators
-                'sentiment_rsi_14': float(sent.sentiment_rsi_14) if sent.sentiment_rsi_14 else None,
-                'sentiment_macd': float(sent.sentiment_macd) if sent.sentiment_macd else None,
-                'sentiment_macd_signal': float(sent.sentiment_macd_signal) if sent.sentiment_macd_signal else None,
-                'sentiment_macd_histogram': float(sent.sentiment_macd_histogram) if sent.sentiment_macd_histogram else None,
-                
-                # News Volume Indicators
-                'news_volume_sma_7': float(sent.news_volume_sma_7) if sent.news_volume_sma_7 else None,
-                'news_volume_sma_14': float(sent.news_volume_sma_14) if sent.news_volume_sma_14 else None,
-                'news_volume_sma_30': float(sent.news_volume_sma_30) if sent.news_volume_sma_30 else None,
-                'news_volume_roc_7d': float(sent.news_volume_roc_7d) if sent.news_volume_roc_7d else None,
-                'news_volume_roc_14d': float(sent.news_volume_roc_14d) if sent.news_volume_roc_14d else None,
-                
-                # Sentiment Distribution Ratios
-                'news_positive_ratio': float(sent.news_positive_ratio) if sent.news_positive_ratio else None,
-                'news_negative_ratio': float(sent.news_negative_ratio) if sent.news_negative_ratio else None,
-                'news_neutral_ratio': float(sent.news_neutral_ratio) if sent.news_neutral_ratio else None,
-                'news_sentiment_quality': float(sent.news_sentiment_quality) if sent.news_sentiment_quality else None,
-                
-                # Short Interest Indicators
-                'short_interest_momentum_5d': float(sent.short_interest_momentum_5d) if sent.short_interest_momentum_5d else None,
-                'short_interest_momentum_10d': float(sent.short_interest_momentum_10d) if sent.short_interest_momentum_10d else None,
-                'short_interest_momentum_20d': float(sent.short_interest_momentum_20d) if sent.short_interest_momentum_20d else None,
-                'short_interest_volatility_7d': float(sent.short_interest_volatility_7d) if sent.short_interest_volatility_7d else None,
-                'short_interest_volatility_14d': float(sent.short_interest_volatility_14d) if sent.short_interest_volatility_14d else None,
-                'short_interest_volatility_30d': float(sent.short_interest_volatility_30d) if sent.short_interest_volatility_30d else None,
-                'short_interest_sma_7': float(sent.short_interest_sma_7) if sent.short_interest_sma_7 else None,
-                'short_interest_sma_14': float(sent.short_interest_sma_14) if sent.short_interest_sma_14 else None,
-                'short_interest_sma_30': float(sent.short_interest_sma_30) if sent.short_interest_sma_30 else None,
-                
-                # Short Volume Indicators
-                'short_volume_momentum_5d': float(sent.short_volume_momentum_5d) if sent.short_volume_momentum_5d else None,
-                'short_volume_momentum_10d': float(sent.short_volume_momentum_10d) if sent.short_volume_momentum_10d else None,
-                'short_volume_momentum_20d': float(sent.short_volume_momentum_20d) if sent.short_volume_momentum_20d else None,
-                'short_volume_volatility_7d': float(sent.short_volume_volatility_7d) if sent.short_volume_volatility_7d else None,
-                'short_volume_volatility_14d': float(sent.short_volume_volatility_14d) if sent.short_volume_volatility_14d else None,
-                'short_volume_volatility_30d': float(sent.short_volume_volatility_30d) if sent.short_volume_volatility_30d else None,
-                
-                # Composite Sentiment Indicators
-                'sentiment_strength_index': float(sent.sentiment_strength_index) if sent.sentiment_strength_index else None,
-                'market_sentiment_index': float(sent.market_sentiment_index) if sent.market_sentiment_index else None,
-                'sentiment_divergence': float(sent.sentiment_divergence) if sent.sentiment_divergence else None,
-                'sentiment_acceleration': float(sent.sentiment_acceleration) if sent.sentiment_acceleration else None,
-                'sentiment_trend_strength': float(sent.sentiment_trend_strength) if sent.sentiment_trend_strength else None,
-                'sentiment_quality_index': float(sent.sentiment_quality_index) if sent.sentiment_quality_index else None,
-                'sentiment_risk_score': float(sent.sentiment_risk_score) if sent.sentiment_risk_score else None,
-            }
-            row_data.update(sent_indicators)
-        
-        data = [row_data]
-        
-        df = pd.DataFrame(data)
-        
-        # Remplacer les valeurs NaN avec toutes les colonnes enrichies
-        numeric_columns = [
-            # Données de base
-            'close', 'volume', 'vwap',
-            
-            # Moyennes mobiles techniques
-            'sma_5', 'sma_10', 'sma_20', 'sma_50', 'sma_200',
-            'ema_5', 'ema_10', 'ema_20', 'ema_50', 'ema_200',
-            
-            # Indicateurs de momentum techniques
-            'rsi_14', 'macd', 'macd_signal', 'macd_histogram',
-            'stochastic_k', 'stochastic_d', 'williams_r', 'roc', 'cci',
-            
-            # Bollinger Bands
-            'bb_middle', 'bb_lower', 'bb_width', 'bb_position',
-            
-            # Volume techniques
-            'obv', 'volume_roc', 'volume_sma_20',
-            
-            # ATR
-            'atr_14',
-            
-            # Indicateurs de sentiment de base
-            'sentiment_score_normalized',
-            
-            # Sentiment Momentum
-            'sentiment_momentum_1d', 'sentiment_momentum_3d', 'sentiment_momentum_7d', 'sentiment_momentum_14d',
-            
-            # Sentiment Volatility
-            'sentiment_volatility_3d', 'sentiment_volatility_7d', 'sentiment_volatility_14d', 'sentiment_volatility_30d',
-            
-            # Sentiment Moving Averages
-            'sentiment_sma_3', 'sentiment_sma_7', 'sentiment_sma_14', 'sentiment_sma_30',
-            'sentiment_ema_3', 'sentiment_ema_7', 'sentiment_ema_14', 'sentiment_ema_30',
-            
-            # Sentiment Oscillators
-            'sentiment_rsi_14', 'sentiment_macd', 'sentiment_macd_signal', 'sentiment_macd_histogram',
-            
-            # News Volume Indicators
-            'news_volume_sma_7', 'news_volume_sma_14', 'news_volume_sma_30',
-            'news_volume_roc_7d', 'news_volume_roc_14d',
-            
-            # Sentiment Distribution Ratios
-            'news_positive_ratio', 'news_negative_ratio', 'news_neutral_ratio', 'news_sentiment_quality',
-            
-            # Short Interest Indicators
-            'short_interest_momentum_5d', 'short_interest_momentum_10d', 'short_interest_momentum_20d',
-            'short_interest_volatility_7d', 'short_interest_volatility_14d', 'short_interest_volatility_30d',
-            'short_interest_sma_7', 'short_interest_sma_14', 'short_interest_sma_30',
-            
-            # Short Volume Indicators
-            'short_volume_momentum_5d', 'short_volume_momentum_10d', 'short_volume_momentum_20d',
-            'short_volume_volatility_7d', 'short_volume_volatility_14d', 'short_volume_volatility_30d',
-            
-            # Composite Sentiment Indicators
-            'sentiment_strength_index', 'market_sentiment_index', 'sentiment_divergence',
-            'sentiment_acceleration', 'sentiment_trend_strength', 'sentiment_quality_index', 'sentiment_risk_score'
-        ]
-        
-        for col in numeric_columns:
-            if col in df.columns:
-                median_val = df[col].median() if not df[col].isna().all() else 0
-                df[col] = df[col].fillna(median_val)
-        
-        # Récupérer les noms des features utilisées lors de l'entraînement
-        feature_names = ml_model.model_parameters.get('feature_names', [])
-        if not feature_names:
-            return {"error": "Noms des features non trouvés dans le modèle"}
-        
-        # Utiliser la méthode prepare_features_for_prediction pour garantir la cohérence
-        X = self.prepare_features_for_prediction(df, feature_names)
-        
-        # Normaliser
-        X_scaled = scaler.transform(X)
-        feature_names = list(X.columns)
-        
-        # Calculer les explications SHAP
-        try:
-            # Créer un explainer SHAP pour Random Forest
-            explainer = shap.TreeExplainer(model)
-            shap_values = explainer.shap_values(X_scaled)
-            
-            # Gestion spécifique pour la classification et la régression
-            prediction = model.predict(X_scaled)[0]
-            
-            if ml_model.model_type == "classification":
-                # Pour la classification binaire, toujours prendre la classe positive (1)
-                if isinstance(shap_values, list) and len(shap_values) == 2:
-                    shap_values = shap_values[1]  # Classe positive
-                elif isinstance(shap_values, list):
-                    shap_values = shap_values[int(prediction)]
-                
-                # S'assurer que shap_values est un array 1D
-                if hasattr(shap_values, 'shape') and len(shap_values.shape) > 1:
-                    shap_values = shap_values.flatten()
-                    
-                base_value = explainer.expected_value[1] if isinstance(explainer.expected_value, (list, np.ndarray)) and len(explainer.expected_value) > 1 else explainer.expected_value
-            else:
-                # Régression
-                if isinstance(shap_values, list):
-                    shap_values = shap_values[0]
-                
-                # S'assurer que shap_values est un array 1D
-                if hasattr(shap_values, 'shape') and len(shap_values.shape) > 1:
-                    shap_values = shap_values.flatten()
-                    
-                base_value = explainer.expected_value
-            
-            # Créer les explications
-            explanations = []
-            for i, feature in enumerate(feature_names):
-                explanations.append({
-                    "feature": feature,
-                    "shap_value": float(shap_values[i]),
-                    "feature_value": float(X.iloc[0, i]),
-                    "impact": "positive" if shap_values[i] > 0 else "negative"
-                })
-            
-            # Trier par importance (valeur absolue de SHAP) puis par sens (positif d'abord, négatif ensuite)
-            explanations.sort(key=lambda x: (-abs(x["shap_value"]), x["shap_value"] < 0))
-            
-            return {
-                "model_id": model_id,
-                "model_name": ml_model.model_name,
-                "model_type": ml_model.model_type,
-                "symbol": symbol,
-                "prediction_date": historical_data.date,
-                "prediction": float(model.predict(X_scaled)[0]),
-                "shap_explanations": explanations,
-                "base_value": float(base_value) if hasattr(base_value, '__float__') else 0.0
-            }
-            
-        except Exception as e:
-            return {"error": f"Erreur lors du calcul SHAP: {str(e)}"}
+        return ShapService(session).explain(model_id, symbol, prediction_date)
     
     def get_model_feature_importance(self, model_id: int, db: Session = None) -> Dict:
         """Récupérer l'importance des features d'un modèle"""
+        import joblib
+        
         # Utiliser la session passée en paramètre ou celle de l'instance
         session = db or self.db
         
@@ -0,0 +1,277 @@
+"""
+Registre des modèles : versions, écriture atomique des fichiers, index par contenu et rétention
+
+- Version : la prochaine version d'un nom de modèle (v1, v2...) est calculée en une requête, sous
+  un verrou consultatif PostgreSQL tenu jusqu'au commit de l'enregistrement du modèle (deux
+  entraînements concurrents du même modèle ne reçoivent pas la même version).
+- Écriture : chaque fichier (modèle, scaler, forêt aplatie) est écrit dans un fichier temporaire
+  puis renommé ; un lecteur ne voit jamais de fichier partiel.
+- Index : les fichiers sont indexés par empreinte SHA-256 dans model_artifacts. Un fichier identique
+  à un fichier déjà indexé (réentraînement sur les mêmes données) devient un lien physique vers
+  celui-ci au lieu d'une nouvelle copie.
+- Rétention (prune) : au-delà des model_retention_versions dernières versions d'un nom de modèle,
+  les versions plus anciennes que model_retention_days sont désactivées et leurs fichiers
+  supprimés (la ligne ml_models reste, référencée par les prédictions), sauf la version active ; les fichiers non
+  référencés et les fichiers temporaires abandonnés sont supprimés après model_orphan_grace_hours.
+
+La table model_artifacts est créée par scripts/migrate_model_registry.py ; sans elle, les fichiers
+sont écrits de la même façon mais ne sont pas indexés.
+"""
+import os
+import hashlib
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import Integer, cast, func, text
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.database import MLModels, ModelArtifacts
+
+logger = logging.getLogger(__name__)
+
+# joblib est importé à la première utilisation (dans les méthodes)
+
+# Type de fichier -> suffixe ajouté au nom du modèle (cf. MLService.predict, tree_inference)
+ARTIFACT_SUFFIXES = {
+    "model": ".joblib",
+    "scaler": "_scaler.joblib",
+    "flat": "_flat.joblib",
+}
+
+_table_exists: Optional[bool] = None
+_table_lock = threading.Lock()
+
+
+def artifact_index_exists(db: Session) -> bool:
+    """Vrai si la table a été créée par scripts/migrate_model_registry.py (vérifié une fois par processus)"""
+    global _table_exists
+    with _table_lock:
+        if _table_exists is None:
+            _table_exists = db.execute(
+                text("SELECT to_regclass('public.model_artifacts') IS NOT NULL")
+            ).scalar()
+        return _table_exists
+
+
+def file_digest(path: str) -> str:
+    """Empreinte SHA-256 du fichier"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def artifact_paths(model_path: str) -> Dict[str, str]:
+    """Fichiers (modèle, scaler, forêt aplatie) associés au fichier du modèle"""
+    return {kind: model_path.replace('.joblib', suffix) for kind, suffix in ARTIFACT_SUFFIXES.items()}
+
+
+class ModelRegistry:
+    """Versions, fichiers et rétention des modèles de ml_models"""
+
+    def __init__(self, db: Session, models_path: Optional[str] = None):
+        self.db = db
+        self.models_path = models_path or settings.ml_models_path
+        os.makedirs(self.models_path, exist_ok=True)
+
+    # Versions
+
+    def next_version(self, model_name: str) -> str:
+        """Prochaine version vN du modèle (verrou tenu jusqu'à la fin de la transaction)"""
+        self.db.execute(text("SELECT pg_advisory_xact_lock(hashtext(:name))"), {"name": model_name})
+        latest = self.db.query(
+            func.max(cast(func.substring(MLModels.model_version, r'^v([0-9]+)$'), Integer))
+        ).filter(MLModels.model_name == model_name).scalar()
+        return f"v{(latest or 0) + 1}"
+
+    def model_path(self, model_name: str, version: str) -> str:
+        return os.path.join(self.models_path, f"{model_name}_{version}.joblib")
+
+    # Fichiers
+
+    def find_by_digest(self, sha256: str, kind: str) -> Optional[ModelArtifacts]:
+        """Fichier indexé de même contenu, toujours présent sur le disque"""
+        if not artifact_index_exists(self.db):
+            return None
+        for artifact in self.db.query(ModelArtifacts).filter(
+            ModelArtifacts.sha256 == sha256,
+            ModelArtifacts.kind == kind
+        ).order_by(ModelArtifacts.id.desc()).limit(5):
+            if os.path.exists(artifact.path):
+                return artifact
+        return None
+
+    def write_artifact(self, obj: Any, path: str, kind: str) -> Dict[str, Any]:
+        """
+        Écrire l'objet (joblib, sans compression) de façon atomique ; lien physique vers un fichier
+        indexé de même contenu s'il en existe un
+        """
+        import joblib
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        joblib.dump(obj, tmp_path)
+        sha256 = file_digest(tmp_path)
+        size_bytes = os.path.getsize(tmp_path)
+
+        existing = self.find_by_digest(sha256, kind)
+        if existing is not None and os.path.abspath(existing.path) != os.path.abspath(path):
+            link_path = f"{path}.{os.getpid()}.link"
+            try:
+                os.link(existing.path, link_path)
+                os.replace(link_path, path)
+                os.remove(tmp_path)
+                # Date de modification à jour (fichiers associés comparés par date, cf. tree_inference)
+                os.utime(path)
+                logger.info(f"🔗 [REGISTRY] {os.path.basename(path)} identique à {os.path.basename(existing.path)}")
+            except OSError:
+                # Système de fichiers sans liens physiques : copie écrite normalement
+                if os.path.exists(link_path):
+                    os.remove(link_path)
+                os.replace(tmp_path, path)
+        else:
+            os.replace(tmp_path, path)
+
+        return {"kind": kind, "path": path, "sha256": sha256, "size_bytes": size_bytes}
+
+    def save(self, model_name: str, model: Any, scaler: Any = None,
+             flat: Optional[bool] = None) -> Tuple[str, str, List[Dict[str, Any]]]:
+        """
+        Allouer une version et écrire les fichiers du modèle : (version, chemin du modèle, fichiers)
+        La forêt aplatie (cf. tree_inference) est écrite si ml_mmap_artifacts est activé.
+        """
+        flat = settings.ml_mmap_artifacts if flat is None else flat
+        version = self.next_version(model_name)
+        model_path = self.model_path(model_name, version)
+        paths = artifact_paths(model_path)
+
+        artifacts = [self.write_artifact(model, paths["model"], "model")]
+        if scaler is not None:
+            artifacts.append(self.write_artifact(scaler, paths["scaler"], "scaler"))
+        if flat:
+            from app.services.tree_inference import FlatForest
+            try:
+                artifacts.append(self.write_artifact(FlatForest.from_model(model), paths["flat"], "flat"))
+            except ValueError as e:
+                logger.warning(f"⚠️ [REGISTRY] Forêt aplatie non enregistrée pour {model_name}: {e}")
+        return version, model_path, artifacts
+
+    def register(self, ml_model: MLModels, artifacts: List[Dict[str, Any]]):
+        """Ajouter le modèle et indexer ses fichiers (commit laissé à l'appelant)"""
+        self.db.add(ml_model)
+        if not artifact_index_exists(self.db):
+            return
+        self.db.flush()
+        paths = [artifact["path"] for artifact in artifacts]
+        # Chemin réutilisé (ancien modèle du même nom et de la même version) : entrée remplacée
+        self.db.query(ModelArtifacts).filter(ModelArtifacts.path.in_(paths)).delete(synchronize_session=False)
+        for artifact in artifacts:
+            self.db.add(ModelArtifacts(model_id=ml_model.id, **artifact))
+
+    def remove_artifacts(self, ml_model: MLModels) -> int:
+        """Supprimer les fichiers du modèle et leurs entrées d'index ; retourne le nombre de fichiers supprimés"""
+        removed = 0
+        paths = set(artifact_paths(ml_model.model_path).values()) if ml_model.model_path else set()
+        if artifact_index_exists(self.db):
+            indexed = self.db.query(ModelArtifacts).filter(ModelArtifacts.model_id == ml_model.id)
+            paths.update(artifact.path for artifact in indexed)
+            indexed.delete(synchronize_session=False)
+        for path in paths:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        ml_model.model_path = None
+        return removed
+
+    # Rétention
+
+    def retired_models(self, keep_versions: int, cutoff: datetime) -> List[MLModels]:
+        """
+        Versions au-delà des keep_versions dernières de leur nom, créées avant cutoff, avec des fichiers,
+        sauf la version active de chaque nom (le modèle actif le plus récent, celui que lisent le screener
+        et les prédictions)
+        """
+        ranked = self.db.query(
+            MLModels.id,
+            func.row_number().over(partition_by=MLModels.model_name, order_by=MLModels.id.desc()).label("rank")
+        ).filter(MLModels.model_path.isnot(None)).subquery()
+        active = self.db.query(func.max(MLModels.id)).filter(MLModels.is_active == True).group_by(MLModels.model_name)
+        return self.db.query(MLModels).join(ranked, ranked.c.id == MLModels.id).filter(
+            ranked.c.rank > max(1, keep_versions),
+            MLModels.created_at < cutoff,
+            MLModels.id.notin_(active)
+        ).order_by(MLModels.id).all()
+
+    def referenced_paths(self) -> Set[str]:
+        """Chemins (absolus) des fichiers des modèles et de l'index"""
+        referenced = set()
+        for (model_path,) in self.db.query(MLModels.model_path).filter(MLModels.model_path.isnot(None)):
+            referenced.update(os.path.abspath(path) for path in artifact_paths(model_path).values())
+        if artifact_index_exists(self.db):
+            referenced.update(os.path.abspath(path) for (path,) in self.db.query(ModelArtifacts.path))
+        return referenced
+
+    def orphaned_files(self, grace_hours: int) -> List[str]:
+        """Fichiers de models_path non référencés (ou temporaires) plus anciens que le délai de grâce"""
+        referenced = self.referenced_paths()
+        cutoff = (datetime.now() - timedelta(hours=grace_hours)).timestamp()
+        orphans = []
+        # Sous-répertoires (Datasets LightGBM...) exclus
+        for entry in os.scandir(self.models_path):
+            if not entry.is_file() or not entry.name.endswith((".joblib", ".tmp", ".link")):
+                continue
+            if os.path.abspath(entry.path) in referenced or entry.stat().st_mtime > cutoff:
+                continue
+            orphans.append(entry.path)
+        return orphans
+
+    def prune(self, keep_versions: Optional[int] = None, retention_days: Optional[int] = None,
+              grace_hours: Optional[int] = None, dry_run: bool = False) -> Dict[str, Any]:
+        """Appliquer la politique de rétention : anciennes versions, fichiers orphelins, index obsolète"""
+        keep_versions = settings.model_retention_versions if keep_versions is None else keep_versions
+        retention_days = settings.model_retention_days if retention_days is None else retention_days
+        grace_hours = settings.model_orphan_grace_hours if grace_hours is None else grace_hours
+
+        retired = self.retired_models(keep_versions, datetime.now() - timedelta(days=retention_days))
+        removed_files = 0
+        if not dry_run:
+            for ml_model in retired:
+                removed_files += self.remove_artifacts(ml_model)
+                ml_model.is_active = False
+            self.db.commit()
+
+        orphans = self.orphaned_files(grace_hours)
+        freed_bytes = 0
+        for path in orphans:
+            try:
+                freed_bytes += os.path.getsize(path)
+                if not dry_run:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        stale = 0
+        if artifact_index_exists(self.db):
+            missing = [artifact.id for artifact in self.db.query(ModelArtifacts.id, ModelArtifacts.path)
+                       if not os.path.exists(artifact.path)]
+            stale = len(missing)
+            if missing and not dry_run:
+                self.db.query(ModelArtifacts).filter(ModelArtifacts.id.in_(missing)).delete(synchronize_session=False)
+                self.db.commit()
+
+        logger.info(f"🧹 [REGISTRY] {len(retired)} versions retirées ({removed_files} fichiers), "
+                    f"{len(orphans)} fichiers orphelins ({freed_bytes / 1024 ** 2:.1f} Mo), "
+                    f"{stale} entrées d'index obsolètes{' (simulation)' if dry_run else ''}")
+        return {
+            "dry_run": dry_run,
+            "retired_models": [ml_model.id for ml_model in retired],
+            "removed_files": removed_files,
+            "orphaned_files": [os.path.basename(path) for path in orphans],
+            "orphaned_bytes": freed_bytes,
+            "stale_index_entries": stale,
+        }
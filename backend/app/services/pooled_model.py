@@ -0,0 +1,317 @@
+"""
+Modèle poolé (transversal) : un seul modèle par paramètre cible pour tout l'univers
+
+Au lieu d'un RandomForest par symbole, un modèle LightGBM (ou RandomForest) est entraîné sur le
+panel empilé de tous les symboles, avec le symbole et le secteur en variables catégorielles.
+Les données d'entraînement sont lues par lots de symboles et copiées au fil de l'eau dans un
+tableau float32 alloué une seule fois ; la prédiction de l'univers se fait en un seul appel
+vectorisé.
+
+Le modèle est enregistré dans ml_models avec le symbole POOLED_SYMBOL et le type
+POOLED_MODEL_TYPE ; les correspondances symbole/secteur -> code sont gardées dans
+model_parameters pour reproduire l'encodage à la prédiction.
+"""
+import os
+import logging
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.database import HistoricalData, MLModels, SymbolMetadata, TargetParameters
+from app.services.feature_registry import MODEL_FEATURE_COLUMNS, compute_features
+from app.services.ml_service import MLService
+from app.services.model_registry import ModelRegistry
+
+logger = logging.getLogger(__name__)
+
+# joblib, lightgbm et scikit-learn sont importés à la première utilisation (dans les méthodes)
+
+POOLED_SYMBOL = "*"
+POOLED_MODEL_TYPE = "pooled_classification"
+
+# Variables catégorielles ajoutées aux features du registre (code -1 : symbole ou secteur inconnu)
+CATEGORICAL_FEATURES = ['symbol_code', 'sector_code']
+
+POOLED_ALGORITHMS = ("lightgbm", "random_forest")
+
+# Part des dates les plus récentes réservée à l'évaluation (découpage temporel, pas aléatoire :
+# les symboles d'une même date sont corrélés)
+TEST_FRACTION = 0.2
+
+# Lignes minimum du panel pour entraîner le modèle
+MIN_POOLED_ROWS = 1000
+
+
+def encode_categories(symbols: List[str], sectors: Dict[str, Optional[str]],
+                      symbol_categories: List[str], sector_categories: List[str]) -> np.ndarray:
+    """Codes (symbole, secteur) des symboles donnés, -1 pour une valeur absente des catégories"""
+    symbol_codes = {symbol: i for i, symbol in enumerate(symbol_categories)}
+    sector_codes = {sector: i for i, sector in enumerate(sector_categories)}
+    return np.array([
+        [symbol_codes.get(symbol, -1), sector_codes.get(sectors.get(symbol), -1)]
+        for symbol in symbols
+    ], dtype=np.float32).reshape(len(symbols), len(CATEGORICAL_FEATURES))
+
+
+def _grow(array: np.ndarray, size: int) -> np.ndarray:
+    """Copie de array dans un tableau de size lignes (lignes ajoutées non initialisées)"""
+    grown = np.empty((size,) + array.shape[1:], dtype=array.dtype)
+    grown[:len(array)] = array
+    return grown
+
+
+class PooledModelService:
+    """Entraînement et prédiction du modèle poolé"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.ml_service = MLService(db)
+        self.models_path = settings.ml_models_path
+        os.makedirs(self.models_path, exist_ok=True)
+
+    def get_sectors(self, symbols: List[str]) -> Dict[str, Optional[str]]:
+        """Secteur de chaque symbole (symbol_metadata)"""
+        return dict(self.db.query(SymbolMetadata.symbol, SymbolMetadata.sector).filter(
+            SymbolMetadata.symbol.in_(symbols)
+        ).all())
+
+    def get_latest_model(self, target_return_percentage: float, time_horizon_days: int) -> Optional[MLModels]:
+        """Modèle poolé actif le plus récent pour ce rendement cible et cet horizon"""
+        return self.db.query(MLModels).join(TargetParameters).filter(
+            MLModels.is_active == True,
+            MLModels.symbol == POOLED_SYMBOL,
+            MLModels.model_type == POOLED_MODEL_TYPE,
+            TargetParameters.target_return_percentage == target_return_percentage,
+            TargetParameters.time_horizon_days == time_horizon_days
+        ).order_by(MLModels.id.desc()).first()
+
+    # Entraînement
+
+    def count_history_rows(self, symbols: List[str]) -> int:
+        """Lignes d'historique des symboles : borne supérieure des lignes étiquetées du panel"""
+        return self.db.query(func.count()).select_from(HistoricalData).filter(
+            HistoricalData.symbol.in_(symbols)
+        ).scalar() or 0
+
+    def iter_training_chunks(self, symbols: List[str], target_param: TargetParameters):
+        """
+        Panel d'entraînement par lots de symboles : (X float32, y, dates) par lot, features du
+        registre suivies des codes catégoriels. Seul le lot courant est gardé en DataFrame.
+        """
+        symbol_categories = list(symbols)
+        sectors = self.get_sectors(symbols)
+        sector_categories = sorted({sector for sector in sectors.values() if sector})
+        chunk_size = max(1, settings.pooled_training_chunk_symbols)
+
+        for start in range(0, len(symbols), chunk_size):
+            features, labels, dates = [], [], []
+            for symbol in symbols[start:start + chunk_size]:
+                df = self.ml_service.create_labels_for_training(symbol, target_param, self.db)
+                if df.empty:
+                    continue
+                X = compute_features(df, MODEL_FEATURE_COLUMNS).to_numpy(dtype=np.float32)
+                codes = encode_categories([symbol] * len(df), sectors, symbol_categories, sector_categories)
+                features.append(np.hstack([X, codes]))
+                labels.append(df['target_achieved'].to_numpy(dtype=np.int8))
+                dates.append(pd.to_datetime(df['date']).to_numpy())
+
+            # Libérer les objets de la session entre deux lots
+            self.db.expire_all()
+            if features:
+                yield np.vstack(features), np.concatenate(labels), np.concatenate(dates)
+
+    def build_training_panel(self, symbols: List[str],
+                             target_param: TargetParameters) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Panel empilé (X, y, dates) de tous les symboles. Les tableaux sont alloués une seule fois à
+        la taille de l'historique des symboles, puis remplis lot par lot : la mémoire maximale est
+        celle du panel plus un lot, sans seconde copie. Ils ne sont agrandis (copie) que si des
+        lignes ont été ajoutées pendant la lecture. L'entraînement n'est pas pour autant à mémoire
+        constante : train() recopie encore les lignes du découpage d'entraînement.
+        """
+        n_features = len(MODEL_FEATURE_COLUMNS) + len(CATEGORICAL_FEATURES)
+        capacity = self.count_history_rows(symbols)
+        X = np.empty((capacity, n_features), dtype=np.float32)
+        y = np.empty(capacity, dtype=np.int8)
+        dates = np.empty(capacity, dtype='datetime64[ns]')
+
+        n_rows = 0
+        for X_chunk, y_chunk, dates_chunk in self.iter_training_chunks(symbols, target_param):
+            end = n_rows + len(X_chunk)
+            if end > len(X):
+                logger.warning(f"⚠️ [POOLED] Panel plus grand que l'historique compté ({end} > {len(X)} lignes)")
+                size = max(end, 2 * len(X))
+                X, y, dates = _grow(X, size), _grow(y, size), _grow(dates, size)
+            X[n_rows:end] = X_chunk
+            y[n_rows:end] = y_chunk
+            dates[n_rows:end] = dates_chunk
+            n_rows = end
+
+        return X[:n_rows], y[:n_rows], dates[:n_rows]
+
+    def _fit(self, X_train: np.ndarray, y_train: np.ndarray, feature_names: List[str], algorithm: str):
+        """Entraîner le modèle (LightGBM avec variables catégorielles, ou RandomForest)"""
+        if algorithm == "lightgbm":
+            import lightgbm as lgb
+            model = lgb.LGBMClassifier(
+                n_estimators=300,
+                learning_rate=0.05,
+                num_leaves=63,
+                min_child_samples=50,
+                subsample=0.8,
+                subsample_freq=1,
+                colsample_bytree=0.8,
+                class_weight='balanced',
+                random_state=42,
+                verbose=-1
+            )
+            model.fit(
+                pd.DataFrame(X_train, columns=feature_names), y_train,
+                categorical_feature=CATEGORICAL_FEATURES
+            )
+            return model
+
+        from sklearn.ensemble import RandomForestClassifier
+        model = RandomForestClassifier(
+            n_estimators=200,
+            max_depth=12,
+            min_samples_leaf=20,
+            n_jobs=-1,
+            random_state=42,
+            class_weight='balanced'
+        )
+        # Les codes catégoriels sont traités comme des valeurs ordinales par la forêt
+        model.fit(np.nan_to_num(X_train), y_train)
+        return model
+
+    def train(self, symbols: List[str], target_param: TargetParameters,
+              algorithm: Optional[str] = None) -> Dict[str, Any]:
+        """Entraîner un modèle poolé sur tous les symboles donnés"""
+        from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score
+
+        algorithm = algorithm or settings.pooled_model_algorithm
+        if algorithm not in POOLED_ALGORITHMS:
+            return {"error": f"Algorithme inconnu: {algorithm} (attendu: {', '.join(POOLED_ALGORITHMS)})"}
+
+        X, y, dates = self.build_training_panel(symbols, target_param)
+        if len(X) < MIN_POOLED_ROWS:
+            return {"error": f"Pas assez de données pour l'entraînement: {len(X)} lignes"}
+
+        # Découpage temporel : les dernières dates servent à l'évaluation
+        split_date = np.sort(dates)[int(len(dates) * (1 - TEST_FRACTION))]
+        train_mask = dates < split_date
+        feature_names = MODEL_FEATURE_COLUMNS + CATEGORICAL_FEATURES
+
+        model = self._fit(X[train_mask], y[train_mask], feature_names, algorithm)
+
+        X_test, y_test = X[~train_mask], y[~train_mask]
+        if algorithm == "lightgbm":
+            y_pred = model.predict(pd.DataFrame(X_test, columns=feature_names))
+        else:
+            y_pred = model.predict(np.nan_to_num(X_test))
+
+        metrics = {
+            "test_score": float(accuracy_score(y_test, y_pred)),
+            "precision": float(precision_score(y_test, y_pred, zero_division=0)),
+            "recall": float(recall_score(y_test, y_pred, zero_division=0)),
+            "f1_score": float(f1_score(y_test, y_pred, zero_division=0)),
+            "train_samples": int(train_mask.sum()),
+            "test_samples": int(len(y_test))
+        }
+
+        sectors = self.get_sectors(symbols)
+        model_name = f"pooled_{target_param.parameter_name}"
+        registry = ModelRegistry(self.db, self.models_path)
+        version, model_path, artifacts = registry.save(model_name, model, flat=False)
+
+        ml_model = MLModels(
+            model_name=model_name,
+            model_type=POOLED_MODEL_TYPE,
+            model_version=version,
+            symbol=POOLED_SYMBOL,
+            target_parameter_id=target_param.id,
+            model_parameters={
+                "algorithm": algorithm,
+                "target_return_percentage": float(target_param.target_return_percentage),
+                "time_horizon_days": int(target_param.time_horizon_days),
+                "feature_names": MODEL_FEATURE_COLUMNS,
+                "categorical_features": CATEGORICAL_FEATURES,
+                "symbol_categories": list(symbols),
+                "sector_categories": sorted({sector for sector in sectors.values() if sector}),
+                "training_data_start": str(pd.Timestamp(dates.min()).date()),
+                "training_data_end": str(pd.Timestamp(dates.max()).date()),
+                "split_date": str(pd.Timestamp(split_date).date())
+            },
+            performance_metrics=metrics,
+            model_path=model_path,
+            is_active=True,
+            created_by="pooled_model"
+        )
+        registry.register(ml_model, artifacts)
+        self.db.commit()
+
+        logger.info(f"✅ [POOLED] Modèle {model_name} ({algorithm}) entraîné sur {len(X)} lignes "
+                    f"de {len(symbols)} symboles (ID: {ml_model.id}, précision test: {metrics['test_score']:.3f})")
+        return {"model_id": ml_model.id, "model_name": model_name, "rows": int(len(X)), **metrics}
+
+    # Prédiction
+
+    def predict_universe(self, ml_model: MLModels, symbols: List[str], as_of_date: Optional[date] = None,
+                         screener_run_id: Optional[int] = None, sink=None, snapshot=None) -> List[Dict[str, Any]]:
+        """
+        Prédire tous les symboles en un seul appel (features de la dernière date disponible),
+        prédictions enregistrées via le puits s'il est fourni
+        """
+        import joblib
+
+        parameters = ml_model.model_parameters or {}
+        feature_names = parameters.get('feature_names', [])
+        X, data_dates = self.ml_service.load_latest_features(symbols, as_of_date, feature_names, self.db, snapshot)
+        if X.empty:
+            return []
+
+        codes = encode_categories(
+            list(X.index), self.get_sectors(list(X.index)),
+            parameters.get('symbol_categories', []), parameters.get('sector_categories', [])
+        )
+        matrix = np.hstack([X.to_numpy(dtype=np.float32), codes])
+
+        model = joblib.load(ml_model.model_path)
+        if parameters.get('algorithm') == "lightgbm":
+            probabilities = model.predict_proba(
+                pd.DataFrame(matrix, columns=feature_names + CATEGORICAL_FEATURES)
+            )
+        else:
+            probabilities = model.predict_proba(np.nan_to_num(matrix))
+
+        classes = model.classes_
+        predictions = classes[probabilities.argmax(axis=1)]
+        confidences = probabilities.max(axis=1)
+
+        results = []
+        for symbol, prediction, confidence in zip(X.index, predictions, confidences):
+            data_date = data_dates.get(symbol)
+            if sink is not None:
+                sink.add(
+                    symbol=symbol,
+                    model_id=ml_model.id,
+                    prediction_date=data_date,
+                    prediction_value=float(prediction),
+                    confidence=float(confidence),
+                    prediction_class="target_achieved",
+                    data_date_used=data_date,
+                    screener_run_id=screener_run_id,
+                    created_by="pooled_model"
+                )
+            results.append({
+                "symbol": symbol,
+                "date": data_date,
+                "prediction": float(prediction),
+                "confidence": float(confidence)
+            })
+        return results
@@ -0,0 +1,102 @@
+"""
+Puits de prédictions : persistance groupée des MLPredictions
+
+Au lieu d'un commit par prédiction, les lignes sont accumulées en mémoire puis écrites par
+INSERT multi-lignes (ON CONFLICT DO NOTHING) lorsque le tampon atteint une taille ou un âge
+maximal, et à la fermeture du puits (fin de run du screener).
+"""
+import time
+import logging
+import threading
+from datetime import date
+from typing import Dict, List, Any, Optional
+
+from sqlalchemy.dialects.postgresql import insert
+
+from app.core.config import settings
+from app.core.database import get_db_session
+from app.models.database import MLPredictions
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximal de lignes par instruction INSERT (limite de paramètres PostgreSQL)
+INSERT_CHUNK_SIZE = 1000
+
+
+class PredictionSink:
+    """Tampon de prédictions vidé par lots, partageable entre threads"""
+
+    def __init__(self, screener_run_id: Optional[int] = None, max_rows: Optional[int] = None,
+                 max_seconds: Optional[float] = None, created_by: str = "ml_service"):
+        self.screener_run_id = screener_run_id
+        self.max_rows = max(1, max_rows or settings.ml_prediction_batch_size)
+        self.max_seconds = max_seconds if max_seconds is not None else settings.prediction_sink_flush_seconds
+        self.created_by = created_by
+        self.total_written = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.flush()
+
+    @property
+    def pending(self) -> int:
+        """Nombre de prédictions en attente d'écriture"""
+        return len(self._buffer)
+
+    def add(self, symbol: str, model_id: int, prediction_date: date, prediction_value: float,
+            confidence: float, prediction_class: Optional[str] = None,
+            data_date_used: Optional[date] = None, screener_run_id: Optional[int] = None,
+            created_by: Optional[str] = None):
+        """Ajouter une prédiction au tampon (vidé automatiquement selon les seuils)"""
+        row = {
+            "model_id": model_id,
+            "symbol": symbol,
+            "prediction_date": prediction_date,
+            "prediction_value": float(prediction_value),
+            "prediction_class": prediction_class,
+            "confidence": float(confidence),
+            "data_date_used": data_date_used,
+            "screener_run_id": screener_run_id if screener_run_id is not None else self.screener_run_id,
+            "created_by": created_by or self.created_by,
+        }
+
+        with self._lock:
+            self._buffer.append(row)
+            should_flush = (
+                len(self._buffer) >= self.max_rows
+                or time.monotonic() - self._last_flush >= self.max_seconds
+            )
+
+        if should_flush:
+            self.flush()
+
+    def flush(self) -> int:
+        """Écrire les prédictions en attente et retourner le nombre de lignes écrites"""
+        with self._lock:
+            rows, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+
+        if not rows:
+            return 0
+
+        try:
+            with get_db_session() as db:
+                for i in range(0, len(rows), INSERT_CHUNK_SIZE):
+                    statement = insert(MLPredictions).values(rows[i:i + INSERT_CHUNK_SIZE]).on_conflict_do_nothing()
+                    db.execute(statement)
+                db.commit()
+        except Exception as e:
+            # Remettre les lignes dans le tampon pour une prochaine tentative
+            with self._lock:
+                self._buffer = rows + self._buffer
+            logger.error(f"❌ [SINK] Échec de l'écriture de {len(rows)} prédictions: {str(e)}")
+            raise
+
+        self.total_written += len(rows)
+        logger.info(f"💾 [SINK] {len(rows)} prédictions écrites (total: {self.total_written})")
+        return len(rows)
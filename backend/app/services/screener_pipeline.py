@@ -0,0 +1,666 @@
+"""
+Pipeline de screener paramétrable
+
+Remplace les différentes variantes de tâches de screener par un pipeline unique en étapes :
+sélection des symboles → chargement des features → entraînement/réutilisation des modèles
+→ prédictions par lot → classement → persistance des résultats.
+
+Le mode d'exécution, la limite de symboles et la concurrence sont des paramètres du pipeline.
+"""
+import time
+import random
+import logging
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, date
+from typing import Dict, List, Any, Optional, Callable, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import get_db_session
+from app.models.database import (
+    ScreenerRun, ScreenerResult, MLModels, MLPredictions,
+    TargetParameters, SymbolMetadata, HistoricalData
+)
+from app.models.schemas import ScreenerRequest
+from app.services.latest_features import LatestFeaturesSnapshot
+from app.services.ml_service import MLService
+from app.services.pooled_model import PooledModelService
+from app.services.prediction_sink import PredictionSink
+
+logger = logging.getLogger(__name__)
+
+# Modes d'exécution supportés
+#   train : entraîne un nouveau modèle pour chaque symbole puis prédit
+#   reuse : réutilise les modèles actifs existants et n'entraîne que les symboles sans modèle
+#   pooled : un seul modèle pour tous les symboles (cf. app.services.pooled_model), réutilisé
+#            s'il a été entraîné le jour même, puis une prédiction vectorisée de l'univers
+#   demo  : prédictions aléatoires sur les symboles actifs, sans entraînement (seul le run est enregistré)
+PIPELINE_MODES = ("train", "reuse", "pooled", "demo")
+
+# Symboles populaires utilisés en priorité par les exécutions limitées et la démonstration
+POPULAR_SYMBOLS = ["AAPL", "GOOGL", "MSFT", "AMZN", "TSLA", "META", "NVDA", "NFLX", "ADBE", "CRM"]
+
+# Nombre minimum de lignes historiques pour entraîner un modèle (cf. MLService)
+MIN_TRAINING_ROWS = 100
+
+
+class ScreenerPipeline:
+    """Pipeline unique du screener, configuré par mode, limite de symboles et concurrence"""
+
+    def __init__(self, mode: str = "train", max_symbols: Optional[int] = None,
+                 concurrency: Optional[int] = None, priority_symbols: Optional[List[str]] = None,
+                 progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None):
+        if mode not in PIPELINE_MODES:
+            raise ValueError(f"Mode de screener inconnu: {mode} (attendu: {', '.join(PIPELINE_MODES)})")
+
+        self.mode = mode
+        self.max_symbols = max_symbols
+        self.concurrency = max(1, concurrency or settings.screener_concurrency)
+        self.priority_symbols = priority_symbols or []
+        self.progress_callback = progress_callback
+        self.start_time = time.time()
+
+    def get_execution_time(self) -> int:
+        """Calculer le temps d'exécution"""
+        return int(time.time() - self.start_time)
+
+    def report_progress(self, status: str, progress: int, current_step: str, **meta):
+        """Transmettre l'avancement au callback (ex: update_state Celery)"""
+        if self.progress_callback:
+            self.progress_callback({
+                "status": status,
+                "progress": int(progress),
+                "current_step": current_step,
+                **meta
+            })
+
+    # === Étape 1 : sélection des symboles ===
+
+    def get_active_symbols(self, db: Session, limit: Optional[int] = None) -> List[str]:
+        """Récupérer les symboles actifs, les symboles prioritaires (actifs eux aussi) en tête"""
+        priority = []
+        if self.priority_symbols:
+            active_priority = {row[0] for row in db.query(SymbolMetadata.symbol).filter(
+                SymbolMetadata.is_active == True,
+                SymbolMetadata.symbol.in_(self.priority_symbols)
+            ).all()}
+            priority = [symbol for symbol in dict.fromkeys(self.priority_symbols) if symbol in active_priority]
+        if limit:
+            priority = priority[:limit]
+
+        query = db.query(SymbolMetadata.symbol).filter(
+            SymbolMetadata.is_active == True
+        ).order_by(SymbolMetadata.symbol.asc())
+
+        if priority:
+            query = query.filter(SymbolMetadata.symbol.notin_(priority))
+        if limit:
+            query = query.limit(limit - len(priority))
+
+        symbols = priority + [row[0] for row in query.all()]
+        logger.info(f"🔍 [GET_SYMBOLS] {len(symbols)} symboles sélectionnés (limite: {limit})")
+        return symbols
+
+    # === Étape 2 : chargement des features ===
+
+    def filter_symbols_with_features(self, db: Session, symbols: List[str]) -> List[str]:
+        """Écarter en une seule requête les symboles sans historique suffisant pour l'entraînement"""
+        if not symbols:
+            return []
+
+        counts = dict(db.query(HistoricalData.symbol, func.count(HistoricalData.id)).filter(
+            HistoricalData.symbol.in_(symbols)
+        ).group_by(HistoricalData.symbol).all())
+
+        eligible = [symbol for symbol in symbols if counts.get(symbol, 0) >= MIN_TRAINING_ROWS]
+        skipped = len(symbols) - len(eligible)
+        if skipped:
+            logger.info(f"⏭️ [FEATURES] {skipped} symboles écartés (moins de {MIN_TRAINING_ROWS} jours de données)")
+        return eligible
+
+    # === Étape 3 : entraînement / réutilisation ===
+
+    def create_target_parameter(self, db: Session, symbol: str, request: ScreenerRequest, user_id: str) -> TargetParameters:
+        """Créer ou récupérer les paramètres cibles"""
+        parameter_name = f"target_{symbol}_{request.target_return_percentage}%_{request.time_horizon_days}d"
+        existing_param = db.query(TargetParameters).filter(
+            TargetParameters.user_id == user_id,
+            TargetParameters.parameter_name == parameter_name
+        ).first()
+
+        if existing_param:
+            return existing_param
+
+        if request.risk_tolerance <= 0.3:
+            risk_tolerance_str = "low"
+        elif request.risk_tolerance <= 0.6:
+            risk_tolerance_str = "medium"
+        else:
+            risk_tolerance_str = "high"
+
+        target_param = TargetParameters(
+            user_id=user_id,
+            parameter_name=parameter_name,
+            target_return_percentage=request.target_return_percentage,
+            time_horizon_days=request.time_horizon_days,
+            risk_tolerance=risk_tolerance_str,
+            min_confidence_threshold=request.risk_tolerance,
+            max_drawdown_percentage=5.0,
+            is_active=True
+        )
+        db.add(target_param)
+        db.commit()
+        db.refresh(target_param)
+        return target_param
+
+    def get_latest_models(self, db: Session, symbols: List[str], request: ScreenerRequest) -> Dict[str, MLModels]:
+        """Récupérer le modèle actif le plus récent par symbole pour les paramètres du screener"""
+        if not symbols:
+            return {}
+
+        latest_ids = db.query(func.max(MLModels.id)).join(TargetParameters).filter(
+            MLModels.is_active == True,
+            MLModels.symbol.in_(symbols),
+            TargetParameters.target_return_percentage == request.target_return_percentage,
+            TargetParameters.time_horizon_days == request.time_horizon_days
+        ).group_by(MLModels.symbol)
+
+        models = db.query(MLModels).filter(MLModels.id.in_(latest_ids)).all()
+        return {model.symbol: model for model in models}
+
+    def train_model_for_symbol(self, db: Session, symbol: str, target_param: TargetParameters) -> bool:
+        """Entraîner un modèle pour un symbole"""
+        try:
+            ml_service = MLService(db)
+            model_result = ml_service.train_classification_model(
+                symbol=symbol,
+                target_param=target_param,
+                db=db,
+                evaluation=settings.screener_evaluation_policy
+            )
+
+            if model_result and model_result.get("model_id"):
+                logger.info(f"✅ [TRAIN] Modèle ML entraîné avec succès pour {symbol} (ID: {model_result.get('model_id')})")
+                return True
+
+            error_msg = model_result.get('error', 'Erreur inconnue') if model_result else 'Pas de résultat'
+            logger.error(f"❌ [TRAIN] Échec entraînement {symbol}: {error_msg}")
+            return False
+
+        except Exception as e:
+            logger.error(f"❌ [TRAIN] Exception lors de l'entraînement ML pour {symbol}: {str(e)}")
+            logger.error(f"❌ [TRAIN] Stack trace: {traceback.format_exc()}")
+            return False
+
+    def _train_symbol_job(self, symbol: str, request: ScreenerRequest, user_id: str) -> bool:
+        """Unité de travail d'entraînement, avec sa propre session pour l'exécution concurrente"""
+        with get_db_session() as db:
+            target_param = self.create_target_parameter(db, symbol, request, user_id)
+            return self.train_model_for_symbol(db, symbol, target_param)
+
+    def train_models(self, symbols: List[str], request: ScreenerRequest, user_id: str,
+                     screener_run_id: Optional[int] = None) -> int:
+        """Entraîner les modèles manquants (mode reuse) ou tous les modèles (mode train)"""
+        if self.mode == "pooled":
+            return self.train_pooled_model(symbols, request, user_id, screener_run_id)
+
+        to_train = list(symbols)
+        reused = 0
+
+        if self.mode == "reuse":
+            with get_db_session() as db:
+                existing = self.get_latest_models(db, symbols, request)
+            to_train = [symbol for symbol in symbols if symbol not in existing]
+            reused = len(symbols) - len(to_train)
+            logger.info(f"♻️ [TRAIN] {reused} modèles réutilisés, {len(to_train)} à entraîner")
+
+        successful_models = reused
+        total = len(to_train)
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = {
+                executor.submit(self._train_symbol_job, symbol, request, user_id): symbol
+                for symbol in to_train
+            }
+            for done, future in enumerate(as_completed(futures), start=1):
+                symbol = futures[future]
+                try:
+                    if future.result():
+                        successful_models += 1
+                except Exception as e:
+                    logger.error(f"❌ [TRAIN] {symbol}: Erreur générale - {str(e)}")
+
+                self.report_progress(
+                    f"Entraînement ML {symbol} ({done}/{total})...",
+                    10 + (done / total) * 40,
+                    "training_models",
+                    screener_run_id=screener_run_id,
+                    total_symbols=len(symbols),
+                    trained_models=successful_models,
+                    current_symbol=symbol
+                )
+
+        return successful_models
+
+    def train_pooled_model(self, symbols: List[str], request: ScreenerRequest, user_id: str,
+                           screener_run_id: Optional[int] = None) -> int:
+        """Entraîner (ou réutiliser s'il date du jour) le modèle poolé ; retourne le nombre de symboles couverts"""
+        with get_db_session() as db:
+            service = PooledModelService(db)
+            existing = service.get_latest_model(request.target_return_percentage, request.time_horizon_days)
+            if existing and existing.created_at and existing.created_at.date() == date.today():
+                covered = set(existing.model_parameters.get("symbol_categories", []))
+                logger.info(f"♻️ [TRAIN] Modèle poolé {existing.model_name} du jour réutilisé (ID: {existing.id})")
+                return len([symbol for symbol in symbols if symbol in covered])
+
+            self.report_progress(
+                f"Entraînement du modèle poolé ({len(symbols)} symboles)...", 15, "training_models",
+                screener_run_id=screener_run_id, total_symbols=len(symbols)
+            )
+            target_param = self.create_target_parameter(db, "pooled", request, user_id)
+            result = service.train(symbols, target_param)
+
+        if result.get("error"):
+            logger.error(f"❌ [TRAIN] Échec entraînement du modèle poolé: {result['error']}")
+            return 0
+        return len(symbols)
+
+    # === Étape 4 : prédictions par lot ===
+
+    def predict_for_model(self, db: Session, model: MLModels, request: ScreenerRequest,
+                          screener_run_id: Optional[int] = None,
+                          sink: Optional[PredictionSink] = None,
+                          snapshot: Optional[LatestFeaturesSnapshot] = None) -> Optional[Dict[str, Any]]:
+        """Faire une prédiction pour un modèle, en réutilisant celle du jour si elle existe"""
+        try:
+            recent_prediction = db.query(MLPredictions).filter(
+                MLPredictions.model_id == model.id,
+                MLPredictions.created_at >= date.today()
+            ).order_by(MLPredictions.created_at.desc()).first()
+
+            if recent_prediction:
+                prediction = float(recent_prediction.prediction_value)
+                confidence = float(recent_prediction.confidence)
+            else:
+                prediction_result = MLService(db).predict(
+                    symbol=model.symbol,
+                    model_id=model.id,
+                    date=date.today(),
+                    db=db,
+                    screener_run_id=screener_run_id,
+                    sink=sink,
+                    snapshot=snapshot
+                )
+
+                if not prediction_result or prediction_result.get("error"):
+                    error_msg = prediction_result.get('error', 'Erreur inconnue') if prediction_result else 'Pas de résultat'
+                    logger.error(f"❌ [PREDICT] Échec prédiction {model.symbol}: {error_msg}")
+                    return None
+
+                prediction = prediction_result["prediction"]
+                confidence = prediction_result["confidence"]
+
+            return self._prediction_entry(model, prediction, confidence, request)
+
+        except Exception as e:
+            logger.error(f"❌ [PREDICT] Exception lors de la prédiction ML pour {model.symbol}: {str(e)}")
+            logger.error(f"❌ [PREDICT] Stack trace: {traceback.format_exc()}")
+            return None
+
+    def predict_models_flat(self, db: Session, models: List[MLModels], request: ScreenerRequest,
+                            screener_run_id: Optional[int], sink: PredictionSink,
+                            snapshot: Optional[LatestFeaturesSnapshot]) -> Tuple[List[Dict[str, Any]], List[MLModels]]:
+        """
+        Prédire un lot de modèles de classification en un seul parcours des forêts aplaties
+        (cf. app.services.tree_inference.predict_many). Retourne les prédictions et les modèles
+        laissés à predict_for_model (régression, modèle non convertible, features manquantes).
+        """
+        from app.services.tree_inference import load_flat_model, predict_many
+
+        predictions, remaining = [], []
+
+        # Prédictions déjà faites aujourd'hui : une seule requête pour le lot
+        recent = {}
+        for row in db.query(MLPredictions).filter(
+            MLPredictions.model_id.in_([model.id for model in models]),
+            MLPredictions.created_at >= date.today()
+        ).order_by(MLPredictions.created_at.desc()).all():
+            recent.setdefault(row.model_id, row)
+
+        # Features chargées une fois par liste de features
+        groups: Dict[Tuple[str, ...], List[MLModels]] = {}
+        for model in models:
+            if model.id in recent:
+                row = recent[model.id]
+                predictions.append(self._prediction_entry(model, float(row.prediction_value), float(row.confidence), request))
+            elif model.model_type != "classification" or not (model.model_parameters or {}).get('feature_names'):
+                remaining.append(model)
+            else:
+                groups.setdefault(tuple(model.model_parameters['feature_names']), []).append(model)
+
+        forests, inputs, batch = [], [], []
+        for feature_names, group in groups.items():
+            X, data_dates = MLService(db).load_latest_features(
+                [model.symbol for model in group], date.today(), list(feature_names), db, snapshot
+            )
+            for model in group:
+                if model.symbol not in X.index:
+                    remaining.append(model)
+                    continue
+                try:
+                    forest, scaler = load_flat_model(model.model_path)
+                except (ValueError, OSError) as e:
+                    logger.warning(f"⚠️ [PREDICT] {model.symbol}: modèle non aplati ({e})")
+                    remaining.append(model)
+                    continue
+                forests.append(forest)
+                inputs.append(scaler.transform(X.loc[[model.symbol]]))
+                batch.append((model, data_dates.get(model.symbol)))
+
+        for (model, data_date), forest, proba in zip(batch, forests, predict_many(forests, inputs)):
+            prediction = float(forest.classes[proba[0].argmax()])
+            confidence = float(proba[0].max())
+            sink.add(
+                symbol=model.symbol,
+                model_id=model.id,
+                prediction_date=data_date,
+                prediction_value=prediction,
+                confidence=confidence,
+                prediction_class="target_achieved",
+                data_date_used=data_date,
+                screener_run_id=screener_run_id,
+                created_by="ml_service"
+            )
+            predictions.append(self._prediction_entry(model, prediction, confidence, request))
+
+        return predictions, remaining
+
+    def _prediction_entry(self, model: MLModels, prediction: float, confidence: float,
+                          request: ScreenerRequest) -> Dict[str, Any]:
+        return {
+            "symbol": model.symbol,
+            "model_id": model.id,
+            "model_name": model.model_name,
+            "prediction": prediction,
+            "confidence": confidence,
+            "is_opportunity": prediction == 1.0 and confidence >= request.risk_tolerance
+        }
+
+    def _predict_chunk_job(self, model_ids: List[int], request: ScreenerRequest,
+                           screener_run_id: Optional[int], sink: PredictionSink) -> List[Dict[str, Any]]:
+        """Prédire un lot de modèles avec une seule session et une seule lecture de latest_features"""
+        predictions = []
+        with get_db_session() as db:
+            models = db.query(MLModels).filter(MLModels.id.in_(model_ids)).all()
+            snapshot = LatestFeaturesSnapshot(db, [model.symbol for model in models]) if settings.feature_store_enabled else None
+            if settings.ml_inference_engine == "flat":
+                try:
+                    predictions, models = self.predict_models_flat(db, models, request, screener_run_id, sink, snapshot)
+                except Exception as e:
+                    # Repli modèle par modèle (scikit-learn) si le parcours groupé échoue
+                    logger.error(f"❌ [PREDICT] Prédiction groupée des forêts aplaties impossible: {str(e)}")
+                    predictions = []
+            for model in models:
+                prediction_data = self.predict_for_model(db, model, request, screener_run_id, sink, snapshot)
+                if prediction_data:
+                    predictions.append(prediction_data)
+        return predictions
+
+    def predict_batch(self, symbols: List[str], request: ScreenerRequest,
+                      screener_run_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Prédire pour le dernier modèle de chaque symbole, par lots répartis sur les workers.
+        Les prédictions sont écrites par lots via un puits partagé, vidé en fin d'étape.
+        """
+        if self.mode == "pooled":
+            return self.predict_pooled(symbols, request, screener_run_id)
+
+        with get_db_session() as db:
+            model_ids = [model.id for model in self.get_latest_models(db, symbols, request).values()]
+
+        if not model_ids:
+            return []
+
+        chunk_size = max(1, -(-len(model_ids) // self.concurrency))
+        chunks = [model_ids[i:i + chunk_size] for i in range(0, len(model_ids), chunk_size)]
+        predictions = []
+
+        with PredictionSink(screener_run_id=screener_run_id) as sink, \
+                ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            futures = [
+                executor.submit(self._predict_chunk_job, chunk, request, screener_run_id, sink)
+                for chunk in chunks
+            ]
+            for future in as_completed(futures):
+                predictions.extend(future.result())
+                self.report_progress(
+                    f"Prédictions ML ({len(predictions)}/{len(model_ids)})...",
+                    50 + (len(predictions) / len(model_ids)) * 40,
+                    "making_predictions",
+                    screener_run_id=screener_run_id,
+                    total_symbols=len(symbols)
+                )
+
+        return predictions
+
+    def predict_pooled(self, symbols: List[str], request: ScreenerRequest,
+                       screener_run_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Prédire tout l'univers avec le modèle poolé, en un seul appel"""
+        with get_db_session() as db, PredictionSink(screener_run_id=screener_run_id) as sink:
+            service = PooledModelService(db)
+            model = service.get_latest_model(request.target_return_percentage, request.time_horizon_days)
+            if not model:
+                return []
+
+            snapshot = LatestFeaturesSnapshot(db, symbols) if settings.feature_store_enabled else None
+            results = service.predict_universe(model, symbols, screener_run_id=screener_run_id,
+                                               sink=sink, snapshot=snapshot)
+
+            self.report_progress(f"Prédictions ML ({len(results)}/{len(symbols)})...", 90, "making_predictions",
+                                 screener_run_id=screener_run_id, total_symbols=len(symbols))
+            return [
+                {
+                    "symbol": result["symbol"],
+                    "model_id": model.id,
+                    "model_name": model.model_name,
+                    "prediction": result["prediction"],
+                    "confidence": result["confidence"],
+                    "is_opportunity": result["prediction"] == 1.0 and result["confidence"] >= request.risk_tolerance
+                }
+                for result in results
+            ]
+
+    def simulate_predictions(self, symbols: List[str], request: ScreenerRequest) -> List[Dict[str, Any]]:
+        """Prédictions simulées pour le mode démonstration"""
+        predictions = []
+        for i, symbol in enumerate(symbols):
+            prediction = random.choice([0.0, 1.0])
+            confidence = random.uniform(0.5, 0.95)
+            predictions.append({
+                "symbol": symbol,
+                "model_id": i + 1,
+                "model_name": f"Demo Model {symbol}",
+                "prediction": prediction,
+                "confidence": confidence,
+                "is_opportunity": prediction == 1.0 and confidence >= request.risk_tolerance
+            })
+        return predictions
+
+    # === Étape 5 : classement ===
+
+    def rank_opportunities(self, predictions: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Garder les opportunités et les classer par confiance décroissante"""
+        opportunities = [p for p in predictions if p["is_opportunity"]]
+        opportunities.sort(key=lambda p: p["confidence"], reverse=True)
+        for rank, opportunity in enumerate(opportunities, start=1):
+            opportunity["rank"] = rank
+        return opportunities
+
+    # === Étape 6 : persistance ===
+
+    def create_screener_run(self, db: Session, user_id: str) -> ScreenerRun:
+        """Créer un enregistrement de run de screener"""
+        screener_run = ScreenerRun(
+            screener_config_id=1,
+            run_date=date.today(),
+            total_symbols=0,
+            successful_models=0,
+            opportunities_found=0,
+            execution_time_seconds=0,
+            status="running",
+            created_at=datetime.now()
+        )
+        db.add(screener_run)
+        db.commit()
+        db.refresh(screener_run)
+        return screener_run
+
+    def persist_results(self, screener_run_id: int, total_symbols: int, successful_models: int,
+                        opportunities: List[Dict[str, Any]]):
+        """
+        Enregistrer les résultats et finaliser le run en une seule transaction (en mode démonstration,
+        seul le run est enregistré : les prédictions simulées ne correspondent à aucun modèle)
+        """
+        with get_db_session() as db:
+            if self.mode != "demo":
+                db.add_all([
+                    ScreenerResult(
+                        screener_run_id=screener_run_id,
+                        symbol=opportunity["symbol"],
+                        model_id=opportunity["model_id"],
+                        prediction=float(opportunity["prediction"]),
+                        confidence=float(opportunity["confidence"]),
+                        rank=opportunity["rank"]
+                    )
+                    for opportunity in opportunities
+                ])
+
+            screener_run = db.query(ScreenerRun).filter(ScreenerRun.id == screener_run_id).first()
+            if screener_run:
+                screener_run.total_symbols = total_symbols
+                screener_run.successful_models = successful_models
+                screener_run.opportunities_found = len(opportunities)
+                screener_run.status = "completed"
+                screener_run.execution_time_seconds = self.get_execution_time()
+            db.commit()
+
+    def schedule_shap_precompute(self, screener_run_id: int):
+        """Lancer en arrière-plan le calcul des explications SHAP des meilleures opportunités"""
+        if settings.shap_precompute_top_k <= 0 or self.mode == "pooled":
+            # Les explications SHAP portent sur les modèles par symbole (features normalisées)
+            return
+        try:
+            from app.tasks.shap_tasks import precompute_shap_explanations
+            precompute_shap_explanations.delay(screener_run_id, settings.shap_precompute_top_k)
+        except Exception as e:
+            # Les explications seront calculées à la demande par la page d'analyse
+            logger.warning(f"⚠️ [SHAP] Précalcul non planifié pour le run {screener_run_id}: {str(e)}")
+
+    def mark_run_failed(self, screener_run_id: int, error_message: str):
+        """Marquer le run en échec"""
+        try:
+            with get_db_session() as db:
+                screener_run = db.query(ScreenerRun).filter(ScreenerRun.id == screener_run_id).first()
+                if screener_run:
+                    screener_run.status = "failed"
+                    screener_run.error_message = error_message
+                    db.commit()
+        except Exception as db_e:
+            logger.error(f"Erreur lors de la mise à jour du statut d'échec: {db_e}")
+
+    def build_results(self, opportunities: List[Dict[str, Any]], request: ScreenerRequest) -> List[Dict[str, Any]]:
+        """Construire la liste de résultats renvoyée au client"""
+        company_names = {}
+        if opportunities:
+            with get_db_session() as db:
+                company_names = dict(db.query(SymbolMetadata.symbol, SymbolMetadata.company_name).filter(
+                    SymbolMetadata.symbol.in_([o["symbol"] for o in opportunities])
+                ).all())
+
+        return [
+            {
+                "symbol": opportunity["symbol"],
+                "company_name": company_names.get(opportunity["symbol"], f"{opportunity['symbol']} Corp"),
+                "prediction": float(opportunity["prediction"]),
+                "confidence": float(opportunity["confidence"]),
+                "model_id": opportunity["model_id"],
+                "model_name": opportunity["model_name"],
+                "target_return": float(request.target_return_percentage),
+                "time_horizon": request.time_horizon_days,
+                "rank": opportunity["rank"]
+            }
+            for opportunity in opportunities
+        ]
+
+    # === Orchestration ===
+
+    def run(self, request: ScreenerRequest, user_id: str = "screener_user") -> Dict[str, Any]:
+        """Exécuter toutes les étapes du pipeline"""
+        screener_run_id = None
+
+        try:
+            self.report_progress("Démarrage du screener...", 0, "initialization")
+
+            with get_db_session() as db:
+                screener_run_id = self.create_screener_run(db, user_id).id
+
+            self.report_progress("Récupération des symboles...", 5, "fetching_symbols",
+                                 screener_run_id=screener_run_id)
+
+            if self.mode == "demo":
+                with get_db_session() as db:
+                    symbols = self.get_active_symbols(db, self.max_symbols)
+                successful_models = len(symbols)
+                predictions = self.simulate_predictions(symbols, request)
+            else:
+                with get_db_session() as db:
+                    symbols = self.get_active_symbols(db, self.max_symbols)
+                    eligible_symbols = self.filter_symbols_with_features(db, symbols)
+
+                self.report_progress(f"Entraînement des modèles ML (0/{len(eligible_symbols)})...", 10,
+                                     "training_models", screener_run_id=screener_run_id,
+                                     total_symbols=len(symbols), trained_models=0)
+
+                successful_models = self.train_models(eligible_symbols, request, user_id, screener_run_id)
+                logger.info(f"🎯 {successful_models}/{len(symbols)} modèles ML disponibles")
+
+                self.report_progress("Calcul des prédictions ML...", 50, "making_predictions",
+                                     screener_run_id=screener_run_id, total_symbols=len(symbols),
+                                     successful_models=successful_models)
+
+                predictions = self.predict_batch(eligible_symbols, request, screener_run_id)
+
+            opportunities = self.rank_opportunities(predictions)
+
+            self.persist_results(screener_run_id, len(symbols), successful_models, opportunities)
+            if opportunities and self.mode != "demo":
+                self.schedule_shap_precompute(screener_run_id)
+
+            logger.info(f"🎉 Screener terminé: {len(opportunities)} opportunités trouvées sur {len(symbols)} symboles")
+
+            return {
+                "screener_run_id": screener_run_id,
+                "total_symbols": len(symbols),
+                "successful_models": successful_models,
+                "total_opportunities_found": len(opportunities),
+                "execution_time_seconds": self.get_execution_time(),
+                "status": "completed",
+                "mode": self.mode,
+                "results": self.build_results(opportunities, request)
+            }
+
+        except Exception as e:
+            error_message = str(e)
+            logger.error(f"❌ Erreur générale dans le screener: {error_message}")
+
+            if screener_run_id:
+                self.mark_run_failed(screener_run_id, error_message)
+
+            return {
+                "status": "failed",
+                "error": error_message,
+                "screener_run_id": screener_run_id
+            }
@@ -12,6 +12,7 @@ from ..models.database import (
 )
 from ..models.schemas import ScreenerRequest, ScreenerResponse
 from .ml_service import MLService
+from .prediction_sink import PredictionSink
 
 
 class ScreenerService:
@@ -156,56 +157,63 @@ class ScreenerService:
         
         return target_param
 
-    async def run_predictions_for_all_models(self, model_results: Dict[str, Any], config: ScreenerConfig) -> List[Dict[str, Any]]:
-        """Exécute les prédictions pour tous les modèles entraînés"""
+    async def run_predictions_for_all_models(self, model_results: Dict[str, Any], config: ScreenerConfig,
+                                             screener_run_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Exécute les prédictions pour tous les modèles entraînés (rattachées à l'exécution screener_run_id)"""
         today = date.today()
         opportunities = []
         
         print(f"🔮 Début des prédictions pour {len(model_results)} modèles...")
         
-        for symbol, model_info in model_results.items():
-            try:
-                model_id = model_info["model_id"]
-                print(f"🔍 Prédiction pour {symbol} (Modèle ID: {model_id})")
+        # Prédictions écrites par lots plutôt qu'un commit par modèle
+        sink = PredictionSink(screener_run_id=screener_run_id)
+        try:
+            for symbol, model_info in model_results.items():
+                try:
+                    model_id = model_info["model_id"]
+                    print(f"🔍 Prédiction pour {symbol} (Modèle ID: {model_id})")
                 
-                # Faire la prédiction
-                prediction_result = self.ml_service.predict(
-                    symbol=symbol,
-                    model_id=model_id,
-                    date=today,
-                    db=self.db
-                )
+                    # Faire la prédiction
+                    prediction_result = self.ml_service.predict(
+                        symbol=symbol,
+                        model_id=model_id,
+                        date=today,
+                        db=self.db,
+                        sink=sink
+                    )
                 
-                if prediction_result and "prediction" in prediction_result:
-                    prediction_value = float(prediction_result["prediction"])
-                    confidence = float(prediction_result["confidence"])
+                    if prediction_result and "prediction" in prediction_result:
+                        prediction_value = float(prediction_result["prediction"])
+                        confidence = float(prediction_result["confidence"])
                     
-                    # Vérifier si c'est une opportunité (prediction = 1 et confiance >= seuil)
-                    if prediction_value >= 0.5 and confidence >= float(config.confidence_threshold):
-                        # Récupérer les métadonnées du symbole
-                        symbol_metadata = self.db.query(SymbolMetadata).filter(
-                            SymbolMetadata.symbol == symbol
-                        ).first()
+                        # Vérifier si c'est une opportunité (prediction = 1 et confiance >= seuil)
+                        if prediction_value >= 0.5 and confidence >= float(config.confidence_threshold):
+                            # Récupérer les métadonnées du symbole
+                            symbol_metadata = self.db.query(SymbolMetadata).filter(
+                                SymbolMetadata.symbol == symbol
+                            ).first()
                         
-                        opportunity = {
-                            "symbol": symbol,
-                            "company_name": symbol_metadata.company_name if symbol_metadata else symbol,
-                            "prediction": prediction_value,
-                            "confidence": confidence,
-                            "model_id": model_id,
-                            "model_name": model_info["model_name"],
-                            "target_return": float(config.target_return_percentage),
-                            "time_horizon": config.time_horizon_days
-                        }
+                            opportunity = {
+                                "symbol": symbol,
+                                "company_name": symbol_metadata.company_name if symbol_metadata else symbol,
+                                "prediction": prediction_value,
+                                "confidence": confidence,
+                                "model_id": model_id,
+                                "model_name": model_info["model_name"],
+                                "target_return": float(config.target_return_percentage),
+                                "time_horizon": config.time_horizon_days
+                            }
                         
-                        opportunities.append(opportunity)
-                        print(f"🎯 {symbol}: Opportunité trouvée! Confiance: {confidence:.1%}")
-                    else:
-                        print(f"⏭️ {symbol}: Pas d'opportunité (Confiance: {confidence:.1%}, Prédiction: {prediction_value})")
+                            opportunities.append(opportunity)
+                            print(f"🎯 {symbol}: Opportunité trouvée! Confiance: {confidence:.1%}")
+                        else:
+                            print(f"⏭️ {symbol}: Pas d'opportunité (Confiance: {confidence:.1%}, Prédiction: {prediction_value})")
                         
-            except Exception as e:
-                print(f"❌ {symbol}: Erreur lors de la prédiction - {str(e)}")
-                continue
+                except Exception as e:
+                    print(f"❌ {symbol}: Erreur lors de la prédiction - {str(e)}")
+                    continue
+        finally:
+            sink.flush()
         
         # Trier par confiance décroissante
         opportunities.sort(key=lambda x: x["confidence"], reverse=True)
@@ -270,7 +278,8 @@ class ScreenerService:
             # 4. Exécuter les prédictions
             opportunities = await self.run_predictions_for_all_models(
                 training_results["model_results"], 
-                config
+                config,
+                screener_run_id=screener_run.id
             )
             
             # 5. Sauvegarder les résultats
@@ -0,0 +1,265 @@
+"""
+Service d'explications SHAP pour les modèles à base d'arbres
+
+- un explainer TreeExplainer par modèle, gardé en cache (LRU) avec le modèle et le scaler ;
+- calcul vectorisé : un seul appel shap_values pour toutes les lignes d'un même modèle ;
+- stockage des explications (table shap_explanations), précalculées en arrière-plan pour les
+  meilleures opportunités de chaque run du screener et servies directement par la page d'analyse.
+"""
+import os
+import logging
+import threading
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Any, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.database import MLModels, ScreenerResult, ShapExplanations
+from app.services.ml_service import MLService
+from app.services.pooled_model import POOLED_MODEL_TYPE
+
+logger = logging.getLogger(__name__)
+
+# Cache LRU (model_id, chemin, mtime) -> (modèle, scaler, explainer), partagé par le processus
+_explainer_cache: "OrderedDict[Tuple[int, str, float], Tuple[Any, Any, Any]]" = OrderedDict()
+_explainer_cache_lock = threading.Lock()
+
+
+def get_model_explainer(ml_model: MLModels) -> Tuple[Any, Any, Any]:
+    """Retourner (modèle, scaler, explainer) pour un modèle, en les chargeant une seule fois"""
+    import joblib
+    import shap
+
+    key = (ml_model.id, ml_model.model_path, os.path.getmtime(ml_model.model_path))
+
+    with _explainer_cache_lock:
+        if key in _explainer_cache:
+            _explainer_cache.move_to_end(key)
+            return _explainer_cache[key]
+
+    model = joblib.load(ml_model.model_path)
+    scaler = joblib.load(ml_model.model_path.replace('.joblib', '_scaler.joblib'))
+    explainer = shap.TreeExplainer(model)
+
+    with _explainer_cache_lock:
+        _explainer_cache[key] = (model, scaler, explainer)
+        _explainer_cache.move_to_end(key)
+        while len(_explainer_cache) > max(1, settings.shap_explainer_cache_size):
+            _explainer_cache.popitem(last=False)
+
+    return model, scaler, explainer
+
+
+def clear_explainer_cache():
+    """Vider le cache des explainers (après réentraînement ou suppression de modèles)"""
+    with _explainer_cache_lock:
+        _explainer_cache.clear()
+
+
+def _select_output(values: Any, predictions: np.ndarray, model_type: str) -> np.ndarray:
+    """Ramener les valeurs SHAP à une matrice (lignes, features) pour la sortie expliquée"""
+    if isinstance(values, list):
+        if model_type != "classification":
+            return np.asarray(values[0])
+        if len(values) == 2:
+            return np.asarray(values[1])  # Classe positive
+        return np.stack([values[int(p)][i] for i, p in enumerate(predictions)])
+
+    values = np.asarray(values)
+    if values.ndim == 3:
+        # Format (lignes, features, classes) des versions récentes de shap
+        if values.shape[2] == 2:
+            return values[:, :, 1]
+        return np.stack([values[i, :, int(p)] for i, p in enumerate(predictions)])
+    return values.reshape(len(predictions), -1)
+
+
+def _base_value(explainer: Any, model_type: str) -> float:
+    """Valeur de base de l'explainer (classe positive pour la classification)"""
+    expected = explainer.expected_value
+    if model_type == "classification" and isinstance(expected, (list, np.ndarray)) and len(expected) > 1:
+        expected = expected[1]
+    try:
+        return float(np.ravel(expected)[0])
+    except (TypeError, ValueError, IndexError):
+        return 0.0
+
+
+def _format_explanations(shap_row: np.ndarray, feature_names: List[str], feature_row: np.ndarray) -> List[Dict[str, Any]]:
+    """Explications triées par importance (|SHAP|) puis par sens (positif d'abord)"""
+    explanations = [
+        {
+            "feature": feature,
+            "shap_value": float(shap_row[i]),
+            "feature_value": float(feature_row[i]),
+            "impact": "positive" if shap_row[i] > 0 else "negative"
+        }
+        for i, feature in enumerate(feature_names)
+    ]
+    explanations.sort(key=lambda x: (-abs(x["shap_value"]), x["shap_value"] < 0))
+    return explanations
+
+
+class ShapService:
+    """Calcul, stockage et lecture des explications SHAP"""
+
+    def __init__(self, db: Session):
+        self.db = db
+        self.ml_service = MLService(db=db)
+
+    def explain_symbols(self, model_id: int, symbols: List[str], as_of_date: Optional[date] = None) -> Dict[str, Dict]:
+        """Expliquer un modèle pour plusieurs symboles avec un seul appel shap_values"""
+        ml_model = self.db.query(MLModels).filter(MLModels.id == model_id).first()
+        if not ml_model:
+            return {symbol: {"error": "Modèle non trouvé"} for symbol in symbols}
+        if ml_model.model_type == POOLED_MODEL_TYPE:
+            return {symbol: {"error": "Explications SHAP non disponibles pour le modèle poolé"} for symbol in symbols}
+
+        feature_names = (ml_model.model_parameters or {}).get('feature_names', [])
+        if not feature_names:
+            return {symbol: {"error": "Noms des features non trouvés dans le modèle"} for symbol in symbols}
+
+        # Mêmes features que l'entraînement (magasin de features ou registre), une ligne par symbole
+        X, data_dates = self.ml_service.load_latest_features(symbols, as_of_date, feature_names, self.db)
+        results = {
+            symbol: {"error": "Aucune donnée historique trouvée pour ce symbole"}
+            for symbol in symbols if symbol not in X.index
+        }
+        if X.empty:
+            return results
+
+        try:
+            model, scaler, explainer = get_model_explainer(ml_model)
+
+            # Lignes expliquées en bloc
+            X_scaled = scaler.transform(X)
+
+            predictions = model.predict(X_scaled)
+            shap_matrix = _select_output(explainer.shap_values(X_scaled), predictions, ml_model.model_type)
+            base_value = _base_value(explainer, ml_model.model_type)
+        except Exception as e:
+            results.update({symbol: {"error": f"Erreur lors du calcul SHAP: {str(e)}"} for symbol in X.index})
+            return results
+
+        X_values = X.to_numpy(dtype=float)
+        for i, symbol in enumerate(X.index):
+            results[symbol] = {
+                "model_id": model_id,
+                "model_name": ml_model.model_name,
+                "model_type": ml_model.model_type,
+                "symbol": symbol,
+                "prediction_date": data_dates[symbol],
+                "prediction": float(predictions[i]),
+                "shap_explanations": _format_explanations(shap_matrix[i], list(X.columns), X_values[i]),
+                "base_value": base_value
+            }
+
+        return results
+
+    def explain(self, model_id: int, symbol: str, prediction_date: Optional[date] = None) -> Dict:
+        """Expliquer une prédiction (un symbole)"""
+        return self.explain_symbols(model_id, [symbol], prediction_date)[symbol]
+
+    def store_explanations(self, explanations: List[Dict], screener_run_id: Optional[int] = None) -> int:
+        """Enregistrer (ou remplacer) des explications calculées, en une seule requête"""
+        rows = [
+            {
+                "model_id": e["model_id"],
+                "symbol": e["symbol"],
+                "prediction_date": e["prediction_date"],
+                "prediction": e["prediction"],
+                "base_value": e["base_value"],
+                "explanations": e["shap_explanations"],
+                "screener_run_id": screener_run_id,
+            }
+            for e in explanations if "error" not in e
+        ]
+        if not rows:
+            return 0
+
+        statement = insert(ShapExplanations).values(rows)
+        statement = statement.on_conflict_do_update(
+            index_elements=["model_id", "symbol", "prediction_date"],
+            set_={
+                "prediction": statement.excluded.prediction,
+                "base_value": statement.excluded.base_value,
+                "explanations": statement.excluded.explanations,
+                "screener_run_id": statement.excluded.screener_run_id,
+            }
+        )
+        self.db.execute(statement)
+        self.db.commit()
+        return len(rows)
+
+    def get_stored_explanation(self, model_id: int, symbol: str,
+                               prediction_date: Optional[date] = None) -> Optional[Dict]:
+        """Lire une explication stockée (la plus récente si aucune date n'est donnée)"""
+        query = self.db.query(ShapExplanations, MLModels).join(
+            MLModels, MLModels.id == ShapExplanations.model_id
+        ).filter(
+            ShapExplanations.model_id == model_id,
+            ShapExplanations.symbol == symbol
+        )
+        if prediction_date:
+            query = query.filter(ShapExplanations.prediction_date == prediction_date)
+
+        record = query.order_by(ShapExplanations.prediction_date.desc()).first()
+        if not record:
+            return None
+
+        stored, ml_model = record
+        return {
+            "model_id": model_id,
+            "model_name": ml_model.model_name,
+            "model_type": ml_model.model_type,
+            "symbol": symbol,
+            "prediction_date": stored.prediction_date,
+            "prediction": float(stored.prediction) if stored.prediction is not None else None,
+            "shap_explanations": stored.explanations,
+            "base_value": float(stored.base_value) if stored.base_value is not None else 0.0
+        }
+
+    def get_or_compute(self, model_id: int, symbol: str, prediction_date: Optional[date] = None) -> Dict:
+        """Servir l'explication stockée, ou la calculer et la stocker pour les appels suivants"""
+        stored = self.get_stored_explanation(model_id, symbol, prediction_date)
+        if stored:
+            return stored
+
+        result = self.explain(model_id, symbol, prediction_date)
+        if "error" not in result:
+            try:
+                self.store_explanations([result])
+            except Exception as e:
+                self.db.rollback()
+                logger.warning(f"⚠️ [SHAP] Explication de {symbol} non stockée: {str(e)}")
+        return result
+
+    def precompute_for_run(self, screener_run_id: int, top_k: Optional[int] = None) -> Dict[str, Any]:
+        """Calculer et stocker les explications des top-K opportunités d'un run du screener"""
+        top_k = top_k or settings.shap_precompute_top_k
+        results = self.db.query(ScreenerResult).filter(
+            ScreenerResult.screener_run_id == screener_run_id
+        ).order_by(ScreenerResult.rank).limit(top_k).all()
+
+        # Regrouper par modèle : un seul appel shap_values par modèle
+        symbols_by_model: Dict[int, List[str]] = {}
+        for result in results:
+            symbols_by_model.setdefault(result.model_id, []).append(result.symbol)
+
+        explanations = []
+        for model_id, symbols in symbols_by_model.items():
+            explanations.extend(self.explain_symbols(model_id, symbols).values())
+
+        stored = self.store_explanations(explanations, screener_run_id)
+        failed = len(explanations) - stored
+        logger.info(f"🧠 [SHAP] Run {screener_run_id}: {stored} explications stockées, {failed} échecs")
+
+        return {
+            "screener_run_id": screener_run_id,
+            "explained": stored,
+            "failed": failed
+        }
@@ -0,0 +1,191 @@
+"""
+Index de recherche des symboles en mémoire (typeahead)
+
+L'index est construit à partir de symbol_metadata et gardé par processus :
+- listes triées des symboles, des noms d'entreprise et des fins de nom à partir de chaque mot,
+  pour les recherches par préfixe (bisect, O(log n)) : une requête de plusieurs mots est cherchée
+  en entier, les candidats examinés correspondent tous à la requête ;
+- index de trigrammes des noms, pour les recherches par sous-chaîne ou approximatives.
+
+Il est reconstruit après une modification faite par l'API (invalidate_symbol_index) et, pour les
+modifications faites ailleurs, lorsque la version de la table (nombre de lignes, max(updated_at))
+change ; cette version est relue au plus toutes les symbol_search_refresh_seconds secondes.
+"""
+import re
+import time
+import logging
+import threading
+from bisect import bisect_left
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.models.database import SymbolMetadata
+
+logger = logging.getLogger(__name__)
+
+# Rang des correspondances, de la plus pertinente à la moins pertinente
+MATCH_RANKS = {
+    "symbol_exact": 0,
+    "symbol_prefix": 1,
+    "company_prefix": 2,
+    "word_prefix": 3,
+    "substring": 4,
+    "fuzzy": 5,
+}
+
+# Candidats examinés par recherche de préfixe, en multiple de la limite (requêtes très courtes)
+PREFIX_SCAN_FACTOR = 20
+
+# Part minimale des trigrammes de la requête présents dans le nom (correspondance approximative)
+FUZZY_MIN_SHARED = 0.5
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def _normalize(value: str) -> str:
+    return " ".join(_WORD_RE.findall(value.lower()))
+
+
+def _trigrams(value: str) -> Set[str]:
+    padded = f"  {value} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _prefix_range(keys: List[str], prefix: str) -> Tuple[int, int]:
+    """Bornes [début, fin) des clés triées commençant par prefix"""
+    return bisect_left(keys, prefix), bisect_left(keys, prefix + "\uffff")
+
+
+class SymbolSearchIndex:
+    """Index en mémoire des symboles et des noms d'entreprise"""
+
+    def __init__(self, entries: List[Dict]):
+        self.entries = entries
+        self.names = [_normalize(entry["company_name"] or "") for entry in entries]
+
+        symbols = sorted((entry["symbol"].lower(), i) for i, entry in enumerate(entries))
+        self.symbol_keys = [symbol for symbol, _ in symbols]
+        self.symbol_ids = [i for _, i in symbols]
+
+        names = sorted((name, i) for i, name in enumerate(self.names) if name)
+        self.name_keys = [name for name, _ in names]
+        self.name_ids = [i for _, i in names]
+
+        # Fin du nom à partir de chaque mot sauf le premier ("airlines group" pour "american airlines group")
+        suffixes = sorted({
+            (" ".join(words[k:]), i)
+            for i, words in enumerate(name.split() for name in self.names)
+            for k in range(1, len(words))
+        })
+        self.suffix_keys = [suffix for suffix, _ in suffixes]
+        self.suffix_ids = [i for _, i in suffixes]
+
+        self.trigrams: Dict[str, List[int]] = {}
+        for i, name in enumerate(self.names):
+            for trigram in _trigrams(name):
+                self.trigrams.setdefault(trigram, []).append(i)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def search(self, query: str, limit: int = 10, active_only: bool = True) -> List[Dict]:
+        """Symboles correspondant à la requête, classés par pertinence"""
+        normalized = _normalize(query)
+        if not normalized:
+            return []
+
+        best: Dict[int, str] = {}
+        max_scan = max(limit, 1) * PREFIX_SCAN_FACTOR
+
+        def consider(i: int, match: str):
+            if active_only and not self.entries[i]["is_active"]:
+                return
+            if i not in best or MATCH_RANKS[match] < MATCH_RANKS[best[i]]:
+                best[i] = match
+
+        # Symbole (exact puis préfixe)
+        compact = normalized.replace(" ", "")
+        start, end = _prefix_range(self.symbol_keys, compact)
+        for position in range(start, min(end, start + max_scan)):
+            i = self.symbol_ids[position]
+            consider(i, "symbol_exact" if self.symbol_keys[position] == compact else "symbol_prefix")
+
+        # Nom d'entreprise : préfixe du nom, puis requête entière au début d'un mot du nom
+        for keys, ids, match in ((self.name_keys, self.name_ids, "company_prefix"),
+                                 (self.suffix_keys, self.suffix_ids, "word_prefix")):
+            start, end = _prefix_range(keys, normalized)
+            for position in range(start, min(end, start + max_scan)):
+                consider(ids[position], match)
+
+        # Trigrammes : sous-chaîne ou nom approchant, seulement s'il manque des résultats
+        if len(best) < limit and len(normalized) >= 3:
+            query_trigrams = _trigrams(normalized)
+            shared: Dict[int, int] = {}
+            for trigram in query_trigrams:
+                for i in self.trigrams.get(trigram, ()):
+                    shared[i] = shared.get(i, 0) + 1
+            for i, count in shared.items():
+                if i in best:
+                    continue
+                if normalized in self.names[i]:
+                    consider(i, "substring")
+                elif count / len(query_trigrams) >= FUZZY_MIN_SHARED:
+                    consider(i, "fuzzy")
+
+        ranked = sorted(
+            best.items(),
+            key=lambda item: (MATCH_RANKS[item[1]], len(self.entries[item[0]]["symbol"]), self.entries[item[0]]["symbol"])
+        )
+        return [{**self.entries[i], "match": match} for i, match in ranked[:limit]]
+
+
+_index: Optional[SymbolSearchIndex] = None
+_index_version: Optional[Tuple] = None
+_index_checked_at = 0.0
+_index_lock = threading.Lock()
+
+
+def _table_version(db: Session) -> Tuple:
+    count, updated_at = db.query(func.count(SymbolMetadata.id), func.max(SymbolMetadata.updated_at)).one()
+    return count, updated_at
+
+
+def _build_index(db: Session) -> SymbolSearchIndex:
+    rows = db.query(
+        SymbolMetadata.symbol, SymbolMetadata.company_name, SymbolMetadata.sector, SymbolMetadata.is_active
+    ).all()
+    entries = [
+        {"symbol": symbol, "company_name": company_name, "sector": sector, "is_active": bool(is_active)}
+        for symbol, company_name, sector, is_active in rows
+    ]
+    return SymbolSearchIndex(entries)
+
+
+def get_symbol_index(db: Session) -> SymbolSearchIndex:
+    """Index courant, reconstruit si symbol_metadata a changé"""
+    global _index, _index_version, _index_checked_at
+
+    with _index_lock:
+        now = time.monotonic()
+        if _index is not None and now - _index_checked_at < settings.symbol_search_refresh_seconds:
+            return _index
+
+        version = _table_version(db)
+        if _index is None or version != _index_version:
+            start = time.perf_counter()
+            _index = _build_index(db)
+            _index_version = version
+            logger.info(f"🔎 [SEARCH] Index des symboles reconstruit: {len(_index)} symboles "
+                        f"en {(time.perf_counter() - start) * 1000:.0f} ms")
+        _index_checked_at = now
+        return _index
+
+
+def invalidate_symbol_index():
+    """Forcer la relecture de la version de la table à la prochaine recherche"""
+    global _index_checked_at
+    with _index_lock:
+        _index_checked_at = 0.0
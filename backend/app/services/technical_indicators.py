@@ -79,7 +79,7 @@ class TechnicalIndicatorsCalculator:
                 'low': float(row.low),
                 'close': float(row.close),
                 'volume': int(row.volume),
-                'vwap': float(row.vwap) if row.vwap else None
+                'vwap': float(row.vwap) if row.vwap is not None else None
             })
         
         return pd.DataFrame(data)
@@ -0,0 +1,475 @@
+"""
+Inférence des ensembles d'arbres sur des tableaux de nœuds aplatis
+
+Un RandomForest scikit-learn ou un Booster LightGBM est converti en tableaux NumPy (feature,
+seuil, fils gauche, fils droit, valeur des feuilles...), une ligne par nœud, tous arbres confondus.
+La prédiction parcourt en même temps tous les couples (ligne, arbre) : à chaque niveau, un seul
+calcul vectorisé fait descendre tous les parcours encore actifs. Plusieurs modèles sont évalués
+ensemble en concaténant leurs nœuds (predict_many), ce qui remplace des centaines d'appels
+predict_proba d'une ligne par un seul parcours.
+
+Les résultats reproduisent ceux des modèles d'origine : comparaisons en float32 pour
+scikit-learn (comme l'implémentation Cython), en float64 pour LightGBM, avec la même gestion des
+valeurs manquantes et des variables catégorielles.
+
+Les forêts aplaties sont enregistrées sans compression à côté des modèles (<modèle>_flat.joblib)
+et relues avec joblib.load(mmap_mode='r') : les tableaux de nœuds restent dans le cache de pages,
+partagés par tous les workers Celery et uvicorn de la machine, au lieu d'une copie désérialisée
+par processus (les arbres scikit-learn recopient leurs nœuds au chargement, même en mmap).
+"""
+import logging
+from collections import OrderedDict
+import os
+import threading
+from typing import Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Gestion des valeurs manquantes d'un nœud
+MISSING_NONE = 0  # LightGBM "None" : NaN traité comme 0
+MISSING_ZERO = 1  # LightGBM "Zero" : 0 et NaN suivent la branche par défaut
+MISSING_NAN = 2   # NaN suit la branche par défaut (LightGBM "NaN", scikit-learn)
+
+# Valeurs considérées comme nulles par LightGBM (kZeroThreshold)
+ZERO_THRESHOLD = 1e-35
+
+# Agrégation des sorties des arbres et fonction de lien
+AGGREGATIONS = ("mean", "sum")
+LINKS = ("identity", "sigmoid", "softmax")
+
+
+class FlatForest:
+    """Ensemble d'arbres aplati : un tableau par attribut de nœud, racines des arbres"""
+
+    def __init__(self, feature: np.ndarray, threshold: np.ndarray, left: np.ndarray, right: np.ndarray,
+                 value: np.ndarray, roots: np.ndarray, is_leaf: np.ndarray, default_left: np.ndarray,
+                 missing_type: np.ndarray, float32_inputs: np.ndarray, n_features: int,
+                 aggregation: str = "mean", link: str = "identity", classes: Optional[np.ndarray] = None,
+                 cat_index: Optional[np.ndarray] = None, cat_table: Optional[np.ndarray] = None,
+                 output_scale: float = 1.0):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value  # (nœuds, sorties) : contribution d'une feuille à chaque sortie
+        self.roots = roots
+        self.is_leaf = is_leaf
+        self.default_left = default_left
+        self.missing_type = missing_type
+        self.float32_inputs = float32_inputs
+        self.n_features = n_features
+        self.aggregation = aggregation
+        self.link = link
+        self.classes = classes
+        # Variables catégorielles : indice de la liste de catégories du nœud (-1 : seuil numérique)
+        # et table (liste, catégorie) -> branche gauche
+        self.cat_index = cat_index if cat_index is not None else np.full(len(feature), -1, dtype=np.int32)
+        self.cat_table = cat_table if cat_table is not None else np.zeros((0, 0), dtype=bool)
+        self.output_scale = output_scale
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.feature)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.roots)
+
+    @property
+    def n_outputs(self) -> int:
+        return self.value.shape[1]
+
+    # Construction
+
+    @classmethod
+    def from_sklearn(cls, model) -> "FlatForest":
+        """RandomForest (ou ExtraTrees) scikit-learn, classification ou régression"""
+        estimators = getattr(model, "estimators_", None)
+        if not estimators:
+            raise ValueError(f"Modèle non supporté: {type(model).__name__}")
+        classes = getattr(model, "classes_", None)
+        if classes is not None and np.ndim(classes) != 1:
+            raise ValueError("Classification multi-sorties non supportée")
+
+        parts, roots, offset = [], [], 0
+        for estimator in estimators:
+            tree = estimator.tree_
+            leaf = tree.children_left == -1
+            value = tree.value[:, 0, :].astype(np.float64)
+            if classes is not None:
+                # Fréquences des classes par nœud (predict_proba d'un arbre)
+                totals = value.sum(axis=1, keepdims=True)
+                value = np.divide(value, totals, out=np.zeros_like(value), where=totals > 0)
+            missing_left = getattr(tree, "missing_go_to_left", None)
+            parts.append((
+                np.where(leaf, 0, tree.feature).astype(np.int32),
+                tree.threshold.astype(np.float64),
+                np.where(leaf, 0, tree.children_left + offset).astype(np.int32),
+                np.where(leaf, 0, tree.children_right + offset).astype(np.int32),
+                value,
+                leaf,
+                np.zeros(tree.node_count, dtype=bool) if missing_left is None else missing_left.astype(bool),
+            ))
+            roots.append(offset)
+            offset += tree.node_count
+
+        n_nodes = offset
+        return cls(
+            feature=np.concatenate([p[0] for p in parts]),
+            threshold=np.concatenate([p[1] for p in parts]),
+            left=np.concatenate([p[2] for p in parts]),
+            right=np.concatenate([p[3] for p in parts]),
+            value=np.concatenate([p[4] for p in parts]),
+            roots=np.array(roots, dtype=np.int32),
+            is_leaf=np.concatenate([p[5] for p in parts]),
+            default_left=np.concatenate([p[6] for p in parts]),
+            missing_type=np.full(n_nodes, MISSING_NAN, dtype=np.int8),
+            float32_inputs=np.ones(n_nodes, dtype=bool),
+            n_features=int(model.n_features_in_),
+            aggregation="mean",
+            link="identity",
+            classes=classes,
+        )
+
+    @classmethod
+    def from_lightgbm(cls, model) -> "FlatForest":
+        """Booster LightGBM (ou modèle scikit-learn LGBM*) : arbres jusqu'à la meilleure itération"""
+        booster = getattr(model, "booster_", model)
+        classes = getattr(model, "classes_", None)
+        dump = booster.dump_model()
+        objective = dump.get("objective", "regression").split()
+        num_class = int(dump.get("num_class", 1))
+        trees_per_iteration = int(dump.get("num_tree_per_iteration", 1))
+
+        if objective[0] == "binary":
+            link = "sigmoid"
+            sigmoid = float(next((o.split(":")[1] for o in objective[1:] if o.startswith("sigmoid:")), 1.0))
+        elif objective[0] in ("multiclass", "softmax"):
+            link, sigmoid = "softmax", 1.0
+        elif objective[0] in ("regression", "regression_l1", "huber", "fair", "quantile", "mape"):
+            link, sigmoid = "identity", 1.0
+        else:
+            raise ValueError(f"Objectif LightGBM non supporté: {objective[0]}")
+
+        nodes = {key: [] for key in ("feature", "threshold", "left", "right", "leaf_value", "output",
+                                     "is_leaf", "default_left", "missing_type", "cat_index")}
+        categories: List[List[int]] = []
+        roots = []
+
+        def add_node(node: dict, output: int) -> int:
+            index = len(nodes["feature"])
+            for key in nodes:
+                nodes[key].append(0)
+            nodes["output"][index] = output
+            nodes["cat_index"][index] = -1
+            if "leaf_value" in node or "split_feature" not in node:
+                nodes["is_leaf"][index] = True
+                nodes["leaf_value"][index] = float(node.get("leaf_value", 0.0))
+                return index
+
+            nodes["is_leaf"][index] = False
+            nodes["feature"][index] = int(node["split_feature"])
+            nodes["default_left"][index] = bool(node.get("default_left", False))
+            nodes["missing_type"][index] = {"None": MISSING_NONE, "Zero": MISSING_ZERO,
+                                            "NaN": MISSING_NAN}[node.get("missing_type", "None")]
+            if node.get("decision_type", "<=") == "==":
+                categories.append([int(c) for c in str(node["threshold"]).split("||")])
+                nodes["cat_index"][index] = len(categories) - 1
+                nodes["threshold"][index] = 0.0
+            else:
+                nodes["threshold"][index] = float(node["threshold"])
+            nodes["left"][index] = add_node(node["left_child"], output)
+            nodes["right"][index] = add_node(node["right_child"], output)
+            return index
+
+        for tree in dump["tree_info"]:
+            if tree.get("is_linear"):
+                raise ValueError("Arbres linéaires LightGBM non supportés")
+            output = tree["tree_index"] % trees_per_iteration if num_class > 1 else 0
+            roots.append(add_node(tree["tree_structure"], output))
+
+        n_nodes = len(nodes["feature"])
+        n_outputs = num_class if num_class > 1 else 1
+        value = np.zeros((n_nodes, n_outputs))
+        value[np.arange(n_nodes), np.array(nodes["output"], dtype=np.int64)] = nodes["leaf_value"]
+
+        cat_table = np.zeros((len(categories), max([max(c) for c in categories if c] + [0]) + 1), dtype=bool)
+        for i, cats in enumerate(categories):
+            cat_table[i, [c for c in cats if c >= 0]] = True
+
+        n_iterations = max(1, len(roots) // max(1, trees_per_iteration))
+        return cls(
+            feature=np.array(nodes["feature"], dtype=np.int32),
+            threshold=np.array(nodes["threshold"], dtype=np.float64),
+            left=np.array(nodes["left"], dtype=np.int32),
+            right=np.array(nodes["right"], dtype=np.int32),
+            value=value,
+            roots=np.array(roots, dtype=np.int32),
+            is_leaf=np.array(nodes["is_leaf"], dtype=bool),
+            default_left=np.array(nodes["default_left"], dtype=bool),
+            missing_type=np.array(nodes["missing_type"], dtype=np.int8),
+            float32_inputs=np.zeros(n_nodes, dtype=bool),
+            n_features=int(dump.get("max_feature_idx", 0)) + 1,
+            aggregation="sum",
+            link=link,
+            classes=classes,
+            cat_index=np.array(nodes["cat_index"], dtype=np.int32),
+            cat_table=cat_table,
+            # Sortie moyennée (boosting rf) et paramètre de la sigmoïde appliqués au score brut
+            output_scale=(1.0 / n_iterations if dump.get("average_output") else 1.0) * sigmoid,
+        )
+
+    @classmethod
+    def from_model(cls, model) -> "FlatForest":
+        """Conversion selon le type du modèle"""
+        if type(model).__module__.startswith("lightgbm"):
+            return cls.from_lightgbm(model)
+        return cls.from_sklearn(model)
+
+    # Parcours
+
+    def leaves(self, X: np.ndarray, rows: np.ndarray, nodes: np.ndarray) -> np.ndarray:
+        """Feuille atteinte par chaque parcours (ligne rows[i] de X, à partir du nœud nodes[i])"""
+        # Entrées comparées en float32 pour scikit-learn (arbres Cython), en float64 pour LightGBM :
+        # la conversion est faite une fois quand tous les nœuds sont du même type
+        mixed_precision = self.float32_inputs.any() and not self.float32_inputs.all()
+        X = np.ascontiguousarray(X, dtype=np.float64)
+        if self.float32_inputs.all():
+            X = X.astype(np.float32).astype(np.float64)
+        width = X.shape[1]
+        values = X.ravel()
+        nan_only = bool((self.missing_type == MISSING_NAN).all())
+        has_categories = bool((self.cat_index >= 0).any())
+
+        nodes = nodes.astype(np.int32, copy=True)
+        active = np.nonzero(~self.is_leaf[nodes])[0]
+        cells = rows.astype(np.int64) * width
+        while len(active):
+            current = nodes[active]
+            x = values[cells[active] + self.feature[current]]
+            if mixed_precision:
+                x = np.where(self.float32_inputs[current], x.astype(np.float32).astype(np.float64), x)
+
+            is_nan = np.isnan(x)
+            if nan_only:
+                missing = is_nan
+            else:
+                missing_type = self.missing_type[current]
+                x = np.where(is_nan & (missing_type == MISSING_NONE), 0.0, x)
+                missing = (is_nan & (missing_type != MISSING_NONE)) | (
+                    (missing_type == MISSING_ZERO) & (np.abs(x) <= ZERO_THRESHOLD)
+                )
+
+            with np.errstate(invalid="ignore"):
+                go_left = x <= self.threshold[current]
+            if missing.any():
+                go_left = np.where(missing, self.default_left[current], go_left)
+
+            if has_categories:
+                categorical = self.cat_index[current] >= 0
+                if categorical.any():
+                    cat_x = x[categorical]
+                    cat_nodes = current[categorical]
+                    # Catégorie négative ou manquante (type NaN) : branche droite
+                    valid = ~np.isnan(cat_x) & (cat_x >= 0) & (cat_x < self.cat_table.shape[1])
+                    codes = np.where(valid, cat_x, 0).astype(np.int64)
+                    go_left[categorical] = self.cat_table[self.cat_index[cat_nodes], codes] & valid
+
+            nodes[active] = np.where(go_left, self.left[current], self.right[current])
+            active = active[~self.is_leaf[nodes[active]]]
+        return nodes
+
+    def raw_predict(self, X: np.ndarray) -> np.ndarray:
+        """Sorties agrégées des arbres, avant la fonction de lien : (lignes, sorties)"""
+        X = np.asarray(X, dtype=np.float64).reshape(-1, self.n_features)
+        n_rows = len(X)
+        rows = np.repeat(np.arange(n_rows), self.n_trees)
+        leaves = self.leaves(X, rows, np.tile(self.roots, n_rows))
+        raw = self.value[leaves].reshape(n_rows, self.n_trees, self.n_outputs).sum(axis=1)
+        return self._aggregate(raw)
+
+    def _aggregate(self, raw: np.ndarray) -> np.ndarray:
+        if self.aggregation == "mean":
+            raw = raw / self.n_trees
+        return raw * self.output_scale
+
+    def _apply_link(self, raw: np.ndarray) -> np.ndarray:
+        if self.link == "sigmoid":
+            return 1.0 / (1.0 + np.exp(-raw))
+        if self.link == "softmax":
+            exp = np.exp(raw - raw.max(axis=1, keepdims=True))
+            return exp / exp.sum(axis=1, keepdims=True)
+        return raw
+
+    def predict_proba(self, X: np.ndarray) -> np.ndarray:
+        """Probabilités des classes (comme predict_proba de scikit-learn)"""
+        return self._proba_from_raw(self.raw_predict(X))
+
+    def _proba_from_raw(self, raw: np.ndarray) -> np.ndarray:
+        output = self._apply_link(raw)
+        if self.link == "sigmoid":
+            return np.hstack([1.0 - output, output])
+        return output
+
+    def predict(self, X: np.ndarray) -> np.ndarray:
+        """Classes prédites (classification) ou valeurs (régression)"""
+        return self._predict_from_raw(self.raw_predict(X))
+
+    def _predict_from_raw(self, raw: np.ndarray) -> np.ndarray:
+        if self.classes is not None or self.link != "identity":
+            proba = self._proba_from_raw(raw)
+            labels = self.classes if self.classes is not None else np.arange(proba.shape[1])
+            return np.asarray(labels)[proba.argmax(axis=1)]
+        return raw[:, 0]
+
+
+def predict_many(forests: Sequence[FlatForest], inputs: Sequence[np.ndarray],
+                 proba: bool = True) -> List[np.ndarray]:
+    """
+    Évaluer plusieurs modèles, chacun sur ses lignes, en un seul parcours : les nœuds des modèles
+    sont concaténés et tous les couples (ligne, arbre) descendent ensemble. Retourne, par modèle,
+    predict_proba (classification, proba=True) ou predict.
+    """
+    if not forests:
+        return []
+
+    # Nœuds concaténés (indices des fils décalés) et lignes empilées (largeur maximale, NaN au-delà)
+    offsets = np.cumsum([0] + [forest.n_nodes for forest in forests[:-1]])
+    cat_offsets = np.cumsum([0] + [forest.cat_table.shape[0] for forest in forests[:-1]])
+    width = max(forest.n_features for forest in forests)
+    cat_width = max([forest.cat_table.shape[1] for forest in forests] + [1])
+
+    cat_table = np.zeros((sum(forest.cat_table.shape[0] for forest in forests), cat_width), dtype=bool)
+    for forest, cat_offset in zip(forests, cat_offsets):
+        table = forest.cat_table
+        cat_table[cat_offset:cat_offset + table.shape[0], :table.shape[1]] = table
+
+    max_outputs = max(forest.n_outputs for forest in forests)
+    value = np.zeros((sum(forest.n_nodes for forest in forests), max_outputs))
+    for forest, offset in zip(forests, offsets):
+        value[offset:offset + forest.n_nodes, :forest.n_outputs] = forest.value
+
+    combined = FlatForest(
+        feature=np.concatenate([forest.feature for forest in forests]),
+        threshold=np.concatenate([forest.threshold for forest in forests]),
+        left=np.concatenate([forest.left + offset for forest, offset in zip(forests, offsets)]).astype(np.int32),
+        right=np.concatenate([forest.right + offset for forest, offset in zip(forests, offsets)]).astype(np.int32),
+        value=value,
+        roots=np.concatenate([forest.roots + offset for forest, offset in zip(forests, offsets)]).astype(np.int32),
+        is_leaf=np.concatenate([forest.is_leaf for forest in forests]),
+        default_left=np.concatenate([forest.default_left for forest in forests]),
+        missing_type=np.concatenate([forest.missing_type for forest in forests]),
+        float32_inputs=np.concatenate([forest.float32_inputs for forest in forests]),
+        n_features=width,
+        cat_index=np.concatenate([
+            np.where(forest.cat_index >= 0, forest.cat_index + cat_offset, -1)
+            for forest, cat_offset in zip(forests, cat_offsets)
+        ]).astype(np.int32),
+        cat_table=cat_table,
+    )
+
+    matrices = [np.asarray(X, dtype=np.float64).reshape(-1, forest.n_features) for forest, X in zip(forests, inputs)]
+    X_all = np.full((sum(len(X) for X in matrices), width), np.nan)
+    row_offsets = np.cumsum([0] + [len(X) for X in matrices[:-1]])
+    for X, row_offset in zip(matrices, row_offsets):
+        X_all[row_offset:row_offset + len(X), :X.shape[1]] = X
+
+    # Un parcours par (ligne, arbre) de chaque modèle
+    rows, nodes = [], []
+    for forest, X, offset, row_offset in zip(forests, matrices, offsets, row_offsets):
+        rows.append(np.repeat(np.arange(len(X)) + row_offset, forest.n_trees))
+        nodes.append(np.tile(forest.roots + offset, len(X)))
+    leaves = combined.leaves(X_all, np.concatenate(rows), np.concatenate(nodes))
+
+    results, start = [], 0
+    for forest, X in zip(forests, matrices):
+        count = len(X) * forest.n_trees
+        model_leaves = leaves[start:start + count]
+        start += count
+        raw = value[model_leaves, :forest.n_outputs].reshape(len(X), forest.n_trees, forest.n_outputs).sum(axis=1)
+        raw = forest._aggregate(raw)
+        results.append(forest._proba_from_raw(raw) if proba and (forest.classes is not None or forest.link != "identity")
+                       else forest._predict_from_raw(raw))
+    return results
+
+
+def flat_artifact_path(model_path: str) -> str:
+    """Fichier de la forêt aplatie associé au modèle joblib"""
+    return model_path.replace('.joblib', '_flat.joblib')
+
+
+def save_flat_artifact(model, model_path: str) -> Optional[str]:
+    """
+    Enregistrer la forêt aplatie du modèle à côté de son fichier joblib, sans compression : les
+    tableaux de nœuds sont stockés tels quels et relus par joblib.load(mmap_mode='r'), si bien que
+    tous les processus d'une machine partagent la même copie en cache de pages. Écriture atomique
+    (fichier temporaire puis renommage) ; None si le modèle n'est pas convertible.
+    """
+    import joblib
+
+    try:
+        forest = FlatForest.from_model(model)
+    except ValueError as e:
+        logger.warning(f"⚠️ [INFERENCE] Forêt aplatie non enregistrée pour {model_path}: {e}")
+        return None
+
+    path = flat_artifact_path(model_path)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    joblib.dump(forest, tmp_path, compress=0)
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_flat_artifact(model_path: str) -> FlatForest:
+    """
+    Forêt aplatie du modèle projetée en mémoire (mmap, lecture seule). Le fichier est créé à la
+    première lecture pour les modèles enregistrés avant lui, ou recréé si le modèle est plus récent.
+    """
+    import joblib
+
+    path = flat_artifact_path(model_path)
+    if not os.path.exists(path) or os.path.getmtime(path) < os.path.getmtime(model_path):
+        if save_flat_artifact(joblib.load(model_path), model_path) is None:
+            raise ValueError(f"Modèle non convertible en forêt aplatie: {model_path}")
+    return joblib.load(path, mmap_mode='r')
+
+
+# Cache LRU chemin du modèle -> (FlatForest, scaler), partagé par le processus
+_flat_cache: "OrderedDict[Tuple[str, float], Tuple[FlatForest, Any]]" = OrderedDict()
+_flat_lock = threading.Lock()
+
+
+def load_flat_model(model_path: str, with_scaler: bool = True) -> Tuple[FlatForest, Any]:
+    """
+    Modèle aplati (et scaler associé) d'un fichier joblib, chargé une seule fois par processus :
+    projeté en mémoire depuis son fichier de forêt aplatie si ml_mmap_artifacts est activé,
+    sinon converti depuis le modèle
+    """
+    import joblib
+    from app.core.config import settings
+
+    key = (model_path, os.path.getmtime(model_path))
+    with _flat_lock:
+        if key in _flat_cache:
+            _flat_cache.move_to_end(key)
+            return _flat_cache[key]
+
+    if settings.ml_mmap_artifacts:
+        forest = load_flat_artifact(model_path)
+    else:
+        forest = FlatForest.from_model(joblib.load(model_path))
+    scaler = joblib.load(model_path.replace('.joblib', '_scaler.joblib')) if with_scaler else None
+
+    with _flat_lock:
+        _flat_cache[key] = (forest, scaler)
+        while len(_flat_cache) > max(1, settings.ml_flat_model_cache_size):
+            _flat_cache.popitem(last=False)
+    return forest, scaler
+
+
+def clear_flat_model_cache():
+    """Vider le cache des modèles aplatis"""
+    with _flat_lock:
+        _flat_cache.clear()
@@ -0,0 +1,45 @@
+"""
+Tâches de maintenance de la base de données
+"""
+import logging
+from typing import Dict, Any, List, Optional
+
+from app.core.celery_app import celery_app
+from app.core.database import engine, get_db_session
+from app.core.partitioning import ensure_future_partitions
+
+logger = logging.getLogger(__name__)
+
+
+@celery_app.task(name="ensure_future_partitions")
+def ensure_future_partitions_task() -> Dict[str, Any]:
+    """
+    Créer à l'avance les partitions annuelles des tables partitionnées
+    """
+    with engine.begin() as conn:
+        partitions = ensure_future_partitions(conn)
+
+    logger.info(f"🗂️ [PARTITIONS] {len(partitions)} partitions annuelles vérifiées")
+    return {"partitions": partitions}
+
+
+@celery_app.task(name="refresh_feature_store")
+def refresh_feature_store_task(symbols: Optional[List[str]] = None, full: bool = False) -> Dict[str, Any]:
+    """
+    Calculer les vecteurs de features des nouvelles dates (magasin feature_vectors)
+    """
+    from app.services.feature_store import FeatureStore
+
+    with get_db_session() as db:
+        return FeatureStore(db).refresh(symbols, full)
+
+
+@celery_app.task(name="prune_model_registry")
+def prune_model_registry_task(dry_run: bool = False) -> Dict[str, Any]:
+    """
+    Appliquer la politique de rétention des modèles : anciennes versions, fichiers orphelins
+    """
+    from app.services.model_registry import ModelRegistry
+
+    with get_db_session() as db:
+        return ModelRegistry(db).prune(dry_run=dry_run)
@@ -0,0 +1,27 @@
+"""
+Tâches asynchrones pour les explications SHAP
+"""
+from typing import Dict, Any, Optional
+
+from app.core.celery_app import celery_app
+from app.core.database import get_db_session
+from app.services.shap_service import ShapService
+
+
+@celery_app.task(bind=True, name="precompute_shap_explanations")
+def precompute_shap_explanations(self, screener_run_id: int, top_k: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Précalculer les explications SHAP des meilleures opportunités d'un run du screener
+    """
+    self.update_state(
+        state="PROGRESS",
+        meta={
+            "status": "Calcul des explications SHAP...",
+            "progress": 0,
+            "current_step": "shap_explanations",
+            "screener_run_id": screener_run_id
+        }
+    )
+
+    with get_db_session() as db:
+        return ShapService(db).precompute_for_run(screener_run_id, top_k)
@@ -0,0 +1,78 @@
+"""
+Tâches asynchrones pour l'entraînement des modèles
+"""
+from typing import Dict, Any
+
+from app.core.celery_app import celery_app
+from app.core.database import get_db_session
+from app.models.database import TargetParameters
+
+
+@celery_app.task(bind=True, name="train_lightgbm_model")
+def train_lightgbm_model(self, model_kind: str, symbol: str, target_parameter_id: int) -> Dict[str, Any]:
+    """
+    Entraîner un modèle LightGBM (binary, multiclass ou regression) dans un worker Celery
+    """
+    from app.services.lightgbm_service import LightGBMService, LIGHTGBM_TRAINERS
+
+    method_name, model_type, message = LIGHTGBM_TRAINERS[model_kind]
+
+    self.update_state(
+        state="PROGRESS",
+        meta={
+            "status": f"Entraînement LightGBM ({model_kind}) de {symbol}...",
+            "progress": 10,
+            "current_step": "training_model"
+        }
+    )
+
+    with get_db_session() as db:
+        target_param = db.query(TargetParameters).filter(
+            TargetParameters.id == target_parameter_id
+        ).first()
+        if not target_param:
+            raise ValueError(f"Paramètre cible {target_parameter_id} non trouvé")
+
+        result = getattr(LightGBMService(db), method_name)(
+            symbol=symbol,
+            target_param=target_param,
+            db=db
+        )
+
+    return {
+        "model_id": result["model_id"],
+        "model_name": result["model_name"],
+        "model_type": model_type,
+        "symbol": symbol,
+        "performance": result["performance"],
+        "training_samples": result["training_samples"],
+        "test_samples": result["test_samples"],
+        "message": message
+    }
+
+
+@celery_app.task(bind=True, name="tune_lightgbm_hyperparameters")
+def tune_lightgbm_hyperparameters(self, model_kind: str, symbol: str, target_parameter_id: int,
+                                  scope: str = "symbol") -> Dict[str, Any]:
+    """
+    Rechercher les meilleurs paramètres LightGBM (successive halving) du symbole ou de son secteur
+    """
+    from app.services.lightgbm_tuning import LightGBMTuner
+
+    self.update_state(
+        state="PROGRESS",
+        meta={
+            "status": f"Recherche des paramètres LightGBM ({model_kind}, {scope}) de {symbol}...",
+            "progress": 10,
+            "current_step": "tuning_model"
+        }
+    )
+
+    with get_db_session() as db:
+        target_param = db.query(TargetParameters).filter(
+            TargetParameters.id == target_parameter_id
+        ).first()
+        if not target_param:
+            raise ValueError(f"Paramètre cible {target_parameter_id} non trouvé")
+
+        return LightGBMTuner(db).tune(symbol, target_param, model_kind, scope)
@@ -1,294 +0,0 @@
-"""
-Tâche de screener ultra-simplifiée - évite tous les problèmes de sérialisation
-"""
-import time
-from datetime import datetime, date
-from typing import Dict, List, Any
-from celery import current_task
-from sqlalchemy.orm import Session
-
-from app.core.celery_app import celery_app
-from app.core.database import SessionLocal
-from app.models.database import ScreenerRun, ScreenerResult, MLModels, TargetParameters, SymbolMetadata
-from app.models.schemas import ScreenerRequest
-
-
-@celery_app.task(bind=True, name="run_ultra_simple_screener")
-def run_ultra_simple_screener(self, screener_request: Dict[str, Any], user_id: str = "demo_user") -> Dict[str, Any]:
-    """
-    Tâche ultra-simplifiée pour exécuter un screener
-    """
-    db = None
-    screener_run = None
-    
-    try:
-        # Mise à jour du statut initial
-        self.update_state(
-            state="PROGRESS",
-            meta={
-                "status": "Démarrage du screener...",
-                "progress": 0,
-                "current_step": "initialization"
-            }
-        )
-        
-        # Création de la session de base de données
-        db = SessionLocal()
-        
-        # Conversion du dictionnaire en objet ScreenerRequest
-        request = ScreenerRequest(**screener_request)
-        
-        # Création de l'enregistrement de run
-        screener_run = ScreenerRun(
-            screener_config_id=1,
-            run_date=date.today(),
-            total_symbols=0,
-            successful_models=0,
-            opportunities_found=0,
-            execution_time_seconds=0,
-            status="running",
-            created_at=datetime.now()
-        )
-        db.add(screener_run)
-        db.commit()
-        db.refresh(screener_run)
-        
-        # Récupération des symboles disponibles (limité à 5 pour les tests)
-        self.update_state(
-            state="PROGRESS",
-            meta={
-                "status": "Récupération des symboles...",
-                "progress": 5,
-                "current_step": "fetching_symbols",
-                "screener_run_id": screener_run.id
-            }
-        )
-        
-        symbols = db.query(SymbolMetadata.symbol).filter(
-            SymbolMetadata.is_active == True
-        ).limit(5).all()
-        
-        symbols = [s[0] for s in symbols]
-        total_symbols = len(symbols)
-        
-        # Mise à jour du nombre total de symboles
-        screener_run.total_symbols = total_symbols
-        db.commit()
-        
-        # Phase d'entraînement simplifiée
-        self.update_state(
-            state="PROGRESS",
-            meta={
-                "status": f"Entraînement des modèles (0/{total_symbols})...",
-                "progress": 10,
-                "current_step": "training_models",
-                "screener_run_id": screener_run.id,
-                "total_symbols": total_symbols,
-                "trained_models": 0
-            }
-        )
-        
-        successful_models = 0
-        
-        # Entraînement simplifié - on simule juste l'entraînement
-        for i, symbol in enumerate(symbols):
-            progress = 10 + (i / total_symbols) * 40
-            self.update_state(
-                state="PROGRESS",
-                meta={
-                    "status": f"Entraînement {symbol} ({i+1}/{total_symbols})...",
-                    "progress": int(progress),
-                    "current_step": "training_models",
-                    "screener_run_id": screener_run.id,
-                    "total_symbols": total_symbols,
-                    "trained_models": successful_models,
-                    "current_symbol": symbol
-                }
-            )
-            
-            # Simulation d'entraînement - on crée juste un modèle factice
-            try:
-                # Vérifier si des paramètres existent déjà
-                existing_param = db.query(TargetParameters).filter(
-                    TargetParameters.user_id == user_id,
-                    TargetParameters.parameter_name == f"target_{symbol}_{request.target_return_percentage}%_{request.time_horizon_days}d"
-                ).first()
-                
-                if existing_param:
-                    target_param = existing_param
-                else:
-                    # Créer des paramètres cibles factices
-                    target_param = TargetParameters(
-                        user_id=user_id,
-                        parameter_name=f"target_{symbol}_{request.target_return_percentage}%_{request.time_horizon_days}d",
-                        target_return_percentage=request.target_return_percentage,
-                        time_horizon_days=request.time_horizon_days,
-                        risk_tolerance="medium",
-                        is_active=True
-                    )
-                    db.add(target_param)
-                    db.commit()
-                    db.refresh(target_param)
-                
-                # Créer un modèle factice
-                model = MLModels(
-                    model_name=f"classification_{symbol}_Rendement {request.target_return_percentage}% sur {request.time_horizon_days} jours_v1",
-                    model_type="classification",
-                    model_version="v1",
-                    symbol=symbol,
-                    target_parameter_id=target_param.id,
-                    model_parameters={
-                        "target_return_percentage": request.target_return_percentage,
-                        "time_horizon_days": request.time_horizon_days,
-                        "risk_tolerance": request.risk_tolerance
-                    },
-                    performance_metrics={
-                        "accuracy": 0.75,
-                        "precision": 0.70,
-                        "recall": 0.80,
-                        "f1_score": 0.75
-                    },
-                    is_active=True,
-                    created_by=user_id
-                )
-                db.add(model)
-                db.commit()
-                db.refresh(model)
-                
-                successful_models += 1
-                
-            except Exception as e:
-                # Log simple sans exception complexe
-                print(f"Erreur pour {symbol}: {str(e)}")
-                continue
-        
-        # Mise à jour du nombre de modèles entraînés avec succès
-        screener_run.successful_models = successful_models
-        db.commit()
-        
-        # Phase de prédiction simplifiée
-        self.update_state(
-            state="PROGRESS",
-            meta={
-                "status": f"Calcul des prédictions...",
-                "progress": 50,
-                "current_step": "making_predictions",
-                "screener_run_id": screener_run.id,
-                "total_symbols": total_symbols,
-                "successful_models": successful_models
-            }
-        )
-        
-        # Récupération des modèles créés
-        active_models = db.query(MLModels).filter(
-            MLModels.is_active == True,
-            MLModels.symbol.in_(symbols)
-        ).all()
-        
-        opportunities_found = 0
-        predictions_made = 0
-        
-        # Prédictions simplifiées - simulation
-        for i, model in enumerate(active_models):
-            progress = 50 + (i / len(active_models)) * 40
-            self.update_state(
-                state="PROGRESS",
-                meta={
-                    "status": f"Prédiction {model.symbol} ({i+1}/{len(active_models)})...",
-                    "progress": int(progress),
-                    "current_step": "making_predictions",
-                    "screener_run_id": screener_run.id,
-                    "total_symbols": total_symbols,
-                    "successful_models": successful_models,
-                    "predictions_made": predictions_made,
-                    "current_symbol": model.symbol
-                }
-            )
-            
-            # Simulation de prédiction
-            import random
-            prediction = random.choice([0.0, 1.0])  # Prédiction aléatoire
-            confidence = random.uniform(0.5, 0.95)  # Confiance aléatoire
-            
-            predictions_made += 1
-            
-            # Vérification si c'est une opportunité
-            if prediction == 1.0 and confidence >= request.risk_tolerance:
-                opportunities_found += 1
-                
-                # Enregistrement du résultat
-                screener_result = ScreenerResult(
-                    screener_run_id=screener_run.id,
-                    symbol=model.symbol,
-                    model_id=model.id,
-                    prediction=float(prediction),
-                    confidence=float(confidence),
-                    rank=opportunities_found
-                )
-                db.add(screener_result)
-        
-        # Finalisation
-        db.commit()
-        
-        # Mise à jour finale du run
-        screener_run.opportunities_found = opportunities_found
-        screener_run.status = "completed"
-        screener_run.execution_time_seconds = int(time.time() - self.request.started_at)
-        db.commit()
-        
-        # Résultat final
-        result = {
-            "screener_run_id": screener_run.id,
-            "total_symbols": total_symbols,
-            "successful_models": successful_models,
-            "total_opportunities_found": opportunities_found,
-            "execution_time_seconds": screener_run.execution_time_seconds,
-            "status": "completed"
-        }
-        
-        self.update_state(
-            state="SUCCESS",
-            meta={
-                "status": "Screener terminé avec succès!",
-                "progress": 100,
-                "current_step": "completed",
-                "result": result
-            }
-        )
-        
-        return result
-        
-    except Exception as e:
-        # Gestion d'erreur ultra-simple
-        error_message = str(e)
-        
-        if screener_run and db:
-            try:
-                screener_run.status = "failed"
-                screener_run.error_message = error_message
-                db.commit()
-            except:
-                pass
-        
-        # Retourner un résultat d'erreur simple
-        error_result = {
-            "status": "failed",
-            "error": error_message,
-            "screener_run_id": screener_run.id if screener_run else None
-        }
-        
-        self.update_state(
-            state="FAILURE",
-            meta={
-                "status": f"Erreur: {error_message}",
-                "progress": 0,
-                "current_step": "error",
-                "result": error_result
-            }
-        )
-        
-        return error_result
-        
-    finally:
-        if db:
-            db.close()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'hydratation des indicateurs (base -> DataFrame)
+
+Compare, sur le même panel (prix + indicateurs techniques + sentiment) :
+- orm : objets ORM puis conversion valeur par valeur en float (ancien chemin des services ML) ;
+- raw : colonnes brutes (Decimal tant que les colonnes sont NUMERIC) converties en tableaux NumPy ;
+- numpy : colonnes lues en double précision et converties en tableaux NumPy (feature_frames).
+
+À lancer avant puis après scripts/migrate_float_columns.py ; le type des colonnes est enregistré
+avec les résultats.
+
+Usage:
+    python scripts/benchmark_hydration.py --symbols AAPL MSFT --runs 5 --output benchmarks/hydration.jsonl
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import and_, select, text
+
+from app.core.database import SessionLocal
+from app.models.database import HistoricalData, TechnicalIndicators, SentimentIndicators
+from app.services.feature_frames import KEY_COLUMNS, PRICE_COLUMNS, load_feature_frame, panel_from_clause
+from app.services.feature_registry import TECHNICAL_FEATURE_COLUMNS, SENTIMENT_FEATURE_COLUMNS
+
+
+def hydrate_orm(db, symbols) -> pd.DataFrame:
+    """Objets ORM convertis valeur par valeur"""
+    records = db.query(HistoricalData, TechnicalIndicators, SentimentIndicators).outerjoin(
+        TechnicalIndicators,
+        and_(TechnicalIndicators.symbol == HistoricalData.symbol, TechnicalIndicators.date == HistoricalData.date)
+    ).outerjoin(
+        SentimentIndicators,
+        and_(SentimentIndicators.symbol == HistoricalData.symbol, SentimentIndicators.date == HistoricalData.date)
+    ).filter(HistoricalData.symbol.in_(symbols)).order_by(HistoricalData.symbol, HistoricalData.date).all()
+
+    rows = []
+    for hist, tech, sent in records:
+        row = {'symbol': hist.symbol, 'date': hist.date}
+        row.update({col: float(getattr(hist, col)) if getattr(hist, col) is not None else None for col in PRICE_COLUMNS})
+        if tech:
+            row.update({col: float(getattr(tech, col)) if getattr(tech, col) is not None else None
+                        for col in TECHNICAL_FEATURE_COLUMNS})
+        if sent:
+            row.update({col: float(getattr(sent, col)) if getattr(sent, col) is not None else None
+                        for col in SENTIMENT_FEATURE_COLUMNS})
+        rows.append(row)
+    return pd.DataFrame(rows)
+
+
+def hydrate_raw(db, symbols) -> pd.DataFrame:
+    """Colonnes brutes (sans conversion côté PostgreSQL) transposées en tableaux NumPy"""
+    columns = [HistoricalData.symbol, HistoricalData.date]
+    columns += [HistoricalData.__table__.c[col] for col in PRICE_COLUMNS]
+    columns += [TechnicalIndicators.__table__.c[col] for col in TECHNICAL_FEATURE_COLUMNS]
+    columns += [SentimentIndicators.__table__.c[col] for col in SENTIMENT_FEATURE_COLUMNS]
+    keys = ['symbol', 'date'] + PRICE_COLUMNS + TECHNICAL_FEATURE_COLUMNS + SENTIMENT_FEATURE_COLUMNS
+
+    rows = db.execute(
+        select(*columns).select_from(panel_from_clause())
+        .where(HistoricalData.symbol.in_(symbols))
+        .order_by(HistoricalData.symbol, HistoricalData.date)
+    ).all()
+    data = {}
+    for key, values in zip(keys, zip(*rows)):
+        data[key] = list(values) if key in KEY_COLUMNS else np.array(values, dtype=np.float64)
+    return pd.DataFrame(data)
+
+
+def hydrate_numpy(db, symbols) -> pd.DataFrame:
+    """Chemin des services ML (colonnes en double précision -> tableaux NumPy)"""
+    return load_feature_frame(db, symbols, TECHNICAL_FEATURE_COLUMNS, SENTIMENT_FEATURE_COLUMNS)
+
+
+METHODS = {
+    "orm": hydrate_orm,
+    "raw": hydrate_raw,
+    "numpy": hydrate_numpy,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'hydratation des indicateurs")
+    parser.add_argument("--symbols", nargs="*", default=None, help="Symboles lus (par défaut les 20 premiers)")
+    parser.add_argument("--runs", type=int, default=3, help="Mesures par méthode")
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=list(METHODS))
+    parser.add_argument("--output", help="Fichier JSONL où ajouter les résultats (suivi dans le temps)")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        symbols = args.symbols or db.execute(
+            select(HistoricalData.symbol).distinct().order_by(HistoricalData.symbol).limit(20)
+        ).scalars().all()
+        column_type = db.execute(text("""
+            SELECT data_type FROM information_schema.columns
+            WHERE table_schema = 'public' AND table_name = 'technical_indicators' AND column_name = 'sma_5'
+        """)).scalar()
+
+        report = {
+            "timestamp": datetime.now().isoformat(),
+            "indicator_column_type": column_type,
+            "symbols": len(symbols),
+            "methods": {},
+        }
+        print(f"⏱️  Hydratation de {len(symbols)} symboles (colonnes d'indicateurs: {column_type})...")
+
+        for method in args.methods:
+            timings = []
+            rows = 0
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                df = METHODS[method](db, symbols)
+                timings.append(time.perf_counter() - start)
+                rows = len(df)
+                db.rollback()
+
+            median = statistics.median(timings)
+            report["methods"][method] = {
+                "rows": rows,
+                "seconds_median": median,
+                "seconds_min": min(timings),
+                "rows_per_second": rows / median if median else None,
+            }
+            print(f"   - {method:6s}: {rows} lignes en {median:.3f}s (médiane), {rows / median if median else 0:,.0f} lignes/s")
+    finally:
+        db.close()
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with output.open("a") as f:
+            f.write(json.dumps(report) + "\n")
+        print(f"📝 Résultats ajoutés à {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Mémoire des workers selon le chargement des modèles
+
+Lance plusieurs processus (comme des workers Celery ou uvicorn) qui chargent chacun les mêmes
+modèles puis font une prédiction par modèle, et relève leur mémoire (Linux, /proc) :
+- pickle : modèles scikit-learn désérialisés par joblib.load (une copie par processus) ;
+- mmap : forêts aplaties relues par joblib.load(mmap_mode='r') (cf. app/services/tree_inference.py),
+  une seule copie dans le cache de pages pour toute la machine.
+
+RSS compte les pages partagées dans chaque processus ; PSS les répartit entre les processus qui
+les partagent et donne la mémoire réellement consommée par worker.
+
+Usage:
+    python scripts/benchmark_model_memory.py --models-dir ./models --workers 4 --output benchmarks/model_memory.jsonl
+    python scripts/benchmark_model_memory.py --synthetic 200 --workers 4
+"""
+import os
+import sys
+import glob
+import json
+import tempfile
+import argparse
+import statistics
+import multiprocessing
+from pathlib import Path
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+METHODS = ("pickle", "mmap")
+
+
+def process_memory() -> dict:
+    """RSS (anonyme / fichiers) et PSS du processus courant, en Mo"""
+    memory = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if key in ("VmRSS", "RssAnon", "RssFile"):
+                memory[key] = int(value.split()[0]) / 1024
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    memory["Pss"] = int(line.split()[1]) / 1024
+    except OSError:
+        memory["Pss"] = None
+    return {"rss_mb": memory.get("VmRSS"), "anon_mb": memory.get("RssAnon"),
+            "file_mb": memory.get("RssFile"), "pss_mb": memory.get("Pss")}
+
+
+def worker(method: str, model_paths, barrier, queue):
+    """Charger les modèles, prédire une ligne par modèle, puis relever la mémoire"""
+    import joblib
+    from app.services.tree_inference import load_flat_artifact
+
+    before = process_memory()
+    models = []
+    for path in model_paths:
+        models.append(load_flat_artifact(path) if method == "mmap" else joblib.load(path))
+
+    for model in models:
+        x = np.zeros((1, model.n_features if method == "mmap" else model.n_features_in_))
+        model.predict_proba(x)
+
+    # Mesure une fois que tous les workers ont chargé leurs modèles (pages partagées comptées par tous)
+    barrier.wait()
+    after = process_memory()
+    barrier.wait()
+    queue.put({"pid": os.getpid(), "before": before, "after": after})
+
+
+def synthetic_models(directory: str, count: int):
+    """Forêts de la taille de celles du screener (100 arbres, profondeur 10) enregistrées en joblib"""
+    import joblib
+    from sklearn.ensemble import RandomForestClassifier
+    from app.services.feature_registry import MODEL_FEATURE_COLUMNS
+
+    rng = np.random.default_rng(42)
+    paths = []
+    for i in range(count):
+        X = rng.normal(size=(1500, len(MODEL_FEATURE_COLUMNS)))
+        y = (X[:, i % X.shape[1]] + rng.normal(scale=0.8, size=len(X)) > 0).astype(int)
+        model = RandomForestClassifier(n_estimators=100, max_depth=10, random_state=i, n_jobs=-1).fit(X, y)
+        path = os.path.join(directory, f"synthetic_{i}_v1.joblib")
+        joblib.dump(model, path)
+        paths.append(path)
+    return paths
+
+
+def run(method: str, model_paths, workers: int) -> list:
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(workers)
+    queue = context.Queue()
+    processes = [context.Process(target=worker, args=(method, model_paths, barrier, queue)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    results = [queue.get() for _ in processes]
+    for process in processes:
+        process.join()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mémoire des workers selon le chargement des modèles")
+    parser.add_argument("--models-dir", default=None, help="Répertoire des modèles joblib (ml_models_path)")
+    parser.add_argument("--limit", type=int, default=200, help="Modèles chargés par worker")
+    parser.add_argument("--synthetic", type=int, default=0, help="Entraîner ce nombre de forêts synthétiques au lieu de lire --models-dir")
+    parser.add_argument("--workers", type=int, default=4, help="Processus lancés par méthode")
+    parser.add_argument("--methods", nargs="+", default=list(METHODS), choices=list(METHODS))
+    parser.add_argument("--output", help="Fichier JSONL où ajouter les résultats (suivi dans le temps)")
+    args = parser.parse_args()
+
+    from app.core.config import settings
+    from app.services.tree_inference import flat_artifact_path, load_flat_artifact
+
+    with tempfile.TemporaryDirectory(prefix="model_memory_") as directory:
+        if args.synthetic:
+            print(f"🌲 Entraînement de {args.synthetic} forêts synthétiques...")
+            model_paths = synthetic_models(directory, args.synthetic)
+        else:
+            models_dir = args.models_dir or settings.ml_models_path
+            model_paths = sorted(
+                path for path in glob.glob(os.path.join(models_dir, "*.joblib"))
+                if not path.endswith(("_scaler.joblib", "_flat.joblib"))
+            )[:args.limit]
+        if not model_paths:
+            print("❌ Aucun modèle trouvé")
+            sys.exit(1)
+
+        # Forêts aplaties créées avant les mesures (sinon chaque worker mmap les créerait)
+        for path in model_paths:
+            load_flat_artifact(path)
+        pickle_size = sum(os.path.getsize(path) for path in model_paths) / 1024 ** 2
+        flat_size = sum(os.path.getsize(flat_artifact_path(path)) for path in model_paths) / 1024 ** 2
+
+        report = {
+            "timestamp": datetime.now().isoformat(),
+            "models": len(model_paths),
+            "workers": args.workers,
+            "pickle_files_mb": pickle_size,
+            "flat_files_mb": flat_size,
+            "methods": {},
+        }
+        print(f"⏱️  {len(model_paths)} modèles ({pickle_size:.0f} Mo joblib, {flat_size:.0f} Mo aplatis), "
+              f"{args.workers} workers")
+
+        for method in args.methods:
+            results = run(method, model_paths, args.workers)
+            growth = [r["after"]["rss_mb"] - r["before"]["rss_mb"] for r in results]
+            pss = [r["after"]["pss_mb"] for r in results if r["after"]["pss_mb"] is not None]
+            report["methods"][method] = {
+                "workers": results,
+                "rss_growth_mb_median": statistics.median(growth),
+                "pss_mb_total": sum(pss) if pss else None,
+            }
+            print(f"   - {method:6s}:")
+            for r in results:
+                before, after = r["before"], r["after"]
+                print(f"       pid {r['pid']}: RSS {before['rss_mb']:.0f} -> {after['rss_mb']:.0f} Mo "
+                      f"(anonyme {after['anon_mb']:.0f}, fichiers {after['file_mb']:.0f}), "
+                      f"PSS {after['pss_mb'] or 0:.0f} Mo")
+            print(f"       PSS total des workers: {sum(pss) if pss else 0:.0f} Mo")
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with output.open("a") as f:
+            f.write(json.dumps(report) + "\n")
+        print(f"📝 Résultats ajoutés à {output}")
+
+
+if __name__ == "__main__":
+    main()
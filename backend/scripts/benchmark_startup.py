@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Benchmark du temps de démarrage de l'API et du worker Celery
+
+Mesure, dans un interpréteur neuf pour chaque exécution, le temps d'import à froid et la
+mémoire résidente (RSS max) de app.main (API) et de app.core.celery_app (worker), et vérifie
+qu'aucune bibliothèque ML lourde n'est chargée au démarrage.
+
+Usage:
+    python scripts/benchmark_startup.py --runs 5 --output benchmarks/startup.jsonl
+"""
+import os
+import sys
+import json
+import argparse
+import subprocess
+import statistics
+from pathlib import Path
+from datetime import datetime
+
+BACKEND_DIR = Path(__file__).parent.parent
+
+TARGETS = {
+    "api": "app.main",
+    "worker": "app.core.celery_app",
+}
+
+# Bibliothèques qui ne doivent être chargées qu'à la première utilisation
+HEAVY_MODULES = ["shap", "sklearn", "lightgbm", "joblib", "xgboost", "tensorflow"]
+
+PROBE = """
+import sys, time, json, resource
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss est en octets sous macOS et en kilo-octets sous Linux
+rss_mb = rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+print(json.dumps({{
+    "import_seconds": elapsed,
+    "rss_mb": rss_mb,
+    "heavy_modules": [m for m in {heavy!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure(module: str) -> dict:
+    """Importer un module dans un interpréteur neuf et retourner les mesures"""
+    result = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module, heavy=HEAVY_MODULES)],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import de {module} impossible:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark du démarrage de l'API et du worker")
+    parser.add_argument("--runs", type=int, default=5, help="Nombre d'imports à froid par cible")
+    parser.add_argument("--targets", nargs="+", default=list(TARGETS), choices=list(TARGETS))
+    parser.add_argument("--output", help="Fichier JSONL où ajouter les résultats (suivi dans le temps)")
+    parser.add_argument("--max-seconds", type=float, help="Échouer si le temps médian dépasse ce seuil")
+    args = parser.parse_args()
+
+    report = {"timestamp": datetime.now().isoformat(), "python": sys.version.split()[0], "targets": {}}
+    failed = False
+
+    for target in args.targets:
+        module = TARGETS[target]
+        print(f"⏱️  {target} ({module}) - {args.runs} imports à froid...")
+        runs = [measure(module) for _ in range(args.runs)]
+
+        timings = [r["import_seconds"] for r in runs]
+        rss = [r["rss_mb"] for r in runs]
+        heavy = sorted({m for r in runs for m in r["heavy_modules"]})
+
+        summary = {
+            "module": module,
+            "import_seconds_median": statistics.median(timings),
+            "import_seconds_min": min(timings),
+            "rss_mb_median": statistics.median(rss),
+            "heavy_modules_loaded": heavy,
+        }
+        report["targets"][target] = summary
+
+        print(f"   - Import médian: {summary['import_seconds_median']:.2f}s (min {summary['import_seconds_min']:.2f}s)")
+        print(f"   - RSS médian: {summary['rss_mb_median']:.0f} MB")
+        if heavy:
+            print(f"   ⚠️  Bibliothèques lourdes chargées au démarrage: {', '.join(heavy)}")
+            failed = True
+        else:
+            print("   ✅ Aucune bibliothèque ML lourde chargée au démarrage")
+
+        if args.max_seconds and summary["import_seconds_median"] > args.max_seconds:
+            print(f"   ❌ Temps médian au-dessus du seuil ({args.max_seconds:.2f}s)")
+            failed = True
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with output.open("a") as f:
+            f.write(json.dumps(report) + "\n")
+        print(f"📝 Résultats ajoutés à {output}")
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Benchmark de l'inférence sur arbres aplatis (app/services/tree_inference.py)
+
+Compare, pour des forêts au format des modèles du screener (RandomForest 100 arbres, profondeur 10,
+et LightGBM binaire) :
+- screener : une ligne par modèle sur de nombreux modèles, predict_proba appelé modèle par modèle
+  contre un seul predict_many ;
+- batch : de nombreuses lignes sur un seul modèle, predict_proba contre FlatForest.predict_proba.
+
+Les sorties des deux chemins sont comparées (écart maximal des probabilités). Les modèles sont
+entraînés sur des données synthétiques, ou lus depuis les fichiers joblib donnés par --model-paths.
+
+Usage:
+    python scripts/benchmark_tree_inference.py --models 200 --rows 5000 --runs 5 --output benchmarks/tree_inference.jsonl
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+from pathlib import Path
+from datetime import datetime
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from app.services.feature_registry import MODEL_FEATURE_COLUMNS
+from app.services.tree_inference import FlatForest, predict_many
+
+
+def synthetic_models(kind: str, count: int, n_features: int, seed: int = 42):
+    """Modèles entraînés sur des données synthétiques (quelques NaN, comme les features réelles)"""
+    rng = np.random.default_rng(seed)
+    models = []
+    for i in range(count):
+        X = rng.normal(size=(1500, n_features))
+        X[rng.random(X.shape) < 0.02] = np.nan
+        y = (np.nan_to_num(X[:, i % n_features]) + rng.normal(scale=0.8, size=len(X)) > 0).astype(int)
+        if kind == "lightgbm":
+            import lightgbm as lgb
+            model = lgb.LGBMClassifier(n_estimators=100, num_leaves=31, verbose=-1, random_state=i)
+        else:
+            from sklearn.ensemble import RandomForestClassifier
+            model = RandomForestClassifier(n_estimators=100, max_depth=10, class_weight='balanced',
+                                           random_state=i, n_jobs=1)
+        models.append(model.fit(X, y))
+    return models
+
+
+def timed(function, runs: int):
+    """(résultat de la dernière mesure, durées)"""
+    timings = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return result, timings
+
+
+def summary(timings, calls: int) -> dict:
+    median = statistics.median(timings)
+    return {
+        "seconds_median": median,
+        "seconds_min": min(timings),
+        "rows_per_second": calls / median if median else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de l'inférence sur arbres aplatis")
+    parser.add_argument("--kind", default="random_forest", choices=["random_forest", "lightgbm"])
+    parser.add_argument("--models", type=int, default=100, help="Modèles du scénario screener (une ligne chacun)")
+    parser.add_argument("--rows", type=int, default=5000, help="Lignes du scénario batch (un modèle)")
+    parser.add_argument("--runs", type=int, default=3, help="Mesures par méthode")
+    parser.add_argument("--model-paths", nargs="*", default=None, help="Modèles joblib à utiliser au lieu des modèles synthétiques")
+    parser.add_argument("--output", help="Fichier JSONL où ajouter les résultats (suivi dans le temps)")
+    args = parser.parse_args()
+
+    if args.model_paths:
+        import joblib
+        models = [joblib.load(path) for path in args.model_paths]
+        kind = "joblib"
+    else:
+        print(f"🌲 Entraînement de {args.models} modèles {args.kind} synthétiques...")
+        models = synthetic_models(args.kind, args.models, len(MODEL_FEATURE_COLUMNS))
+        kind = args.kind
+
+    start = time.perf_counter()
+    forests = [FlatForest.from_model(model) for model in models]
+    conversion = time.perf_counter() - start
+    n_features = forests[0].n_features
+
+    rng = np.random.default_rng(0)
+    rows = [rng.normal(size=(1, forest.n_features)) for forest in forests]
+    X_batch = rng.normal(size=(args.rows, n_features))
+    X_batch[rng.random(X_batch.shape) < 0.02] = np.nan
+
+    report = {
+        "timestamp": datetime.now().isoformat(),
+        "kind": kind,
+        "models": len(models),
+        "trees": int(sum(forest.n_trees for forest in forests)),
+        "nodes": int(sum(forest.n_nodes for forest in forests)),
+        "conversion_seconds": conversion,
+        "scenarios": {},
+    }
+    print(f"⏱️  {len(models)} modèles convertis en {conversion:.2f}s ({report['nodes']:,} nœuds)")
+
+    # Scénario screener : une ligne par modèle
+    expected, sklearn_timings = timed(lambda: [model.predict_proba(x) for model, x in zip(models, rows)], args.runs)
+    flat, flat_timings = timed(lambda: predict_many(forests, rows), args.runs)
+    report["scenarios"]["screener"] = {
+        "rows": len(models),
+        "predict_proba": summary(sklearn_timings, len(models)),
+        "predict_many": summary(flat_timings, len(models)),
+        "max_abs_diff": float(max(np.abs(e - f).max() for e, f in zip(expected, flat))),
+    }
+
+    # Scénario batch : de nombreuses lignes, un modèle
+    model, forest = models[0], forests[0]
+    expected, sklearn_timings = timed(lambda: model.predict_proba(X_batch), args.runs)
+    flat, flat_timings = timed(lambda: forest.predict_proba(X_batch), args.runs)
+    report["scenarios"]["batch"] = {
+        "rows": args.rows,
+        "predict_proba": summary(sklearn_timings, args.rows),
+        "flat": summary(flat_timings, args.rows),
+        "max_abs_diff": float(np.abs(expected - flat).max()),
+    }
+
+    for name, scenario in report["scenarios"].items():
+        timings = [(method, values) for method, values in scenario.items() if isinstance(values, dict)]
+        reference = timings[0][1]["seconds_median"]
+        for method, values in timings:
+            speedup = reference / values["seconds_median"] if values["seconds_median"] else 0
+            print(f"   - {name:8s} {method:13s}: {values['seconds_median']:.4f}s (médiane), "
+                  f"{values['rows_per_second'] or 0:,.0f} lignes/s, x{speedup:.1f}")
+        status = "✅" if scenario["max_abs_diff"] < 1e-9 else "❌"
+        print(f"   {status} {name}: écart maximal des probabilités {scenario['max_abs_diff']:.2e}")
+
+    if args.output:
+        output = Path(args.output)
+        output.parent.mkdir(parents=True, exist_ok=True)
+        with output.open("a") as f:
+            f.write(json.dumps(report) + "\n")
+        print(f"📝 Résultats ajoutés à {output}")
+
+
+if __name__ == "__main__":
+    main()
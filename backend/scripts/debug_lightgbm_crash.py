@@ -114,21 +114,21 @@ def debug_lightgbm_crash():
                     'volume': float(hist.volume),
                     
                     # Indicateurs techniques
-                    'sma_5': float(tech.sma_5) if tech.sma_5 else 0,
-                    'sma_10': float(tech.sma_10) if tech.sma_10 else 0,
-                    'sma_20': float(tech.sma_20) if tech.sma_20 else 0,
-                    'rsi_14': float(tech.rsi_14) if tech.rsi_14 else 0,
-                    'macd': float(tech.macd) if tech.macd else 0,
-                    'bb_upper': float(tech.bb_upper) if tech.bb_upper else 0,
-                    'bb_lower': float(tech.bb_lower) if tech.bb_lower else 0,
-                    'atr_14': float(tech.atr_14) if tech.atr_14 else 0,
-                    'obv': float(tech.obv) if tech.obv else 0,
+                    'sma_5': float(tech.sma_5) if tech.sma_5 is not None else 0,
+                    'sma_10': float(tech.sma_10) if tech.sma_10 is not None else 0,
+                    'sma_20': float(tech.sma_20) if tech.sma_20 is not None else 0,
+                    'rsi_14': float(tech.rsi_14) if tech.rsi_14 is not None else 0,
+                    'macd': float(tech.macd) if tech.macd is not None else 0,
+                    'bb_upper': float(tech.bb_upper) if tech.bb_upper is not None else 0,
+                    'bb_lower': float(tech.bb_lower) if tech.bb_lower is not None else 0,
+                    'atr_14': float(tech.atr_14) if tech.atr_14 is not None else 0,
+                    'obv': float(tech.obv) if tech.obv is not None else 0,
                     
                     # Indicateurs de sentiment
-                    'sentiment_score_normalized': float(sent.sentiment_score_normalized) if sent.sentiment_score_normalized else 0,
-                    'sentiment_momentum_1d': float(sent.sentiment_momentum_1d) if sent.sentiment_momentum_1d else 0,
-                    'sentiment_volatility_3d': float(sent.sentiment_volatility_3d) if sent.sentiment_volatility_3d else 0,
-                    'news_positive_ratio': float(sent.news_positive_ratio) if sent.news_positive_ratio else 0,
+                    'sentiment_score_normalized': float(sent.sentiment_score_normalized) if sent.sentiment_score_normalized is not None else 0,
+                    'sentiment_momentum_1d': float(sent.sentiment_momentum_1d) if sent.sentiment_momentum_1d is not None else 0,
+                    'sentiment_volatility_3d': float(sent.sentiment_volatility_3d) if sent.sentiment_volatility_3d is not None else 0,
+                    'news_positive_ratio': float(sent.news_positive_ratio) if sent.news_positive_ratio is not None else 0,
                 }
                 data.append(row)
             
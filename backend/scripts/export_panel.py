@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Export du panel historique + technique + sentiment en Parquet ou Arrow IPC
+
+Par défaut le panel est téléchargé en streaming depuis l'API (/api/v1/data/export) ; avec
+--local il est lu directement en base par curseur côté serveur. Dans les deux cas l'écriture
+se fait lot par lot, à mémoire constante.
+
+Usage:
+    python scripts/export_panel.py --symbols AAPL MSFT --start-date 2020-01-01 --output panel.parquet
+    python scripts/export_panel.py --local --format arrow --output panel.arrow
+"""
+import os
+import sys
+import time
+import argparse
+from datetime import date
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def export_from_api(args) -> int:
+    """Télécharger l'export de l'API et l'écrire au fil de l'eau"""
+    import httpx
+
+    params = {"format": args.format}
+    if args.symbols:
+        params["symbols"] = args.symbols
+    if args.start_date:
+        params["start_date"] = args.start_date.isoformat()
+    if args.end_date:
+        params["end_date"] = args.end_date.isoformat()
+
+    written = 0
+    with httpx.stream("GET", f"{args.base_url}/api/v1/data/export", params=params, timeout=None) as response:
+        if response.status_code != 200:
+            response.read()
+            raise RuntimeError(f"HTTP {response.status_code}: {response.text}")
+        with open(args.output, "wb") as output:
+            for chunk in response.iter_bytes():
+                output.write(chunk)
+                written += len(chunk)
+    return written
+
+
+def export_from_database(args) -> int:
+    """Lire le panel directement en base et l'écrire au fil de l'eau"""
+    from app.services.export_service import stream_panel
+
+    written = 0
+    with open(args.output, "wb") as output:
+        for chunk in stream_panel(args.format, args.symbols, args.start_date, args.end_date, args.batch_size):
+            output.write(chunk)
+            written += len(chunk)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export du panel en Parquet ou Arrow IPC")
+    parser.add_argument("--symbols", nargs="*", default=None, help="Symboles exportés (tous si absent)")
+    parser.add_argument("--start-date", type=date.fromisoformat, default=None)
+    parser.add_argument("--end-date", type=date.fromisoformat, default=None)
+    parser.add_argument("--format", choices=["parquet", "arrow"], default="parquet")
+    parser.add_argument("--output", required=True, help="Fichier de sortie")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--local", action="store_true", help="Lire directement en base au lieu de passer par l'API")
+    parser.add_argument("--batch-size", type=int, default=None, help="Lignes par lot (mode --local)")
+    args = parser.parse_args()
+
+    source = "base de données" if args.local else args.base_url
+    print(f"📦 Export {args.format} du panel depuis {source} vers {args.output}...")
+    start = time.perf_counter()
+
+    try:
+        written = export_from_database(args) if args.local else export_from_api(args)
+    except Exception as e:
+        print(f"❌ Erreur lors de l'export: {str(e)}")
+        sys.exit(1)
+
+    elapsed = time.perf_counter() - start
+    print(f"✅ {written / (1024 * 1024):.1f} Mo écrits en {elapsed:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
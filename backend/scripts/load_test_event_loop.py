@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""
+Test de charge : latence des routes légères pendant un entraînement
+
+Interroge en continu /health et /api/v1/data/historical/{symbol} pendant une phase de référence,
+puis pendant un ou plusieurs entraînements lancés sur l'API. Si la boucle d'événements est
+bloquée par l'entraînement, le p99 de la seconde phase explose.
+
+Usage:
+    python scripts/load_test_event_loop.py --base-url http://localhost:8000 --symbol AAPL \
+        --train-path "/api/v1/ml-models/train" \
+        --train-json '{"symbol": "AAPL", "target_parameter_id": 1, "model_type": "classification"}'
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import statistics
+from typing import Dict, List, Optional
+
+import httpx
+
+PROBES = {
+    "health": "/health",
+    "historical": "/api/v1/data/historical/{symbol}?limit=100",
+}
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Percentile (méthode du rang le plus proche)"""
+    if not values:
+        return float("nan")
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def probe_loop(client: httpx.AsyncClient, path: str, stop_at: float,
+                     latencies: List[float], errors: List[str]):
+    """Envoyer des requêtes en boucle jusqu'à stop_at en mesurant la latence"""
+    while time.perf_counter() < stop_at:
+        start = time.perf_counter()
+        try:
+            response = await client.get(path)
+            if response.status_code >= 500:
+                errors.append(f"HTTP {response.status_code}")
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+
+async def run_phase(client: httpx.AsyncClient, symbol: str, duration: float,
+                    concurrency: int) -> Dict[str, Dict[str, float]]:
+    """Mesurer la latence de chaque sonde pendant `duration` secondes"""
+    stop_at = time.perf_counter() + duration
+    samples = {name: ([], []) for name in PROBES}
+
+    await asyncio.gather(*[
+        probe_loop(client, path.format(symbol=symbol), stop_at, *samples[name])
+        for name, path in PROBES.items()
+        for _ in range(concurrency)
+    ])
+
+    return {
+        name: {
+            "requests": len(latencies),
+            "errors": len(errors),
+            "p50_ms": statistics.median(latencies) if latencies else float("nan"),
+            "p99_ms": percentile(latencies, 99),
+            "max_ms": max(latencies) if latencies else float("nan"),
+        }
+        for name, (latencies, errors) in samples.items()
+    }
+
+
+async def start_training(client: httpx.AsyncClient, path: str, body: Optional[dict]) -> Dict:
+    """Lancer un entraînement et retourner son statut et sa durée"""
+    start = time.perf_counter()
+    try:
+        response = await client.post(path, json=body, timeout=None)
+        status = response.status_code
+    except httpx.HTTPError as e:
+        status = type(e).__name__
+    return {"status": status, "duration_s": time.perf_counter() - start}
+
+
+def print_phase(title: str, results: Dict[str, Dict[str, float]]):
+    print(f"\n📊 {title}")
+    for name, stats in results.items():
+        print(f"   - {name:<11} {stats['requests']:>6} req | p50 {stats['p50_ms']:8.1f} ms | "
+              f"p99 {stats['p99_ms']:8.1f} ms | max {stats['max_ms']:8.1f} ms | erreurs {stats['errors']}")
+
+
+async def main_async(args) -> int:
+    body = json.loads(args.train_json) if args.train_json else None
+
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout) as client:
+        print(f"⏱️  Phase de référence ({args.duration:.0f}s, {args.concurrency} clients par sonde)...")
+        baseline = await run_phase(client, args.symbol, args.duration, args.concurrency)
+        print_phase("Référence", baseline)
+
+        print(f"\n🏋️  Lancement de {args.trainings} entraînement(s) sur {args.train_path}...")
+        trainings = [asyncio.create_task(start_training(client, args.train_path, body))
+                     for _ in range(args.trainings)]
+        # Laisser les entraînements démarrer avant de mesurer
+        await asyncio.sleep(1)
+        under_load = await run_phase(client, args.symbol, args.duration, args.concurrency)
+        print_phase("Pendant l'entraînement", under_load)
+
+        training_results = await asyncio.gather(*trainings)
+        for i, result in enumerate(training_results, start=1):
+            print(f"   🏁 Entraînement {i}: statut {result['status']} en {result['duration_s']:.1f}s")
+
+    failed = False
+    print("\n📈 Évolution du p99")
+    for name in PROBES:
+        ratio = under_load[name]["p99_ms"] / max(baseline[name]["p99_ms"], 1e-6)
+        ok = ratio <= args.max_ratio
+        failed |= not ok
+        print(f"   {'✅' if ok else '❌'} {name}: x{ratio:.2f} (seuil x{args.max_ratio:.1f})")
+
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence des routes légères pendant un entraînement")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--symbol", default="AAPL")
+    parser.add_argument("--duration", type=float, default=20.0, help="Durée de chaque phase (secondes)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Clients simultanés par sonde")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout des sondes (secondes)")
+    parser.add_argument("--train-path", default="/api/v1/ml-models/train")
+    parser.add_argument("--train-json", default=None, help="Corps JSON de la requête d'entraînement")
+    parser.add_argument("--trainings", type=int, default=1, help="Entraînements lancés simultanément")
+    parser.add_argument("--max-ratio", type=float, default=3.0,
+                        help="Dégradation maximale tolérée du p99 par rapport à la référence")
+    args = parser.parse_args()
+
+    sys.exit(asyncio.run(main_async(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+"""
+Script de migration pour la validation HTTP (ETag) des séries temporelles
+
+- crée les index (symbol, updated_at) lus par le calcul de version des routes /data ;
+- ajoute un trigger qui met à jour updated_at à chaque UPDATE : les scripts d'import écrivent
+  par INSERT ... ON CONFLICT DO UPDATE en SQL brut, sans passer par l'onupdate de l'ORM.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+TABLES = ["historical_data", "technical_indicators", "sentiment_indicators"]
+
+def migrate_data_etag():
+    """Crée les index et triggers updated_at des tables de séries temporelles"""
+
+    engine = create_engine(settings.database_url)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            print("🔧 Création de la fonction de mise à jour de updated_at...")
+            conn.execute(text("""
+                CREATE OR REPLACE FUNCTION public.set_updated_at()
+                RETURNS TRIGGER AS $$
+                BEGIN
+                    NEW.updated_at = CURRENT_TIMESTAMP;
+                    RETURN NEW;
+                END;
+                $$ LANGUAGE plpgsql;
+            """))
+
+            for table in TABLES:
+                print(f"🔍 Index et trigger de {table}...")
+                conn.execute(text(f"""
+                    CREATE INDEX IF NOT EXISTS ix_{table}_symbol_updated_at
+                    ON public.{table}(symbol, updated_at);
+                """))
+                conn.execute(text(f"DROP TRIGGER IF EXISTS trg_{table}_updated_at ON public.{table};"))
+                conn.execute(text(f"""
+                    CREATE TRIGGER trg_{table}_updated_at
+                    BEFORE UPDATE ON public.{table}
+                    FOR EACH ROW EXECUTE FUNCTION public.set_updated_at();
+                """))
+
+            trans.commit()
+            print("✅ Index et triggers updated_at créés avec succès!")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"❌ Erreur lors de la migration: {str(e)}")
+            raise e
+
+if __name__ == "__main__":
+    try:
+        migrate_data_etag()
+        print("🎉 Migration ETag des séries temporelles terminée avec succès!")
+
+    except Exception as e:
+        print(f"💥 Erreur lors de la migration: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Script de migration pour le magasin de features
+
+Crée les tables feature_sets (ordre des colonnes de chaque version du jeu de features) et
+feature_vectors (un vecteur float32 par version, symbole et date). Le remplissage initial se fait
+ensuite avec scripts/refresh_feature_store.py --full.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+def migrate_feature_store():
+    """Crée les tables du magasin de features"""
+
+    engine = create_engine(settings.database_url)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            print("🔧 Création de la table feature_sets...")
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS public.feature_sets (
+                    feature_set_version VARCHAR(32) PRIMARY KEY,
+                    feature_names JSON NOT NULL,
+                    created_at TIMESTAMP DEFAULT NOW()
+                );
+            """))
+
+            print("🔧 Création de la table feature_vectors...")
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS public.feature_vectors (
+                    feature_set_version VARCHAR(32) NOT NULL REFERENCES public.feature_sets (feature_set_version),
+                    symbol VARCHAR(10) NOT NULL,
+                    date DATE NOT NULL,
+                    features REAL[] NOT NULL,
+                    updated_at TIMESTAMP DEFAULT NOW(),
+                    PRIMARY KEY (feature_set_version, symbol, date)
+                );
+            """))
+
+            print("🔍 Création des index...")
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_feature_vectors_version_date
+                ON public.feature_vectors (feature_set_version, date);
+            """))
+
+            trans.commit()
+            print("✅ Tables du magasin de features créées avec succès!")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"❌ Erreur lors de la migration: {str(e)}")
+            raise e
+
+if __name__ == "__main__":
+    try:
+        migrate_feature_store()
+        print("🎉 Migration du magasin de features terminée avec succès!")
+
+    except Exception as e:
+        print(f"💥 Erreur lors de la migration: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Script de migration (optionnelle) des colonnes d'indicateurs de NUMERIC vers double precision / real
+
+Toutes les colonnes NUMERIC de technical_indicators et sentiment_indicators sont converties en une
+seule réécriture par table (un ALTER TABLE avec une clause par colonne). Les prix de historical_data
+restent en NUMERIC. Après la migration, définir DB_INDICATOR_COLUMN_TYPE=double (ou real) pour que
+les modèles SQLAlchemy lisent des float au lieu de Decimal.
+
+Usage:
+    python scripts/migrate_float_columns.py                 # double precision
+    python scripts/migrate_float_columns.py --type real --tables sentiment_indicators
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+INDICATOR_TABLES = ["technical_indicators", "sentiment_indicators"]
+
+COLUMN_TYPES = {
+    "double": "double precision",
+    "real": "real",
+}
+
+
+def migrate_float_columns(tables, column_type: str = "double"):
+    """Convertir les colonnes NUMERIC des tables d'indicateurs en flottants"""
+
+    engine = create_engine(settings.database_url)
+    sql_type = COLUMN_TYPES[column_type]
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            for table in tables:
+                columns = conn.execute(text("""
+                    SELECT column_name FROM information_schema.columns
+                    WHERE table_schema = 'public' AND table_name = :table AND data_type = 'numeric'
+                    ORDER BY ordinal_position
+                """), {"table": table}).scalars().all()
+
+                if not columns:
+                    print(f"⏭️  {table}: aucune colonne NUMERIC à convertir")
+                    continue
+
+                print(f"🔧 {table}: conversion de {len(columns)} colonnes en {sql_type}...")
+                clauses = ", ".join(
+                    f'ALTER COLUMN "{column}" TYPE {sql_type} USING "{column}"::{sql_type}' for column in columns
+                )
+                conn.execute(text(f"ALTER TABLE public.{table} {clauses}"))
+
+            trans.commit()
+            print("✅ Colonnes d'indicateurs converties avec succès!")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"❌ Erreur lors de la migration: {str(e)}")
+            raise e
+
+    # Statistiques à jour pour le planificateur après la réécriture des tables
+    with engine.connect() as conn:
+        for table in tables:
+            conn.execute(text(f"ANALYZE public.{table}"))
+        conn.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Conversion des colonnes d'indicateurs en flottants")
+    parser.add_argument("--type", choices=list(COLUMN_TYPES), default="double", dest="column_type")
+    parser.add_argument("--tables", nargs="*", choices=INDICATOR_TABLES, default=INDICATOR_TABLES)
+    args = parser.parse_args()
+
+    try:
+        migrate_float_columns(args.tables, args.column_type)
+        print("🎉 Migration des colonnes d'indicateurs terminée avec succès!")
+        print(f"👉 Définir DB_INDICATOR_COLUMN_TYPE={args.column_type} puis redémarrer l'API et les workers")
+
+    except Exception as e:
+        print(f"💥 Erreur lors de la migration: {str(e)}")
+        sys.exit(1)
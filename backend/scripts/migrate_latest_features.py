@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Script de migration pour la vue matérialisée latest_features
+
+Crée la vue (une ligne par symbole actif : dernière barre, indicateurs, sentiment et vecteur du
+magasin de features) et son index unique sur symbol, nécessaire au REFRESH ... CONCURRENTLY.
+À lancer après scripts/migrate_feature_store.py ; redémarrer ensuite l'API et les workers.
+
+Usage:
+    python scripts/migrate_latest_features.py
+    python scripts/migrate_latest_features.py --recreate   # après un changement du registre de features
+"""
+
+import sys
+import os
+import argparse
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+from app.services.latest_features import LATEST_FEATURES_VIEW, create_view_sql
+
+def migrate_latest_features(recreate: bool = False):
+    """Crée la vue matérialisée latest_features et ses index"""
+
+    engine = create_engine(settings.database_url)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            if recreate:
+                print(f"🗑️  Suppression de la vue {LATEST_FEATURES_VIEW}...")
+                conn.execute(text(f"DROP MATERIALIZED VIEW IF EXISTS public.{LATEST_FEATURES_VIEW};"))
+
+            print(f"🔧 Création de la vue matérialisée {LATEST_FEATURES_VIEW}...")
+            conn.execute(text(create_view_sql()))
+
+            print("🔍 Création des index...")
+            conn.execute(text(f"""
+                CREATE UNIQUE INDEX IF NOT EXISTS ux_{LATEST_FEATURES_VIEW}_symbol
+                ON public.{LATEST_FEATURES_VIEW} (symbol);
+            """))
+
+            trans.commit()
+            print(f"✅ Vue {LATEST_FEATURES_VIEW} créée avec succès!")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"❌ Erreur lors de la migration: {str(e)}")
+            raise e
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Création de la vue matérialisée latest_features")
+    parser.add_argument("--recreate", action="store_true", help="Supprimer puis recréer la vue")
+    args = parser.parse_args()
+
+    try:
+        migrate_latest_features(args.recreate)
+        print("🎉 Migration de latest_features terminée avec succès!")
+
+    except Exception as e:
+        print(f"💥 Erreur lors de la migration: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Script de migration pour la recherche d'hyperparamètres LightGBM
+
+Crée la table lightgbm_hyperparameters (meilleurs paramètres par symbole ou par secteur et par
+type de modèle), remplie par la tâche tune_lightgbm_hyperparameters et lue par les entraînements.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+def migrate_lightgbm_tuning():
+    """Crée la table des hyperparamètres LightGBM"""
+
+    engine = create_engine(settings.database_url)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            print("🔧 Création de la table lightgbm_hyperparameters...")
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS public.lightgbm_hyperparameters (
+                    id SERIAL PRIMARY KEY,
+                    scope VARCHAR(10) NOT NULL,
+                    scope_value VARCHAR(100) NOT NULL,
+                    model_kind VARCHAR(20) NOT NULL,
+                    params JSON NOT NULL,
+                    metric VARCHAR(30) NOT NULL,
+                    best_score DOUBLE PRECISION,
+                    best_iteration INTEGER,
+                    trials INTEGER,
+                    created_at TIMESTAMP DEFAULT NOW(),
+                    updated_at TIMESTAMP DEFAULT NOW(),
+                    CONSTRAINT uq_lightgbm_hyperparameters_scope_kind UNIQUE (scope, scope_value, model_kind)
+                );
+            """))
+
+            trans.commit()
+            print("✅ Table lightgbm_hyperparameters créée avec succès!")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"❌ Erreur lors de la migration: {str(e)}")
+            raise e
+
+if __name__ == "__main__":
+    try:
+        migrate_lightgbm_tuning()
+        print("🎉 Migration de la recherche d'hyperparamètres terminée avec succès!")
+
+    except Exception as e:
+        print(f"💥 Erreur lors de la migration: {str(e)}")
+        sys.exit(1)
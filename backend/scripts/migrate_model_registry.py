@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Script de migration pour le registre des modèles
+
+Crée la table model_artifacts (index des fichiers des modèles par empreinte SHA-256, cf.
+app/services/model_registry.py) et l'index sur ml_models(model_name, model_version) utilisé pour
+allouer les versions, puis indexe les fichiers des modèles existants.
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+from app.services.model_registry import artifact_paths, file_digest
+
+def migrate_model_registry():
+    """Crée la table d'index des fichiers et indexe les modèles existants"""
+
+    engine = create_engine(settings.database_url)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            print("🔧 Création de la table model_artifacts...")
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS public.model_artifacts (
+                    id SERIAL PRIMARY KEY,
+                    model_id INTEGER NOT NULL REFERENCES public.ml_models(id) ON DELETE CASCADE,
+                    kind VARCHAR(20) NOT NULL,
+                    path TEXT NOT NULL UNIQUE,
+                    sha256 VARCHAR(64) NOT NULL,
+                    size_bytes BIGINT NOT NULL,
+                    created_at TIMESTAMP DEFAULT NOW()
+                );
+            """))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_model_artifacts_model_id ON public.model_artifacts (model_id);"))
+            conn.execute(text("CREATE INDEX IF NOT EXISTS ix_model_artifacts_sha256 ON public.model_artifacts (sha256);"))
+
+            print("🔧 Création de l'index des versions de ml_models...")
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_ml_models_name_version
+                ON public.ml_models (model_name, model_version);
+            """))
+
+            print("🔧 Indexation des fichiers des modèles existants...")
+            models = conn.execute(text(
+                "SELECT id, model_path FROM public.ml_models WHERE model_path IS NOT NULL ORDER BY id"
+            )).fetchall()
+            indexed = 0
+            for model_id, model_path in models:
+                for kind, path in artifact_paths(model_path).items():
+                    if not os.path.exists(path):
+                        continue
+                    conn.execute(text("""
+                        INSERT INTO public.model_artifacts (model_id, kind, path, sha256, size_bytes)
+                        VALUES (:model_id, :kind, :path, :sha256, :size_bytes)
+                        ON CONFLICT (path) DO NOTHING
+                    """), {
+                        "model_id": model_id,
+                        "kind": kind,
+                        "path": path,
+                        "sha256": file_digest(path),
+                        "size_bytes": os.path.getsize(path),
+                    })
+                    indexed += 1
+            print(f"   {indexed} fichiers indexés pour {len(models)} modèles")
+
+            trans.commit()
+            print("✅ Table model_artifacts créée avec succès!")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"❌ Erreur lors de la migration: {str(e)}")
+            raise e
+
+if __name__ == "__main__":
+    try:
+        migrate_model_registry()
+        print("🎉 Migration du registre des modèles terminée avec succès!")
+
+    except Exception as e:
+        print(f"💥 Erreur lors de la migration: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Script de migration vers des tables partitionnées par année
+
+Pour chaque table (historical_data, technical_indicators, sentiment_indicators, ml_predictions) :
+la table existante est renommée en <table>_legacy, une table partitionnée (RANGE sur la date)
+de même structure la remplace avec ses contraintes et index, une partition est créée par année
+présente dans les données (plus les années à venir et une partition DEFAULT), puis les lignes
+sont recopiées. Chaque table est migrée dans sa propre transaction.
+
+Usage:
+    python scripts/migrate_partitioning.py                       # toutes les tables
+    python scripts/migrate_partitioning.py --tables historical_data --drop-legacy
+    python scripts/migrate_partitioning.py --archive-before 2005  # détacher les années < 2005
+"""
+
+import sys
+import os
+import argparse
+from datetime import date
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+from app.core.partitioning import (
+    PARTITIONED_TABLES, is_partitioned, ensure_year_partitions, create_default_partition, detach_year_partition
+)
+
+# Contraintes et index recréés sur la table partitionnée (ils incluent tous la colonne de partitionnement
+# ou sont de simples index)
+TABLE_DDL = {
+    "historical_data": [
+        "ALTER TABLE public.historical_data ADD CONSTRAINT historical_data_symbol_date_key UNIQUE (symbol, date)",
+        "CREATE INDEX IF NOT EXISTS ix_historical_data_symbol_updated_at ON public.historical_data (symbol, updated_at)",
+        "CREATE INDEX IF NOT EXISTS ix_historical_data_date ON public.historical_data (date)",
+    ],
+    "technical_indicators": [
+        "ALTER TABLE public.technical_indicators ADD CONSTRAINT technical_indicators_symbol_date_key UNIQUE (symbol, date)",
+        "CREATE INDEX IF NOT EXISTS ix_technical_indicators_symbol_updated_at ON public.technical_indicators (symbol, updated_at)",
+        "CREATE INDEX IF NOT EXISTS ix_technical_indicators_date ON public.technical_indicators (date)",
+    ],
+    "sentiment_indicators": [
+        "ALTER TABLE public.sentiment_indicators ADD CONSTRAINT sentiment_indicators_symbol_date_key UNIQUE (symbol, date)",
+        "CREATE INDEX IF NOT EXISTS ix_sentiment_indicators_symbol_updated_at ON public.sentiment_indicators (symbol, updated_at)",
+        "CREATE INDEX IF NOT EXISTS ix_sentiment_indicators_date ON public.sentiment_indicators (date)",
+    ],
+    "ml_predictions": [
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_ml_predictions_run_model_date "
+        "ON public.ml_predictions (screener_run_id, model_id, symbol, prediction_date)",
+        "CREATE INDEX IF NOT EXISTS ix_ml_predictions_symbol_date ON public.ml_predictions (symbol, prediction_date)",
+        "CREATE INDEX IF NOT EXISTS ix_ml_predictions_screener_run_id ON public.ml_predictions (screener_run_id)",
+        "ALTER TABLE public.ml_predictions ADD CONSTRAINT ml_predictions_model_id_fkey "
+        "FOREIGN KEY (model_id) REFERENCES public.ml_models (id)",
+        "ALTER TABLE public.ml_predictions ADD CONSTRAINT ml_predictions_screener_run_id_fkey "
+        "FOREIGN KEY (screener_run_id) REFERENCES public.screener_runs (id)",
+    ],
+}
+
+
+def rename_legacy_objects(conn, table: str):
+    """Renommer la table existante, ses index et ses contraintes de clé étrangère (suffixe _legacy)"""
+    legacy = f"{table}_legacy"
+    conn.execute(text(f"ALTER TABLE public.{table} RENAME TO {legacy}"))
+
+    indexes = conn.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE schemaname = 'public' AND tablename = :table"
+    ), {"table": legacy}).scalars().all()
+    for index in indexes:
+        conn.execute(text(f'ALTER INDEX public."{index}" RENAME TO "{index[:55]}_legacy"'))
+
+    foreign_keys = conn.execute(text("""
+        SELECT conname FROM pg_constraint
+        WHERE conrelid = CAST(:table AS regclass) AND contype = 'f'
+    """), {"table": f"public.{legacy}"}).scalars().all()
+    for constraint in foreign_keys:
+        conn.execute(text(f'ALTER TABLE public.{legacy} RENAME CONSTRAINT "{constraint}" TO "{constraint[:55]}_legacy"'))
+
+
+def migrate_table(engine, table: str, drop_legacy: bool):
+    """Convertir une table en table partitionnée par année"""
+    column = PARTITIONED_TABLES[table]
+    legacy = f"{table}_legacy"
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            if is_partitioned(conn, table):
+                print(f"⏭️  {table} est déjà partitionnée")
+                trans.rollback()
+                return
+
+            print(f"🔧 Migration de {table} (partitionnement par {column})...")
+            rename_legacy_objects(conn, table)
+
+            conn.execute(text(f"""
+                CREATE TABLE public.{table} (LIKE public.{legacy} INCLUDING DEFAULTS)
+                PARTITION BY RANGE ({column})
+            """))
+            conn.execute(text(f"ALTER TABLE public.{table} ADD CONSTRAINT {table}_pkey PRIMARY KEY (id, {column})"))
+
+            # La séquence de l'id suit la nouvelle table (elle ne doit pas disparaître avec l'ancienne)
+            sequence = conn.execute(text("SELECT pg_get_serial_sequence(:table, 'id')"),
+                                    {"table": f"public.{legacy}"}).scalar()
+            if sequence:
+                conn.execute(text(f"ALTER SEQUENCE {sequence} OWNED BY public.{table}.id"))
+
+            for statement in TABLE_DDL[table]:
+                conn.execute(text(statement))
+
+            # Trigger updated_at (cf. scripts/migrate_data_etag.py) si la fonction existe
+            has_trigger_function = conn.execute(text(
+                "SELECT EXISTS (SELECT 1 FROM pg_proc WHERE proname = 'set_updated_at')"
+            )).scalar()
+            if has_trigger_function and table != "ml_predictions":
+                conn.execute(text(f"""
+                    CREATE TRIGGER trg_{table}_updated_at
+                    BEFORE UPDATE ON public.{table}
+                    FOR EACH ROW EXECUTE FUNCTION public.set_updated_at()
+                """))
+
+            first_year = conn.execute(text(f"SELECT EXTRACT(YEAR FROM MIN({column}))::int FROM public.{legacy}")).scalar()
+            partitions = ensure_year_partitions(conn, table, first_year or date.today().year)
+            create_default_partition(conn, table)
+            print(f"   - {len(partitions)} partitions annuelles + DEFAULT")
+
+            result = conn.execute(text(f"INSERT INTO public.{table} SELECT * FROM public.{legacy}"))
+            print(f"   - {result.rowcount} lignes recopiées")
+
+            if drop_legacy:
+                conn.execute(text(f"DROP TABLE public.{legacy}"))
+                print(f"   - {legacy} supprimée")
+
+            trans.commit()
+
+        except Exception as e:
+            trans.rollback()
+            print(f"❌ Erreur lors de la migration de {table}: {str(e)}")
+            raise e
+
+    # ANALYZE hors transaction pour que le planificateur connaisse les nouvelles partitions
+    with engine.connect() as conn:
+        conn.execute(text(f"ANALYZE public.{table}"))
+        conn.commit()
+    print(f"✅ {table} partitionnée avec succès!")
+
+
+def archive_partitions(engine, tables, before_year: int):
+    """Détacher les partitions des années antérieures à before_year"""
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            for table in tables:
+                years = conn.execute(text("""
+                    SELECT c.relname FROM pg_inherits i
+                    JOIN pg_class c ON c.oid = i.inhrelid
+                    WHERE i.inhparent = CAST(:table AS regclass)
+                """), {"table": f"public.{table}"}).scalars().all()
+                for name in years:
+                    suffix = name.rsplit("_y", 1)[-1]
+                    if suffix.isdigit() and int(suffix) < before_year:
+                        detach_year_partition(conn, table, int(suffix))
+                        print(f"📦 {name} détachée (archivable)")
+
+            trans.commit()
+
+        except Exception as e:
+            trans.rollback()
+            print(f"❌ Erreur lors de l'archivage: {str(e)}")
+            raise e
+
+
+def migrate_partitioning(tables, drop_legacy: bool = False, archive_before: int = None):
+    """Partitionner les tables demandées, puis archiver les années anciennes si demandé"""
+    engine = create_engine(settings.database_url)
+
+    for table in tables:
+        migrate_table(engine, table, drop_legacy)
+
+    if archive_before:
+        archive_partitions(engine, tables, archive_before)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Partitionnement par année des grandes tables")
+    parser.add_argument("--tables", nargs="*", choices=list(PARTITIONED_TABLES), default=list(PARTITIONED_TABLES))
+    parser.add_argument("--drop-legacy", action="store_true", help="Supprimer les tables <table>_legacy après copie")
+    parser.add_argument("--archive-before", type=int, default=None,
+                        help="Détacher les partitions des années antérieures à cette année")
+    args = parser.parse_args()
+
+    try:
+        migrate_partitioning(args.tables, args.drop_legacy, args.archive_before)
+        print("🎉 Migration du partitionnement terminée avec succès!")
+
+    except Exception as e:
+        print(f"💥 Erreur lors de la migration: {str(e)}")
+        sys.exit(1)
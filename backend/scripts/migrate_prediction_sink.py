@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Script de migration pour l'écriture groupée des prédictions
+
+Supprime les doublons de ml_predictions puis crée l'index unique utilisé par les
+INSERT ... ON CONFLICT DO NOTHING du puits de prédictions (app/services/prediction_sink.py).
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+def migrate_prediction_sink():
+    """Dédoublonne ml_predictions et crée l'index unique"""
+    
+    engine = create_engine(settings.database_url)
+    
+    with engine.connect() as conn:
+        trans = conn.begin()
+        
+        try:
+            # Garder la première prédiction de chaque (run, modèle, symbole, date)
+            print("🧹 Suppression des prédictions en double...")
+            result = conn.execute(text("""
+                DELETE FROM public.ml_predictions p
+                USING public.ml_predictions d
+                WHERE p.screener_run_id IS NOT NULL
+                  AND p.screener_run_id = d.screener_run_id
+                  AND p.model_id = d.model_id
+                  AND p.symbol = d.symbol
+                  AND p.prediction_date = d.prediction_date
+                  AND p.id > d.id;
+            """))
+            print(f"   - {result.rowcount} doublons supprimés")
+            
+            print("🔍 Création de l'index unique...")
+            conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_ml_predictions_run_model_date
+                ON public.ml_predictions(screener_run_id, model_id, symbol, prediction_date);
+            """))
+            
+            trans.commit()
+            print("✅ Index unique des prédictions créé avec succès!")
+            
+        except Exception as e:
+            trans.rollback()
+            print(f"❌ Erreur lors de la migration: {str(e)}")
+            raise e
+
+if __name__ == "__main__":
+    try:
+        migrate_prediction_sink()
+        print("🎉 Migration du puits de prédictions terminée avec succès!")
+        
+    except Exception as e:
+        print(f"💥 Erreur lors de la migration: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Script de migration pour créer la table des explications SHAP précalculées
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+def create_shap_explanations_table():
+    """Crée la table shap_explanations et ses index"""
+    
+    engine = create_engine(settings.database_url)
+    
+    with engine.connect() as conn:
+        trans = conn.begin()
+        
+        try:
+            print("🧠 Création de la table shap_explanations...")
+            conn.execute(text("""
+                CREATE TABLE IF NOT EXISTS public.shap_explanations (
+                    id SERIAL PRIMARY KEY,
+                    model_id INTEGER NOT NULL,
+                    symbol VARCHAR(10) NOT NULL,
+                    prediction_date DATE NOT NULL,
+                    prediction DECIMAL(15,8),
+                    base_value DECIMAL(15,8),
+                    explanations JSON NOT NULL,
+                    screener_run_id INTEGER,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (model_id) REFERENCES public.ml_models(id),
+                    FOREIGN KEY (screener_run_id) REFERENCES public.screener_runs(id)
+                );
+            """))
+            
+            print("🔍 Création des index...")
+            conn.execute(text("""
+                CREATE UNIQUE INDEX IF NOT EXISTS uq_shap_explanations_model_symbol_date
+                    ON public.shap_explanations(model_id, symbol, prediction_date);
+                CREATE INDEX IF NOT EXISTS idx_shap_explanations_symbol ON public.shap_explanations(symbol);
+                CREATE INDEX IF NOT EXISTS idx_shap_explanations_screener_run_id ON public.shap_explanations(screener_run_id);
+            """))
+            
+            trans.commit()
+            print("✅ Table shap_explanations créée avec succès!")
+            
+        except Exception as e:
+            trans.rollback()
+            print(f"❌ Erreur lors de la création de la table: {str(e)}")
+            raise e
+
+if __name__ == "__main__":
+    try:
+        create_shap_explanations_table()
+        print("🎉 Migration des explications SHAP terminée avec succès!")
+        
+    except Exception as e:
+        print(f"💥 Erreur lors de la migration: {str(e)}")
+        sys.exit(1)
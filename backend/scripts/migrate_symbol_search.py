@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Script de migration pour la recherche de symboles
+
+Active l'extension pg_trgm et crée les index GIN trigrammes de symbol_metadata : les recherches
+ILIKE '%...%' faites en SQL (autres services, requêtes ad hoc) n'ont plus à parcourir la table.
+La recherche instantanée de l'API utilise l'index en mémoire (app/services/symbol_search.py).
+"""
+
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from app.core.config import settings
+
+def migrate_symbol_search():
+    """Crée l'extension pg_trgm et les index trigrammes de symbol_metadata"""
+
+    engine = create_engine(settings.database_url)
+
+    with engine.connect() as conn:
+        trans = conn.begin()
+
+        try:
+            print("🔧 Activation de l'extension pg_trgm...")
+            conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm;"))
+
+            print("🔍 Création des index trigrammes...")
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_symbol_metadata_company_name_trgm
+                ON public.symbol_metadata USING gin (company_name gin_trgm_ops);
+            """))
+            conn.execute(text("""
+                CREATE INDEX IF NOT EXISTS ix_symbol_metadata_symbol_trgm
+                ON public.symbol_metadata USING gin (symbol gin_trgm_ops);
+            """))
+
+            trans.commit()
+            print("✅ Index de recherche des symboles créés avec succès!")
+
+        except Exception as e:
+            trans.rollback()
+            print(f"❌ Erreur lors de la migration: {str(e)}")
+            raise e
+
+if __name__ == "__main__":
+    try:
+        migrate_symbol_search()
+        print("🎉 Migration de la recherche de symboles terminée avec succès!")
+
+    except Exception as e:
+        print(f"💥 Erreur lors de la migration: {str(e)}")
+        sys.exit(1)
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Rafraîchissement du magasin de features (feature_vectors)
+
+À lancer après le calcul des indicateurs : seuls les vecteurs des nouvelles dates (et des
+dernières dates déjà stockées, cf. FEATURE_STORE_OVERLAP_DAYS) sont calculés.
+
+Usage:
+    python scripts/refresh_feature_store.py                    # tous les symboles, incrémental
+    python scripts/refresh_feature_store.py --symbols AAPL MSFT --full
+    python scripts/refresh_feature_store.py --purge-old-versions
+"""
+import os
+import sys
+import time
+import argparse
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.core.database import get_db_session
+from app.services.feature_store import FeatureStore
+
+
+def refresh_feature_store(symbols=None, full: bool = False, purge_old_versions: bool = False) -> dict:
+    """Rafraîchir le magasin de features pour les symboles donnés (tous par défaut)"""
+    with get_db_session() as db:
+        store = FeatureStore(db)
+        summary = store.refresh(symbols, full)
+        if purge_old_versions:
+            summary["purged"] = store.purge_old_versions()
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rafraîchissement du magasin de features")
+    parser.add_argument("--symbols", nargs="*", default=None, help="Symboles rafraîchis (tous si absent)")
+    parser.add_argument("--full", action="store_true", help="Recalculer tout l'historique")
+    parser.add_argument("--purge-old-versions", action="store_true",
+                        help="Supprimer les vecteurs des anciennes versions du jeu de features")
+    args = parser.parse_args()
+
+    print("🧮 Rafraîchissement du magasin de features...")
+    start = time.perf_counter()
+
+    try:
+        summary = refresh_feature_store(args.symbols, args.full, args.purge_old_versions)
+    except Exception as e:
+        print(f"❌ Erreur lors du rafraîchissement: {str(e)}")
+        sys.exit(1)
+
+    print(f"✅ {summary['vectors']} vecteurs écrits pour {summary['symbols']} symboles "
+          f"(version {summary['feature_set_version']}) en {time.perf_counter() - start:.1f}s")
+    if summary["errors"]:
+        print(f"⚠️  {summary['errors']} symboles en erreur")
+    if "purged" in summary:
+        print(f"🧹 {summary['purged']} vecteurs d'anciennes versions supprimés")
+
+
+if __name__ == "__main__":
+    main()
@@ -78,7 +78,7 @@ def calculate_sentiment_indicators_for_symbol(symbol: str, limit_per_symbol: int
         df = pd.read_sql(query, conn, params=[symbol, limit_per_symbol])
         
         if df.empty:
-            return symbol, 0, f"Aucune donnée de sentiment trouvée"
+            return symbol, 0, "Aucune donnée de sentiment trouvée"
         
         # Trier par date croissante pour les calculs
         df = df.sort_values('date').reset_index(drop=True)
@@ -426,7 +426,7 @@ def main():
     end_time = time.time()
     
     # Résumé final
-    print(f"\n📊 Résumé final:")
+    print("\n📊 Résumé final:")
     print(f"   Symboles traités: {len(symbols)}")
     print(f"   Indicateurs de sentiment calculés: {total_processed}")
     print(f"   Erreurs: {total_errors}")
@@ -434,12 +434,28 @@ def main():
     print(f"   Temps moyen par symbole: {(end_time - start_time) / len(symbols):.2f} secondes")
     
     # Statistiques par symbole
-    print(f"\n📈 Statistiques par symbole:")
+    print("\n📈 Statistiques par symbole:")
     for symbol, count, status in results:
         if count > 0:
             print(f"   ✅ {symbol}: {count} indicateurs de sentiment")
         else:
             print(f"   ❌ {symbol}: {status}")
+    
+    # Vecteurs de features des nouvelles dates (magasin feature_vectors)
+    refresh_feature_store(symbols)
+
+def refresh_feature_store(symbols: list):
+    """Mettre à jour le magasin de features des symboles traités"""
+    from app.core.database import get_db_session
+    from app.services.feature_store import FeatureStore
+    
+    print("\n🧮 Mise à jour du magasin de features...")
+    try:
+        with get_db_session() as db:
+            summary = FeatureStore(db).refresh(symbols)
+        print(f"   ✅ {summary['vectors']} vecteurs écrits (version {summary['feature_set_version']})")
+    except Exception as e:
+        print(f"   ❌ Erreur lors de la mise à jour du magasin de features: {e}")
 
 if __name__ == "__main__":
     main()
@@ -122,9 +122,9 @@ def test_lightgbm_simple():
                         'date': hist.date,
                         'symbol': hist.symbol,
                         'close': float(hist.close),
-                        'sma_5': float(tech.sma_5) if tech.sma_5 else 0,
-                        'rsi_14': float(tech.rsi_14) if tech.rsi_14 else 0,
-                        'sentiment_score_normalized': float(sent.sentiment_score_normalized) if sent.sentiment_score_normalized else 0,
+                        'sma_5': float(tech.sma_5) if tech.sma_5 is not None else 0,
+                        'rsi_14': float(tech.rsi_14) if tech.rsi_14 is not None else 0,
+                        'sentiment_score_normalized': float(sent.sentiment_score_normalized) if sent.sentiment_score_normalized is not None else 0,
                     }
                     data.append(row)
                 
@@ -7,7 +7,7 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.core.database import SessionLocal
-from app.tasks.full_screener_ml_web_tasks import MLWebService
+from app.services.screener_pipeline import ScreenerPipeline
 from app.models.schemas import ScreenerRequest
 from datetime import datetime
 
@@ -18,8 +18,8 @@ def test_detailed_logs():
     db = SessionLocal()
     try:
         # Créer une instance du service
-        ml_service = MLWebService()
-        print(f"✅ MLWebService créé: {type(ml_service)}")
+        ml_service = ScreenerPipeline()
+        print(f"✅ ScreenerPipeline créé: {type(ml_service)}")
         
         # Créer une requête de test
         request = ScreenerRequest(
@@ -7,7 +7,7 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.core.database import SessionLocal
-from app.tasks.full_screener_ml_web_tasks import MLWebService
+from app.services.screener_pipeline import ScreenerPipeline
 
 def test_get_active_symbols():
     """Tester la méthode get_active_symbols"""
@@ -15,7 +15,7 @@ def test_get_active_symbols():
     
     db = SessionLocal()
     try:
-        ml_service = MLWebService()
+        ml_service = ScreenerPipeline()
         
         # Test sans limite
         print("🔧 Test sans limite...")
@@ -7,7 +7,7 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.core.database import SessionLocal
-from app.tasks.full_screener_ml_web_tasks import run_full_screener_ml_web
+from app.tasks.screener_tasks import run_screener_pipeline
 from app.models.schemas import ScreenerRequest
 from datetime import datetime
 
@@ -27,7 +27,7 @@ def test_screener_directly():
     try:
         # Appeler directement la fonction (sans Celery)
         print("🚀 Lancement du screener ML...")
-        result = run_full_screener_ml_web(request_dict, "test_user", max_symbols=3)
+        result = run_screener_pipeline(request_dict, "test_user", max_symbols=3)
         
         print("🎉 Screener terminé !")
         print(f"📊 Résultat: {result}")
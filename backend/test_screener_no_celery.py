@@ -7,7 +7,7 @@ import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 from app.core.database import SessionLocal
-from app.tasks.full_screener_ml_web_tasks import MLWebService
+from app.services.screener_pipeline import ScreenerPipeline
 from app.models.schemas import ScreenerRequest
 from datetime import datetime, date
 
@@ -27,8 +27,8 @@ def test_screener_without_celery():
         print(f"✅ Requête créée: {request}")
         
         # Créer le service ML
-        ml_service = MLWebService()
-        print("✅ MLWebService créé")
+        ml_service = ScreenerPipeline()
+        print("✅ ScreenerPipeline créé")
         
         # Récupérer les symboles (limité à 3 pour le test)
         symbols = ml_service.get_active_symbols(db, limit=3)
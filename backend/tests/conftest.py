@@ -0,0 +1,37 @@
+"""
+Fixtures communes des tests unitaires
+
+Les tests n'utilisent ni PostgreSQL ni Redis : les tables nécessaires sont créées dans une base
+SQLite en mémoire, avec un schéma "public" attaché pour les modèles déclarés dans ce schéma.
+"""
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.models.database import (
+    MLModels, ModelArtifacts, ScreenerResult, ScreenerRun, SymbolMetadata, TargetParameters
+)
+
+# Tables sans type propre à PostgreSQL, utilisables avec SQLite
+SQLITE_TABLES = [SymbolMetadata, TargetParameters, MLModels, ModelArtifacts, ScreenerRun, ScreenerResult]
+
+
+@pytest.fixture
+def db_session():
+    """Session SQLite en mémoire avec les tables de SQLITE_TABLES"""
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+
+    @event.listens_for(engine, "connect")
+    def attach_public_schema(dbapi_connection, connection_record):
+        dbapi_connection.execute("ATTACH DATABASE ':memory:' AS public")
+
+    for model in SQLITE_TABLES:
+        model.__table__.create(engine)
+
+    session = sessionmaker(bind=engine, autoflush=False)()
+    try:
+        yield session
+    finally:
+        session.close()
+        engine.dispose()
@@ -0,0 +1,69 @@
+"""
+Validation des requêtes groupées POST /data/batch
+"""
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy.dialects import postgresql
+
+from app.api.endpoints.data import build_batch_query, get_batch_series
+from app.core.config import settings
+from app.core.serialization import raw_columns
+from app.models.database import TechnicalIndicators
+from app.models.schemas import BatchSeriesRequest
+
+
+def test_defaults():
+    request = BatchSeriesRequest(symbols=["AAPL"])
+
+    assert request.dataset == "historical"
+    assert request.layout == "rows"
+    assert request.limit_per_symbol == 250
+    assert request.columns is None
+
+
+@pytest.mark.parametrize("payload", [
+    {"symbols": []},
+    {"symbols": ["AAPL"], "dataset": "fundamentals"},
+    {"symbols": ["AAPL"], "layout": "arrow"},
+    {"symbols": ["AAPL"], "limit_per_symbol": 0},
+    {"symbols": ["AAPL"], "limit_per_symbol": 2001},
+    {"symbols": ["AAPL"], "start_date": "hier"},
+])
+def test_invalid_payloads_are_rejected(payload):
+    with pytest.raises(ValidationError):
+        BatchSeriesRequest(**payload)
+
+
+def test_too_many_symbols_is_a_bad_request():
+    # Symboles dédoublonnés (casse ignorée) avant la comparaison au maximum
+    symbols = [f"S{i}" for i in range(settings.api_batch_max_symbols)]
+    request = BatchSeriesRequest(symbols=symbols + [symbol.lower() for symbol in symbols] + ["EXTRA"])
+
+    with pytest.raises(HTTPException) as error:
+        get_batch_series(request, db=None)
+
+    assert error.value.status_code == 400
+    assert str(settings.api_batch_max_symbols + 1) in error.value.detail
+
+
+def test_unknown_columns_are_a_bad_request():
+    request = BatchSeriesRequest(symbols=["AAPL"], dataset="technical", columns=["rsi_14", "close", "foo"])
+
+    with pytest.raises(HTTPException) as error:
+        get_batch_series(request, db=None)
+
+    assert error.value.status_code == 400
+    assert error.value.detail == "Colonnes inconnues pour technical: close, foo"
+
+
+def test_batch_query_limits_rows_per_symbol():
+    columns = [column for column in raw_columns(TechnicalIndicators) if column.name in ("symbol", "date", "rsi_14")]
+    query = build_batch_query(TechnicalIndicators, ["AAPL", "MSFT"], None, None, columns, 5)
+    compiled = query.compile(dialect=postgresql.dialect())
+    sql = str(compiled)
+
+    assert "ANY" in sql
+    assert "row_number() OVER (PARTITION BY public.technical_indicators.symbol" in sql
+    assert compiled.params["symbols"] == ["AAPL", "MSFT"]
+    assert compiled.params["row_number_1"] == 5
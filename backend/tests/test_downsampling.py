@@ -0,0 +1,113 @@
+"""
+Décimation LTTB et agrégation des séries pour les graphiques
+"""
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import orjson
+import pytest
+from fastapi import Response
+from sqlalchemy import create_engine, text
+
+from app.api.endpoints.data import series_response
+from app.services.downsampling import (
+    build_resampled_combined_query, build_resampled_ohlcv_query, downsample_rows, lttb_indices
+)
+
+
+def test_short_series_are_kept_whole():
+    assert lttb_indices([1.0, 2.0, 3.0], 10) == [0, 1, 2]
+    assert lttb_indices([1.0, 2.0, 3.0, 4.0], 2) == [0, 1, 2, 3]
+
+
+@pytest.mark.parametrize("n, threshold", [(10, 3), (100, 10), (1000, 97), (250, 249)])
+def test_one_point_per_bucket_with_both_ends(n, threshold):
+    indices = lttb_indices([float(i % 7) for i in range(n)], threshold)
+
+    assert len(indices) == threshold
+    assert indices[0] == 0 and indices[-1] == n - 1
+    assert indices == sorted(set(indices))
+
+    # Chaque point intérieur vient de son propre seau
+    bucket_size = (n - 2) / (threshold - 2)
+    for i, index in enumerate(indices[1:-1]):
+        assert int(i * bucket_size) + 1 <= index < int((i + 1) * bucket_size) + 1
+
+
+def test_spikes_are_preserved():
+    values = [0.0] * 200
+    values[57], values[143] = 50.0, -40.0
+
+    indices = lttb_indices(values, 20)
+
+    assert 57 in indices and 143 in indices
+
+
+def test_missing_values_do_not_break_the_selection():
+    values = [float(i) if i % 5 else None for i in range(50)]
+
+    assert len(lttb_indices(values, 10)) == 10
+
+
+def test_downsample_rows_keeps_route_order():
+    # Lignes des routes : de la plus récente à la plus ancienne
+    start = date(2024, 1, 1)
+    rows = [SimpleNamespace(date=start - timedelta(days=i), close=(i * 37) % 11) for i in range(120)]
+
+    kept = downsample_rows(rows, 15, lambda row: row.close)
+
+    assert len(kept) == 15
+    assert kept[0] is rows[0] and kept[-1] is rows[-1]
+    assert [row.date for row in kept] == sorted((row.date for row in kept), reverse=True)
+
+    # Mêmes lignes que LTTB appliqué à la série chronologique
+    chronological = list(reversed(rows))
+    expected = [chronological[i] for i in lttb_indices([row.close for row in chronological], 15)]
+    assert kept == list(reversed(expected))
+
+
+def test_downsample_rows_without_max_points():
+    rows = [SimpleNamespace(close=float(i)) for i in range(5)]
+
+    assert downsample_rows(rows, None, lambda row: row.close) == rows
+    assert downsample_rows(rows, 5, lambda row: row.close) == rows
+
+
+def test_resampled_queries_are_parameterized():
+    query, params = build_resampled_ohlcv_query("aapl", "weekly", date(2024, 1, 1), None, 50, 10)
+
+    assert params == {"symbol": "AAPL", "unit": "week", "start_date": date(2024, 1, 1), "limit": 50, "skip": 10}
+    assert "date_trunc(:unit, date)" in str(query)
+
+    query, params = build_resampled_combined_query("aapl", "monthly", None, date(2024, 6, 30), 12, 0)
+
+    assert params["unit"] == "month" and params["end_date"] == date(2024, 6, 30)
+    assert "technical_indicators" in str(query) and "sentiment_indicators" in str(query)
+
+
+def test_resampled_columns_are_json_types():
+    # SUM(bigint) est un numeric (Decimal) : le volume agrégé doit être reconverti comme les prix
+    query, _ = build_resampled_ohlcv_query("AAPL", "weekly", None, None, 50, 0)
+    sql = str(query)
+
+    assert "SUM(volume)::bigint AS volume" in sql
+    for column in ("open", "high", "low", "close", "vwap"):
+        assert f"{column}::float8 AS {column}" in sql
+
+
+def test_resampled_rows_are_encoded_as_json():
+    # Ligne brute avec les types des colonnes converties (float8, bigint)
+    engine = create_engine("sqlite://")
+    with engine.connect() as connection:
+        rows = connection.execute(text(
+            "SELECT '2024-01-01' AS date, 'AAPL' AS symbol, 1.5 AS open, 2.0 AS high, 1.0 AS low, "
+            "1.75 AS close, 12000000000 AS volume, NULL AS vwap"
+        )).all()
+
+    result = series_response(Response(), list(rows[0]._fields), rows, '"etag"', "AAPL", "absent")
+
+    assert result.headers["etag"] == '"etag"'
+    assert orjson.loads(result.body) == [{
+        "date": "2024-01-01", "symbol": "AAPL", "open": 1.5, "high": 2.0, "low": 1.0,
+        "close": 1.75, "volume": 12000000000, "vwap": None,
+    }]
@@ -0,0 +1,106 @@
+"""
+Labels de plusieurs paramètres cibles (LabelMatrix) comparés aux labels calculés ligne par ligne
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services.feature_registry import BASE_FEATURE_COLUMNS
+from app.services.label_engine import LABEL_COLUMNS, LabelMatrix, forward_closes, target_price_factor
+
+TARGETS = [(5.0, 10), (2.5, 10), (10.0, 30), (1.0, 1)]
+
+
+def per_row_target_price(current_price, target_return_percentage, time_horizon_days):
+    """Ancien MLService.calculate_target_price"""
+    current_price = float(current_price)
+    target_return_percentage = float(target_return_percentage)
+    time_horizon_days = int(time_horizon_days)
+    daily_return = (1 + target_return_percentage / 100) ** (1 / time_horizon_days) - 1
+    return current_price * (1 + daily_return * time_horizon_days)
+
+
+def per_row_labels(df, target_return_percentage, time_horizon_days):
+    """Ancien MLService.create_labels_for_training, à partir de l'historique déjà chargé"""
+    df = df.copy()
+    df['target_price'] = df['close'].apply(
+        lambda x: per_row_target_price(x, target_return_percentage, time_horizon_days)
+    )
+    df['future_close'] = df['close'].shift(-time_horizon_days)
+    df['actual_return'] = (df['future_close'] - df['close']) / df['close'] * 100
+    df['target_achieved'] = (df['actual_return'] >= float(target_return_percentage)).astype(int)
+    df['target_return'] = df['actual_return']
+
+    for col in BASE_FEATURE_COLUMNS:
+        if col in df.columns:
+            median_val = df[col].median() if not df[col].isna().all() else 0
+            df[col] = df[col].fillna(median_val)
+
+    critical_columns = ['close', 'volume', 'target_price', 'future_close', 'actual_return']
+    return df.dropna(subset=critical_columns)
+
+
+def matrix_labels(df, targets):
+    """Nouveau chemin (MLService.create_labels_for_targets) : une LabelMatrix pour toutes les cibles"""
+    labels = LabelMatrix(df['close'].to_numpy(), targets)
+    df = df.copy()
+    for col in BASE_FEATURE_COLUMNS:
+        if col in df.columns:
+            median_val = df[col].median() if not df[col].isna().all() else 0
+            df[col] = df[col].fillna(median_val)
+    return {target: labels.label_frame(df, *target) for target in targets}
+
+
+@pytest.fixture
+def history():
+    rng = np.random.default_rng(7)
+    n = 400
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n)))
+    df = pd.DataFrame({
+        'date': pd.date_range('2022-01-03', periods=n, freq='B').date,
+        'close': close,
+        'volume': rng.integers(1_000, 50_000, n).astype(float),
+        'rsi_14': rng.uniform(0, 100, n),
+    })
+    df.loc[rng.random(n) < 0.03, 'close'] = np.nan
+    df.loc[rng.random(n) < 0.05, 'volume'] = np.nan
+    df.loc[rng.random(n) < 0.10, 'rsi_14'] = np.nan
+    return df
+
+
+def test_target_price_factor_matches_per_row_price():
+    for target_return, horizon in TARGETS:
+        assert 123.4 * target_price_factor(target_return, horizon) == pytest.approx(
+            per_row_target_price(123.4, target_return, horizon)
+        )
+
+
+def test_forward_closes_shift_the_series():
+    future = forward_closes(np.array([1.0, 2.0, 3.0]), [1, 3])
+
+    np.testing.assert_array_equal(future[1], [2.0, 3.0, np.nan])
+    assert np.isnan(future[3]).all()
+
+
+def test_label_frames_match_per_row_labels(history):
+    labeled = matrix_labels(history, TARGETS)
+
+    for target in TARGETS:
+        expected = per_row_labels(history, *target)
+        result = labeled[target]
+
+        assert list(result.index) == list(expected.index)
+        assert result['target_achieved'].dtype == expected['target_achieved'].dtype
+        pd.testing.assert_frame_equal(result[expected.columns], expected, check_exact=False, rtol=1e-12)
+
+
+def test_label_matrix_columns(history):
+    labels = LabelMatrix(history['close'].to_numpy(), TARGETS)
+    frame = labels.to_frame(history.index)
+
+    assert list(frame.columns) == [
+        "target_achieved_5_10d", "target_achieved_2.5_10d", "target_achieved_10_30d", "target_achieved_1_1d"
+    ]
+    # Pas de label sans clôture future
+    assert frame["target_achieved_10_30d"].iloc[-30:].isna().all()
+    assert set(LABEL_COLUMNS) <= set(labels.label_frame(history, 5.0, 10).columns)
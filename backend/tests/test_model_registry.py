@@ -0,0 +1,121 @@
+"""
+Registre des modèles : versions, fichiers indexés par contenu et rétention
+"""
+import os
+import re
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from app.models.database import MLModels, ModelArtifacts
+from app.services import model_registry
+from app.services.model_registry import ModelRegistry, artifact_paths
+
+
+@pytest.fixture
+def locks(db_session):
+    """Fonctions PostgreSQL utilisées par next_version, définies dans SQLite ; retourne les verrous pris"""
+    taken = []
+    connection = db_session.connection().connection.dbapi_connection
+    connection.create_function("hashtext", 1, lambda name: hash(name) & 0x7FFFFFFF)
+    connection.create_function("pg_advisory_xact_lock", 1, taken.append)
+
+    def substring(value, pattern):
+        match = re.search(pattern, value or "")
+        return match.group(1) if match else None
+
+    connection.create_function("substring", 2, substring)
+    return taken
+
+
+@pytest.fixture
+def registry(db_session, tmp_path, monkeypatch):
+    monkeypatch.setattr(model_registry, "_table_exists", True)
+    return ModelRegistry(db_session, str(tmp_path))
+
+
+@pytest.fixture(scope="module")
+def model():
+    X = np.random.default_rng(0).normal(size=(200, 4))
+    return RandomForestClassifier(n_estimators=5, random_state=0).fit(X, (X[:, 0] > 0).astype(int))
+
+
+def add_model(db, name, version, model_path=None, is_active=False):
+    ml_model = MLModels(model_name=name, model_type="classification", model_version=version, symbol="AAPL",
+                        model_path=model_path, is_active=is_active)
+    db.add(ml_model)
+    db.commit()
+    return ml_model
+
+
+def register_versions(db, registry, model, count, active_version=None):
+    """Enregistrer count versions du même modèle (v1...) ; seule active_version est active"""
+    versions = []
+    for _ in range(count):
+        version, path, artifacts = registry.save("clf_AAPL", model, StandardScaler().fit(np.eye(4)), flat=False)
+        ml_model = MLModels(model_name="clf_AAPL", model_type="classification", model_version=version,
+                            symbol="AAPL", model_path=path, is_active=version == active_version)
+        registry.register(ml_model, artifacts)
+        db.commit()
+        versions.append(ml_model)
+    return versions
+
+
+def test_next_version(db_session, registry, locks):
+    assert registry.next_version("clf_AAPL") == "v1"
+
+    add_model(db_session, "clf_AAPL", "v1")
+    add_model(db_session, "clf_AAPL", "v3")
+    add_model(db_session, "clf_AAPL", "v1.0")
+    add_model(db_session, "clf_MSFT", "v9")
+
+    assert registry.next_version("clf_AAPL") == "v4"
+    assert registry.next_version("clf_MSFT") == "v10"
+    assert registry.next_version("reg_AAPL") == "v1"
+    # Verrou consultatif pris pour chaque nom
+    assert len(locks) == 4 and locks[0] == locks[1] != locks[2]
+
+
+def test_identical_files_are_hard_linked(db_session, registry, locks, model):
+    first, second = register_versions(db_session, registry, model, 2)
+
+    assert first.model_version == "v1" and second.model_version == "v2"
+    assert first.model_path != second.model_path
+    assert os.path.samefile(first.model_path, second.model_path)
+    assert os.stat(second.model_path).st_nlink == 2
+    assert db_session.query(ModelArtifacts).count() == 4
+    assert not [name for name in os.listdir(registry.models_path) if name.endswith((".tmp", ".link"))]
+
+
+def test_prune_keeps_recent_and_active_versions(db_session, registry, locks, model):
+    versions = register_versions(db_session, registry, model, 5, active_version="v2")
+    stray = os.path.join(registry.models_path, "old_v1.joblib")
+    with open(stray, "w") as f:
+        f.write("x")
+    os.utime(stray, (0, 0))
+
+    simulation = registry.prune(keep_versions=2, retention_days=-1, grace_hours=1, dry_run=True)
+    assert simulation["retired_models"] == [versions[0].id, versions[2].id]
+    assert os.path.exists(stray) and os.path.exists(versions[0].model_path)
+
+    paths = {ml_model.model_version: artifact_paths(ml_model.model_path)["model"] for ml_model in versions}
+    result = registry.prune(keep_versions=2, retention_days=-1, grace_hours=1)
+
+    assert result["retired_models"] == [versions[0].id, versions[2].id]
+    assert result["orphaned_files"] == ["old_v1.joblib"]
+    assert not os.path.exists(stray)
+    assert [os.path.exists(paths[v]) for v in ("v1", "v2", "v3", "v4", "v5")] == [False, True, False, True, True]
+
+    # Version active conservée avec ses fichiers ; versions retirées désactivées, sans fichiers
+    states = {m.model_version: (m.is_active, m.model_path is not None) for m in db_session.query(MLModels)}
+    assert states == {"v1": (False, False), "v2": (True, True), "v3": (False, False),
+                      "v4": (False, True), "v5": (False, True)}
+    assert db_session.query(ModelArtifacts).count() == 6
+
+
+def test_prune_respects_retention_days(db_session, registry, locks, model):
+    register_versions(db_session, registry, model, 4)
+
+    assert registry.prune(keep_versions=1, retention_days=30, grace_hours=1)["retired_models"] == []
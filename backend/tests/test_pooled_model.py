@@ -0,0 +1,52 @@
+"""
+Panel d'entraînement du modèle poolé rempli lot par lot
+"""
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.services.feature_registry import MODEL_FEATURE_COLUMNS
+from app.services.pooled_model import CATEGORICAL_FEATURES, PooledModelService
+
+N_FEATURES = len(MODEL_FEATURE_COLUMNS) + len(CATEGORICAL_FEATURES)
+
+
+def make_chunks(sizes):
+    rng = np.random.default_rng(0)
+    return [(
+        rng.normal(size=(size, N_FEATURES)).astype(np.float32),
+        rng.integers(0, 2, size).astype(np.int8),
+        np.datetime64("2024-01-01", "ns") + np.arange(size).astype("timedelta64[D]"),
+    ) for size in sizes]
+
+
+@pytest.fixture
+def service(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "ml_models_path", str(tmp_path))
+    return PooledModelService(db=None)
+
+
+@pytest.mark.parametrize("history_rows", [100, 40, 0])
+def test_panel_matches_stacked_chunks(service, monkeypatch, history_rows):
+    # 100 lignes d'historique : panel rempli sans copie ; moins : tableaux agrandis
+    chunks = make_chunks([30, 0, 45])
+    monkeypatch.setattr(service, "count_history_rows", lambda symbols: history_rows)
+    monkeypatch.setattr(service, "iter_training_chunks", lambda symbols, target_param: iter(chunks))
+
+    X, y, dates = service.build_training_panel(["AAPL", "MSFT"], target_param=None)
+
+    np.testing.assert_array_equal(X, np.vstack([chunk[0] for chunk in chunks]))
+    np.testing.assert_array_equal(y, np.concatenate([chunk[1] for chunk in chunks]))
+    np.testing.assert_array_equal(dates, np.concatenate([chunk[2] for chunk in chunks]))
+    assert X.dtype == np.float32 and y.dtype == np.int8
+    if history_rows >= 75:
+        assert X.base is not None and X.base.shape == (history_rows, N_FEATURES)
+
+
+def test_empty_panel(service, monkeypatch):
+    monkeypatch.setattr(service, "count_history_rows", lambda symbols: 0)
+    monkeypatch.setattr(service, "iter_training_chunks", lambda symbols, target_param: iter([]))
+
+    X, y, dates = service.build_training_panel(["AAPL"], target_param=None)
+
+    assert X.shape == (0, N_FEATURES) and len(y) == 0 and len(dates) == 0
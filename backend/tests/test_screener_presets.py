@@ -0,0 +1,81 @@
+"""
+Préréglages du screener -> paramètres du pipeline, sélection des symboles et run de démonstration
+"""
+from contextlib import contextmanager
+
+import pytest
+
+from app.models.database import ScreenerRun, SymbolMetadata
+from app.models.schemas import ScreenerRequest
+from app.services import screener_pipeline
+from app.services.screener_pipeline import PIPELINE_MODES, POPULAR_SYMBOLS, ScreenerPipeline
+from app.tasks import screener_tasks
+from app.tasks.screener_tasks import SCREENER_PRESETS, launch_screener_preset
+
+
+def add_symbols(db, active, inactive=()):
+    for symbol in active:
+        db.add(SymbolMetadata(symbol=symbol, company_name=f"{symbol} Inc", is_active=True))
+    for symbol in inactive:
+        db.add(SymbolMetadata(symbol=symbol, company_name=f"{symbol} Inc", is_active=False))
+    db.commit()
+
+
+@pytest.mark.parametrize("preset", sorted(SCREENER_PRESETS))
+def test_every_preset_builds_a_pipeline(preset):
+    params = SCREENER_PRESETS[preset]
+    pipeline = ScreenerPipeline(**params)
+
+    assert params["mode"] in PIPELINE_MODES
+    assert pipeline.mode == params["mode"]
+    assert pipeline.max_symbols == params["max_symbols"]
+    assert pipeline.priority_symbols == (params.get("priority_symbols") or [])
+
+
+def test_simple_presets_keep_their_baseline_behaviour():
+    # simple : vrai entraînement et vraies prédictions sur 10 symboles
+    assert SCREENER_PRESETS["simple"] == {"mode": "train", "max_symbols": 10}
+    # full-simple : simulation sur tous les symboles actifs
+    assert SCREENER_PRESETS["full-simple"] == {"mode": "demo", "max_symbols": None}
+    assert SCREENER_PRESETS["demo"]["priority_symbols"] == POPULAR_SYMBOLS
+
+
+def test_launch_preset_applies_overrides(monkeypatch):
+    calls = []
+    monkeypatch.setattr(screener_tasks.run_screener_pipeline, "delay",
+                        lambda *args, **kwargs: calls.append((args, kwargs)))
+
+    request = {"target_return_percentage": 5.0, "time_horizon_days": 10, "risk_tolerance": 0.5}
+    launch_screener_preset("real-limited", request, "user", max_symbols=3, concurrency=None)
+
+    args, kwargs = calls[0]
+    assert args == (request, "user")
+    assert kwargs == {"mode": "train", "max_symbols": 3, "priority_symbols": POPULAR_SYMBOLS}
+
+
+def test_get_active_symbols_drops_inactive_priority_symbols(db_session):
+    add_symbols(db_session, active=["AAPL", "IBM", "MSFT", "ORCL"], inactive=["TWTR"])
+    pipeline = ScreenerPipeline(mode="train", priority_symbols=["TWTR", "MSFT", "AAPL", "MSFT"])
+
+    assert pipeline.get_active_symbols(db_session) == ["MSFT", "AAPL", "IBM", "ORCL"]
+    assert pipeline.get_active_symbols(db_session, limit=3) == ["MSFT", "AAPL", "IBM"]
+
+
+def test_full_simple_covers_all_active_symbols_and_saves_the_run(db_session, monkeypatch):
+    add_symbols(db_session, active=[f"S{i:02d}" for i in range(12)], inactive=["OLD"])
+
+    @contextmanager
+    def session():
+        yield db_session
+
+    monkeypatch.setattr(screener_pipeline, "get_db_session", session)
+    pipeline = ScreenerPipeline(**SCREENER_PRESETS["full-simple"])
+    result = pipeline.run(ScreenerRequest(target_return_percentage=5.0, time_horizon_days=10, risk_tolerance=0.5))
+
+    assert result["status"] == "completed"
+    assert result["total_symbols"] == 12
+    run = db_session.query(ScreenerRun).one()
+    assert run.id == result["screener_run_id"]
+    assert run.status == "completed"
+    assert run.total_symbols == 12
+    assert run.opportunities_found == result["total_opportunities_found"]
@@ -0,0 +1,69 @@
+"""
+Index de recherche des symboles : correspondances et classement
+"""
+import pytest
+
+from app.services.symbol_search import PREFIX_SCAN_FACTOR, SymbolSearchIndex
+
+
+def entry(symbol, company_name, is_active=True):
+    return {"symbol": symbol, "company_name": company_name, "sector": None, "is_active": is_active}
+
+
+@pytest.fixture
+def index():
+    return SymbolSearchIndex([
+        entry("APP", "AppLovin Corp"),
+        entry("AAPL", "Apple Inc."),
+        entry("APPN", "Appian Corp"),
+        entry("APLE", "Apple Hospitality REIT"),
+        entry("PINE", "Pineapple Energy"),
+        entry("MAPL", "Big Apple Holdings"),
+        entry("APPX", "Applied Things", is_active=False),
+        entry("AMZN", "Amazon.com Inc."),
+        entry("AMZX", None),
+    ])
+
+
+def search(index, query, **kwargs):
+    return [(result["symbol"], result["match"]) for result in index.search(query, **kwargs)]
+
+
+def test_ranking_order(index):
+    assert search(index, "app") == [
+        ("APP", "symbol_exact"),
+        ("APPN", "symbol_prefix"),
+        ("AAPL", "company_prefix"),
+        ("APLE", "company_prefix"),
+        ("MAPL", "word_prefix"),
+        ("PINE", "substring"),
+    ]
+
+
+def test_multi_word_queries(index):
+    # Noms approchants en fin de liste
+    assert search(index, "Apple Hosp")[0] == ("APLE", "company_prefix")
+    assert search(index, "apple hold")[0] == ("MAPL", "word_prefix")
+    assert search(index, "amazon.com") == [("AMZN", "company_prefix")]
+
+
+def test_fuzzy_match_and_limit(index):
+    assert search(index, "amazn") == [("AMZN", "fuzzy")]
+    assert search(index, "app", limit=2) == [("APP", "symbol_exact"), ("APPN", "symbol_prefix")]
+
+
+def test_inactive_symbols(index):
+    assert "APPX" not in [symbol for symbol, _ in search(index, "appx")]
+    assert search(index, "appx", active_only=False)[0] == ("APPX", "symbol_exact")
+    assert search(index, "  ") == []
+
+
+def test_common_first_word_does_not_hide_the_company():
+    # Plus de noms commençant par "american" que de candidats examinés, tous triés avant la cible
+    fillers = [entry(f"AA{i:03d}", f"American Aaron Holdings {i:03d}") for i in range(PREFIX_SCAN_FACTOR * 5)]
+    index = SymbolSearchIndex(fillers + [
+        entry("AAL", "American Airlines Group"),
+        entry("FAAL", "First American Airlines Trust"),
+    ])
+
+    assert search(index, "american airlines", limit=2) == [("AAL", "company_prefix"), ("FAAL", "word_prefix")]
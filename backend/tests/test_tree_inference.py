@@ -0,0 +1,127 @@
+"""
+Forêts aplaties (FlatForest) comparées aux prédictions de scikit-learn et de LightGBM
+"""
+import os
+
+import joblib
+import lightgbm as lgb
+import numpy as np
+import pandas as pd
+import pytest
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+
+from app.services.tree_inference import FlatForest, flat_artifact_path, load_flat_artifact, predict_many
+
+
+@pytest.fixture(scope="module")
+def data():
+    """Données sans valeur manquante : scikit-learn 1.3 refuse les NaN dans les forêts"""
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(1500, 12))
+    y = (X[:, 0] + rng.normal(size=len(X)) > 0).astype(int)
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def missing_data(data):
+    """Mêmes données avec 5 % de valeurs manquantes, pour les modèles LightGBM"""
+    X, y = data
+    X = X.copy()
+    X[np.random.default_rng(3).random(X.shape) < 0.05] = np.nan
+    return X, y
+
+
+@pytest.fixture(scope="module")
+def random_forest(data):
+    X, y = data
+    return RandomForestClassifier(n_estimators=40, max_depth=10, random_state=0).fit(X, y)
+
+
+@pytest.fixture(scope="module")
+def lightgbm_binary(missing_data):
+    X, y = missing_data
+    return lgb.LGBMClassifier(n_estimators=60, verbose=-1).fit(X, y)
+
+
+def test_random_forest_classifier(data, random_forest):
+    X, _ = data
+    forest = FlatForest.from_sklearn(random_forest)
+
+    np.testing.assert_allclose(forest.predict_proba(X), random_forest.predict_proba(X), atol=1e-12)
+    np.testing.assert_array_equal(forest.predict(X), random_forest.predict(X))
+
+
+def test_random_forest_regressor(data):
+    X, y = data
+    model = RandomForestRegressor(n_estimators=20, max_depth=8, random_state=0).fit(X, X[:, 1] + y)
+
+    np.testing.assert_allclose(FlatForest.from_sklearn(model).predict(X), model.predict(X), atol=1e-10)
+
+
+def test_lightgbm_binary_matches_booster(missing_data, lightgbm_binary):
+    X, _ = missing_data
+    forest = FlatForest.from_model(lightgbm_binary)
+
+    np.testing.assert_allclose(forest.predict_proba(X), lightgbm_binary.predict_proba(X), atol=1e-10)
+    np.testing.assert_allclose(forest.predict_proba(X)[:, 1], lightgbm_binary.booster_.predict(X), atol=1e-10)
+
+
+def test_lightgbm_multiclass(missing_data):
+    X, _ = missing_data
+    y = np.random.default_rng(1).integers(0, 3, len(X))
+    model = lgb.LGBMClassifier(n_estimators=20, verbose=-1).fit(X, y)
+
+    np.testing.assert_allclose(FlatForest.from_model(model).predict_proba(X), model.predict_proba(X), atol=1e-10)
+
+
+def test_lightgbm_categorical(missing_data):
+    X, _ = missing_data
+    rng = np.random.default_rng(2)
+    X = X.copy()
+    X[:, 3] = rng.integers(0, 20, len(X))
+    X[rng.random(len(X)) < 0.05, 3] = np.nan
+    frame = pd.DataFrame(X, columns=[f"f{i}" for i in range(X.shape[1])])
+    model = lgb.LGBMClassifier(n_estimators=30, verbose=-1, min_data_per_group=5, cat_smooth=1).fit(
+        frame, (np.nan_to_num(X[:, 3]) % 3 == 0).astype(int), categorical_feature=["f3"]
+    )
+
+    np.testing.assert_allclose(FlatForest.from_model(model).predict_proba(X), model.predict_proba(frame), atol=1e-10)
+
+
+def test_lightgbm_regressor(missing_data):
+    X, y = missing_data
+    model = lgb.LGBMRegressor(n_estimators=30, verbose=-1).fit(X, np.nan_to_num(X[:, 2]) + y)
+
+    np.testing.assert_allclose(FlatForest.from_model(model).predict(X), model.predict(X), atol=1e-10)
+
+
+def test_predict_many_evaluates_each_model_on_its_rows(data, missing_data, random_forest, lightgbm_binary):
+    X, _ = data
+    X_missing, _ = missing_data
+    forests = [FlatForest.from_model(random_forest), FlatForest.from_model(lightgbm_binary)]
+
+    results = predict_many(forests, [X[:5], X_missing[10:17]])
+
+    assert [result.shape for result in results] == [(5, 2), (7, 2)]
+    np.testing.assert_allclose(results[0], random_forest.predict_proba(X[:5]), atol=1e-12)
+    np.testing.assert_allclose(results[1], lightgbm_binary.predict_proba(X_missing[10:17]), atol=1e-10)
+
+
+def test_flat_artifact_is_memory_mapped(tmp_path, data, random_forest):
+    X, _ = data
+    model_path = str(tmp_path / "AAPL_v1.joblib")
+    joblib.dump(random_forest, model_path)
+
+    forest = load_flat_artifact(model_path)
+    flat_path = flat_artifact_path(model_path)
+
+    assert flat_path.endswith("AAPL_v1_flat.joblib")
+    arrays = {name: array for name, array in vars(forest).items() if isinstance(array, np.ndarray)}
+    assert {"feature", "threshold", "left", "right", "value", "roots"} <= set(arrays)
+    assert all(isinstance(array, np.memmap) and array.mode == "r" for array in arrays.values())
+    np.testing.assert_allclose(forest.predict_proba(X[:50]), random_forest.predict_proba(X[:50]), atol=1e-12)
+
+    # Fichier réutilisé tant que le modèle n'est pas plus récent
+    written = os.path.getmtime(flat_path)
+    assert isinstance(load_flat_artifact(model_path).value, np.memmap)
+    assert os.path.getmtime(flat_path) == written
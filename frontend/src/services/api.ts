@@ -62,6 +62,14 @@ export interface SymbolMetadata {
   updated_at: string
 }
 
+export interface SymbolSearchResult {
+  symbol: string
+  company_name: string
+  sector?: string
+  is_active: boolean
+  match: 'symbol_exact' | 'symbol_prefix' | 'company_prefix' | 'word_prefix' | 'substring' | 'fuzzy'
+}
+
 export interface SymbolWithMetadata {
   symbol: string
   company_name: string
@@ -672,6 +680,14 @@ export const symbolMetadataAPI = {
     return response.data
   },
 
+  // Recherche instantanée classée (symbole ou nom d'entreprise)
+  typeahead: async (q: string, limit?: number): Promise<SymbolSearchResult[]> => {
+    const response = await apiClient.get('/api/v1/symbol-metadata/search/typeahead', {
+      params: { q, limit }
+    })
+    return response.data
+  },
+
   // Récupérer la liste des secteurs
   getSectors: async (): Promise<string[]> => {
     const response = await apiClient.get('/api/v1/symbol-metadata/sectors/list')